@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+import pendulum
+
+from airflow import DAG
+from airflow.operators.python import PythonOperator
+from bangkok_aqi.alerts import notify_dbt_build_failure
+from bangkok_aqi.dbt_build import run_dbt_quality_checks
+
+
+def run_full_history_dq_checks_task() -> int:
+    return len(run_dbt_quality_checks(mode="full"))
+
+
+# The hourly build only checks the window its latest ingest touched; this daily run
+# re-checks the whole mart history.
+with DAG(
+    dag_id="bangkok_aqi_dq_full_history",
+    description="Run the dbt data-quality tests over the full warehouse history.",
+    start_date=pendulum.datetime(2024, 1, 1, tz="Asia/Bangkok"),
+    schedule="30 3 * * *",
+    catchup=False,
+    max_active_runs=1,
+    tags=["portfolio", "aqi", "dbt", "data-quality"],
+) as dag:
+    run_full_history_dq_checks = PythonOperator(
+        task_id="run_full_history_dq_checks",
+        python_callable=run_full_history_dq_checks_task,
+        on_failure_callback=notify_dbt_build_failure,
+    )
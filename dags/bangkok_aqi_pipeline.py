@@ -1,33 +1,84 @@
 from __future__ import annotations
 
+from typing import Any
+
 import pendulum
 
 from airflow import DAG
 from airflow.exceptions import AirflowFailException
-from airflow.operators.bash import BashOperator
-from airflow.operators.python import PythonOperator
-from bangkok_aqi.alerts import notify_airflow_failure
-from bangkok_aqi.extract import (
-    AQIPayloadValidationError,
-    extract_aqi_to_bronze,
-    extract_weather_to_bronze,
+from airflow.operators.python import PythonOperator, ShortCircuitOperator
+from bangkok_aqi.alerts import notify_airflow_failure, notify_dbt_build_failure
+from bangkok_aqi.change_signal import (
+    extract_with_change_signal,
+    is_scheduled_rebuild,
+    should_rebuild,
 )
+from bangkok_aqi.config import get_settings
+from bangkok_aqi.dbt_build import DBT_LAYER_ORDER, run_dbt_build
+from bangkok_aqi.export import export_mart_parquet
+from bangkok_aqi.extract import AQIPayloadValidationError
+from bangkok_aqi.snapshot import publish_dashboard_snapshot
+
+EXTRACT_TASK_IDS = ("extract_raw_aqi_json", "extract_raw_weather_json")
+BUILT_SIGNALS_KEY = "built_signals"
+
+
+def extract_with_previous_signal(ti: Any, dataset: str, data_interval_end: Any) -> dict[str, Any]:
+    # The previous run's signal supplies the content hash this payload is compared with, and
+    # a matching body is not landed again. Scheduled rebuild hours land it anyway, so the
+    # mart's last_ingested_at_utc keeps moving while upstream is quiet.
+    return extract_with_change_signal(
+        dataset,
+        ti.xcom_pull(task_ids=ti.task_id, include_prior_dates=True),
+        land_unchanged=is_scheduled_rebuild(data_interval_end, get_settings().forced_rebuild_hours),
+    )
 
 
-def extract_raw_aqi_json_task() -> str:
+def extract_raw_aqi_json_task(ti: Any, data_interval_end: Any) -> dict[str, Any]:
     try:
-        return extract_aqi_to_bronze()
+        return extract_with_previous_signal(ti, "aqi", data_interval_end)
     except AQIPayloadValidationError as exc:
         raise AirflowFailException(f"AQI extract validation failed: {exc}") from exc
 
 
-def extract_raw_weather_json_task() -> str:
+def extract_raw_weather_json_task(ti: Any, data_interval_end: Any) -> dict[str, Any]:
     try:
-        return extract_weather_to_bronze()
+        return extract_with_previous_signal(ti, "weather", data_interval_end)
     except AQIPayloadValidationError as exc:
         raise AirflowFailException(f"Weather extract validation failed: {exc}") from exc
 
 
+def detect_bronze_changes_task(ti: Any, data_interval_end: Any, dag_run: Any) -> bool:
+    return should_rebuild(
+        ti.xcom_pull(task_ids=list(EXTRACT_TASK_IDS)),
+        data_interval_end,
+        get_settings().forced_rebuild_hours,
+        forced=getattr(dag_run, "run_type", None) == "manual",
+        # A failed or skipped build pushes nothing, so this is the last successful build's.
+        built_signals=ti.xcom_pull(
+            task_ids="build_dbt_models", key=BUILT_SIGNALS_KEY, include_prior_dates=True
+        ),
+    )
+
+
+def build_dbt_models_task(ti: Any) -> dict[str, int]:
+    signals = ti.xcom_pull(task_ids=list(EXTRACT_TASK_IDS))
+    node_results = run_dbt_build()
+    ti.xcom_push(key=BUILT_SIGNALS_KEY, value=signals)
+    return {
+        layer: sum(1 for node_result in node_results if node_result.layer == layer)
+        for layer in DBT_LAYER_ORDER
+    }
+
+
+def publish_dashboard_snapshot_task() -> int:
+    return len(publish_dashboard_snapshot().hourly)
+
+
+def export_gold_parquet_task() -> int:
+    return len(export_mart_parquet().written_partitions)
+
+
 with DAG(
     dag_id="bangkok_aqi_pipeline",
     description="Extract Bangkok AQI data and build the DuckDB warehouse with dbt.",
@@ -53,31 +104,34 @@ with DAG(
         on_failure_callback=notify_airflow_failure,
     )
 
-    build_silver_models = BashOperator(
-        task_id="build_silver_models",
-        bash_command=(
-            "set -euo pipefail && "
-            "cd /opt/airflow/project && "
-            "dbt build --project-dir dbt --profiles-dir dbt "
-            "--select "
-            "base_aqi_hourly_exploded "
-            "base_weather_hourly_exploded "
-            "stg_aqi_hourly "
-            "stg_weather_hourly"
-        ),
+    # Skips the build, snapshot and export when neither extract changed, except on every
+    # BANGKOK_AQI_FORCED_REBUILD_HOURS-th hour and on manual runs.
+    detect_bronze_changes = ShortCircuitOperator(
+        task_id="detect_bronze_changes",
+        python_callable=detect_bronze_changes_task,
         on_failure_callback=notify_airflow_failure,
     )
 
-    build_gold_mart = BashOperator(
-        task_id="build_gold_mart",
-        bash_command=(
-            "set -euo pipefail && "
-            "cd /opt/airflow/project && "
-            "dbt build --project-dir dbt --profiles-dir dbt --select fct_aqi_hourly"
-        ),
+    build_dbt_models = PythonOperator(
+        task_id="build_dbt_models",
+        python_callable=build_dbt_models_task,
+        on_failure_callback=notify_dbt_build_failure,
+    )
+
+    publish_dashboard_snapshot_view = PythonOperator(
+        task_id="publish_dashboard_snapshot",
+        python_callable=publish_dashboard_snapshot_task,
+        on_failure_callback=notify_airflow_failure,
+    )
+
+    export_gold_parquet = PythonOperator(
+        task_id="export_gold_parquet",
+        python_callable=export_gold_parquet_task,
         on_failure_callback=notify_airflow_failure,
     )
 
-    extract_raw_aqi_json >> build_silver_models
-    extract_raw_weather_json >> build_silver_models
-    build_silver_models >> build_gold_mart
+    extract_raw_aqi_json >> detect_bronze_changes
+    extract_raw_weather_json >> detect_bronze_changes
+    detect_bronze_changes >> build_dbt_models
+    build_dbt_models >> publish_dashboard_snapshot_view
+    build_dbt_models >> export_gold_parquet
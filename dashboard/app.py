@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from datetime import date
 from pathlib import Path
 
 import altair as alt
@@ -7,37 +8,32 @@ import pandas as pd
 import pydeck as pdk
 import streamlit as st
 
-from bangkok_aqi.config import get_settings
+from bangkok_aqi.config import DEFAULT_SNAPSHOT_WINDOW_DAYS, get_settings
 from bangkok_aqi.dashboard import (
     build_daily_summary,
+    build_hero_summary,
     build_map_frame,
     build_metric_options,
     build_status_rows,
     classify_aqi,
+    default_date_window,
     is_data_stale,
+    load_forecast_skill_curve,
     load_hourly_aqi,
+    load_mart_date_bounds,
     melt_metrics,
     warehouse_has_mart,
 )
+from bangkok_aqi.snapshot import SNAPSHOT_HEADER_NAME, DashboardSnapshot, load_dashboard_snapshot
 
 st.set_page_config(page_title="Bangkok AQI Dashboard", layout="wide")
 
 
-def has_metric_data(frame: pd.DataFrame, column: str) -> bool:
-    return column in frame.columns and not frame[column].isna().all()
-
-
-def format_optional_metric(
-    frame: pd.DataFrame,
-    row: pd.Series,
-    column: str,
-    fmt: str,
-    suffix: str = "",
-) -> str:
-    if not has_metric_data(frame, column) or pd.isna(row[column]):
+def format_optional_metric(value: float | None, fmt: str, suffix: str = "") -> str:
+    if value is None or pd.isna(value):
         return "N/A"
 
-    return f"{row[column]:{fmt}}{suffix}"
+    return f"{value:{fmt}}{suffix}"
 
 st.markdown(
     """
@@ -135,12 +131,51 @@ st.markdown(
 
 settings = get_settings()
 duckdb_path = settings.duckdb_path
+snapshot_header_path = settings.snapshot_dir / SNAPSHOT_HEADER_NAME
 
 
 @st.cache_data(ttl=300, show_spinner=False)
-def get_hourly_data(path: str, warehouse_mtime_ns: int) -> pd.DataFrame:
+def get_hourly_data(
+    path: str,
+    warehouse_mtime_ns: int,
+    start_date: date,
+    end_date: date,
+) -> pd.DataFrame:
     del warehouse_mtime_ns
-    return load_hourly_aqi(Path(path))
+    return load_hourly_aqi(Path(path), compact=True, start_date=start_date, end_date=end_date)
+
+
+@st.cache_data(ttl=300, show_spinner=False)
+def get_forecast_skill_curve(path: str, warehouse_mtime_ns: int) -> pd.DataFrame:
+    del warehouse_mtime_ns
+    return load_forecast_skill_curve(Path(path))
+
+
+@st.cache_data(ttl=300, show_spinner=False)
+def get_snapshot(snapshot_dir: str, header_mtime_ns: int) -> DashboardSnapshot | None:
+    del header_mtime_ns
+    return load_dashboard_snapshot(Path(snapshot_dir))
+
+
+def stop_without_warehouse() -> None:
+    if not duckdb_path.exists():
+        st.error(
+            (
+                f"Warehouse file not found at `{duckdb_path}`. "
+                "Run `bangkok-aqi extract` and "
+                "`dbt build --project-dir dbt --profiles-dir dbt` first."
+            )
+        )
+        st.stop()
+
+    if not warehouse_has_mart(duckdb_path):
+        st.error(
+            (
+                "DuckDB is present, but the `fct_aqi_hourly` mart is missing. "
+                "Run `dbt build --project-dir dbt --profiles-dir dbt` first."
+            )
+        )
+        st.stop()
 
 
 st.sidebar.title("Bangkok AQI")
@@ -150,35 +185,31 @@ if st.sidebar.button("Refresh warehouse data", use_container_width=True):
     st.cache_data.clear()
     st.rerun()
 
-if not duckdb_path.exists():
-    st.error(
-        (
-            f"Warehouse file not found at `{duckdb_path}`. "
-            "Run `bangkok-aqi extract` and `dbt build --project-dir dbt --profiles-dir dbt` first."
-        )
-    )
-    st.stop()
-
-if not warehouse_has_mart(duckdb_path):
-    st.error(
-        (
-            "DuckDB is present, but the `fct_aqi_hourly` mart is missing. "
-            "Run `dbt build --project-dir dbt --profiles-dir dbt` first."
-        )
-    )
-    st.stop()
-
-hourly = get_hourly_data(str(duckdb_path), duckdb_path.stat().st_mtime_ns)
+# The default view renders from the snapshot the DAG publishes after each build, so first
+# paint never opens DuckDB, skill curve included; other date windows are queried from the
+# warehouse on demand.
+snapshot = (
+    get_snapshot(str(settings.snapshot_dir), snapshot_header_path.stat().st_mtime_ns)
+    if snapshot_header_path.exists()
+    else None
+)
 
-if hourly.empty:
-    st.warning("The mart exists but contains no rows yet.")
-    st.stop()
+if snapshot is None:
+    stop_without_warehouse()
+    mart_bounds = load_mart_date_bounds(duckdb_path)
+    if mart_bounds is None:
+        st.warning("The mart exists but contains no rows yet.")
+        st.stop()
+    min_date, max_date, _ = mart_bounds
+    # Same window the snapshot covers, so first paint shows the same range either way.
+    default_window = default_date_window(min_date, max_date, DEFAULT_SNAPSHOT_WINDOW_DAYS)
+else:
+    min_date, max_date = snapshot.mart_start_date, snapshot.mart_end_date
+    default_window = (snapshot.window_start_date, snapshot.window_end_date)
 
-min_date = hourly["forecast_date_local"].min()
-max_date = hourly["forecast_date_local"].max()
 selected_dates = st.sidebar.date_input(
     "Forecast window",
-    value=(min_date, max_date),
+    value=default_window,
     min_value=min_date,
     max_value=max_date,
 )
@@ -188,7 +219,17 @@ if isinstance(selected_dates, (tuple, list)):
 else:
     start_date = end_date = selected_dates
 
-metric_options = build_metric_options(hourly)
+use_snapshot = snapshot is not None and (start_date, end_date) == default_window
+if use_snapshot:
+    filtered = snapshot.hourly
+    metric_options = snapshot.metric_options
+else:
+    stop_without_warehouse()
+    filtered = get_hourly_data(
+        str(duckdb_path), duckdb_path.stat().st_mtime_ns, start_date, end_date
+    )
+    metric_options = build_metric_options(filtered)
+
 selected_metric_keys = st.sidebar.multiselect(
     "Chart series",
     options=list(metric_options),
@@ -196,11 +237,6 @@ selected_metric_keys = st.sidebar.multiselect(
     format_func=metric_options.get,
 )
 
-filtered = hourly[
-    (hourly["forecast_date_local"] >= start_date)
-    & (hourly["forecast_date_local"] <= end_date)
-].copy()
-
 if filtered.empty:
     st.warning("No AQI records match the selected date range.")
     st.stop()
@@ -208,13 +244,11 @@ if filtered.empty:
 if not selected_metric_keys:
     selected_metric_keys = ["us_aqi"]
 
-next_forecast = filtered.iloc[0]
-peak_forecast = filtered.loc[filtered["us_aqi"].idxmax()]
-aqi_band = classify_aqi(next_forecast["us_aqi"])
-comparison_row = filtered.iloc[1] if len(filtered) > 1 else filtered.iloc[0]
-aqi_delta = next_forecast["us_aqi"] - comparison_row["us_aqi"]
-next_forecast_time = next_forecast["forecast_timestamp_local"].strftime("%Y-%m-%d %H:%M")
-hero_aqi_value = int(next_forecast["us_aqi"])
+hero = snapshot.hero if use_snapshot else build_hero_summary(filtered)
+aqi_band = classify_aqi(hero["us_aqi"])
+aqi_delta = hero["aqi_delta"] or 0
+next_forecast_time = hero["forecast_time"]
+hero_aqi_value = int(hero["us_aqi"])
 
 st.markdown(
     f"""
@@ -233,23 +267,23 @@ st.markdown(
 
 metric_columns = st.columns(4)
 metric_columns[0].metric("Next forecast AQI", f"{hero_aqi_value}", f"{aqi_delta:+.0f}")
-metric_columns[1].metric("Peak AQI in window", f'{int(peak_forecast["us_aqi"])}')
-metric_columns[2].metric("Average PM2.5", f'{filtered["pm25"].mean():.1f}')
+metric_columns[1].metric("Peak AQI in window", f'{int(hero["peak_aqi"])}')
+metric_columns[2].metric("Average PM2.5", format_optional_metric(hero["avg_pm25"], ".1f"))
 metric_columns[3].metric(
     "Temperature",
-    format_optional_metric(filtered, next_forecast, "temperature_c", ".1f", " C"),
+    format_optional_metric(hero["temperature_c"], ".1f", " C"),
 )
 
 secondary_metric_columns = st.columns(3)
 secondary_metric_columns[0].metric(
     "Relative humidity",
-    format_optional_metric(filtered, next_forecast, "relative_humidity", ".0f", "%"),
+    format_optional_metric(hero["relative_humidity"], ".0f", "%"),
 )
 secondary_metric_columns[1].metric(
     "Wind speed",
-    format_optional_metric(filtered, next_forecast, "wind_speed_kph", ".1f", " km/h"),
+    format_optional_metric(hero["wind_speed_kph"], ".1f", " km/h"),
 )
-latest_ingestion = filtered["last_ingested_at_utc"].max()
+latest_ingestion = pd.Timestamp(hero["last_ingested_at_utc"])
 ingestion_is_stale = is_data_stale(latest_ingestion)
 secondary_metric_columns[2].markdown(
     f"""
@@ -264,7 +298,7 @@ secondary_metric_columns[2].markdown(
     unsafe_allow_html=True,
 )
 
-status_rows = build_status_rows(filtered)
+status_rows = snapshot.status_rows if use_snapshot else build_status_rows(filtered)
 status_columns = st.columns(len(status_rows))
 for column, status in zip(status_columns, status_rows, strict=False):
     column.markdown(
@@ -277,7 +311,7 @@ for column, status in zip(status_columns, status_rows, strict=False):
         unsafe_allow_html=True,
     )
 
-map_data = build_map_frame(filtered)
+map_data = snapshot.map_frame if use_snapshot else build_map_frame(filtered)
 map_latitude = map_data.iloc[0]["latitude"]
 map_longitude = map_data.iloc[0]["longitude"]
 map_tooltip_text = (
@@ -383,7 +417,7 @@ pollutant_chart = (
     .properties(height=320, title="Selected AQI and Particulate Series")
 )
 
-daily_summary = build_daily_summary(filtered)
+daily_summary = snapshot.daily_summary if use_snapshot else build_daily_summary(filtered)
 daily_chart = (
     alt.Chart(daily_summary)
     .mark_bar(cornerRadiusTopLeft=6, cornerRadiusTopRight=6, color="#40594A")
@@ -412,6 +446,30 @@ right_column.altair_chart(pollutant_chart, use_container_width=True)
 
 st.altair_chart(daily_chart, use_container_width=True)
 
+if snapshot is not None:
+    skill_curve = snapshot.skill_curve
+elif duckdb_path.exists():
+    skill_curve = get_forecast_skill_curve(str(duckdb_path), duckdb_path.stat().st_mtime_ns)
+else:
+    skill_curve = pd.DataFrame()
+if not skill_curve.empty:
+    skill_chart = (
+        alt.Chart(skill_curve)
+        .mark_line(point=True, strokeWidth=2.5, color="#1F618D")
+        .encode(
+            x=alt.X("lead_hours:Q", title="Forecast lead time (hours)"),
+            y=alt.Y("us_aqi_mae:Q", title="Mean absolute US AQI error"),
+            tooltip=[
+                alt.Tooltip("lead_hours:Q", title="Lead time (h)"),
+                alt.Tooltip("us_aqi_mae:Q", title="US AQI MAE", format=".1f"),
+                alt.Tooltip("pm25_mae:Q", title="PM2.5 MAE", format=".1f"),
+                alt.Tooltip("revision_count:Q", title="Revisions scored"),
+            ],
+        )
+        .properties(height=280, title="Forecast Accuracy by Lead Time")
+    )
+    st.altair_chart(skill_chart, use_container_width=True)
+
 display_table = filtered[
     [
         "forecast_timestamp_local",
@@ -0,0 +1,5 @@
+{% macro affected_hours_filter() %}
+    {#- dbt rebuilds fct_aqi_hourly in full, so this renders nothing. The native engine
+        renders the model with its own definition to recompute only the forecast hours that
+        new files touched. -#}
+{% endmacro %}
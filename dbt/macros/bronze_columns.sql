@@ -0,0 +1,10 @@
+{#- Generated from bangkok_aqi.schemas by `bangkok-aqi sync-dbt-schemas`. -#}
+{% macro bronze_columns(dataset) %}
+    {%- if dataset == "aqi" -%}
+    {'latitude': 'DOUBLE', 'longitude': 'DOUBLE', 'hourly': 'STRUCT("time" VARCHAR[], "pm2_5" DOUBLE[], "pm10" DOUBLE[], "us_aqi" INTEGER[])', 'delta': 'STRUCT(window_start VARCHAR, window_end VARCHAR)'}
+    {%- elif dataset == "weather" -%}
+    {'latitude': 'DOUBLE', 'longitude': 'DOUBLE', 'hourly': 'STRUCT("time" VARCHAR[], "temperature_2m" DOUBLE[], "relative_humidity_2m" DOUBLE[], "wind_speed_10m" DOUBLE[])', 'delta': 'STRUCT(window_start VARCHAR, window_end VARCHAR)'}
+    {%- else -%}
+    {{ exceptions.raise_compiler_error("Unknown bronze dataset " ~ dataset) }}
+    {%- endif -%}
+{% endmacro %}
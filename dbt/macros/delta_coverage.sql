@@ -0,0 +1,15 @@
+{% macro delta_coverage(relation) %}
+    {#- One row per forecast hour covered by each delta file. Delta files always store their
+        window's last hour, so that row identifies the file and its window. -#}
+    select
+        unnest(
+            generate_series(window_start_local, window_end_local, interval 1 hour)
+        ) as forecast_timestamp_local,
+        ingest_time_utc,
+        ingested_at_utc,
+        latitude,
+        longitude,
+        raw_file_name
+    from {{ relation }}
+    where is_delta and forecast_timestamp_local = window_end_local
+{% endmacro %}
@@ -0,0 +1,43 @@
+{% macro dq_window_start(relation, ingested_column="last_ingested_at_utc") %}
+    {#- Window mode checks only the forecast hours rewritten by the latest ingests; full mode
+        checks the whole history and is meant for a slower schedule. -#}
+    {%- if var("dq_mode") == "full" -%}
+    (select min(forecast_timestamp_local) from {{ relation }})
+    {%- elif var("dq_mode") == "window" -%}
+    (
+        select min(forecast_timestamp_local)
+        from {{ relation }}
+        where {{ ingested_column }} >= (
+            select max({{ ingested_column }}) - to_hours({{ var("dq_window_hours") | int }})
+            from {{ relation }}
+        )
+    )
+    {%- else -%}
+    {{ exceptions.raise_compiler_error("Unknown dq_mode " ~ var("dq_mode")) }}
+    {%- endif -%}
+{% endmacro %}
+
+{% macro get_where_subquery(relation) -%}
+    {#- Generic tests take `where: __dq_window__` from dbt_project.yml, so they scan the same
+        window as the singular tests. Staging rows carry ingested_at_utc, marts
+        last_ingested_at_utc. -#}
+    {%- set where = config.get("where", "") -%}
+    {%- if "__dq_window__" in where -%}
+        {%- if var("dq_mode") == "full" -%}
+            {%- set where = where | replace("__dq_window__", "true") -%}
+        {%- else -%}
+            {%- set ingested_column = (
+                "ingested_at_utc" if relation.identifier.startswith("stg_")
+                else "last_ingested_at_utc"
+            ) -%}
+            {%- set where = where | replace(
+                "__dq_window__",
+                "forecast_timestamp_local >= " ~ dq_window_start(relation, ingested_column)
+            ) -%}
+        {%- endif -%}
+    {%- endif -%}
+    {%- if where -%}
+        {%- do return("(select * from " ~ relation ~ " where " ~ where ~ ") dbt_subquery") -%}
+    {%- endif -%}
+    {%- do return(relation) -%}
+{%- endmacro %}
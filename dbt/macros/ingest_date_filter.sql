@@ -0,0 +1,14 @@
+{% macro ingest_date_filter() %}
+    {#- Incremental runs stage only files silver has not seen, matched by base name as the
+        native transform does. Filtering on the hive partition column lets DuckDB skip whole
+        ingest_date=... folders; a full build reads every partition so it never drops
+        history. -#}
+    {%- if is_incremental() %}
+    where parse_filename(filename) not in (
+        select distinct parse_filename(raw_file_name) from {{ this }}
+    )
+        {%- if var("min_ingest_date") %}
+        and ingest_date >= cast('{{ var("min_ingest_date") }}' as date)
+        {%- endif %}
+    {%- endif %}
+{% endmacro %}
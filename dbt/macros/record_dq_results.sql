@@ -0,0 +1,31 @@
+{% macro record_dq_results(results) %}
+    {#- Appends one row per data-quality test so pass rates and failure counts can be trended
+        across runs; the table lives outside the models and survives full refreshes. -#}
+    {%- set test_results = results | selectattr("node.resource_type", "equalto", "test") | list -%}
+    {%- if execute and test_results %}
+    create table if not exists {{ target.schema }}.dq_test_results (
+        invocation_id varchar,
+        run_started_at timestamp,
+        test_name varchar,
+        dq_mode varchar,
+        dq_window_hours integer,
+        status varchar,
+        failures bigint,
+        execution_time_seconds double
+    );
+
+    insert into {{ target.schema }}.dq_test_results values
+    {%- for result in test_results %}
+    (
+        '{{ invocation_id }}',
+        cast('{{ run_started_at.strftime("%Y-%m-%d %H:%M:%S") }}' as timestamp),
+        '{{ result.node.name }}',
+        '{{ var("dq_mode") }}',
+        {{ var("dq_window_hours") | int }},
+        '{{ result.status }}',
+        {{ result.failures if result.failures is not none else "null" }},
+        {{ result.execution_time }}
+    ){{ "," if not loop.last }}
+    {%- endfor %};
+    {%- endif %}
+{% endmacro %}
@@ -0,0 +1,179 @@
+{{
+    config(
+        materialized="incremental",
+        unique_key="forecast_timestamp_local",
+        incremental_strategy="delete+insert",
+        full_refresh=false,
+    )
+}}
+
+-- One row per forecast hour with every revision of it, its lead time and, once the hour
+-- has been observed, its error against the realised value. Scored revisions are kept when
+-- lifecycle retires their bronze file, so the mart is never rebuilt from scratch: a full
+-- refresh rescores every staged hour and merges it with what is already stored, and
+-- incremental runs rescore only the hours new ingests touched.
+with
+{% if is_incremental() %}
+affected_hours as (
+    {% if flags.FULL_REFRESH %}
+    select distinct forecast_timestamp_local from {{ ref("stg_aqi_hourly") }}
+    {% else %}
+    -- Every file stores its window's last hour, and that row carries the whole window. New
+    -- files are those ingested after the newest scored one, plus the late ones staging
+    -- flagged, which count until their window's last hour holds a revision from them.
+    select unnest(
+        generate_series(pending.window_start_local, pending.window_end_local, interval 1 hour)
+    ) as forecast_timestamp_local
+    from (
+        select window_start_local, window_end_local, ingested_at_utc
+        from {{ ref("stg_aqi_hourly") }}
+        where forecast_timestamp_local = window_end_local
+            and (
+                ingested_at_utc > (select max(last_ingested_at_utc) from {{ this }})
+                or is_late
+            )
+    ) as pending
+    left join {{ this }} as skill
+        on skill.forecast_timestamp_local = pending.window_end_local
+    where not coalesce(
+        list_contains(
+            list_transform(skill.revisions, revision -> revision.ingested_at_utc),
+            pending.ingested_at_utc
+        ),
+        false
+    )
+    {% endif %}
+),
+{% endif %}
+
+changes as (
+    select
+        forecast_timestamp_local,
+        ingested_at_utc,
+        raw_file_name,
+        latitude,
+        longitude,
+        struct_pack(forecast_date_local, pm25, pm10, us_aqi) as stored
+    from {{ ref("stg_aqi_hourly") }}
+    {% if is_incremental() %}
+    where forecast_timestamp_local in (select forecast_timestamp_local from affected_hours)
+    {% endif %}
+),
+
+-- A delta file that covers an hour without restating it repeats the hour's previous stored
+-- value for that location, so the revision history matches a corpus of full payloads.
+filled_revisions as (
+    select
+        forecast_timestamp_local,
+        ingested_at_utc,
+        raw_file_name,
+        last_value(stored ignore nulls) over (
+            partition by forecast_timestamp_local, latitude, longitude
+            order by ingested_at_utc, raw_file_name
+        ) as stored
+    from (
+        select * from changes
+        union all
+        select
+            forecast_timestamp_local,
+            ingested_at_utc,
+            raw_file_name,
+            latitude,
+            longitude,
+            null as stored
+        from (
+            select *
+            from ({{ delta_coverage(ref("stg_aqi_hourly")) }})
+            {% if is_incremental() %}
+            where forecast_timestamp_local in (select forecast_timestamp_local from affected_hours)
+            {% endif %}
+        ) as coverage
+        where not exists (
+            select 1
+            from changes
+            where changes.forecast_timestamp_local = coverage.forecast_timestamp_local
+                and changes.raw_file_name = coverage.raw_file_name
+        )
+    )
+),
+
+revisions as (
+    select
+        forecast_timestamp_local,
+        stored.forecast_date_local,
+        stored.pm25,
+        stored.pm10,
+        stored.us_aqi,
+        ingested_at_utc,
+        raw_file_name,
+        datediff(
+            'hour',
+            timezone('{{ var("local_timezone") }}', timezone('UTC', ingested_at_utc)),
+            forecast_timestamp_local
+        ) as lead_hours
+    from filled_revisions
+    where stored is not null
+    {% if is_incremental() %}
+    -- Revisions whose bronze file was retired are no longer staged; keep them as scored.
+    union all
+    select
+        skill.forecast_timestamp_local,
+        skill.forecast_date_local,
+        scored.revision.pm25,
+        scored.revision.pm10,
+        scored.revision.us_aqi,
+        scored.revision.ingested_at_utc,
+        null as raw_file_name,
+        scored.revision.lead_hours
+    from {{ this }} as skill, unnest(skill.revisions) as scored(revision)
+    where skill.forecast_timestamp_local in (select forecast_timestamp_local from affected_hours)
+        and scored.revision.ingested_at_utc not in (
+            select ingested_at_utc
+            from filled_revisions
+            where filled_revisions.forecast_timestamp_local = skill.forecast_timestamp_local
+                and stored is not null
+        )
+    {% endif %}
+),
+
+scored_revisions as (
+    select
+        *,
+        -- The latest revision is the realised value once it was ingested at or after the
+        -- forecast hour itself.
+        first_value(lead_hours) over latest <= 0 as is_realised,
+        first_value(pm25) over latest as latest_pm25,
+        first_value(pm10) over latest as latest_pm10,
+        first_value(us_aqi) over latest as latest_us_aqi
+    from revisions
+    window latest as (
+        partition by forecast_timestamp_local
+        order by ingested_at_utc desc, raw_file_name desc
+    )
+)
+
+select
+    forecast_timestamp_local,
+    any_value(forecast_date_local) as forecast_date_local,
+    count(*) as revision_count,
+    max(lead_hours) as max_lead_hours,
+    bool_or(is_realised) as is_realised,
+    case when bool_or(is_realised) then any_value(latest_pm25) end as actual_pm25,
+    case when bool_or(is_realised) then any_value(latest_pm10) end as actual_pm10,
+    case when bool_or(is_realised) then any_value(latest_us_aqi) end as actual_us_aqi,
+    max(ingested_at_utc) as last_ingested_at_utc,
+    list(
+        struct_pack(
+            lead_hours := lead_hours,
+            ingested_at_utc := ingested_at_utc,
+            pm25 := pm25,
+            pm10 := pm10,
+            us_aqi := us_aqi,
+            pm25_error := case when is_realised then pm25 - latest_pm25 end,
+            pm10_error := case when is_realised then pm10 - latest_pm10 end,
+            us_aqi_error := case when is_realised then us_aqi - latest_us_aqi end
+        )
+        order by ingested_at_utc, raw_file_name
+    ) as revisions
+from scored_revisions
+group by forecast_timestamp_local
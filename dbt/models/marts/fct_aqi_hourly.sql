@@ -1,40 +1,108 @@
-with ranked_forecasts as (
+-- arg_max keeps each hour's latest version in a single hash aggregate instead of ranking
+-- every revision; packing the whole row keeps revisions with null metrics eligible.
+-- Delta files only store the hours that changed since the previous ingest, so an hour's
+-- values come from its latest stored row for a location, and the ingest that last reported
+-- them is the newest file covering the hour, whether it restated the hour or not. With
+-- full payloads every covered hour is stored and both reduce to the latest row.
+with aqi_changes as (
     select
-        *,
-        row_number() over (
-            partition by forecast_timestamp_local
-            order by strptime(ingest_time_utc, '%Y%m%dT%H%M%SZ') desc, raw_file_name desc
-        ) as version_rank
-    from {{ ref("stg_aqi_hourly") }}
+        forecast_timestamp_local,
+        latitude,
+        longitude,
+        arg_max(stg, (ingested_at_utc, raw_file_name)) as latest
+    from {{ ref("stg_aqi_hourly") }} as stg
+    {{ affected_hours_filter() }}
+    group by forecast_timestamp_local, latitude, longitude
 ),
-ranked_weather as (
+aqi_ingests as (
     select
-        *,
-        row_number() over (
-            partition by forecast_timestamp_local
-            order by strptime(ingest_time_utc, '%Y%m%dT%H%M%SZ') desc, raw_file_name desc
-        ) as version_rank
+        forecast_timestamp_local,
+        arg_max(
+            struct_pack(ingest_time_utc, ingested_at_utc, latitude, longitude),
+            (ingested_at_utc, raw_file_name)
+        ) as latest
+    from (
+        select
+            forecast_timestamp_local,
+            latest.ingest_time_utc,
+            latest.ingested_at_utc,
+            latitude,
+            longitude,
+            latest.raw_file_name
+        from aqi_changes
+        union all
+        select * from ({{ delta_coverage(ref("stg_aqi_hourly")) }}) {{ affected_hours_filter() }}
+    )
+    group by forecast_timestamp_local
+),
+weather_changes as (
+    select
+        forecast_timestamp_local,
+        latitude,
+        longitude,
+        arg_max(
+            struct_pack(
+                temperature_c,
+                relative_humidity,
+                wind_speed_kph,
+                ingested_at_utc,
+                raw_file_name
+            ),
+            (ingested_at_utc, raw_file_name)
+        ) as latest
     from {{ ref("stg_weather_hourly") }}
+    {{ affected_hours_filter() }}
+    group by forecast_timestamp_local, latitude, longitude
+),
+weather_ingests as (
+    select
+        forecast_timestamp_local,
+        arg_max(struct_pack(latitude, longitude), (ingested_at_utc, raw_file_name)) as latest
+    from (
+        select
+            forecast_timestamp_local,
+            latest.ingested_at_utc,
+            latitude,
+            longitude,
+            latest.raw_file_name
+        from weather_changes
+        union all
+        select forecast_timestamp_local, ingested_at_utc, latitude, longitude, raw_file_name
+        from ({{ delta_coverage(ref("stg_weather_hourly")) }}) {{ affected_hours_filter() }}
+    )
+    group by forecast_timestamp_local
+),
+latest_weather as (
+    select weather.forecast_timestamp_local, weather.latest
+    from weather_ingests as ingest
+    inner join weather_changes as weather
+        on ingest.forecast_timestamp_local = weather.forecast_timestamp_local
+        and ingest.latest.latitude = weather.latitude
+        and ingest.latest.longitude = weather.longitude
 )
 
 select
     md5(
-        cast(aqi.forecast_timestamp_local as varchar) || '|' || cast(aqi.ingest_time_utc as varchar)
+        cast(aqi.forecast_timestamp_local as varchar)
+        || '|'
+        || cast(ingest.latest.ingest_time_utc as varchar)
     ) as record_key,
     aqi.forecast_timestamp_local,
-    aqi.forecast_date_local,
-    aqi.pm25,
-    aqi.pm10,
-    aqi.us_aqi,
-    weather.temperature_c,
-    weather.relative_humidity,
-    weather.wind_speed_kph,
-    strptime(aqi.ingest_time_utc, '%Y%m%dT%H%M%SZ') as last_ingested_at_utc,
-    aqi.source_system,
-    aqi.latitude,
-    aqi.longitude
-from ranked_forecasts as aqi
-left join ranked_weather as weather
+    aqi.latest.forecast_date_local,
+    aqi.latest.pm25,
+    aqi.latest.pm10,
+    aqi.latest.us_aqi,
+    weather.latest.temperature_c,
+    weather.latest.relative_humidity,
+    weather.latest.wind_speed_kph,
+    ingest.latest.ingested_at_utc as last_ingested_at_utc,
+    aqi.latest.source_system,
+    aqi.latest.latitude,
+    aqi.latest.longitude
+from aqi_ingests as ingest
+inner join aqi_changes as aqi
+    on ingest.forecast_timestamp_local = aqi.forecast_timestamp_local
+    and ingest.latest.latitude = aqi.latitude
+    and ingest.latest.longitude = aqi.longitude
+left join latest_weather as weather
     on aqi.forecast_timestamp_local = weather.forecast_timestamp_local
-   and weather.version_rank = 1
-where aqi.version_rank = 1
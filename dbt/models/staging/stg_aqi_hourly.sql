@@ -1,12 +1,58 @@
+{{
+    config(
+        materialized="incremental",
+        incremental_strategy="append",
+        on_schema_change="append_new_columns",
+    )
+}}
+
+-- One scan of bronze with no intermediate table: the ingest time is derived once per file,
+-- before the unnest fans each payload out into hourly rows. Incremental runs append only
+-- the files not staged yet, and flag those stamped before the newest staged ingest as late
+-- so fct_aqi_forecast_skill can find them without rescanning history.
 select
-    forecast_timestamp_local,
-    cast(forecast_timestamp_local as date) as forecast_date_local,
-    pm25,
-    pm10,
-    us_aqi,
-    split_part(replace(raw_file_name, '.json', ''), '_raw_', 2) as ingest_time_utc,
+    cast(element1 as timestamp) as forecast_timestamp_local,
+    cast(cast(element1 as timestamp) as date) as forecast_date_local,
+    cast(element2 as double) as pm25,
+    cast(element3 as double) as pm10,
+    cast(element4 as integer) as us_aqi,
+    ingest_date,
+    ingest_time_utc,
+    ingested_at_utc,
     'open-meteo' as source_system,
     latitude,
     longitude,
-    raw_file_name
-from {{ ref("base_aqi_hourly_exploded") }}
+    raw_file_name,
+    is_delta,
+    window_start_local,
+    window_end_local,
+    {% if is_incremental() -%}
+    coalesce(ingested_at_utc <= (select max(ingested_at_utc) from {{ this }}), false)
+    {%- else -%}
+    false
+    {%- endif %} as is_late
+from (
+    select
+        unnest(
+            list_zip(hourly.time, hourly.pm2_5, hourly.pm10, hourly.us_aqi),
+            recursive := true
+        ),
+        cast(latitude as double) as latitude,
+        cast(longitude as double) as longitude,
+        ingest_date,
+        split_part(replace(filename, '.json', ''), '_raw_', 2) as ingest_time_utc,
+        strptime(ingest_time_utc, '%Y%m%dT%H%M%SZ') as ingested_at_utc,
+        filename as raw_file_name,
+        delta is not null as is_delta,
+        cast(coalesce(delta.window_start, hourly.time[1]) as timestamp)
+            as window_start_local,
+        cast(coalesce(delta.window_end, hourly.time[-1]) as timestamp)
+            as window_end_local
+    from read_json(
+        '{{ var("raw_aqi_glob") }}',
+        columns = {{ bronze_columns("aqi") }},
+        filename = true,
+        hive_partitioning = true
+    )
+    {{ ingest_date_filter() }}
+)
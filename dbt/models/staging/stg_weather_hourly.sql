@@ -1,12 +1,54 @@
+{{
+    config(
+        materialized="incremental",
+        incremental_strategy="append",
+    )
+}}
+
+-- Mirrors stg_aqi_hourly: one scan of bronze, ingest time derived once per file.
 select
-    forecast_timestamp_local,
-    cast(forecast_timestamp_local as date) as forecast_date_local,
-    temperature_c,
-    relative_humidity,
-    wind_speed_kph,
-    split_part(replace(raw_file_name, '.json', ''), '_raw_', 2) as ingest_time_utc,
+    cast(element1 as timestamp) as forecast_timestamp_local,
+    cast(cast(element1 as timestamp) as date) as forecast_date_local,
+    cast(element2 as double) as temperature_c,
+    cast(element3 as double) as relative_humidity,
+    cast(element4 as double) as wind_speed_kph,
+    ingest_date,
+    ingest_time_utc,
+    ingested_at_utc,
     'open-meteo-weather' as source_system,
     latitude,
     longitude,
-    raw_file_name
-from {{ ref("base_weather_hourly_exploded") }}
+    raw_file_name,
+    is_delta,
+    window_start_local,
+    window_end_local
+from (
+    select
+        unnest(
+            list_zip(
+                hourly.time,
+                hourly.temperature_2m,
+                hourly.relative_humidity_2m,
+                hourly.wind_speed_10m
+            ),
+            recursive := true
+        ),
+        cast(latitude as double) as latitude,
+        cast(longitude as double) as longitude,
+        ingest_date,
+        split_part(replace(filename, '.json', ''), '_raw_', 2) as ingest_time_utc,
+        strptime(ingest_time_utc, '%Y%m%dT%H%M%SZ') as ingested_at_utc,
+        filename as raw_file_name,
+        delta is not null as is_delta,
+        cast(coalesce(delta.window_start, hourly.time[1]) as timestamp)
+            as window_start_local,
+        cast(coalesce(delta.window_end, hourly.time[-1]) as timestamp)
+            as window_end_local
+    from read_json(
+        '{{ var("raw_weather_glob") }}',
+        columns = {{ bronze_columns("weather") }},
+        filename = true,
+        hive_partitioning = true
+    )
+    {{ ingest_date_filter() }}
+)
@@ -1,10 +1,29 @@
-with ordered_forecasts as (
+with window_start as (
+    select {{ dq_window_start(ref("fct_aqi_hourly")) }} as forecast_timestamp_local
+),
+
+scoped_forecasts as (
+    select forecast_timestamp_local
+    from {{ ref("fct_aqi_hourly") }}
+    where forecast_timestamp_local >= (select forecast_timestamp_local from window_start)
+
+    union all
+
+    -- The last hour before the window is kept as a boundary row, so a gap that opens at the
+    -- window edge is still caught.
+    select max(forecast_timestamp_local)
+    from {{ ref("fct_aqi_hourly") }}
+    where forecast_timestamp_local < (select forecast_timestamp_local from window_start)
+),
+
+ordered_forecasts as (
     select
         forecast_timestamp_local,
         lag(forecast_timestamp_local) over (
             order by forecast_timestamp_local
         ) as previous_forecast_timestamp_local
-    from {{ ref("fct_aqi_hourly") }}
+    from scoped_forecasts
+    where forecast_timestamp_local is not null
 )
 
 select *
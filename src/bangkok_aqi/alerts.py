@@ -6,6 +6,7 @@ from typing import Any
 import requests
 
 from bangkok_aqi.config import get_settings
+from bangkok_aqi.dbt_build import DbtBuildError
 
 LOGGER = logging.getLogger(__name__)
 
@@ -21,11 +22,14 @@ def build_airflow_failure_message(context: dict[str, Any]) -> str:
     task_id = getattr(task_instance, "task_id", "unknown")
     run_id = getattr(dag_run, "run_id", context.get("run_id", "unknown"))
     logical_date = context.get("logical_date")
+    dbt_layer = context.get("dbt_layer")
+    layer_line = f"Layer: {dbt_layer}\n" if dbt_layer else ""
 
     return (
         "Bangkok AQI pipeline failure detected.\n"
         f"DAG: {dag_id}\n"
         f"Task: {task_id}\n"
+        f"{layer_line}"
         f"Run ID: {run_id}\n"
         f"Logical date: {logical_date}\n"
         f"Error: {exception}"
@@ -58,3 +62,19 @@ def notify_airflow_failure(context: dict[str, Any]) -> None:
 
     if alert_sent:
         LOGGER.info("Sent Airflow failure alert for %s", context.get("task_instance"))
+
+
+def notify_dbt_build_failure(context: dict[str, Any]) -> None:
+    exception = context.get("exception")
+    if not isinstance(exception, DbtBuildError):
+        notify_airflow_failure(context)
+        return
+
+    for layer, failed_nodes in exception.failures.items():
+        notify_airflow_failure(
+            {
+                **context,
+                "dbt_layer": layer,
+                "exception": f"{len(failed_nodes)} failing dbt node(s): {', '.join(failed_nodes)}",
+            }
+        )
@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta, timezone
+from pathlib import Path
+
+from requests import Session
+
+from bangkok_aqi.config import (
+    DEFAULT_BACKFILL_CHUNK_DAYS,
+    DEFAULT_BACKFILL_WORKERS,
+    Settings,
+    get_settings,
+)
+from bangkok_aqi.extract import (
+    build_history_request,
+    build_raw_object_path,
+    build_session,
+    stream_payload_to_bronze,
+)
+from bangkok_aqi.storage import StorageClient
+
+LOGGER = logging.getLogger(__name__)
+BACKFILL_DATASETS = ("aqi", "weather")
+BACKFILL_CHECKPOINT_NAME = "backfill_checkpoint.json"
+
+
+@dataclass(frozen=True)
+class BackfillChunk:
+    dataset: str
+    start_date: date
+    end_date: date
+
+    @property
+    def key(self) -> str:
+        return f"{self.dataset}:{self.start_date.isoformat()}:{self.end_date.isoformat()}"
+
+    @property
+    def ingested_at(self) -> datetime:
+        # Stamping a chunk at the midnight after its last day gives it a fixed object path,
+        # so a rerun overwrites the same file, and later hourly forecasts still outrank it.
+        return datetime.combine(self.end_date + timedelta(days=1), time(), timezone.utc)
+
+
+@dataclass(frozen=True)
+class BackfillResult:
+    object_paths: tuple[str, ...]
+    skipped_chunks: int
+    total_bytes: int
+
+
+class BackfillCheckpoint:
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._completed: set[str] = set()
+        if path.exists():
+            self._completed = set(json.loads(path.read_text(encoding="utf-8"))["completed"])
+
+    def is_done(self, chunk: BackfillChunk) -> bool:
+        return chunk.key in self._completed
+
+    def mark_done(self, chunk: BackfillChunk) -> None:
+        with self._lock:
+            self._completed.add(chunk.key)
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+            temp_path.write_text(
+                json.dumps({"completed": sorted(self._completed)}, indent=2),
+                encoding="utf-8",
+            )
+            os.replace(temp_path, self.path)
+
+
+def plan_backfill_chunks(
+    start_date: date,
+    end_date: date,
+    chunk_days: int = DEFAULT_BACKFILL_CHUNK_DAYS,
+    datasets: tuple[str, ...] = BACKFILL_DATASETS,
+) -> list[BackfillChunk]:
+    if end_date < start_date:
+        raise ValueError("Backfill end date cannot be before the start date.")
+    if chunk_days < 1:
+        raise ValueError("chunk_days must be at least 1.")
+
+    # Chunks are aligned to the start of the range, so the same arguments always plan the
+    # same chunks and the checkpoint keys line up across resumed runs.
+    chunks = []
+    chunk_start = start_date
+    while chunk_start <= end_date:
+        chunk_end = min(chunk_start + timedelta(days=chunk_days - 1), end_date)
+        chunks.extend(BackfillChunk(dataset, chunk_start, chunk_end) for dataset in datasets)
+        chunk_start = chunk_end + timedelta(days=1)
+    return chunks
+
+
+def backfill_chunk(
+    settings: Settings,
+    session: Session,
+    storage: StorageClient,
+    chunk: BackfillChunk,
+) -> tuple[str, int]:
+    url, params = build_history_request(settings, chunk.dataset, chunk.start_date, chunk.end_date)
+    object_path = build_raw_object_path(chunk.ingested_at, dataset=chunk.dataset)
+    streamed = stream_payload_to_bronze(session, url, params, chunk.dataset, storage, object_path)
+    return object_path, streamed.payload_bytes
+
+
+def backfill_bronze(
+    start_date: date,
+    end_date: date,
+    settings: Settings | None = None,
+    chunk_days: int = DEFAULT_BACKFILL_CHUNK_DAYS,
+    workers: int = DEFAULT_BACKFILL_WORKERS,
+    datasets: tuple[str, ...] = BACKFILL_DATASETS,
+    resume: bool = True,
+    session: Session | None = None,
+) -> BackfillResult:
+    active_settings = settings or get_settings()
+    if end_date >= datetime.now(timezone.utc).date():
+        raise ValueError("Backfill only covers completed days; end the range before today.")
+
+    chunks = plan_backfill_chunks(start_date, end_date, chunk_days, datasets)
+    checkpoint_path = active_settings.data_dir / "checkpoints" / BACKFILL_CHECKPOINT_NAME
+    if not resume:
+        checkpoint_path.unlink(missing_ok=True)
+    checkpoint = BackfillCheckpoint(checkpoint_path)
+    pending = [chunk for chunk in chunks if not checkpoint.is_done(chunk)]
+
+    # Worker threads share one session, so the request scheduler's rate budget and adaptive
+    # concurrency limit bound what actually goes upstream.
+    active_session = session or build_session(active_settings)
+    storage = StorageClient(active_settings)
+
+    def run_chunk(chunk: BackfillChunk) -> tuple[str, int]:
+        object_path, payload_bytes = backfill_chunk(active_settings, active_session, storage, chunk)
+        checkpoint.mark_done(chunk)
+        LOGGER.info("Backfilled %s into %s", chunk.key, object_path)
+        return object_path, payload_bytes
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        results = list(executor.map(run_chunk, pending))
+
+    return BackfillResult(
+        object_paths=tuple(sorted(object_path for object_path, _ in results)),
+        skipped_chunks=len(chunks) - len(pending),
+        total_bytes=sum(payload_bytes for _, payload_bytes in results),
+    )
+
+
+def run_backfill(
+    start_date: date,
+    end_date: date,
+    chunk_days: int = DEFAULT_BACKFILL_CHUNK_DAYS,
+    workers: int = DEFAULT_BACKFILL_WORKERS,
+    resume: bool = True,
+) -> BackfillResult:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    result = backfill_bronze(
+        start_date,
+        end_date,
+        chunk_days=chunk_days,
+        workers=workers,
+        resume=resume,
+    )
+    LOGGER.info(
+        "Backfill wrote %s bronze file(s) (%.1f MiB); %s chunk(s) already in the checkpoint",
+        len(result.object_paths),
+        result.total_bytes / 2**20,
+        result.skipped_chunks,
+    )
+    return result
@@ -0,0 +1,492 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import tempfile
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, replace
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+import duckdb
+import pandas as pd
+
+from bangkok_aqi.config import SYNTHETIC_SCALES, Settings, get_repo_root, get_settings
+from bangkok_aqi.dashboard import build_daily_summary, load_hourly_aqi
+from bangkok_aqi.extract import (
+    build_session,
+    fetch_aqi_payload,
+    fetch_weather_payload,
+    validate_hourly_payload,
+    validate_weather_payload,
+)
+from bangkok_aqi.instrumentation import span
+from bangkok_aqi.scheduler import RequestScheduler, SchedulerConfig
+from bangkok_aqi.standin import StandinConfig, start_standin_server
+from bangkok_aqi.storage import StorageClient
+from bangkok_aqi.synthetic import SyntheticConfig, write_synthetic_corpus
+from bangkok_aqi.transform import transform_warehouse
+
+LOGGER = logging.getLogger(__name__)
+BENCHMARK_SCHEMA_VERSION = 1
+DEFAULT_REGRESSION_THRESHOLD = 0.10
+
+
+@dataclass(frozen=True)
+class Timing:
+    samples: tuple[float, ...]
+    items: int = 1
+
+    @property
+    def median_seconds(self) -> float:
+        return statistics.median(self.samples)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "iterations": len(self.samples),
+            "items": self.items,
+            "min_seconds": min(self.samples),
+            "median_seconds": self.median_seconds,
+            "max_seconds": max(self.samples),
+        }
+
+
+@dataclass(frozen=True)
+class BenchmarkComparison:
+    scale: str
+    name: str
+    baseline_seconds: float
+    candidate_seconds: float
+
+    @property
+    def ratio(self) -> float:
+        if self.baseline_seconds == 0:
+            return float("inf") if self.candidate_seconds else 1.0
+        return self.candidate_seconds / self.baseline_seconds
+
+    def is_regression(self, threshold: float = DEFAULT_REGRESSION_THRESHOLD) -> bool:
+        return self.ratio > 1 + threshold
+
+
+def time_callable(func: Callable[[], Any], repeat: int = 3, items: int = 1) -> Timing:
+    samples = []
+    for _ in range(max(1, repeat)):
+        started = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - started)
+    return Timing(samples=tuple(samples), items=items)
+
+
+def _sample_evenly(paths: list[str], limit: int) -> list[str]:
+    if limit <= 0 or len(paths) <= limit:
+        return paths
+    step = len(paths) / limit
+    return [paths[int(index * step)] for index in range(limit)]
+
+
+def benchmark_validation(
+    storage: StorageClient,
+    sample_size: int,
+    repeat: int,
+) -> dict[str, Timing]:
+    timings: dict[str, Timing] = {}
+    for dataset, validator in (
+        ("aqi", validate_hourly_payload),
+        ("weather", validate_weather_payload),
+    ):
+        paths = _sample_evenly(storage.list_files(f"raw/{dataset}/"), sample_size)
+        contents = [storage.read_bytes(path) for path in paths]
+        timings[f"parse_{dataset}_payload"] = time_callable(
+            lambda contents=contents: [json.loads(content) for content in contents],
+            repeat=repeat,
+            items=len(contents),
+        )
+        payloads = [json.loads(content) for content in contents]
+        timings[validator.__name__] = time_callable(
+            lambda payloads=payloads, validator=validator: [
+                validator(payload) for payload in payloads
+            ],
+            repeat=repeat,
+            items=len(payloads),
+        )
+    return timings
+
+
+def benchmark_extract(
+    settings: Settings,
+    request_count: int,
+    repeat: int,
+    standin_config: StandinConfig | None = None,
+) -> dict[str, Timing]:
+    with start_standin_server(standin_config) as server:
+        standin_settings = replace(
+            settings,
+            air_quality_url=server.air_quality_url,
+            weather_forecast_url=server.weather_forecast_url,
+        )
+        # An unlimited budget keeps the timing about the fetch path rather than the rate limit.
+        session = build_session(
+            standin_settings,
+            scheduler=RequestScheduler(SchedulerConfig(rate_per_second=0)),
+        )
+
+        def fetch_and_validate() -> None:
+            for _ in range(request_count):
+                validate_hourly_payload(fetch_aqi_payload(standin_settings, session).payload)
+                validate_weather_payload(
+                    fetch_weather_payload(standin_settings, session).payload
+                )
+
+        return {
+            "extract_fetch_validate": time_callable(
+                fetch_and_validate,
+                repeat=repeat,
+                items=request_count * 2,
+            )
+        }
+
+
+def benchmark_dbt_build(settings: Settings, work_dir: Path) -> dict[str, Timing]:
+    dbt_executable = shutil.which("dbt")
+    if dbt_executable is None:
+        LOGGER.warning("Skipping dbt benchmark because the dbt executable is not installed.")
+        return {}
+
+    project_dir = get_repo_root() / "dbt"
+    target_dir = work_dir / "dbt_target"
+    env = {
+        **os.environ,
+        "DBT_DUCKDB_PATH": str(settings.duckdb_path),
+        "DBT_RAW_AQI_GLOB": str(settings.data_dir / "raw" / "aqi" / "**" / "*.json"),
+        "DBT_RAW_WEATHER_GLOB": str(settings.data_dir / "raw" / "weather" / "**" / "*.json"),
+    }
+    started = time.perf_counter()
+    with span("dbt_build", runner="subprocess"):
+        subprocess.run(
+            [
+                dbt_executable,
+                "build",
+                "--project-dir",
+                str(project_dir),
+                "--profiles-dir",
+                str(project_dir),
+                "--target-path",
+                str(target_dir),
+                "--log-path",
+                str(work_dir / "dbt_logs"),
+            ],
+            cwd=work_dir,
+            env=env,
+            check=True,
+            capture_output=True,
+        )
+    timings = {"dbt_build_total": Timing(samples=(time.perf_counter() - started,))}
+
+    run_results = json.loads((target_dir / "run_results.json").read_text())
+    for result in run_results["results"]:
+        resource_type, _, node_name = result["unique_id"].split(".", 2)
+        timings[f"dbt.{resource_type}.{node_name}"] = Timing(samples=(result["execution_time"],))
+    return timings
+
+
+def benchmark_native_transform(
+    settings: Settings,
+    warehouse_dir: Path,
+    repeat: int,
+) -> dict[str, Timing]:
+    native_settings = replace(settings, warehouse_dir=warehouse_dir)
+    warehouse_dir.mkdir(parents=True, exist_ok=True)
+
+    def rebuild() -> None:
+        with duckdb.connect(str(native_settings.duckdb_path)) as connection:
+            transform_warehouse(connection, native_settings, full_refresh=True)
+
+    return {"native_transform_full_refresh": time_callable(rebuild, repeat=repeat)}
+
+
+def measure_warehouse(duckdb_path: Path) -> dict[str, Any]:
+    # Everything a full build materializes stays in the file, so its used blocks are the
+    # bytes the build wrote, and the per-table row counts show where they went.
+    if not duckdb_path.exists():
+        return {}
+
+    with duckdb.connect(str(duckdb_path), read_only=True) as connection:
+        used_bytes = connection.execute(
+            "select used_blocks * block_size from pragma_database_size()"
+        ).fetchone()[0]
+        table_rows = dict(
+            connection.execute(
+                """
+                select table_name, estimated_size
+                from duckdb_tables()
+                where schema_name = 'main'
+                order by table_name
+                """
+            ).fetchall()
+        )
+    return {
+        "used_bytes": int(used_bytes),
+        "materialized_rows": sum(table_rows.values()),
+        "table_rows": table_rows,
+    }
+
+
+def benchmark_dashboard(duckdb_path: Path, repeat: int) -> dict[str, Timing]:
+    hourly = load_hourly_aqi(duckdb_path)
+    return {
+        "load_hourly_aqi": time_callable(
+            lambda: load_hourly_aqi(duckdb_path),
+            repeat=repeat,
+            items=len(hourly),
+        ),
+        "load_hourly_aqi_compact": time_callable(
+            lambda: load_hourly_aqi(duckdb_path, compact=True),
+            repeat=repeat,
+            items=len(hourly),
+        ),
+        "build_daily_summary": time_callable(
+            lambda: build_daily_summary(hourly),
+            repeat=repeat,
+            items=len(hourly),
+        ),
+    }
+
+
+def run_benchmark_scale(
+    scale: str,
+    work_dir: Path,
+    locations: int = 1,
+    repeat: int = 3,
+    validation_sample: int = 200,
+    run_dbt: bool = True,
+    workers: int = 1,
+    extract_requests: int = 0,
+    revision_rate: float = 0.3,
+    delta_baseline_hours: int = 0,
+) -> dict[str, Any]:
+    settings = replace(
+        get_settings(),
+        data_dir=work_dir / "data",
+        warehouse_dir=work_dir / "warehouse",
+        azure_storage_connection_string=None,
+    )
+    settings.warehouse_dir.mkdir(parents=True, exist_ok=True)
+    storage = StorageClient(settings)
+
+    LOGGER.info("Generating %s synthetic corpus across %s location(s)", scale, locations)
+    started = time.perf_counter()
+    corpus = write_synthetic_corpus(
+        settings,
+        SyntheticConfig(
+            ingest_hours=SYNTHETIC_SCALES[scale],
+            locations=locations,
+            revision_rate=revision_rate,
+            delta_baseline_hours=delta_baseline_hours,
+        ),
+        workers=workers,
+    )
+    timings = {"write_synthetic_corpus": Timing(samples=(time.perf_counter() - started,))}
+
+    timings.update(benchmark_validation(storage, validation_sample, repeat))
+    if extract_requests:
+        timings.update(benchmark_extract(settings, extract_requests, repeat))
+    warehouses = {}
+    if run_dbt:
+        timings.update(benchmark_dbt_build(settings, work_dir))
+        warehouses["dbt"] = measure_warehouse(settings.duckdb_path)
+    native_warehouse_dir = work_dir / "native_warehouse"
+    timings.update(benchmark_native_transform(settings, native_warehouse_dir, repeat))
+    warehouses["native"] = measure_warehouse(native_warehouse_dir / settings.duckdb_path.name)
+    # Both engines build the same mart, so the dashboard is timed against whichever exists.
+    warehouse_paths = {
+        "dbt": settings.duckdb_path,
+        "native": native_warehouse_dir / settings.duckdb_path.name,
+    }
+    dashboard_warehouse = next(
+        (name for name, duckdb_path in warehouse_paths.items() if duckdb_path.exists()),
+        None,
+    )
+    if dashboard_warehouse is None:
+        LOGGER.warning("Skipping dashboard benchmarks because no warehouse was built.")
+    else:
+        timings.update(benchmark_dashboard(warehouse_paths[dashboard_warehouse], repeat))
+
+    return {
+        "scale": {
+            "name": scale,
+            "ingest_hours": corpus.ingest_hours,
+            "locations": corpus.locations,
+            "files": corpus.file_count,
+            "bytes": corpus.total_bytes,
+            "revision_rate": revision_rate,
+            "delta_baseline_hours": delta_baseline_hours,
+        },
+        "timings": {name: timing.to_dict() for name, timing in timings.items()},
+        "warehouses": warehouses,
+        "dashboard": {
+            "warehouse": dashboard_warehouse,
+            "skipped": dashboard_warehouse is None,
+        },
+    }
+
+
+def _git_metadata(repo_root: Path) -> dict[str, Any]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=repo_root,
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout.strip()
+        status = subprocess.run(
+            ["git", "status", "--porcelain"],
+            cwd=repo_root,
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return {"commit": None, "dirty": None}
+
+    return {"commit": commit, "dirty": bool(status.strip())}
+
+
+def build_environment_metadata() -> dict[str, Any]:
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "duckdb": duckdb.__version__,
+        "pandas": pd.__version__,
+    }
+
+
+def run_benchmark_suite(
+    scales: list[str],
+    output_path: Path | None = None,
+    locations: int = 1,
+    repeat: int = 3,
+    validation_sample: int = 200,
+    run_dbt: bool = True,
+    work_dir: Path | None = None,
+    workers: int = 1,
+    extract_requests: int = 0,
+    revision_rate: float = 0.3,
+    delta_baseline_hours: int = 0,
+) -> dict[str, Any]:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    runs = []
+    for scale in scales:
+        if work_dir is not None:
+            scale_dir = work_dir / scale
+            if scale_dir.exists():
+                shutil.rmtree(scale_dir)
+            runs.append(
+                run_benchmark_scale(
+                    scale,
+                    scale_dir,
+                    locations,
+                    repeat,
+                    validation_sample,
+                    run_dbt,
+                    workers,
+                    extract_requests,
+                    revision_rate,
+                    delta_baseline_hours,
+                )
+            )
+            continue
+
+        with tempfile.TemporaryDirectory(prefix=f"bangkok_aqi_bench_{scale}_") as temp_dir:
+            runs.append(
+                run_benchmark_scale(
+                    scale,
+                    Path(temp_dir),
+                    locations,
+                    repeat,
+                    validation_sample,
+                    run_dbt,
+                    workers,
+                    extract_requests,
+                    revision_rate,
+                    delta_baseline_hours,
+                )
+            )
+
+    results = {
+        "schema_version": BENCHMARK_SCHEMA_VERSION,
+        "created_at_utc": datetime.now(timezone.utc).isoformat(),
+        "git": _git_metadata(get_repo_root()),
+        "environment": build_environment_metadata(),
+        "runs": runs,
+    }
+
+    active_output_path = output_path or (
+        get_settings().data_dir
+        / "benchmarks"
+        / f"benchmark_{datetime.now(timezone.utc):%Y%m%dT%H%M%SZ}.json"
+    )
+    active_output_path.parent.mkdir(parents=True, exist_ok=True)
+    active_output_path.write_text(json.dumps(results, indent=2, sort_keys=True))
+    LOGGER.info("Wrote benchmark results to %s", active_output_path)
+    return results
+
+
+def load_benchmark_results(path: Path) -> dict[str, Any]:
+    results = json.loads(path.read_text())
+    if results.get("schema_version") != BENCHMARK_SCHEMA_VERSION:
+        raise ValueError(
+            f"Unsupported benchmark schema version {results.get('schema_version')!r} in {path}."
+        )
+    return results
+
+
+def compare_benchmark_results(
+    baseline: dict[str, Any],
+    candidate: dict[str, Any],
+) -> list[BenchmarkComparison]:
+    baseline_runs = {run["scale"]["name"]: run for run in baseline["runs"]}
+    comparisons = []
+    for candidate_run in candidate["runs"]:
+        scale = candidate_run["scale"]["name"]
+        baseline_run = baseline_runs.get(scale)
+        if baseline_run is None:
+            continue
+
+        for name, timing in sorted(candidate_run["timings"].items()):
+            baseline_timing = baseline_run["timings"].get(name)
+            if baseline_timing is None:
+                continue
+            comparisons.append(
+                BenchmarkComparison(
+                    scale=scale,
+                    name=name,
+                    baseline_seconds=baseline_timing["median_seconds"],
+                    candidate_seconds=timing["median_seconds"],
+                )
+            )
+    return comparisons
+
+
+def format_benchmark_comparison(
+    comparisons: list[BenchmarkComparison],
+    threshold: float = DEFAULT_REGRESSION_THRESHOLD,
+) -> str:
+    lines = [f"{'scale':<6} {'benchmark':<48} {'baseline':>10} {'candidate':>10} {'ratio':>7}"]
+    for comparison in comparisons:
+        marker = "  REGRESSION" if comparison.is_regression(threshold) else ""
+        lines.append(
+            f"{comparison.scale:<6} {comparison.name:<48} "
+            f"{comparison.baseline_seconds:>10.4f} {comparison.candidate_seconds:>10.4f} "
+            f"{comparison.ratio:>7.2f}{marker}"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import logging
+from collections.abc import Iterable, Mapping
+from datetime import datetime, timezone
+from typing import Any
+
+from requests import Session
+
+from bangkok_aqi.config import Settings, get_settings
+from bangkok_aqi.extract import StreamedPayload, build_session, extract_dataset_to_bronze
+from bangkok_aqi.http_cache import build_http_cache
+from bangkok_aqi.storage import StorageClient
+
+LOGGER = logging.getLogger(__name__)
+
+
+def build_change_signal(
+    streamed: StreamedPayload,
+    previous: Mapping[str, Any] | None = None,
+) -> dict[str, Any]:
+    # Signals from before this existed were bare object paths and carry no hash.
+    previous_sha256 = previous.get("content_sha256") if isinstance(previous, Mapping) else None
+    changed = not streamed.not_modified and (
+        previous_sha256 is None or streamed.content_sha256 != previous_sha256
+    )
+    return {
+        "object_path": streamed.object_path,
+        # A 304 or a fresh cache hit has no body to hash; the kept object is unchanged.
+        "content_sha256": streamed.content_sha256 or previous_sha256,
+        "changed": changed,
+    }
+
+
+def previous_payload(
+    previous: Mapping[str, Any] | None,
+    storage: StorageClient,
+) -> StreamedPayload | None:
+    # A body matching the previous signal's hash is kept as that object rather than landed
+    # again, which only works while the object is still in bronze.
+    if not isinstance(previous, Mapping) or not previous.get("content_sha256"):
+        return None
+    if not storage.exists(previous["object_path"]):
+        return None
+    return StreamedPayload(previous["object_path"], 0, content_sha256=previous["content_sha256"])
+
+
+def extract_with_change_signal(
+    dataset: str,
+    previous: Mapping[str, Any] | None = None,
+    settings: Settings | None = None,
+    session: Session | None = None,
+    ingested_at: datetime | None = None,
+    land_unchanged: bool = False,
+) -> dict[str, Any]:
+    active_settings = settings or get_settings()
+    storage = StorageClient(active_settings)
+    streamed = extract_dataset_to_bronze(
+        active_settings,
+        dataset,
+        session or build_session(active_settings),
+        ingested_at or datetime.now(timezone.utc),
+        storage,
+        http_cache=build_http_cache(active_settings),
+        previous=None if land_unchanged else previous_payload(previous, storage),
+    )
+    signal = build_change_signal(streamed, previous)
+    LOGGER.info(
+        "%s payload %s since the previous extract",
+        dataset,
+        "changed" if signal["changed"] else "unchanged",
+    )
+    return signal
+
+
+def is_scheduled_rebuild(logical_date: datetime, forced_rebuild_hours: int) -> bool:
+    if forced_rebuild_hours < 1:
+        raise ValueError("forced_rebuild_hours must be at least 1.")
+    return logical_date.hour % forced_rebuild_hours == 0
+
+
+def should_rebuild(
+    signals: Iterable[Mapping[str, Any] | None],
+    logical_date: datetime,
+    forced_rebuild_hours: int,
+    forced: bool = False,
+    built_signals: Iterable[Mapping[str, Any] | None] | None = None,
+) -> bool:
+    # A change stays pending until a build succeeds on it: each payload is also compared with
+    # the one the last successful build consumed, so a failed build is retried next hour even
+    # when upstream has gone quiet. None means no successful build is on record.
+    signals = list(signals)
+    built = list(built_signals) if built_signals is not None else [None] * len(signals)
+    changed = [
+        signal is None
+        or bool(signal.get("changed", True))
+        or built_signal is None
+        or built_signal.get("content_sha256") != signal.get("content_sha256")
+        for signal, built_signal in zip(signals, built, strict=False)
+    ]
+    scheduled = is_scheduled_rebuild(logical_date, forced_rebuild_hours)
+    if any(changed) or scheduled or forced:
+        LOGGER.info(
+            "Rebuilding: %s",
+            "bronze changed since the last successful build" if any(changed) else "forced rebuild",
+        )
+        return True
+    LOGGER.info("Skipping the rebuild; no extract produced new information.")
+    return False
@@ -1,23 +1,483 @@
 from __future__ import annotations
 
 import argparse
+import os
+import sys
+from datetime import date, datetime, timezone
+from pathlib import Path
 
-from bangkok_aqi.extract import run_extract
+from bangkok_aqi.config import (
+    DEFAULT_BACKFILL_CHUNK_DAYS,
+    DEFAULT_BACKFILL_WORKERS,
+    DEFAULT_MAX_AGE_SECONDS,
+    DEFAULT_POOL_SIZE,
+    DEFAULT_RESPONSE_CACHE_ENTRIES,
+    DEFAULT_SNAPSHOT_WINDOW_DAYS,
+    DEFAULT_SYNTHETIC_START,
+    LIFECYCLE_ACTIONS,
+    LIFECYCLE_DATASETS,
+    PROFILERS,
+    SYNTHETIC_SCALES,
+)
+from bangkok_aqi.profiling import profile_command
+
+
+def parse_utc_datetime(value: str) -> datetime:
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        return parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
 
 
 def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(description="Bangkok AQI pipeline commands")
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Profile this run and write the capture under data/profiles/",
+    )
+    parser.add_argument(
+        "--profiler",
+        choices=PROFILERS,
+        help="Profiler to use (default: BANGKOK_AQI_PROFILER or cprofile)",
+    )
     subparsers = parser.add_subparsers(dest="command", required=True)
 
     subparsers.add_parser("extract", help="Fetch AQI data and land raw JSON files")
+
+    backfill_parser = subparsers.add_parser(
+        "backfill",
+        help="Load historical AQI and weather into bronze in parallel, resumable chunks",
+    )
+    backfill_parser.add_argument("--start", type=date.fromisoformat, required=True)
+    backfill_parser.add_argument("--end", type=date.fromisoformat, required=True)
+    backfill_parser.add_argument(
+        "--chunk-days",
+        type=int,
+        default=DEFAULT_BACKFILL_CHUNK_DAYS,
+        help="Days of history requested per upstream call",
+    )
+    backfill_parser.add_argument("--workers", type=int, default=DEFAULT_BACKFILL_WORKERS)
+    backfill_parser.add_argument(
+        "--restart",
+        action="store_true",
+        help="Ignore the checkpoint and fetch every chunk again",
+    )
+
+    lifecycle_parser = subparsers.add_parser(
+        "lifecycle",
+        help="Archive or delete superseded bronze files and tier old blobs",
+    )
+    lifecycle_parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Report the planned actions and reclaimed bytes without changing storage",
+    )
+    lifecycle_parser.add_argument("--action", choices=LIFECYCLE_ACTIONS, default="archive")
+    lifecycle_parser.add_argument(
+        "--superseded-after-days",
+        type=int,
+        default=2,
+        help="Only retire superseded files ingested at least this many days ago",
+    )
+    lifecycle_parser.add_argument(
+        "--archive-tier",
+        default="Cool",
+        help="Azure access tier for archived blobs",
+    )
+    lifecycle_parser.add_argument(
+        "--tier-after-days",
+        type=int,
+        help="Move retained Azure blobs older than this many days to --tier",
+    )
+    lifecycle_parser.add_argument("--tier", default="Cool")
+    lifecycle_parser.add_argument(
+        "--dataset",
+        action="append",
+        choices=LIFECYCLE_DATASETS,
+        help="Dataset to manage; repeat the flag for several (default: all)",
+    )
+    lifecycle_parser.add_argument(
+        "--keep-forecast-skill-history",
+        action="store_true",
+        help="Keep superseded AQI files so the skill mart can be rescored from bronze",
+    )
+
+    transform_parser = subparsers.add_parser(
+        "transform",
+        help="Apply new bronze files to the warehouse with the native DuckDB engine",
+    )
+    transform_parser.add_argument(
+        "--full-refresh",
+        action="store_true",
+        help="Rebuild silver and gold tables from every bronze file",
+    )
+    transform_parser.add_argument(
+        "--min-ingest-date",
+        type=date.fromisoformat,
+        help="Only read bronze partitions with ingest_date on or after this date",
+    )
+
+    export_parser = subparsers.add_parser(
+        "export",
+        help="Write fct_aqi_hourly as date-partitioned Parquet, rewriting changed dates only",
+    )
+    export_parser.add_argument(
+        "--full-refresh",
+        action="store_true",
+        help="Rewrite every partition regardless of the export manifest",
+    )
+
+    snapshot_parser = subparsers.add_parser(
+        "snapshot",
+        help="Publish the precomputed dashboard snapshot from the warehouse mart",
+    )
+    snapshot_parser.add_argument(
+        "--window-days",
+        type=int,
+        default=DEFAULT_SNAPSHOT_WINDOW_DAYS,
+        help="Most recent forecast dates included in the default dashboard view",
+    )
+
+    serve_parser = subparsers.add_parser(
+        "serve",
+        help="Serve fct_aqi_hourly over a cached read-only HTTP API",
+    )
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=8080)
+    serve_parser.add_argument(
+        "--cache-entries",
+        type=int,
+        default=DEFAULT_RESPONSE_CACHE_ENTRIES,
+        help="Rendered responses kept in the in-process LRU cache",
+    )
+    serve_parser.add_argument(
+        "--max-age",
+        type=int,
+        default=DEFAULT_MAX_AGE_SECONDS,
+        help="Cache-Control max-age sent to clients, in seconds",
+    )
+    serve_parser.add_argument("--pool-size", type=int, default=DEFAULT_POOL_SIZE)
+
+    watch_parser = subparsers.add_parser(
+        "watch",
+        help="Poll upstream and apply changed payloads to the mart as micro-batches",
+    )
+    watch_parser.add_argument(
+        "--interval",
+        type=float,
+        help="Seconds between polls (default: BANGKOK_AQI_WATCH_INTERVAL_SECONDS or 300)",
+    )
+    watch_parser.add_argument("--health-host", default="127.0.0.1")
+    watch_parser.add_argument(
+        "--health-port", type=int, help="Serve /healthz on this port while watching"
+    )
+    watch_parser.add_argument(
+        "--window-days",
+        type=int,
+        default=DEFAULT_SNAPSHOT_WINDOW_DAYS,
+        help="Most recent forecast dates included in each published dashboard snapshot",
+    )
+    watch_parser.add_argument(
+        "--release-warehouse",
+        action="store_true",
+        help="Close the DuckDB connection after each micro-batch so readers can open it",
+    )
+    watch_parser.add_argument("--max-polls", type=int, help="Stop after this many polls")
+
+    standin_parser = subparsers.add_parser(
+        "standin",
+        help="Serve a local Open-Meteo stand-in for offline extract runs and benchmarks",
+    )
+    standin_parser.add_argument("--host", default="127.0.0.1")
+    standin_parser.add_argument("--port", type=int, default=8765)
+    standin_parser.add_argument("--latency", type=float, default=0.0, help="Seconds per request")
+    standin_parser.add_argument(
+        "--error-rate", type=float, default=0.0, help="Share of requests answered with 503"
+    )
+    standin_parser.add_argument(
+        "--throttle-rate", type=float, default=0.0, help="Share of requests answered with 429"
+    )
+    standin_parser.add_argument("--retry-after", type=int, default=1)
+    standin_parser.add_argument(
+        "--slow-every", type=int, default=0, help="Delay every Nth request by --slow-latency"
+    )
+    standin_parser.add_argument(
+        "--slow-latency", type=float, default=0.0, help="Extra seconds for slow requests"
+    )
+    standin_parser.add_argument(
+        "--drip-bytes", type=int, default=0, help="Send bodies in chunks of this many bytes"
+    )
+    standin_parser.add_argument(
+        "--drip-delay", type=float, default=0.0, help="Seconds between body chunks"
+    )
+    standin_parser.add_argument(
+        "--cache-max-age",
+        type=int,
+        default=0,
+        help="Cache-Control max-age in seconds sent with successful responses",
+    )
+    standin_parser.add_argument("--seed", type=int, default=0)
+
+    sync_schemas_parser = subparsers.add_parser(
+        "sync-dbt-schemas",
+        help="Regenerate the dbt bronze column specs from bangkok_aqi.schemas",
+    )
+    sync_schemas_parser.add_argument(
+        "--check",
+        action="store_true",
+        help="Exit non-zero instead of writing when the dbt macro is out of date",
+    )
+
+    sync_native_parser = subparsers.add_parser(
+        "sync-native-sql",
+        help="Regenerate the native transform's SQL from the dbt models",
+    )
+    sync_native_parser.add_argument(
+        "--check",
+        action="store_true",
+        help="Exit non-zero instead of writing when the rendered SQL is out of date",
+    )
+
+    synth_parser = subparsers.add_parser(
+        "synth",
+        help="Write deterministic synthetic bronze files for load testing",
+    )
+    synth_parser.add_argument(
+        "--start",
+        type=parse_utc_datetime,
+        default=DEFAULT_SYNTHETIC_START,
+        help="First ingest timestamp, ISO 8601 (UTC when no offset is given)",
+    )
+    span_group = synth_parser.add_mutually_exclusive_group()
+    span_group.add_argument("--days", type=int, help="Number of days of hourly ingests")
+    span_group.add_argument("--scale", choices=sorted(SYNTHETIC_SCALES), default="1d")
+    synth_parser.add_argument("--locations", type=int, default=1)
+    synth_parser.add_argument(
+        "--revision-rate",
+        type=float,
+        default=0.3,
+        help="Fraction of forecast hours revised between consecutive ingests",
+    )
+    synth_parser.add_argument(
+        "--null-ratio",
+        type=float,
+        default=0.0,
+        help="Fraction of metric values emitted as null",
+    )
+    synth_parser.add_argument("--seed", type=int, default=0)
+    synth_parser.add_argument(
+        "--delta-baseline-hours",
+        type=int,
+        default=0,
+        help="Store a full baseline every N hours and delta files between them (0: all full)",
+    )
+    synth_parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+
+    benchmark_parser = subparsers.add_parser(
+        "benchmark",
+        help="Time validation, dbt and dashboard loads over synthetic bronze corpora",
+    )
+    benchmark_parser.add_argument(
+        "--scale",
+        action="append",
+        choices=sorted(SYNTHETIC_SCALES),
+        help="Corpus size to benchmark; repeat the flag for several scales (default: 1d)",
+    )
+    benchmark_parser.add_argument("--locations", type=int, default=1)
+    benchmark_parser.add_argument("--repeat", type=int, default=3)
+    benchmark_parser.add_argument("--validation-sample", type=int, default=200)
+    benchmark_parser.add_argument("--skip-dbt", action="store_true")
+    benchmark_parser.add_argument(
+        "--extract-requests",
+        type=int,
+        default=0,
+        help="Also time this many AQI and weather fetches against the local stand-in",
+    )
+    benchmark_parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    benchmark_parser.add_argument("--revision-rate", type=float, default=0.3)
+    benchmark_parser.add_argument(
+        "--delta-baseline-hours",
+        type=int,
+        default=0,
+        help="Generate delta-encoded bronze with a full baseline every N hours",
+    )
+    benchmark_parser.add_argument("--work-dir", type=Path, help="Keep generated corpora here")
+    benchmark_parser.add_argument("--output", type=Path, help="Path of the results JSON file")
+
+    compare_parser = subparsers.add_parser(
+        "benchmark-compare",
+        help="Compare two benchmark result files",
+    )
+    compare_parser.add_argument("baseline", type=Path)
+    compare_parser.add_argument("candidate", type=Path)
+    compare_parser.add_argument("--threshold", type=float, default=0.10)
+    compare_parser.add_argument("--fail-on-regression", action="store_true")
     return parser
 
 
 def main() -> None:
     args = build_parser().parse_args()
 
+    with profile_command(args.command, force=args.profile, profiler=args.profiler):
+        run_command(args)
+
+
+def run_command(args: argparse.Namespace) -> None:
     if args.command == "extract":
+        from bangkok_aqi.extract import run_extract
+
         run_extract()
+    elif args.command == "backfill":
+        from bangkok_aqi.backfill import run_backfill
+
+        run_backfill(
+            args.start,
+            args.end,
+            chunk_days=args.chunk_days,
+            workers=args.workers,
+            resume=not args.restart,
+        )
+    elif args.command == "lifecycle":
+        from bangkok_aqi.lifecycle import RetentionPolicy, run_lifecycle
+
+        run_lifecycle(
+            {
+                dataset: RetentionPolicy(
+                    dataset,
+                    superseded_after_days=args.superseded_after_days,
+                    action=args.action,
+                    archive_tier=args.archive_tier,
+                    tier_after_days=args.tier_after_days,
+                    tier=args.tier,
+                    keep_forecast_skill=args.keep_forecast_skill_history,
+                )
+                for dataset in args.dataset or LIFECYCLE_DATASETS
+            },
+            dry_run=args.dry_run,
+        )
+    elif args.command == "transform":
+        from bangkok_aqi.transform import run_native_transform
+
+        run_native_transform(
+            full_refresh=args.full_refresh,
+            min_ingest_date=args.min_ingest_date,
+        )
+    elif args.command == "export":
+        from bangkok_aqi.export import run_export
+
+        run_export(full_refresh=args.full_refresh)
+    elif args.command == "snapshot":
+        from bangkok_aqi.snapshot import run_snapshot
+
+        run_snapshot(window_days=args.window_days)
+    elif args.command == "serve":
+        from bangkok_aqi.serve import run_serve
+
+        run_serve(
+            host=args.host,
+            port=args.port,
+            cache_entries=args.cache_entries,
+            max_age_seconds=args.max_age,
+            pool_size=args.pool_size,
+        )
+    elif args.command == "watch":
+        from bangkok_aqi.watch import run_watch
+
+        run_watch(
+            interval_seconds=args.interval,
+            health_host=args.health_host,
+            health_port=args.health_port,
+            window_days=args.window_days,
+            release_warehouse=args.release_warehouse,
+            max_polls=args.max_polls,
+        )
+    elif args.command == "standin":
+        from bangkok_aqi.standin import StandinConfig, run_standin
+
+        run_standin(
+            StandinConfig(
+                latency_seconds=args.latency,
+                error_rate=args.error_rate,
+                throttle_rate=args.throttle_rate,
+                retry_after_seconds=args.retry_after,
+                slow_every=args.slow_every,
+                slow_latency_seconds=args.slow_latency,
+                drip_chunk_bytes=args.drip_bytes,
+                drip_delay_seconds=args.drip_delay,
+                cache_max_age_seconds=args.cache_max_age,
+                seed=args.seed,
+            ),
+            host=args.host,
+            port=args.port,
+        )
+    elif args.command == "sync-dbt-schemas":
+        from bangkok_aqi.schemas import DBT_COLUMNS_MACRO_PATH, sync_dbt_columns_macro
+
+        if sync_dbt_columns_macro(check=args.check):
+            print(f"{DBT_COLUMNS_MACRO_PATH} is up to date")
+        elif args.check:
+            print(f"{DBT_COLUMNS_MACRO_PATH} is out of date; run `bangkok-aqi sync-dbt-schemas`")
+            sys.exit(1)
+        else:
+            print(f"Regenerated {DBT_COLUMNS_MACRO_PATH}")
+    elif args.command == "sync-native-sql":
+        from bangkok_aqi.transform import NATIVE_SQL_PATH, sync_native_sql
+
+        if sync_native_sql(check=args.check):
+            print(f"{NATIVE_SQL_PATH} is up to date")
+        elif args.check:
+            print(f"{NATIVE_SQL_PATH} is out of date; run `bangkok-aqi sync-native-sql`")
+            sys.exit(1)
+        else:
+            print(f"Regenerated {NATIVE_SQL_PATH}")
+    elif args.command == "synth":
+        from bangkok_aqi.synthetic import SyntheticConfig, run_synth
+
+        run_synth(
+            SyntheticConfig(
+                start=args.start,
+                ingest_hours=args.days * 24 if args.days else SYNTHETIC_SCALES[args.scale],
+                locations=args.locations,
+                revision_rate=args.revision_rate,
+                null_ratio=args.null_ratio,
+                seed=args.seed,
+                delta_baseline_hours=args.delta_baseline_hours,
+            ),
+            workers=args.workers,
+        )
+    elif args.command == "benchmark":
+        from bangkok_aqi.benchmark import run_benchmark_suite
+
+        run_benchmark_suite(
+            scales=args.scale or ["1d"],
+            output_path=args.output,
+            locations=args.locations,
+            repeat=args.repeat,
+            validation_sample=args.validation_sample,
+            run_dbt=not args.skip_dbt,
+            work_dir=args.work_dir,
+            workers=args.workers,
+            extract_requests=args.extract_requests,
+            revision_rate=args.revision_rate,
+            delta_baseline_hours=args.delta_baseline_hours,
+        )
+    elif args.command == "benchmark-compare":
+        from bangkok_aqi.benchmark import (
+            compare_benchmark_results,
+            format_benchmark_comparison,
+            load_benchmark_results,
+        )
+
+        comparisons = compare_benchmark_results(
+            load_benchmark_results(args.baseline),
+            load_benchmark_results(args.candidate),
+        )
+        print(format_benchmark_comparison(comparisons, args.threshold))
+        if args.fail_on_regression and any(
+            comparison.is_regression(args.threshold) for comparison in comparisons
+        ):
+            sys.exit(1)
 
 
 if __name__ == "__main__":
@@ -2,12 +2,36 @@ from __future__ import annotations
 
 import os
 from dataclasses import dataclass
+from datetime import datetime, timezone
 from pathlib import Path
 
 from dotenv import load_dotenv
 
 load_dotenv()
 
+AIR_QUALITY_URL = "https://air-quality-api.open-meteo.com/v1/air-quality"
+WEATHER_FORECAST_URL = "https://api.open-meteo.com/v1/forecast"
+WEATHER_ARCHIVE_URL = "https://archive-api.open-meteo.com/v1/archive"
+# Command defaults live here rather than in their modules so building the CLI parser does
+# not import pandas, pyarrow and the HTTP stack for every command.
+DEFAULT_BACKFILL_CHUNK_DAYS = 31
+DEFAULT_BACKFILL_WORKERS = 4
+LIFECYCLE_DATASETS = ("aqi", "weather")
+LIFECYCLE_ACTIONS = ("archive", "delete")
+PROFILERS = ("cprofile", "pyinstrument")
+DEFAULT_RESPONSE_CACHE_ENTRIES = 256
+DEFAULT_HTTP_CACHE_MAX_ENTRIES = 256
+DEFAULT_MAX_AGE_SECONDS = 60
+DEFAULT_POOL_SIZE = 4
+DEFAULT_SNAPSHOT_WINDOW_DAYS = 7
+SYNTHETIC_SCALES = {
+    "1d": 24,
+    "1w": 24 * 7,
+    "1y": 24 * 365,
+    "5y": 24 * 365 * 5,
+}
+DEFAULT_SYNTHETIC_START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
 
 @dataclass(frozen=True)
 class Settings:
@@ -19,18 +43,45 @@ class Settings:
     azure_storage_connection_string: str | None
     azure_storage_container_name: str
     alert_webhook_url: str | None
+    metrics_dir: Path | None = None
+    profile_sample_rate: float = 0.0
+    profiler: str = "cprofile"
+    air_quality_url: str = AIR_QUALITY_URL
+    weather_forecast_url: str = WEATHER_FORECAST_URL
+    weather_archive_url: str = WEATHER_ARCHIVE_URL
+    request_rate_per_second: float = 1.0
+    request_burst: int = 5
+    request_max_concurrency: int = 4
+    request_rate_limit_path: Path | None = None
+    hedge_requests: bool = False
+    circuit_breaker_threshold: int = 5
+    circuit_breaker_reset_seconds: float = 30.0
+    http_cache_path: Path | None = None
+    http_cache_max_entries: int = DEFAULT_HTTP_CACHE_MAX_ENTRIES
+    bronze_delta_baseline_hours: int = 0
+    watch_interval_seconds: float = 300.0
+    forced_rebuild_hours: int = 6
 
     @property
     def duckdb_path(self) -> Path:
         return self.warehouse_dir / "bangkok_aqi.duckdb"
 
+    @property
+    def snapshot_dir(self) -> Path:
+        return self.warehouse_dir / "snapshots"
+
+
+def get_repo_root() -> Path:
+    return Path(os.getenv("BANGKOK_AQI_REPO_ROOT", Path(__file__).resolve().parents[2])).resolve()
+
 
 def get_settings() -> Settings:
-    repo_root = Path(
-        os.getenv("BANGKOK_AQI_REPO_ROOT", Path(__file__).resolve().parents[2])
-    ).resolve()
+    repo_root = get_repo_root()
     data_dir = repo_root / "data"
     warehouse_dir = repo_root / "warehouse"
+    metrics_dir = os.getenv("BANGKOK_AQI_METRICS_DIR")
+    rate_limit_path = os.getenv("BANGKOK_AQI_REQUEST_RATE_LIMIT_PATH")
+    http_cache_path = os.getenv("BANGKOK_AQI_HTTP_CACHE_PATH")
     data_dir.mkdir(parents=True, exist_ok=True)
     warehouse_dir.mkdir(parents=True, exist_ok=True)
 
@@ -43,4 +94,28 @@ def get_settings() -> Settings:
         azure_storage_connection_string=os.getenv("AZURE_STORAGE_CONNECTION_STRING"),
         azure_storage_container_name=os.getenv("AZURE_STORAGE_CONTAINER_NAME", "aqi-data"),
         alert_webhook_url=os.getenv("ALERT_WEBHOOK_URL"),
+        metrics_dir=repo_root / metrics_dir if metrics_dir else None,
+        profile_sample_rate=float(os.getenv("BANGKOK_AQI_PROFILE_SAMPLE_RATE") or "0"),
+        profiler=os.getenv("BANGKOK_AQI_PROFILER") or "cprofile",
+        air_quality_url=os.getenv("AIR_QUALITY_URL") or AIR_QUALITY_URL,
+        weather_forecast_url=os.getenv("WEATHER_FORECAST_URL") or WEATHER_FORECAST_URL,
+        weather_archive_url=os.getenv("WEATHER_ARCHIVE_URL") or WEATHER_ARCHIVE_URL,
+        request_rate_per_second=float(os.getenv("BANGKOK_AQI_REQUEST_RATE") or "1"),
+        request_burst=int(os.getenv("BANGKOK_AQI_REQUEST_BURST") or "5"),
+        request_max_concurrency=int(os.getenv("BANGKOK_AQI_REQUEST_MAX_CONCURRENCY") or "4"),
+        request_rate_limit_path=repo_root / rate_limit_path if rate_limit_path else None,
+        hedge_requests=os.getenv("BANGKOK_AQI_HEDGE_REQUESTS", "").lower() in {"1", "true"},
+        circuit_breaker_threshold=int(os.getenv("BANGKOK_AQI_CIRCUIT_BREAKER_THRESHOLD") or "5"),
+        circuit_breaker_reset_seconds=float(
+            os.getenv("BANGKOK_AQI_CIRCUIT_BREAKER_RESET_SECONDS") or "30"
+        ),
+        http_cache_path=repo_root / http_cache_path if http_cache_path else None,
+        http_cache_max_entries=int(
+            os.getenv("BANGKOK_AQI_HTTP_CACHE_MAX_ENTRIES") or DEFAULT_HTTP_CACHE_MAX_ENTRIES
+        ),
+        bronze_delta_baseline_hours=int(
+            os.getenv("BANGKOK_AQI_BRONZE_DELTA_BASELINE_HOURS") or "0"
+        ),
+        watch_interval_seconds=float(os.getenv("BANGKOK_AQI_WATCH_INTERVAL_SECONDS") or "300"),
+        forced_rebuild_hours=int(os.getenv("BANGKOK_AQI_FORCED_REBUILD_HOURS") or "6"),
     )
@@ -1,14 +1,21 @@
 from __future__ import annotations
 
+from collections.abc import Iterator
+from contextlib import contextmanager
 from dataclasses import dataclass
-from datetime import timedelta
+from datetime import date, timedelta
 from pathlib import Path
 from typing import Any
 
 import duckdb
 import pandas as pd
 
+from bangkok_aqi.instrumentation import span
+
 WEATHER_COLUMNS = ("temperature_c", "relative_humidity", "wind_speed_kph")
+COMPACT_FLOAT_COLUMNS = ("pm25", "pm10", *WEATHER_COLUMNS)
+LOCATION_COLUMNS = ("latitude", "longitude")
+SKILL_CURVE_COLUMNS = ("lead_hours", "revision_count", "pm25_mae", "us_aqi_mae")
 
 
 @dataclass(frozen=True)
@@ -99,8 +106,129 @@ def warehouse_has_mart(duckdb_path: Path) -> bool:
     return bool(table_count and table_count[0])
 
 
-def load_hourly_aqi(duckdb_path: Path) -> pd.DataFrame:
-    with duckdb.connect(str(duckdb_path), read_only=True) as connection:
+@contextmanager
+def _read_connection(
+    duckdb_path: Path,
+    connection: duckdb.DuckDBPyConnection | None = None,
+) -> Iterator[duckdb.DuckDBPyConnection]:
+    # DuckDB refuses a read-only connection to a file the same process already holds
+    # read-write, so a long-lived writer lends its own connection through a cursor.
+    if connection is not None:
+        with connection.cursor() as cursor:
+            yield cursor
+        return
+    with duckdb.connect(str(duckdb_path), read_only=True) as read_only:
+        yield read_only
+
+
+def load_forecast_skill_curve(
+    duckdb_path: Path,
+    connection: duckdb.DuckDBPyConnection | None = None,
+) -> pd.DataFrame:
+    # Realised hours only; the mart already holds each revision's error, so the curve is a
+    # small aggregate over its revision lists rather than a scan of silver.
+    with _read_connection(duckdb_path, connection) as connection:
+        has_skill_mart = connection.execute(
+            """
+            select count(*)
+            from information_schema.tables
+            where table_schema = 'main' and table_name = 'fct_aqi_forecast_skill'
+            """
+        ).fetchone()[0]
+        if not has_skill_mart:
+            return pd.DataFrame(columns=list(SKILL_CURVE_COLUMNS))
+        return connection.execute(
+            """
+            select
+                revision.lead_hours,
+                count(*) as revision_count,
+                avg(abs(revision.pm25_error)) as pm25_mae,
+                avg(abs(revision.us_aqi_error)) as us_aqi_mae
+            from fct_aqi_forecast_skill,
+                unnest(revisions) as revisions(revision)
+            where is_realised and revision.lead_hours > 0
+            group by revision.lead_hours
+            order by revision.lead_hours
+            """
+        ).fetchdf()
+
+
+def load_mart_date_bounds(
+    duckdb_path: Path,
+    connection: duckdb.DuckDBPyConnection | None = None,
+) -> tuple[date, date, int] | None:
+    with _read_connection(duckdb_path, connection) as connection:
+        row = connection.execute(
+            """
+            select min(forecast_date_local), max(forecast_date_local), count(*)
+            from fct_aqi_hourly
+            """
+        ).fetchone()
+
+    if not row or not row[2]:
+        return None
+    return row[0], row[1], int(row[2])
+
+
+def default_date_window(start_date: date, end_date: date, window_days: int) -> tuple[date, date]:
+    if window_days < 1:
+        raise ValueError("window_days must be at least 1.")
+    return max(start_date, end_date - timedelta(days=window_days - 1)), end_date
+
+
+def load_hourly_aqi(
+    duckdb_path: Path,
+    compact: bool = False,
+    start_date: date | None = None,
+    end_date: date | None = None,
+    connection: duckdb.DuckDBPyConnection | None = None,
+) -> pd.DataFrame:
+    with span("dashboard_load", table="fct_aqi_hourly", compact=compact) as load_span:
+        hourly = _query_hourly_aqi(duckdb_path, start_date, end_date, connection)
+        if compact:
+            hourly = compact_hourly_frame(hourly)
+        else:
+            hourly["forecast_date_local"] = hourly["forecast_date_local"].dt.date
+        load_span.set(row_count=len(hourly))
+    return hourly
+
+
+def compact_hourly_frame(hourly: pd.DataFrame) -> pd.DataFrame:
+    # Each Streamlit replica caches this frame, so keep it free of per-row Python objects:
+    # float32 metrics, nullable int16 AQI, datetime64 dates, and categorical constants. The
+    # coordinates stay columns, as categoricals of their few exact values, so they survive
+    # filters, concats, and merges that would drop frame-level metadata.
+    compact = hourly.copy()
+    for column in COMPACT_FLOAT_COLUMNS:
+        compact[column] = compact[column].astype("float32")
+    compact["us_aqi"] = compact["us_aqi"].round().astype("Int16")
+    compact["forecast_date_local"] = pd.to_datetime(compact["forecast_date_local"])
+    for column in ("source_system", *LOCATION_COLUMNS):
+        compact[column] = compact[column].astype("category")
+    return compact
+
+
+def get_row_coordinates(row: pd.Series) -> tuple[float, float]:
+    return float(row["latitude"]), float(row["longitude"])
+
+
+def _query_hourly_aqi(
+    duckdb_path: Path,
+    start_date: date | None = None,
+    end_date: date | None = None,
+    connection: duckdb.DuckDBPyConnection | None = None,
+) -> pd.DataFrame:
+    date_filters = []
+    parameters = []
+    if start_date is not None:
+        date_filters.append("forecast_date_local >= ?")
+        parameters.append(start_date)
+    if end_date is not None:
+        date_filters.append("forecast_date_local <= ?")
+        parameters.append(end_date)
+    where_clause = f"where {' and '.join(date_filters)}" if date_filters else ""
+
+    with _read_connection(duckdb_path, connection) as connection:
         available_columns = {
             row[1] for row in connection.execute("pragma table_info('fct_aqi_hourly')").fetchall()
         }
@@ -122,12 +250,14 @@ def load_hourly_aqi(duckdb_path: Path) -> pd.DataFrame:
                 latitude,
                 longitude
             from fct_aqi_hourly
+            {where_clause}
             order by forecast_timestamp_local
-            """
+            """,
+            parameters,
         ).fetchdf()
 
     hourly["forecast_timestamp_local"] = pd.to_datetime(hourly["forecast_timestamp_local"])
-    hourly["forecast_date_local"] = pd.to_datetime(hourly["forecast_date_local"]).dt.date
+    hourly["forecast_date_local"] = pd.to_datetime(hourly["forecast_date_local"])
     hourly["last_ingested_at_utc"] = pd.to_datetime(hourly["last_ingested_at_utc"], utc=True)
     return hourly
 
@@ -156,6 +286,30 @@ def is_data_stale(
     return reference_timestamp - ingestion_timestamp > max_age
 
 
+def build_hero_summary(hourly: pd.DataFrame) -> dict[str, Any]:
+    if hourly.empty:
+        return {}
+
+    next_row = hourly.iloc[0]
+    comparison_row = hourly.iloc[1] if len(hourly) > 1 else next_row
+    return {
+        "forecast_time": next_row["forecast_timestamp_local"].strftime("%Y-%m-%d %H:%M"),
+        "us_aqi": _optional_float(next_row["us_aqi"]),
+        "aqi_delta": _optional_float(next_row["us_aqi"] - comparison_row["us_aqi"]),
+        "peak_aqi": _optional_float(hourly["us_aqi"].max()),
+        "avg_pm25": _optional_float(hourly["pm25"].mean()),
+        **{
+            column: _optional_float(next_row[column]) if column in hourly.columns else None
+            for column in WEATHER_COLUMNS
+        },
+        "last_ingested_at_utc": pd.Timestamp(hourly["last_ingested_at_utc"].max()).isoformat(),
+    }
+
+
+def _optional_float(value: Any) -> float | None:
+    return None if value is None or pd.isna(value) else float(value)
+
+
 def build_daily_summary(hourly: pd.DataFrame) -> pd.DataFrame:
     if hourly.empty:
         return pd.DataFrame(
@@ -230,12 +384,13 @@ def build_status_rows(hourly: pd.DataFrame) -> list[dict[str, Any]]:
 
     latest_row = hourly.iloc[0]
     peak_row = hourly.loc[hourly["us_aqi"].idxmax()]
+    latitude, longitude = get_row_coordinates(latest_row)
 
     status_rows = [
         {"label": "Source system", "value": str(latest_row["source_system"])},
         {
             "label": "Coordinates",
-            "value": f'{latest_row["latitude"]:.2f}, {latest_row["longitude"]:.2f}',
+            "value": f"{latitude:.2f}, {longitude:.2f}",
         },
         {
             "label": "Peak forecast hour",
@@ -260,7 +415,8 @@ def build_map_frame(hourly: pd.DataFrame) -> pd.DataFrame:
     if hourly.empty:
         return pd.DataFrame(columns=["latitude", "longitude", "us_aqi"])
 
-    latest_row = hourly.iloc[[0]][["latitude", "longitude", "us_aqi"]].copy()
-    latest_row["latitude"] = latest_row["latitude"].astype(float)
-    latest_row["longitude"] = latest_row["longitude"].astype(float)
-    return latest_row
+    latitude, longitude = get_row_coordinates(hourly.iloc[0])
+    map_frame = hourly.iloc[[0]][["us_aqi"]].astype(float)
+    map_frame.insert(0, "latitude", latitude)
+    map_frame.insert(1, "longitude", longitude)
+    return map_frame
@@ -0,0 +1,226 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+from collections.abc import Iterator, Sequence
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from bangkok_aqi.config import get_repo_root
+from bangkok_aqi.instrumentation import span
+
+LOGGER = logging.getLogger(__name__)
+DBT_LAYER_PATHS = {
+    "silver": "models/staging",
+    "gold": "models/marts",
+}
+DBT_LAYER_ORDER = ("silver", "gold")
+FAILED_DBT_STATUSES = frozenset({"error", "fail", "runtime error"})
+DQ_MODES = ("window", "full")
+DEFAULT_DQ_WINDOW_HOURS = 24
+
+# Parsed manifests keyed by project directory. A warm process (for example a long-lived
+# worker) reuses the manifest instead of re-parsing; cold processes still benefit from
+# dbt's partial-parse file in the project's target directory.
+_MANIFEST_CACHE: dict[Path, tuple[float, Any]] = {}
+
+
+class DbtBuildError(RuntimeError):
+    """Raised when an in-process dbt build has failing models or tests."""
+
+    def __init__(self, failures: dict[str, list[str]]):
+        self.failures = failures
+        summary = "; ".join(
+            f"{layer}: {', '.join(node_failures)}" for layer, node_failures in failures.items()
+        )
+        super().__init__(f"dbt build failed ({summary})")
+
+
+@dataclass(frozen=True)
+class DbtNodeResult:
+    unique_id: str
+    layer: str
+    status: str
+    execution_time: float
+    message: str | None = None
+
+    @property
+    def failed(self) -> bool:
+        return self.status in FAILED_DBT_STATUSES
+
+
+def get_dbt_project_dir() -> Path:
+    return get_repo_root() / "dbt"
+
+
+def build_layer_selectors(layers: Sequence[str] = DBT_LAYER_ORDER) -> list[str]:
+    return [f"path:{DBT_LAYER_PATHS[layer]}" for layer in layers]
+
+
+@contextmanager
+def _working_directory(path: Path) -> Iterator[None]:
+    # The dbt profile and glob vars fall back to repo-relative paths, exactly as they do for
+    # `make dbt-build`, so run from the repo root whatever the caller's cwd is.
+    previous = Path.cwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+
+def _project_fingerprint(project_dir: Path) -> float:
+    return max(
+        (
+            file_path.stat().st_mtime
+            for pattern in ("*.yml", "models/**/*", "tests/**/*", "macros/**/*")
+            for file_path in project_dir.glob(pattern)
+            if file_path.is_file()
+        ),
+        default=0.0,
+    )
+
+
+def _dbt_args(command: str, project_dir: Path, *extra: str) -> list[str]:
+    return [command, "--project-dir", str(project_dir), "--profiles-dir", str(project_dir), *extra]
+
+
+def load_dbt_manifest(project_dir: Path | None = None) -> Any:
+    from dbt.cli.main import dbtRunner
+
+    active_project_dir = project_dir or get_dbt_project_dir()
+    fingerprint = _project_fingerprint(active_project_dir)
+    cached = _MANIFEST_CACHE.get(active_project_dir)
+    if cached is not None and cached[0] == fingerprint:
+        return cached[1]
+
+    with span("dbt_parse", runner="in-process"):
+        result = dbtRunner().invoke(_dbt_args("parse", active_project_dir))
+    if not result.success:
+        raise RuntimeError(f"dbt parse failed: {result.exception}")
+
+    _MANIFEST_CACHE[active_project_dir] = (fingerprint, result.result)
+    return result.result
+
+
+def classify_node_layer(node: Any, manifest: Any) -> str:
+    layer = _layer_from_path(getattr(node, "original_file_path", ""))
+    if layer is not None:
+        return layer
+
+    # Tests live outside the model directories, so they inherit the latest layer among the
+    # models they depend on; a singular test over the mart is reported as a gold failure.
+    upstream_layers = {
+        _layer_from_path(getattr(manifest.nodes.get(upstream_id), "original_file_path", ""))
+        for upstream_id in getattr(node.depends_on, "nodes", [])
+    }
+    for candidate in reversed(DBT_LAYER_ORDER):
+        if candidate in upstream_layers:
+            return candidate
+    return DBT_LAYER_ORDER[0]
+
+
+def _layer_from_path(original_file_path: str) -> str | None:
+    for layer, layer_path in DBT_LAYER_PATHS.items():
+        if original_file_path.startswith(f"{layer_path}/"):
+            return layer
+    return None
+
+
+def summarize_dbt_results(results: Sequence[Any], manifest: Any) -> list[DbtNodeResult]:
+    return [
+        DbtNodeResult(
+            unique_id=result.node.unique_id,
+            layer=classify_node_layer(result.node, manifest),
+            status=str(getattr(result.status, "value", result.status)),
+            execution_time=result.execution_time,
+            message=result.message,
+        )
+        for result in results
+    ]
+
+
+def group_failures_by_layer(node_results: Sequence[DbtNodeResult]) -> dict[str, list[str]]:
+    failures: dict[str, list[str]] = {}
+    for node_result in node_results:
+        if node_result.failed:
+            failures.setdefault(node_result.layer, []).append(node_result.unique_id)
+    return {layer: failures[layer] for layer in DBT_LAYER_ORDER if layer in failures}
+
+
+def run_dbt_build(
+    layers: Sequence[str] = DBT_LAYER_ORDER,
+    project_dir: Path | None = None,
+    extra_args: Sequence[str] = (),
+) -> list[DbtNodeResult]:
+    from dbt.cli.main import dbtRunner
+
+    active_project_dir = project_dir or get_dbt_project_dir()
+    with _working_directory(active_project_dir.parent):
+        manifest = load_dbt_manifest(active_project_dir)
+        with span("dbt_build", runner="in-process") as build_span:
+            result = dbtRunner(manifest=manifest).invoke(
+                _dbt_args(
+                    "build",
+                    active_project_dir,
+                    "--select",
+                    *build_layer_selectors(layers),
+                    *extra_args,
+                )
+            )
+            if result.exception is not None:
+                raise RuntimeError(f"dbt build could not run: {result.exception}")
+            node_results = summarize_dbt_results(result.result.results, manifest)
+            build_span.set(row_count=len(node_results))
+
+    for node_result in node_results:
+        LOGGER.info(
+            "dbt %s %s [%s] in %.2fs",
+            node_result.layer,
+            node_result.unique_id,
+            node_result.status,
+            node_result.execution_time,
+        )
+
+    failures = group_failures_by_layer(node_results)
+    if failures:
+        raise DbtBuildError(failures)
+    return node_results
+
+
+def run_dbt_quality_checks(
+    mode: str = "full",
+    window_hours: int = DEFAULT_DQ_WINDOW_HOURS,
+    project_dir: Path | None = None,
+) -> list[DbtNodeResult]:
+    from dbt.cli.main import dbtRunner
+
+    if mode not in DQ_MODES:
+        raise ValueError(f"Unknown data-quality mode {mode!r}.")
+
+    # Tests only, against the models already built; the on-run-end hook appends the
+    # outcomes to dq_test_results alongside those of the hourly builds.
+    active_project_dir = project_dir or get_dbt_project_dir()
+    with _working_directory(active_project_dir.parent):
+        manifest = load_dbt_manifest(active_project_dir)
+        with span("dbt_test", runner="in-process", dq_mode=mode) as test_span:
+            result = dbtRunner(manifest=manifest).invoke(
+                _dbt_args(
+                    "test",
+                    active_project_dir,
+                    "--vars",
+                    json.dumps({"dq_mode": mode, "dq_window_hours": window_hours}),
+                )
+            )
+            if result.exception is not None:
+                raise RuntimeError(f"dbt test could not run: {result.exception}")
+            node_results = summarize_dbt_results(result.result.results, manifest)
+            test_span.set(row_count=len(node_results))
+
+    failures = group_failures_by_layer(node_results)
+    if failures:
+        raise DbtBuildError(failures)
+    return node_results
@@ -0,0 +1,248 @@
+from __future__ import annotations
+
+import base64
+import hashlib
+import json
+import logging
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import PurePosixPath
+from typing import Any, BinaryIO
+
+import ijson
+import numpy as np
+from azure.core.exceptions import ResourceNotFoundError
+
+from bangkok_aqi.storage import StorageClient
+
+LOGGER = logging.getLogger(__name__)
+DELTA_HEAD_PREFIX = "state/bronze_delta"
+# The staged body is re-read in small buffers: the parser materializes each buffer's events.
+STAGED_READ_BYTES = 8 * 1024
+# Eight bytes per forecast hour keeps a collision between any two hours negligible.
+ROW_DIGEST_BYTES = 8
+
+
+@dataclass(frozen=True)
+class DeltaEncoding:
+    object_path: str
+    is_baseline: bool
+    stored_hours: int
+    window_hours: int
+
+
+def build_delta_head_path(dataset: str) -> str:
+    return f"{DELTA_HEAD_PREFIX}/{dataset}.json"
+
+
+def encode_delta_payload(previous: dict[str, Any], payload: dict[str, Any]) -> dict[str, Any]:
+    # Only hours that are new or whose values changed since the previous ingest are kept,
+    # plus the window's last hour, so every file still stages a silver row recording its
+    # window. Silver fills the omitted hours from their previous revision.
+    hourly = payload["hourly"]
+    columns = list(hourly)
+    previous_hourly = previous["hourly"]
+    previous_rows = {
+        row[0]: row[1:]
+        for row in zip(*(previous_hourly.get(column, []) for column in columns), strict=True)
+    }
+    rows = list(zip(*(hourly[column] for column in columns), strict=True))
+    kept = [
+        row
+        for index, row in enumerate(rows)
+        if index == len(rows) - 1 or previous_rows.get(row[0]) != row[1:]
+    ]
+    return {
+        **{key: value for key, value in payload.items() if key != "hourly"},
+        "hourly": {
+            column: [row[position] for row in kept] for position, column in enumerate(columns)
+        },
+        "delta": {"window_start": hourly["time"][0], "window_end": hourly["time"][-1]},
+    }
+
+
+def _load_delta_head(storage: StorageClient, dataset: str) -> dict[str, Any] | None:
+    try:
+        return json.loads(storage.read_bytes(build_delta_head_path(dataset)))
+    except (FileNotFoundError, ResourceNotFoundError):
+        return None
+
+
+def _latest_object_before(
+    storage: StorageClient,
+    dataset: str,
+    object_path: str,
+    ingested_at: datetime,
+) -> str | None:
+    # Object names embed their ingest time, so the previous object sorts just before this
+    # one within the same or the previous ingest_date partition.
+    earlier = [
+        path
+        for day in (ingested_at - timedelta(days=1), ingested_at)
+        for path in storage.list_files(f"raw/{dataset}/ingest_date={day:%Y-%m-%d}/")
+        if PurePosixPath(path).name < PurePosixPath(object_path).name
+    ]
+    return max(earlier, key=lambda path: PurePosixPath(path).name, default=None)
+
+
+@dataclass(frozen=True)
+class PayloadDigest:
+    latitude: float | None
+    longitude: float | None
+    window: dict[str, str]
+    # One digest per forecast hour over its time and values, ROW_DIGEST_BYTES each.
+    row_digests: bytearray
+
+    def __len__(self) -> int:
+        return len(self.row_digests) // ROW_DIGEST_BYTES
+
+
+def digest_payload(staged: BinaryIO) -> PayloadDigest:
+    # The hourly arrays arrive one column after another, so each hour's digest is folded
+    # forward a value at a time; that is all a later ingest needs to tell which hours
+    # changed, and it costs a few bytes per hour instead of the parsed payload.
+    coordinates: dict[str, float] = {}
+    window: dict[str, str] = {}
+    row_digests = bytearray()
+    indexes: dict[str, int] = {}
+    for prefix, event, value in ijson.parse(staged, buf_size=STAGED_READ_BYTES, use_float=True):
+        if prefix in ("latitude", "longitude") and event == "number":
+            coordinates[prefix] = value
+        elif prefix.startswith("hourly.") and prefix.endswith(".item"):
+            column = prefix[len("hourly.") : -len(".item")]
+            index = indexes[column] = indexes.get(column, -1) + 1
+            if column == "time":
+                window.setdefault("window_start", value)
+                window["window_end"] = value
+            offset = index * ROW_DIGEST_BYTES
+            if offset >= len(row_digests):
+                row_digests.extend(bytes(offset + ROW_DIGEST_BYTES - len(row_digests)))
+            row_digests[offset : offset + ROW_DIGEST_BYTES] = hashlib.blake2b(
+                row_digests[offset : offset + ROW_DIGEST_BYTES]
+                + f"{column}={value!r}".encode(),
+                digest_size=ROW_DIGEST_BYTES,
+            ).digest()
+    return PayloadDigest(
+        coordinates.get("latitude"),
+        coordinates.get("longitude"),
+        window,
+        row_digests,
+    )
+
+
+def _write_delta_payload(
+    staged: BinaryIO,
+    kept: bytearray,
+    window: dict[str, str],
+    write: Callable[[bytes], object],
+) -> None:
+    # Re-emits the staged payload event by event, dropping the hourly items that are not
+    # kept and appending the delta envelope, so the delta is written without loading it.
+    buffer: list[str] = []
+    # Per open container: whether it is a map, values written, and items seen.
+    stack: list[list[Any]] = []
+
+    def emit(text: str) -> None:
+        buffer.append(text)
+        if len(buffer) >= 1024:
+            write("".join(buffer).encode())
+            buffer.clear()
+
+    def open_value() -> None:
+        if stack and not stack[-1][0]:
+            if stack[-1][1]:
+                emit(",")
+            stack[-1][1] += 1
+
+    for prefix, event, value in ijson.parse(staged, buf_size=STAGED_READ_BYTES, use_float=True):
+        if event == "map_key":
+            emit(f"{',' if stack[-1][1] else ''}{json.dumps(value, ensure_ascii=False)}:")
+            stack[-1][1] += 1
+            continue
+        if event in ("end_map", "end_array"):
+            if event == "end_map" and len(stack) == 1:
+                emit(f',"delta":{json.dumps(window, ensure_ascii=False)}')
+            stack.pop()
+            emit("}" if event == "end_map" else "]")
+            continue
+        if prefix.startswith("hourly.") and prefix.endswith(".item"):
+            stack[-1][2] += 1
+            if not kept[stack[-1][2] - 1]:
+                continue
+        open_value()
+        if event in ("start_map", "start_array"):
+            stack.append([event == "start_map", 0, 0])
+            emit("{" if event == "start_map" else "[")
+        else:
+            emit(json.dumps(value, ensure_ascii=False))
+    write("".join(buffer).encode())
+
+
+def encode_bronze_object(
+    storage: StorageClient,
+    dataset: str,
+    object_path: str,
+    ingested_at: datetime,
+    baseline_hours: int,
+    staged: BinaryIO,
+) -> DeltaEncoding:
+    # The fetched body is staged outside bronze, so the object is committed once, already
+    # encoded, and the head only moves after it has landed.
+    digest = digest_payload(staged)
+    head = _load_delta_head(storage, dataset)
+    # A delta is only safe against the object landed immediately before this one; anything
+    # else (no head yet, a failed or out-of-band write, a moved location, an expired
+    # baseline) starts a new baseline instead.
+    is_baseline = (
+        head is None
+        or "row_digests" not in head
+        or head["object_path"] != _latest_object_before(storage, dataset, object_path, ingested_at)
+        or (head["latitude"], head["longitude"]) != (digest.latitude, digest.longitude)
+        or ingested_at - datetime.fromisoformat(head["baseline_ingested_at"])
+        >= timedelta(hours=baseline_hours)
+    )
+
+    kept = bytearray(b"\x01" * len(digest))
+    if not is_baseline:
+        current = np.frombuffer(digest.row_digests, dtype=np.uint64)
+        previous = np.sort(np.frombuffer(base64.b64decode(head["row_digests"]), dtype=np.uint64))
+        positions = np.minimum(np.searchsorted(previous, current), previous.size - 1)
+        changed = previous[positions] != current
+        changed[-1] = True
+        kept = bytearray(changed.tobytes())
+    staged.seek(0)
+    with storage.open_write_stream(object_path) as write:
+        if is_baseline:
+            while chunk := staged.read(STAGED_READ_BYTES):
+                write(chunk)
+        else:
+            _write_delta_payload(staged, kept, digest.window, write)
+    storage.save_bytes(
+        build_delta_head_path(dataset),
+        json.dumps(
+            {
+                "object_path": object_path,
+                "baseline_ingested_at": (
+                    ingested_at.isoformat() if is_baseline else head["baseline_ingested_at"]
+                ),
+                "latitude": digest.latitude,
+                "longitude": digest.longitude,
+                "row_digests": base64.b64encode(digest.row_digests).decode(),
+            },
+        ).encode(),
+    )
+    encoding = DeltaEncoding(
+        object_path=object_path,
+        is_baseline=is_baseline,
+        stored_hours=sum(kept),
+        window_hours=len(digest),
+    )
+    LOGGER.info(
+        "Stored %s as a %s with %s of %s forecast hour(s)",
+        object_path,
+        "baseline" if is_baseline else "delta",
+        encoding.stored_hours,
+        encoding.window_hours,
+    )
+    return encoding
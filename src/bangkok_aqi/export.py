@@ -0,0 +1,247 @@
+from __future__ import annotations
+
+import json
+import logging
+import tempfile
+from dataclasses import dataclass
+from datetime import date
+from pathlib import Path
+from typing import Any
+
+import duckdb
+from azure.core.exceptions import ResourceNotFoundError
+
+from bangkok_aqi.config import Settings, get_settings
+from bangkok_aqi.instrumentation import span
+from bangkok_aqi.storage import StorageClient
+
+LOGGER = logging.getLogger(__name__)
+EXPORT_PREFIX = "gold/fct_aqi_hourly"
+EXPORT_MANIFEST_PATH = f"{EXPORT_PREFIX}/_manifest.json"
+EXPORT_FILE_NAME = "part-0.parquet"
+
+# last_ingested_at_utc tracks AQI revisions, but a weather-only revision rewrites a row
+# without moving it, so each partition is fingerprinted by its watermark plus a content hash.
+PARTITION_FINGERPRINT_SQL = """
+    select
+        forecast_date_local,
+        max(last_ingested_at_utc) as last_ingested_at_utc,
+        count(*) as row_count,
+        bit_xor(hash(fct_aqi_hourly)) as content_hash
+    from fct_aqi_hourly
+    {where_clause}
+    group by forecast_date_local
+"""
+PARTITION_ROW_COUNTS_SQL = """
+    select forecast_date_local, count(*)
+    from fct_aqi_hourly
+    group by forecast_date_local
+"""
+# Only partitions an ingest since the last export could have touched are hashed again: AQI
+# revisions move the mart's last_ingested_at_utc, and a weather file touches the dates of
+# the window its last row carries. Partitions that gained or lost rows, as a backfill
+# stamped in the past can make them, are caught by their row counts.
+TOUCHED_PARTITIONS_SQL = """
+    select forecast_date_local
+    from fct_aqi_hourly
+    where last_ingested_at_utc > ?
+    union
+    select cast(
+        unnest(
+            generate_series(
+                cast(window_start_local as date),
+                cast(window_end_local as date),
+                interval 1 day
+            )
+        ) as date
+    )
+    from stg_weather_hourly
+    where ingested_at_utc > ? and forecast_timestamp_local = window_end_local
+"""
+WATERMARKS_SQL = """
+    select
+        (select max(last_ingested_at_utc) from fct_aqi_hourly),
+        (select max(ingested_at_utc) from stg_weather_hourly)
+"""
+
+
+@dataclass(frozen=True)
+class ExportResult:
+    written_partitions: tuple[date, ...]
+    deleted_partitions: tuple[date, ...]
+    unchanged_partitions: int
+    total_bytes: int
+
+
+def build_partition_path(forecast_date: date) -> str:
+    return f"{EXPORT_PREFIX}/forecast_date_local={forecast_date.isoformat()}/{EXPORT_FILE_NAME}"
+
+
+def _load_manifest(storage: StorageClient) -> dict[str, Any]:
+    try:
+        return json.loads(storage.read_bytes(EXPORT_MANIFEST_PATH))
+    except (FileNotFoundError, ResourceNotFoundError):
+        return {"partitions": {}}
+
+
+def _fingerprint_partitions(
+    connection: duckdb.DuckDBPyConnection,
+    partitions: list[str] | None = None,
+) -> dict[str, dict[str, object]]:
+    where_clause = (
+        "" if partitions is None else "where forecast_date_local in (select unnest(?::date[]))"
+    )
+    return {
+        forecast_date.isoformat(): {
+            "last_ingested_at_utc": last_ingested_at.isoformat(),
+            "row_count": row_count,
+            "content_hash": str(content_hash),
+        }
+        for forecast_date, last_ingested_at, row_count, content_hash in connection.execute(
+            PARTITION_FINGERPRINT_SQL.format(where_clause=where_clause),
+            [] if partitions is None else [partitions],
+        ).fetchall()
+    }
+
+
+def _current_partitions(
+    connection: duckdb.DuckDBPyConnection,
+    manifest: dict[str, Any],
+) -> dict[str, dict[str, object]]:
+    previous = manifest["partitions"]
+    watermarks = manifest.get("watermarks")
+    # Manifests from before the watermarks, and warehouses without silver, hash every
+    # partition.
+    if not previous or not watermarks or not _has_weather_silver(connection):
+        return _fingerprint_partitions(connection)
+
+    row_counts = {
+        forecast_date.isoformat(): row_count
+        for forecast_date, row_count in connection.execute(PARTITION_ROW_COUNTS_SQL).fetchall()
+    }
+    touched = {
+        forecast_date.isoformat()
+        for (forecast_date,) in connection.execute(
+            TOUCHED_PARTITIONS_SQL,
+            [watermarks["last_ingested_at_utc"], watermarks["weather_ingested_at_utc"]],
+        ).fetchall()
+    }
+    touched.update(
+        partition
+        for partition, row_count in row_counts.items()
+        if partition not in previous or previous[partition]["row_count"] != row_count
+    )
+    current = {
+        partition: previous[partition] for partition in row_counts if partition not in touched
+    }
+    if touched:
+        current.update(_fingerprint_partitions(connection, sorted(touched & set(row_counts))))
+    return current
+
+
+def _has_weather_silver(connection: duckdb.DuckDBPyConnection) -> bool:
+    row = connection.execute(
+        """
+        select count(*)
+        from information_schema.tables
+        where table_schema = 'main' and table_name = 'stg_weather_hourly'
+        """
+    ).fetchone()
+    return bool(row and row[0])
+
+
+def export_mart_parquet(
+    settings: Settings | None = None,
+    full_refresh: bool = False,
+    storage: StorageClient | None = None,
+) -> ExportResult:
+    active_settings = settings or get_settings()
+    active_storage = storage or StorageClient(active_settings)
+    manifest = {"partitions": {}} if full_refresh else _load_manifest(active_storage)
+    previous = manifest["partitions"]
+
+    with span("export_parquet", backend=active_storage.backend_name) as export_span:
+        with duckdb.connect(str(active_settings.duckdb_path), read_only=True) as connection:
+            watermarks = None
+            if _has_weather_silver(connection):
+                # Read before the fingerprints, so a later ingest is at worst looked at twice.
+                last_ingested_at, weather_ingested_at = connection.execute(
+                    WATERMARKS_SQL
+                ).fetchone()
+                if last_ingested_at is not None and weather_ingested_at is not None:
+                    watermarks = {
+                        "last_ingested_at_utc": last_ingested_at.isoformat(),
+                        "weather_ingested_at_utc": weather_ingested_at.isoformat(),
+                    }
+            current = _current_partitions(connection, manifest)
+            changed = sorted(
+                partition
+                for partition, state in current.items()
+                if previous.get(partition) != state
+            )
+            deleted = sorted(set(previous) - set(current))
+
+            total_bytes = 0
+            if changed:
+                with tempfile.TemporaryDirectory() as temp_dir:
+                    # Rows are sorted by timestamp within each file so row-group min/max
+                    # statistics stay tight for readers filtering on time.
+                    connection.execute(
+                        f"""
+                        copy (
+                            select *
+                            from fct_aqi_hourly
+                            where forecast_date_local in (select unnest(?::date[]))
+                            order by forecast_timestamp_local, latitude, longitude
+                        ) to '{temp_dir}' (
+                            format parquet,
+                            compression zstd,
+                            partition_by (forecast_date_local),
+                            filename_pattern 'part-{{i}}'
+                        )
+                        """,
+                        [changed],
+                    )
+                    for partition in changed:
+                        partition_date = date.fromisoformat(partition)
+                        content = (
+                            Path(temp_dir) / f"forecast_date_local={partition}" / EXPORT_FILE_NAME
+                        ).read_bytes()
+                        active_storage.save_bytes(build_partition_path(partition_date), content)
+                        total_bytes += len(content)
+
+        active_storage.delete_files(
+            build_partition_path(date.fromisoformat(partition)) for partition in deleted
+        )
+        # The manifest is written last, so an interrupted export is simply redone next time.
+        active_storage.save_bytes(
+            EXPORT_MANIFEST_PATH,
+            json.dumps(
+                {"partitions": current, "watermarks": watermarks}, indent=2, sort_keys=True
+            ).encode(),
+        )
+        export_span.set(
+            row_count=sum(current[partition]["row_count"] for partition in changed),
+            payload_bytes=total_bytes,
+        )
+
+    return ExportResult(
+        written_partitions=tuple(date.fromisoformat(partition) for partition in changed),
+        deleted_partitions=tuple(date.fromisoformat(partition) for partition in deleted),
+        unchanged_partitions=len(current) - len(changed),
+        total_bytes=total_bytes,
+    )
+
+
+def run_export(full_refresh: bool = False) -> ExportResult:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    result = export_mart_parquet(full_refresh=full_refresh)
+    LOGGER.info(
+        "Exported %s changed partition(s) (%.1f KiB), deleted %s, left %s unchanged",
+        len(result.written_partitions),
+        result.total_bytes / 1024,
+        len(result.deleted_partitions),
+        result.unchanged_partitions,
+    )
+    return result
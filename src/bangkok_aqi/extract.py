@@ -1,29 +1,53 @@
 from __future__ import annotations
 
+import hashlib
 import logging
-from dataclasses import dataclass
-from datetime import datetime, timezone
-from typing import Any
-
+import tempfile
+import time
+from collections.abc import Callable
+from contextlib import nullcontext
+from dataclasses import dataclass, replace
+from datetime import date, datetime, timezone
+from functools import partial
+from typing import Any, BinaryIO
+
+import ijson
 import pandas as pd
 import requests
 from requests import Session
-from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
 from bangkok_aqi.config import Settings, get_settings
+from bangkok_aqi.delta import encode_bronze_object
+from bangkok_aqi.http_cache import (
+    HttpCache,
+    build_cache_entry,
+    build_cache_key,
+    build_http_cache,
+)
+from bangkok_aqi.instrumentation import span
+from bangkok_aqi.scheduler import (
+    RequestScheduler,
+    ScheduledHTTPAdapter,
+    build_scheduler_config,
+    get_request_scheduler,
+)
+from bangkok_aqi.schemas import BRONZE_SCHEMAS, BronzeSchema
 from bangkok_aqi.storage import StorageClient
 
 LOGGER = logging.getLogger(__name__)
-AIR_QUALITY_URL = "https://air-quality-api.open-meteo.com/v1/air-quality"
-WEATHER_FORECAST_URL = "https://api.open-meteo.com/v1/forecast"
-REQUIRED_HOURLY_COLUMNS = ("time", "pm2_5", "pm10", "us_aqi")
-METRIC_COLUMNS = ("pm2_5", "pm10", "us_aqi")
-REQUIRED_WEATHER_COLUMNS = ("time", "temperature_2m", "relative_humidity_2m", "wind_speed_10m")
+REQUIRED_HOURLY_COLUMNS = BRONZE_SCHEMAS["aqi"].hourly_columns
+METRIC_COLUMNS = BRONZE_SCHEMAS["aqi"].metric_columns
+REQUIRED_WEATHER_COLUMNS = BRONZE_SCHEMAS["weather"].hourly_columns
 RAW_DATASET_FILE_PREFIXES = {
     "aqi": "bangkok_aqi_raw",
     "weather": "bangkok_weather_raw",
 }
+STREAM_CHUNK_BYTES = 64 * 1024
+# One of these events per array element, whatever the element holds.
+JSON_VALUE_START_EVENTS = frozenset(
+    {"null", "boolean", "integer", "double", "number", "string", "start_map", "start_array"}
+)
 
 
 class AQIPayloadValidationError(ValueError):
@@ -36,52 +60,121 @@ class RawPayload:
     content: bytes
 
 
-def build_session() -> Session:
+@dataclass(frozen=True)
+class StreamedPayload:
+    object_path: str
+    payload_bytes: int
+    not_modified: bool = False
+    content_sha256: str | None = None
+
+
+class _UnchangedPayload(Exception):
+    pass
+
+
+def build_session(
+    settings: Settings | None = None,
+    scheduler: RequestScheduler | None = None,
+) -> Session:
+    active_scheduler = scheduler or get_request_scheduler(
+        build_scheduler_config(settings or get_settings())
+    )
     session = requests.Session()
+    # urllib3 only retries connection and read errors; 429 and 5xx responses go back
+    # through the scheduler, which honours Retry-After and shares the rate budget.
     retry = Retry(
         total=3,
         connect=3,
         read=3,
+        respect_retry_after_header=False,
         backoff_factor=1,
-        status_forcelist=(429, 500, 502, 503, 504),
         allowed_methods=frozenset({"GET"}),
     )
-    adapter = HTTPAdapter(max_retries=retry)
+    adapter = ScheduledHTTPAdapter(active_scheduler, max_retries=retry)
     session.mount("https://", adapter)
     session.mount("http://", adapter)
     return session
 
 
+def _count_retries(response: requests.Response) -> int:
+    retries = getattr(response.raw, "retries", None)
+    urllib3_retries = len(getattr(retries, "history", ()) or ())
+    return urllib3_retries + getattr(response, "scheduler_retries", 0)
+
+
+def _fetch_raw_payload(
+    session: Session,
+    url: str,
+    params: dict[str, Any],
+    dataset: str,
+) -> RawPayload:
+    with span("fetch", dataset=dataset) as fetch_span:
+        response = session.get(url, params=params, timeout=30)
+        response.raise_for_status()
+        content = response.content
+        fetch_span.set(payload_bytes=len(content), retry_count=_count_retries(response))
+
+    with span("parse", dataset=dataset) as parse_span:
+        payload = response.json()
+        parse_span.set(payload_bytes=len(content))
+    return RawPayload(payload=payload, content=content)
+
+
+def build_request_params(settings: Settings, dataset: str) -> dict[str, Any]:
+    return {
+        "latitude": settings.latitude,
+        "longitude": settings.longitude,
+        "hourly": BRONZE_SCHEMAS[dataset].request_hourly_param,
+        "timezone": settings.timezone_name,
+    }
+
+
 def fetch_aqi_payload(settings: Settings, session: Session | None = None) -> RawPayload:
-    active_session = session or build_session()
-    response = active_session.get(
-        AIR_QUALITY_URL,
-        params={
-            "latitude": settings.latitude,
-            "longitude": settings.longitude,
-            "hourly": "pm2_5,pm10,us_aqi",
-            "timezone": settings.timezone_name,
-        },
-        timeout=30,
+    active_session = session or build_session(settings)
+    return _fetch_raw_payload(
+        active_session,
+        settings.air_quality_url,
+        params=build_request_params(settings, "aqi"),
+        dataset="aqi",
     )
-    response.raise_for_status()
-    return RawPayload(payload=response.json(), content=response.content)
 
 
 def fetch_weather_payload(settings: Settings, session: Session | None = None) -> RawPayload:
-    active_session = session or build_session()
-    response = active_session.get(
-        WEATHER_FORECAST_URL,
-        params={
-            "latitude": settings.latitude,
-            "longitude": settings.longitude,
-            "hourly": "temperature_2m,relative_humidity_2m,wind_speed_10m",
-            "timezone": settings.timezone_name,
-        },
-        timeout=30,
+    active_session = session or build_session(settings)
+    return _fetch_raw_payload(
+        active_session,
+        settings.weather_forecast_url,
+        params=build_request_params(settings, "weather"),
+        dataset="weather",
     )
-    response.raise_for_status()
-    return RawPayload(payload=response.json(), content=response.content)
+
+
+def build_history_request(
+    settings: Settings,
+    dataset: str,
+    start_date: date,
+    end_date: date,
+) -> tuple[str, dict[str, Any]]:
+    # Past weather comes from the archive API; air quality serves history from the same
+    # endpoint as the forecast once start_date and end_date are given.
+    url = settings.air_quality_url if dataset == "aqi" else settings.weather_archive_url
+    return url, {
+        **build_request_params(settings, dataset),
+        "start_date": start_date.isoformat(),
+        "end_date": end_date.isoformat(),
+    }
+
+
+def fetch_history_payload(
+    settings: Settings,
+    dataset: str,
+    start_date: date,
+    end_date: date,
+    session: Session | None = None,
+) -> RawPayload:
+    url, params = build_history_request(settings, dataset, start_date, end_date)
+    active_session = session or build_session(settings)
+    return _fetch_raw_payload(active_session, url, params=params, dataset=dataset)
 
 
 def build_hourly_payload_frame(payload: dict[str, Any]) -> pd.DataFrame:
@@ -101,40 +194,252 @@ def build_weather_payload_frame(payload: dict[str, Any]) -> pd.DataFrame:
 
 
 def validate_hourly_payload(payload: dict[str, Any]) -> None:
-    frame = build_hourly_payload_frame(payload)
-    missing_columns = [column for column in REQUIRED_HOURLY_COLUMNS if column not in frame.columns]
-    if missing_columns:
-        formatted_columns = ", ".join(sorted(missing_columns))
-        raise AQIPayloadValidationError(
-            f"Hourly payload is missing required columns: {formatted_columns}."
-        )
+    with span("validate", dataset="aqi") as validate_span:
+        frame = build_hourly_payload_frame(payload)
+        validate_span.set(row_count=len(frame))
+        _validate_hourly_frame(frame)
 
-    if frame.empty:
-        raise AQIPayloadValidationError("Hourly payload produced an empty frame.")
 
-    parsed_timestamps = pd.to_datetime(frame["time"], errors="coerce")
-    if parsed_timestamps.isna().any():
-        raise AQIPayloadValidationError("Hourly payload contains invalid forecast timestamps.")
+def _validate_hourly_frame(frame: pd.DataFrame) -> None:
+    schema = BRONZE_SCHEMAS["aqi"]
+    _validate_schema_frame(frame, schema)
 
-    if all(frame[column].isna().all() for column in METRIC_COLUMNS):
+    if all(frame[column].isna().all() for column in schema.metric_columns):
         raise AQIPayloadValidationError("Hourly payload does not contain any non-null AQI metrics.")
 
 
 def validate_weather_payload(payload: dict[str, Any]) -> None:
-    frame = build_weather_payload_frame(payload)
-    missing_columns = [column for column in REQUIRED_WEATHER_COLUMNS if column not in frame.columns]
+    with span("validate", dataset="weather") as validate_span:
+        frame = build_weather_payload_frame(payload)
+        validate_span.set(row_count=len(frame))
+        _validate_weather_frame(frame)
+
+
+def _validate_weather_frame(frame: pd.DataFrame) -> None:
+    _validate_schema_frame(frame, BRONZE_SCHEMAS["weather"])
+
+
+class StreamingPayloadValidator:
+    """Validates the hourly arrays from JSON parser events without building the payload."""
+
+    def __init__(self, schema: BronzeSchema, require_metric: bool = False):
+        self.schema = schema
+        self.require_metric = require_metric
+        self.has_hourly = False
+        self.column_lengths: dict[str, int] = {}
+        self.populated_columns: set[str] = set()
+        # Parser prefixes repeat once per element, so each is split only once.
+        self._prefix_parts: dict[str, tuple[str, str] | None] = {}
+
+    @property
+    def row_count(self) -> int:
+        return max(self.column_lengths.values(), default=0)
+
+    def feed(self, prefix: str, event: str, value: Any) -> None:
+        if prefix == "hourly" and event == "map_key":
+            self.has_hourly = True
+            return
+        try:
+            parts = self._prefix_parts[prefix]
+        except KeyError:
+            parts = self._prefix_parts[prefix] = _split_hourly_prefix(prefix)
+        if parts is None:
+            return
+
+        column, item = parts
+        if not item and event == "start_array":
+            self.column_lengths.setdefault(column, 0)
+        elif item == "item" and event in JSON_VALUE_START_EVENTS:
+            self.column_lengths[column] = self.column_lengths.get(column, 0) + 1
+            if event != "null":
+                self.populated_columns.add(column)
+            if column == "time" and not _is_forecast_timestamp(value):
+                raise AQIPayloadValidationError(
+                    f"{self.schema.label} payload contains invalid forecast timestamps."
+                )
+
+    def finish(self) -> None:
+        if not self.has_hourly:
+            raise AQIPayloadValidationError(
+                f"{self.schema.label} payload does not contain an hourly section."
+            )
+
+        missing_columns = [
+            column for column in self.schema.hourly_columns if column not in self.column_lengths
+        ]
+        if missing_columns:
+            formatted_columns = ", ".join(sorted(missing_columns))
+            raise AQIPayloadValidationError(
+                f"{self.schema.label} payload is missing required columns: {formatted_columns}."
+            )
+        if len(set(self.column_lengths.values())) > 1:
+            raise AQIPayloadValidationError(
+                f"{self.schema.label} payload has hourly arrays of different lengths."
+            )
+        if self.row_count == 0:
+            raise AQIPayloadValidationError(f"{self.schema.label} payload produced an empty frame.")
+        if self.require_metric and not self.populated_columns & set(self.schema.metric_columns):
+            raise AQIPayloadValidationError(
+                "Hourly payload does not contain any non-null AQI metrics."
+            )
+
+
+def _split_hourly_prefix(prefix: str) -> tuple[str, str] | None:
+    if not prefix.startswith("hourly."):
+        return None
+    column, _, item = prefix.removeprefix("hourly.").partition(".")
+    return column, item
+
+
+def _is_forecast_timestamp(value: Any) -> bool:
+    if not isinstance(value, str):
+        return False
+    try:
+        datetime.fromisoformat(value)
+    except ValueError:
+        return False
+    return True
+
+
+def stream_payload_to_bronze(
+    session: Session,
+    url: str,
+    params: dict[str, Any],
+    dataset: str,
+    storage: StorageClient,
+    object_path: str,
+    http_cache: HttpCache | None = None,
+    previous: StreamedPayload | None = None,
+    encode: Callable[[BinaryIO], object] | None = None,
+) -> StreamedPayload:
+    cache_key = build_cache_key(url, params)
+    cached = http_cache.get(cache_key) if http_cache else None
+    # The cached representation lives in bronze, so it only counts while that object does.
+    if cached is not None and not storage.exists(cached.object_path):
+        cached = None
+    if cached is not None and cached.is_fresh(http_cache.clock()):
+        return StreamedPayload(cached.object_path, 0, not_modified=True)
+
+    # The body goes to storage chunk by chunk while an event parser validates it, so peak
+    # memory is one chunk plus the validator's counters, whatever the payload size.
+    validator = StreamingPayloadValidator(BRONZE_SCHEMAS[dataset], require_metric=dataset == "aqi")
+    events = ijson.sendable_list()
+    parser = ijson.parse_coro(events)
+    digest = hashlib.sha256()
+    payload_bytes = 0
+
+    def drain_events() -> None:
+        for prefix, event, value in events:
+            validator.feed(prefix, event, value)
+        del events[:]
+
+    labels = {"dataset": dataset, "backend": storage.backend_name}
+    with (
+        span("fetch_stream", **labels) as stream_span,
+        span("validate", dataset=dataset) as validate_span,
+        span("storage_write", **labels) as write_span,
+    ):
+        # Both stages only run on a 200, so a revalidated payload reports zero time in them.
+        validate_span.add_duration(0.0)
+        write_span.add_duration(0.0)
+        with session.get(
+            url,
+            params=params,
+            headers=cached.conditional_headers() if cached else None,
+            timeout=30,
+            stream=True,
+        ) as response:
+            if response.status_code == 304 and cached is not None:
+                http_cache.put(cached.revalidated(response.headers, http_cache.clock()))
+                stream_span.set(payload_bytes=0, retry_count=_count_retries(response))
+                return StreamedPayload(cached.object_path, 0, not_modified=True)
+
+            response.raise_for_status()
+            unchanged = False
+            # An encoder needs the whole body before it can choose what to store, so the body
+            # is staged in a local temporary file and the encoder commits the object once.
+            staged = tempfile.TemporaryFile() if encode is not None else None
+            sink = (
+                nullcontext(staged.write)
+                if staged is not None
+                else storage.open_write_stream(object_path)
+            )
+            try:
+                with sink as write:
+                    try:
+                        for chunk in response.iter_content(chunk_size=STREAM_CHUNK_BYTES):
+                            started = time.perf_counter()
+                            write(chunk)
+                            written = time.perf_counter()
+                            payload_bytes += len(chunk)
+                            digest.update(chunk)
+                            parser.send(chunk)
+                            drain_events()
+                            write_span.add_duration(written - started)
+                            validate_span.add_duration(time.perf_counter() - written)
+                        started = time.perf_counter()
+                        parser.close()
+                        drain_events()
+                    except ijson.JSONError as exc:
+                        raise AQIPayloadValidationError(
+                            f"{validator.schema.label} payload is not valid JSON: {exc}"
+                        ) from exc
+                    validator.finish()
+                    validate_span.add_duration(time.perf_counter() - started)
+                    # Upstreams without validators resend identical bodies; raising inside
+                    # the write stream discards the copy before it becomes visible.
+                    if previous is not None and digest.hexdigest() == previous.content_sha256:
+                        raise _UnchangedPayload
+                    # Committing the object (a rename or a block list) counts as writing.
+                    started = time.perf_counter()
+                    if staged is not None:
+                        staged.seek(0)
+                        encode(staged)
+                write_span.add_duration(time.perf_counter() - started)
+            except _UnchangedPayload:
+                unchanged = True
+            finally:
+                if staged is not None:
+                    staged.close()
+        stream_span.set(
+            payload_bytes=payload_bytes,
+            row_count=validator.row_count,
+            retry_count=_count_retries(response),
+        )
+        validate_span.set(payload_bytes=payload_bytes, row_count=validator.row_count)
+        write_span.set(payload_bytes=0 if unchanged else payload_bytes)
+
+    landed_path = previous.object_path if unchanged and previous else object_path
+    if http_cache is not None:
+        entry = build_cache_entry(
+            cache_key, response.headers, landed_path, payload_bytes, http_cache.clock()
+        )
+        if entry is not None:
+            http_cache.put(entry)
+    return StreamedPayload(
+        landed_path,
+        payload_bytes,
+        not_modified=unchanged,
+        content_sha256=digest.hexdigest(),
+    )
+
+
+def _validate_schema_frame(frame: pd.DataFrame, schema: BronzeSchema) -> None:
+    missing_columns = [column for column in schema.hourly_columns if column not in frame.columns]
     if missing_columns:
         formatted_columns = ", ".join(sorted(missing_columns))
         raise AQIPayloadValidationError(
-            f"Weather payload is missing required columns: {formatted_columns}."
+            f"{schema.label} payload is missing required columns: {formatted_columns}."
         )
 
     if frame.empty:
-        raise AQIPayloadValidationError("Weather payload produced an empty frame.")
+        raise AQIPayloadValidationError(f"{schema.label} payload produced an empty frame.")
 
     parsed_timestamps = pd.to_datetime(frame["time"], errors="coerce")
     if parsed_timestamps.isna().any():
-        raise AQIPayloadValidationError("Weather payload contains invalid forecast timestamps.")
+        raise AQIPayloadValidationError(
+            f"{schema.label} payload contains invalid forecast timestamps."
+        )
 
 
 def build_raw_object_path(ingested_at: datetime, dataset: str = "aqi") -> str:
@@ -149,7 +454,63 @@ def build_raw_object_path(ingested_at: datetime, dataset: str = "aqi") -> str:
 
 
 def save_raw_payload(raw_payload: bytes, storage: StorageClient, object_path: str) -> None:
-    storage.save_bytes(object_path, raw_payload)
+    with span(
+        "storage_write",
+        dataset=object_path.split("/")[1],
+        backend=storage.backend_name,
+    ) as write_span:
+        storage.save_bytes(object_path, raw_payload)
+        write_span.set(payload_bytes=len(raw_payload))
+
+
+def extract_dataset_to_bronze(
+    settings: Settings,
+    dataset: str,
+    session: Session,
+    ingested_at: datetime,
+    storage: StorageClient,
+    http_cache: HttpCache | None = None,
+    previous: StreamedPayload | None = None,
+) -> StreamedPayload:
+    url = settings.air_quality_url if dataset == "aqi" else settings.weather_forecast_url
+    label = "AQI" if dataset == "aqi" else "weather"
+    object_path = build_raw_object_path(ingested_at, dataset=dataset)
+    streamed = stream_payload_to_bronze(
+        session,
+        url,
+        build_request_params(settings, dataset),
+        dataset,
+        storage,
+        object_path,
+        http_cache=http_cache,
+        previous=previous,
+        encode=(
+            partial(
+                encode_bronze_object,
+                storage,
+                dataset,
+                object_path,
+                ingested_at,
+                settings.bronze_delta_baseline_hours,
+            )
+            if settings.bronze_delta_baseline_hours > 0
+            else None
+        ),
+    )
+    if streamed.not_modified:
+        LOGGER.info("Upstream %s payload unchanged; keeping %s", label, streamed.object_path)
+        # A fresh cache hit or a 304 carries no body to hash; the kept object still matches.
+        if streamed.content_sha256 is None and previous is not None:
+            streamed = replace(streamed, content_sha256=previous.content_sha256)
+        return streamed
+
+    LOGGER.info(
+        "Saved raw %s payload to %s using %s storage",
+        label,
+        streamed.object_path,
+        storage.backend_name,
+    )
+    return streamed
 
 
 def extract_aqi_to_bronze(
@@ -158,16 +519,14 @@ def extract_aqi_to_bronze(
     ingested_at: datetime | None = None,
 ) -> str:
     active_settings = settings or get_settings()
-    active_session = session or build_session()
-    active_ingested_at = ingested_at or datetime.now(timezone.utc)
-    storage = StorageClient(active_settings)
-
-    raw_payload = fetch_aqi_payload(active_settings, session=active_session)
-    validate_hourly_payload(raw_payload.payload)
-    object_path = build_raw_object_path(active_ingested_at, dataset="aqi")
-    save_raw_payload(raw_payload.content, storage, object_path)
-    LOGGER.info("Saved raw AQI payload to %s using %s storage", object_path, storage.backend_name)
-    return object_path
+    return extract_dataset_to_bronze(
+        active_settings,
+        "aqi",
+        session or build_session(active_settings),
+        ingested_at or datetime.now(timezone.utc),
+        StorageClient(active_settings),
+        http_cache=build_http_cache(active_settings),
+    ).object_path
 
 
 def extract_weather_to_bronze(
@@ -176,20 +535,14 @@ def extract_weather_to_bronze(
     ingested_at: datetime | None = None,
 ) -> str:
     active_settings = settings or get_settings()
-    active_session = session or build_session()
-    active_ingested_at = ingested_at or datetime.now(timezone.utc)
-    storage = StorageClient(active_settings)
-
-    raw_payload = fetch_weather_payload(active_settings, session=active_session)
-    validate_weather_payload(raw_payload.payload)
-    object_path = build_raw_object_path(active_ingested_at, dataset="weather")
-    save_raw_payload(raw_payload.content, storage, object_path)
-    LOGGER.info(
-        "Saved raw weather payload to %s using %s storage",
-        object_path,
-        storage.backend_name,
-    )
-    return object_path
+    return extract_dataset_to_bronze(
+        active_settings,
+        "weather",
+        session or build_session(active_settings),
+        ingested_at or datetime.now(timezone.utc),
+        StorageClient(active_settings),
+        http_cache=build_http_cache(active_settings),
+    ).object_path
 
 
 def run_extract(settings: Settings | None = None) -> dict[str, str]:
@@ -197,7 +550,7 @@ def run_extract(settings: Settings | None = None) -> dict[str, str]:
 
     active_settings = settings or get_settings()
     ingested_at = datetime.now(timezone.utc)
-    session = build_session()
+    session = build_session(active_settings)
     aqi_object_path = extract_aqi_to_bronze(
         settings=active_settings,
         session=session,
@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import sqlite3
+import time
+from collections.abc import Callable, Mapping
+from contextlib import closing
+from dataclasses import dataclass, replace
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Any
+
+import requests
+
+from bangkok_aqi.config import DEFAULT_HTTP_CACHE_MAX_ENTRIES, Settings
+
+
+@dataclass(frozen=True)
+class CacheEntry:
+    cache_key: str
+    etag: str | None
+    last_modified: str | None
+    expires_at: float
+    object_path: str
+    payload_bytes: int
+
+    def is_fresh(self, now: float) -> bool:
+        return now < self.expires_at
+
+    def conditional_headers(self) -> dict[str, str]:
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+    def revalidated(self, headers: Mapping[str, str], now: float) -> CacheEntry:
+        # A 304 may carry updated validators and freshness; anything it omits is kept.
+        return replace(
+            self,
+            etag=headers.get("ETag") or self.etag,
+            last_modified=headers.get("Last-Modified") or self.last_modified,
+            expires_at=compute_expires_at(headers, now),
+        )
+
+
+def build_cache_key(url: str, params: Mapping[str, Any]) -> str:
+    return requests.Request("GET", url, params=dict(params)).prepare().url
+
+
+def parse_cache_control(value: str | None) -> dict[str, str | None]:
+    directives: dict[str, str | None] = {}
+    for directive in (value or "").split(","):
+        name, _, argument = directive.strip().partition("=")
+        if name:
+            directives[name.lower()] = argument.strip('"') or None
+    return directives
+
+
+def compute_expires_at(headers: Mapping[str, str], now: float) -> float:
+    directives = parse_cache_control(headers.get("Cache-Control"))
+    if "no-cache" in directives:
+        return now
+    if "max-age" in directives:
+        try:
+            max_age = int(directives["max-age"] or "")
+            age = int(headers.get("Age") or 0)
+        except ValueError:
+            return now
+        return now + max(max_age - age, 0)
+    if headers.get("Expires"):
+        try:
+            return parsedate_to_datetime(headers["Expires"]).timestamp()
+        except (TypeError, ValueError):
+            return now
+    return now
+
+
+def build_cache_entry(
+    cache_key: str,
+    headers: Mapping[str, str],
+    object_path: str,
+    payload_bytes: int,
+    now: float,
+) -> CacheEntry | None:
+    if "no-store" in parse_cache_control(headers.get("Cache-Control")):
+        return None
+    entry = CacheEntry(
+        cache_key=cache_key,
+        etag=headers.get("ETag"),
+        last_modified=headers.get("Last-Modified"),
+        expires_at=compute_expires_at(headers, now),
+        object_path=object_path,
+        payload_bytes=payload_bytes,
+    )
+    # Without a validator or a freshness lifetime the entry could never save a download.
+    if entry.etag is None and entry.last_modified is None and not entry.is_fresh(now):
+        return None
+    return entry
+
+
+class HttpCache:
+    # The cached representation of a response is the bronze object it was landed as, so
+    # entries only hold validators, freshness and that object's path. The newest
+    # `max_entries` entries by last use are kept.
+    def __init__(
+        self,
+        path: Path,
+        max_entries: int = DEFAULT_HTTP_CACHE_MAX_ENTRIES,
+        clock: Callable[[], float] = time.time,
+    ):
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1.")
+        self.path = path
+        self.max_entries = max_entries
+        self.clock = clock
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as connection:
+            connection.execute(
+                "create table if not exists http_cache ("
+                "cache_key text primary key, etag text, last_modified text, "
+                "expires_at real not null, object_path text not null, "
+                "payload_bytes integer not null, accessed_at real not null)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30, isolation_level=None)
+
+    def get(self, cache_key: str) -> CacheEntry | None:
+        with closing(self._connect()) as connection:
+            row = connection.execute(
+                "select etag, last_modified, expires_at, object_path, payload_bytes "
+                "from http_cache where cache_key = ?",
+                (cache_key,),
+            ).fetchone()
+            if row is None:
+                return None
+            connection.execute(
+                "update http_cache set accessed_at = ? where cache_key = ?",
+                (self.clock(), cache_key),
+            )
+        return CacheEntry(cache_key, *row)
+
+    def put(self, entry: CacheEntry) -> None:
+        with closing(self._connect()) as connection:
+            connection.execute("begin immediate")
+            connection.execute(
+                "insert or replace into http_cache values (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    entry.cache_key,
+                    entry.etag,
+                    entry.last_modified,
+                    entry.expires_at,
+                    entry.object_path,
+                    entry.payload_bytes,
+                    self.clock(),
+                ),
+            )
+            connection.execute(
+                "delete from http_cache where cache_key not in ("
+                "select cache_key from http_cache order by accessed_at desc limit ?)",
+                (self.max_entries,),
+            )
+            connection.execute("commit")
+
+    def delete(self, cache_key: str) -> None:
+        with closing(self._connect()) as connection:
+            connection.execute("delete from http_cache where cache_key = ?", (cache_key,))
+
+    def __len__(self) -> int:
+        with closing(self._connect()) as connection:
+            return connection.execute("select count(*) from http_cache").fetchone()[0]
+
+
+def build_http_cache(settings: Settings) -> HttpCache | None:
+    if settings.http_cache_path is None:
+        return None
+    return HttpCache(settings.http_cache_path, settings.http_cache_max_entries)
@@ -0,0 +1,208 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+from bangkok_aqi.config import get_settings
+
+SPANS_FILE_NAME = "spans.jsonl"
+PROMETHEUS_FILE_PREFIX = "bangkok_aqi"
+PROMETHEUS_GAUGES = (
+    ("duration_seconds", "Wall-clock duration of the last run of a pipeline stage."),
+    ("payload_bytes", "Payload bytes handled by the last run of a pipeline stage."),
+    ("row_count", "Rows handled by the last run of a pipeline stage."),
+    ("retry_count", "HTTP retries spent by the last run of a pipeline stage."),
+    ("success", "Whether the last run of a pipeline stage succeeded (1) or raised (0)."),
+    ("last_run_timestamp_seconds", "Unix time at which a pipeline stage last finished."),
+)
+
+
+@dataclass(frozen=True)
+class SpanRecord:
+    stage: str
+    labels: dict[str, str]
+    started_at_utc: str
+    finished_at: float
+    duration_seconds: float
+    success: bool
+    payload_bytes: int | None = None
+    row_count: int | None = None
+    retry_count: int | None = None
+    error: str | None = None
+
+
+@dataclass
+class MetricsRecorder:
+    output_dir: Path
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def record(self, span_record: SpanRecord) -> None:
+        line = json.dumps(asdict(span_record), sort_keys=True)
+        with self._lock:
+            self.output_dir.mkdir(parents=True, exist_ok=True)
+            with (self.output_dir / SPANS_FILE_NAME).open("a", encoding="utf-8") as spans_file:
+                spans_file.write(line + "\n")
+            self._write_prometheus_textfile(span_record)
+
+    def _write_prometheus_textfile(self, span_record: SpanRecord) -> None:
+        # One textfile per stage and label set: separate Airflow task processes each own the
+        # files for the stages they ran, so they never overwrite each other's gauges.
+        labels = {"stage": span_record.stage, **span_record.labels}
+        formatted_labels = ",".join(
+            f'{name}="{_escape_label_value(value)}"' for name, value in sorted(labels.items())
+        )
+        values = {
+            "duration_seconds": span_record.duration_seconds,
+            "payload_bytes": span_record.payload_bytes,
+            "row_count": span_record.row_count,
+            "retry_count": span_record.retry_count,
+            "success": int(span_record.success),
+            "last_run_timestamp_seconds": span_record.finished_at,
+        }
+
+        lines = []
+        for gauge, help_text in PROMETHEUS_GAUGES:
+            if values[gauge] is None:
+                continue
+            metric_name = f"{PROMETHEUS_FILE_PREFIX}_stage_{gauge}"
+            lines.append(f"# HELP {metric_name} {help_text}")
+            lines.append(f"# TYPE {metric_name} gauge")
+            lines.append(f"{metric_name}{{{formatted_labels}}} {values[gauge]}")
+
+        file_stem = "_".join(
+            [PROMETHEUS_FILE_PREFIX, *(_slugify(labels[name]) for name in sorted(labels))]
+        )
+        target_path = self.output_dir / f"{file_stem}.prom"
+        temp_path = target_path.with_name(f".{target_path.name}.{os.getpid()}.tmp")
+        temp_path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+        os.replace(temp_path, target_path)
+
+
+class Span:
+    __slots__ = (
+        "_recorder",
+        "_stage",
+        "_labels",
+        "_started",
+        "_started_at_utc",
+        "_measured_seconds",
+        "payload_bytes",
+        "row_count",
+        "retry_count",
+    )
+
+    def __init__(self, recorder: MetricsRecorder, stage: str, labels: dict[str, Any]):
+        self._recorder = recorder
+        self._stage = stage
+        self._labels = {name: str(value) for name, value in labels.items()}
+        self._measured_seconds: float | None = None
+        self.payload_bytes: int | None = None
+        self.row_count: int | None = None
+        self.retry_count: int | None = None
+
+    def set(
+        self,
+        payload_bytes: int | None = None,
+        row_count: int | None = None,
+        retry_count: int | None = None,
+    ) -> None:
+        if payload_bytes is not None:
+            self.payload_bytes = payload_bytes
+        if row_count is not None:
+            self.row_count = row_count
+        if retry_count is not None:
+            self.retry_count = retry_count
+
+    def add_duration(self, seconds: float) -> None:
+        # Stages interleaved chunk by chunk report the sum of their own slices instead of
+        # the wall time they were open for.
+        self._measured_seconds = (self._measured_seconds or 0.0) + seconds
+
+    def __enter__(self) -> Span:
+        self._started_at_utc = datetime.now(timezone.utc).isoformat()
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, exc_tb) -> bool:
+        duration = self._measured_seconds
+        if duration is None:
+            duration = time.perf_counter() - self._started
+        self._recorder.record(
+            SpanRecord(
+                stage=self._stage,
+                labels=self._labels,
+                started_at_utc=self._started_at_utc,
+                finished_at=time.time(),
+                duration_seconds=duration,
+                success=exc_type is None,
+                payload_bytes=self.payload_bytes,
+                row_count=self.row_count,
+                retry_count=self.retry_count,
+                error=None if exc is None else f"{exc_type.__name__}: {exc}",
+            )
+        )
+        return False
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def set(
+        self,
+        payload_bytes: int | None = None,
+        row_count: int | None = None,
+        retry_count: int | None = None,
+    ) -> None:
+        return None
+
+    def add_duration(self, seconds: float) -> None:
+        return None
+
+    def __enter__(self) -> _NoopSpan:
+        return self
+
+    def __exit__(self, exc_type, exc, exc_tb) -> bool:
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+_UNCONFIGURED = object()
+_recorder: Any = _UNCONFIGURED
+
+
+def configure_instrumentation(output_dir: Path | None) -> None:
+    global _recorder
+    _recorder = MetricsRecorder(output_dir) if output_dir else None
+
+
+def _load_recorder() -> MetricsRecorder | None:
+    if _recorder is _UNCONFIGURED:
+        configure_instrumentation(get_settings().metrics_dir)
+    return _recorder
+
+
+def instrumentation_enabled() -> bool:
+    return _load_recorder() is not None
+
+
+def span(stage: str, **labels: Any) -> Span | _NoopSpan:
+    # The disabled path hands back a shared no-op object, so instrumented hot paths pay
+    # one global lookup and no allocation, clock read, or I/O.
+    recorder = _recorder if _recorder is not _UNCONFIGURED else _load_recorder()
+    if recorder is None:
+        return _NOOP_SPAN
+    return Span(recorder, stage, labels)
+
+
+def _escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _slugify(value: str) -> str:
+    return "".join(character if character.isalnum() else "_" for character in value.lower())
@@ -0,0 +1,287 @@
+from __future__ import annotations
+
+import logging
+import re
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import PurePosixPath
+from zoneinfo import ZoneInfo
+
+import duckdb
+
+from bangkok_aqi.config import LIFECYCLE_ACTIONS, LIFECYCLE_DATASETS, Settings, get_settings
+from bangkok_aqi.storage import StorageClient
+
+LOGGER = logging.getLogger(__name__)
+ARCHIVE_PREFIX = "archive/"
+RAW_FILE_TIMESTAMP_PATTERN = re.compile(r"_(\d{8}T\d{6}Z)\.json$")
+# fct_aqi_forecast_skill stores the revisions it has scored and survives full refreshes, so
+# the AQI files behind them are only kept on request, to rescore the mart from scratch.
+FORECAST_SKILL_DATASETS = ("aqi",)
+
+# One row per staged bronze file. A file is still needed when it holds the row an hour's mart
+# values come from, or is the newest ingest covering that hour, which for a delta file need
+# not restate it; both sets match fct_aqi_hourly exactly. Every other file is superseded.
+FILE_VERSIONS_SQL = """
+    with changes as (
+        select
+            forecast_timestamp_local,
+            latitude,
+            longitude,
+            arg_max(
+                struct_pack(raw_file_name, ingested_at_utc),
+                (ingested_at_utc, raw_file_name)
+            ) as latest
+        from stg_{dataset}_hourly
+        group by forecast_timestamp_local, latitude, longitude
+    ),
+    ingests as (
+        select
+            forecast_timestamp_local,
+            arg_max(
+                struct_pack(raw_file_name, latitude, longitude),
+                (ingested_at_utc, raw_file_name)
+            ) as latest
+        from (
+            select
+                forecast_timestamp_local,
+                latest.raw_file_name,
+                latest.ingested_at_utc,
+                latitude,
+                longitude
+            from changes
+            union all
+            select
+                unnest(
+                    generate_series(window_start_local, window_end_local, interval 1 hour)
+                ),
+                raw_file_name,
+                ingested_at_utc,
+                latitude,
+                longitude
+            from stg_{dataset}_hourly
+            where is_delta and forecast_timestamp_local = window_end_local
+        )
+        group by forecast_timestamp_local
+    ),
+    needed as (
+        select latest.raw_file_name from ingests
+        union
+        select changes.latest.raw_file_name
+        from ingests
+        inner join changes
+            on ingests.forecast_timestamp_local = changes.forecast_timestamp_local
+            and ingests.latest.latitude = changes.latitude
+            and ingests.latest.longitude = changes.longitude
+    )
+    select
+        raw_file_name,
+        max(ingested_at_utc) as ingested_at_utc,
+        max(forecast_timestamp_local) as last_forecast_timestamp_local,
+        raw_file_name not in (select raw_file_name from needed) as is_superseded
+    from stg_{dataset}_hourly
+    group by raw_file_name
+"""
+
+
+@dataclass(frozen=True)
+class RetentionPolicy:
+    dataset: str
+    superseded_after_days: int = 2
+    action: str = "archive"
+    archive_tier: str | None = "Cool"
+    tier_after_days: int | None = None
+    tier: str = "Cool"
+    keep_forecast_skill: bool = False
+
+    def __post_init__(self) -> None:
+        if self.action not in LIFECYCLE_ACTIONS:
+            raise ValueError(f"Unknown lifecycle action {self.action!r}.")
+        if self.superseded_after_days < 0:
+            raise ValueError("superseded_after_days cannot be negative.")
+        if self.tier_after_days is not None and self.tier_after_days < 0:
+            raise ValueError("tier_after_days cannot be negative.")
+
+
+DEFAULT_RETENTION_POLICIES = {dataset: RetentionPolicy(dataset) for dataset in LIFECYCLE_DATASETS}
+
+
+@dataclass(frozen=True)
+class LifecycleAction:
+    dataset: str
+    object_path: str
+    action: str
+    size_bytes: int
+    target_path: str | None = None
+    tier: str | None = None
+
+
+@dataclass(frozen=True)
+class LifecyclePlan:
+    actions: tuple[LifecycleAction, ...]
+    hot_bytes: dict[str, int]
+
+    @property
+    def reclaimed_bytes(self) -> int:
+        return sum(self.reclaimed_bytes_by_dataset().values())
+
+    def reclaimed_bytes_by_dataset(self) -> dict[str, int]:
+        reclaimed = {dataset: 0 for dataset in self.hot_bytes}
+        for action in self.actions:
+            if action.action in LIFECYCLE_ACTIONS:
+                reclaimed[action.dataset] += action.size_bytes
+        return reclaimed
+
+
+def parse_raw_file_ingested_at(object_path: str) -> datetime | None:
+    match = RAW_FILE_TIMESTAMP_PATTERN.search(object_path)
+    if match is None:
+        return None
+    return datetime.strptime(match.group(1), "%Y%m%dT%H%M%SZ").replace(tzinfo=timezone.utc)
+
+
+def plan_lifecycle(
+    settings: Settings,
+    policies: dict[str, RetentionPolicy] | None = None,
+    now: datetime | None = None,
+    storage: StorageClient | None = None,
+) -> LifecyclePlan:
+    active_policies = policies or DEFAULT_RETENTION_POLICIES
+    active_storage = storage or StorageClient(settings)
+    active_now = now or datetime.now(timezone.utc)
+    now_local = active_now.astimezone(ZoneInfo(settings.timezone_name)).replace(tzinfo=None)
+    if not settings.duckdb_path.exists():
+        raise FileNotFoundError(
+            f"{settings.duckdb_path} does not exist; build the warehouse before applying "
+            "retention, since superseded files are found through the silver tables."
+        )
+
+    actions: list[LifecycleAction] = []
+    hot_bytes: dict[str, int] = {}
+    with duckdb.connect(str(settings.duckdb_path), read_only=True) as connection:
+        for dataset, policy in active_policies.items():
+            file_sizes = active_storage.list_file_sizes(f"raw/{dataset}/")
+            hot_bytes[dataset] = sum(file_sizes.values())
+            # Match on base names, as the native transform does: dbt records raw_file_name
+            # however its glob resolved, while storage lists object paths.
+            object_paths = {PurePosixPath(path).name: path for path in file_sizes}
+            superseded_before = active_now - timedelta(days=policy.superseded_after_days)
+            # Tiering still applies to the files kept for the skill mart; cool blobs stay
+            # readable for a rescore.
+            keeps_skill_history = (
+                policy.keep_forecast_skill
+                and dataset in FORECAST_SKILL_DATASETS
+                and _table_exists(connection, "fct_aqi_forecast_skill")
+            )
+
+            retired: set[str] = set()
+            for raw_file_name, ingested_at, last_forecast_hour, is_superseded in connection.execute(
+                FILE_VERSIONS_SQL.format(dataset=dataset)
+            ).fetchall():
+                object_path = object_paths.get(PurePosixPath(raw_file_name).name)
+                if object_path is None or not is_superseded or keeps_skill_history:
+                    continue
+                if last_forecast_hour >= now_local:
+                    continue
+                if ingested_at.replace(tzinfo=timezone.utc) > superseded_before:
+                    continue
+                retired.add(object_path)
+                actions.append(
+                    LifecycleAction(
+                        dataset=dataset,
+                        object_path=object_path,
+                        action=policy.action,
+                        size_bytes=file_sizes[object_path],
+                        target_path=(
+                            ARCHIVE_PREFIX + object_path if policy.action == "archive" else None
+                        ),
+                        tier=policy.archive_tier if policy.action == "archive" else None,
+                    )
+                )
+
+            if policy.tier_after_days is None or active_storage.backend_name != "azure-blob":
+                continue
+            tier_before = active_now - timedelta(days=policy.tier_after_days)
+            for object_path in sorted(set(file_sizes) - retired):
+                ingested_at = parse_raw_file_ingested_at(object_path)
+                if ingested_at is not None and ingested_at <= tier_before:
+                    actions.append(
+                        LifecycleAction(
+                            dataset=dataset,
+                            object_path=object_path,
+                            action="tier",
+                            size_bytes=file_sizes[object_path],
+                            tier=policy.tier,
+                        )
+                    )
+
+    return LifecyclePlan(actions=tuple(actions), hot_bytes=hot_bytes)
+
+
+def _table_exists(connection: duckdb.DuckDBPyConnection, table_name: str) -> bool:
+    row = connection.execute(
+        """
+        select count(*)
+        from information_schema.tables
+        where table_schema = 'main' and table_name = ?
+        """,
+        [table_name],
+    ).fetchone()
+    return bool(row and row[0])
+
+
+def apply_lifecycle(plan: LifecyclePlan, storage: StorageClient) -> None:
+    deletions = [action.object_path for action in plan.actions if action.action == "delete"]
+    storage.delete_files(deletions)
+    for action in plan.actions:
+        if action.action == "archive":
+            storage.move_file(action.object_path, action.target_path, tier=action.tier)
+
+    tiers: dict[str, list[str]] = {}
+    for action in plan.actions:
+        if action.action == "tier":
+            tiers.setdefault(action.tier, []).append(action.object_path)
+    for tier, object_paths in tiers.items():
+        storage.set_access_tier(object_paths, tier)
+
+
+def format_lifecycle_report(plan: LifecyclePlan, dry_run: bool = False) -> str:
+    header = "Lifecycle plan (dry run)" if dry_run else "Lifecycle applied"
+    lines = [
+        header,
+        f"{'dataset':<10}{'hot MiB':>10}{'archive':>10}{'delete':>10}{'tier':>10}"
+        f"{'reclaimed MiB':>16}",
+    ]
+    reclaimed = plan.reclaimed_bytes_by_dataset()
+    for dataset, hot_bytes in plan.hot_bytes.items():
+        counts = {
+            action_name: sum(
+                1
+                for action in plan.actions
+                if action.dataset == dataset and action.action == action_name
+            )
+            for action_name in (*LIFECYCLE_ACTIONS, "tier")
+        }
+        lines.append(
+            f"{dataset:<10}{hot_bytes / 2**20:>10.2f}{counts['archive']:>10}"
+            f"{counts['delete']:>10}{counts['tier']:>10}{reclaimed[dataset] / 2**20:>16.2f}"
+        )
+    lines.append(f"Total reclaimed from hot bronze: {plan.reclaimed_bytes} bytes")
+    return "\n".join(lines)
+
+
+def run_lifecycle(
+    policies: dict[str, RetentionPolicy] | None = None,
+    dry_run: bool = False,
+    settings: Settings | None = None,
+) -> LifecyclePlan:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    active_settings = settings or get_settings()
+    storage = StorageClient(active_settings)
+    plan = plan_lifecycle(active_settings, policies, storage=storage)
+    if not dry_run:
+        apply_lifecycle(plan, storage)
+        LOGGER.info("Applied %s lifecycle action(s)", len(plan.actions))
+    print(format_lifecycle_report(plan, dry_run=dry_run))
+    return plan
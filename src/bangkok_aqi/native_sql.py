@@ -0,0 +1,882 @@
+# Generated from the dbt models by `bangkok-aqi sync-native-sql`; do not edit.
+# ruff: noqa: E501
+NATIVE_SQL = {
+    ("stg_aqi_hourly", "full"): """
+-- One scan of bronze with no intermediate table: the ingest time is derived once per file,
+-- before the unnest fans each payload out into hourly rows. Incremental runs append only
+-- the files not staged yet, and flag those stamped before the newest staged ingest as late
+-- so fct_aqi_forecast_skill can find them without rescanning history.
+select
+    cast(element1 as timestamp) as forecast_timestamp_local,
+    cast(cast(element1 as timestamp) as date) as forecast_date_local,
+    cast(element2 as double) as pm25,
+    cast(element3 as double) as pm10,
+    cast(element4 as integer) as us_aqi,
+    ingest_date,
+    ingest_time_utc,
+    ingested_at_utc,
+    'open-meteo' as source_system,
+    latitude,
+    longitude,
+    raw_file_name,
+    is_delta,
+    window_start_local,
+    window_end_local,
+    false as is_late
+from (
+    select
+        unnest(
+            list_zip(hourly.time, hourly.pm2_5, hourly.pm10, hourly.us_aqi),
+            recursive := true
+        ),
+        cast(latitude as double) as latitude,
+        cast(longitude as double) as longitude,
+        ingest_date,
+        split_part(replace(filename, '.json', ''), '_raw_', 2) as ingest_time_utc,
+        strptime(ingest_time_utc, '%Y%m%dT%H%M%SZ') as ingested_at_utc,
+        filename as raw_file_name,
+        delta is not null as is_delta,
+        cast(coalesce(delta.window_start, hourly.time[1]) as timestamp)
+            as window_start_local,
+        cast(coalesce(delta.window_end, hourly.time[-1]) as timestamp)
+            as window_end_local
+    from read_json(
+        $files,
+        columns = {'latitude': 'DOUBLE', 'longitude': 'DOUBLE', 'hourly': 'STRUCT("time" VARCHAR[], "pm2_5" DOUBLE[], "pm10" DOUBLE[], "us_aqi" INTEGER[])', 'delta': 'STRUCT(window_start VARCHAR, window_end VARCHAR)'},
+        filename = true,
+        hive_partitioning = true
+    )
+)
+""",
+    ("stg_aqi_hourly", "incremental"): """
+-- One scan of bronze with no intermediate table: the ingest time is derived once per file,
+-- before the unnest fans each payload out into hourly rows. Incremental runs append only
+-- the files not staged yet, and flag those stamped before the newest staged ingest as late
+-- so fct_aqi_forecast_skill can find them without rescanning history.
+select
+    cast(element1 as timestamp) as forecast_timestamp_local,
+    cast(cast(element1 as timestamp) as date) as forecast_date_local,
+    cast(element2 as double) as pm25,
+    cast(element3 as double) as pm10,
+    cast(element4 as integer) as us_aqi,
+    ingest_date,
+    ingest_time_utc,
+    ingested_at_utc,
+    'open-meteo' as source_system,
+    latitude,
+    longitude,
+    raw_file_name,
+    is_delta,
+    window_start_local,
+    window_end_local,
+    coalesce(ingested_at_utc <= (select max(ingested_at_utc) from stg_aqi_hourly), false) as is_late
+from (
+    select
+        unnest(
+            list_zip(hourly.time, hourly.pm2_5, hourly.pm10, hourly.us_aqi),
+            recursive := true
+        ),
+        cast(latitude as double) as latitude,
+        cast(longitude as double) as longitude,
+        ingest_date,
+        split_part(replace(filename, '.json', ''), '_raw_', 2) as ingest_time_utc,
+        strptime(ingest_time_utc, '%Y%m%dT%H%M%SZ') as ingested_at_utc,
+        filename as raw_file_name,
+        delta is not null as is_delta,
+        cast(coalesce(delta.window_start, hourly.time[1]) as timestamp)
+            as window_start_local,
+        cast(coalesce(delta.window_end, hourly.time[-1]) as timestamp)
+            as window_end_local
+    from read_json(
+        $files,
+        columns = {'latitude': 'DOUBLE', 'longitude': 'DOUBLE', 'hourly': 'STRUCT("time" VARCHAR[], "pm2_5" DOUBLE[], "pm10" DOUBLE[], "us_aqi" INTEGER[])', 'delta': 'STRUCT(window_start VARCHAR, window_end VARCHAR)'},
+        filename = true,
+        hive_partitioning = true
+    )
+)
+""",
+    ("stg_weather_hourly", "full"): """
+-- Mirrors stg_aqi_hourly: one scan of bronze, ingest time derived once per file.
+select
+    cast(element1 as timestamp) as forecast_timestamp_local,
+    cast(cast(element1 as timestamp) as date) as forecast_date_local,
+    cast(element2 as double) as temperature_c,
+    cast(element3 as double) as relative_humidity,
+    cast(element4 as double) as wind_speed_kph,
+    ingest_date,
+    ingest_time_utc,
+    ingested_at_utc,
+    'open-meteo-weather' as source_system,
+    latitude,
+    longitude,
+    raw_file_name,
+    is_delta,
+    window_start_local,
+    window_end_local
+from (
+    select
+        unnest(
+            list_zip(
+                hourly.time,
+                hourly.temperature_2m,
+                hourly.relative_humidity_2m,
+                hourly.wind_speed_10m
+            ),
+            recursive := true
+        ),
+        cast(latitude as double) as latitude,
+        cast(longitude as double) as longitude,
+        ingest_date,
+        split_part(replace(filename, '.json', ''), '_raw_', 2) as ingest_time_utc,
+        strptime(ingest_time_utc, '%Y%m%dT%H%M%SZ') as ingested_at_utc,
+        filename as raw_file_name,
+        delta is not null as is_delta,
+        cast(coalesce(delta.window_start, hourly.time[1]) as timestamp)
+            as window_start_local,
+        cast(coalesce(delta.window_end, hourly.time[-1]) as timestamp)
+            as window_end_local
+    from read_json(
+        $files,
+        columns = {'latitude': 'DOUBLE', 'longitude': 'DOUBLE', 'hourly': 'STRUCT("time" VARCHAR[], "temperature_2m" DOUBLE[], "relative_humidity_2m" DOUBLE[], "wind_speed_10m" DOUBLE[])', 'delta': 'STRUCT(window_start VARCHAR, window_end VARCHAR)'},
+        filename = true,
+        hive_partitioning = true
+    )
+)
+""",
+    ("stg_weather_hourly", "incremental"): """
+-- Mirrors stg_aqi_hourly: one scan of bronze, ingest time derived once per file.
+select
+    cast(element1 as timestamp) as forecast_timestamp_local,
+    cast(cast(element1 as timestamp) as date) as forecast_date_local,
+    cast(element2 as double) as temperature_c,
+    cast(element3 as double) as relative_humidity,
+    cast(element4 as double) as wind_speed_kph,
+    ingest_date,
+    ingest_time_utc,
+    ingested_at_utc,
+    'open-meteo-weather' as source_system,
+    latitude,
+    longitude,
+    raw_file_name,
+    is_delta,
+    window_start_local,
+    window_end_local
+from (
+    select
+        unnest(
+            list_zip(
+                hourly.time,
+                hourly.temperature_2m,
+                hourly.relative_humidity_2m,
+                hourly.wind_speed_10m
+            ),
+            recursive := true
+        ),
+        cast(latitude as double) as latitude,
+        cast(longitude as double) as longitude,
+        ingest_date,
+        split_part(replace(filename, '.json', ''), '_raw_', 2) as ingest_time_utc,
+        strptime(ingest_time_utc, '%Y%m%dT%H%M%SZ') as ingested_at_utc,
+        filename as raw_file_name,
+        delta is not null as is_delta,
+        cast(coalesce(delta.window_start, hourly.time[1]) as timestamp)
+            as window_start_local,
+        cast(coalesce(delta.window_end, hourly.time[-1]) as timestamp)
+            as window_end_local
+    from read_json(
+        $files,
+        columns = {'latitude': 'DOUBLE', 'longitude': 'DOUBLE', 'hourly': 'STRUCT("time" VARCHAR[], "temperature_2m" DOUBLE[], "relative_humidity_2m" DOUBLE[], "wind_speed_10m" DOUBLE[])', 'delta': 'STRUCT(window_start VARCHAR, window_end VARCHAR)'},
+        filename = true,
+        hive_partitioning = true
+    )
+)
+""",
+    ("fct_aqi_hourly", "full"): """
+-- arg_max keeps each hour's latest version in a single hash aggregate instead of ranking
+-- every revision; packing the whole row keeps revisions with null metrics eligible.
+-- Delta files only store the hours that changed since the previous ingest, so an hour's
+-- values come from its latest stored row for a location, and the ingest that last reported
+-- them is the newest file covering the hour, whether it restated the hour or not. With
+-- full payloads every covered hour is stored and both reduce to the latest row.
+with aqi_changes as (
+    select
+        forecast_timestamp_local,
+        latitude,
+        longitude,
+        arg_max(stg, (ingested_at_utc, raw_file_name)) as latest
+    from stg_aqi_hourly as stg
+    group by forecast_timestamp_local, latitude, longitude
+),
+aqi_ingests as (
+    select
+        forecast_timestamp_local,
+        arg_max(
+            struct_pack(ingest_time_utc, ingested_at_utc, latitude, longitude),
+            (ingested_at_utc, raw_file_name)
+        ) as latest
+    from (
+        select
+            forecast_timestamp_local,
+            latest.ingest_time_utc,
+            latest.ingested_at_utc,
+            latitude,
+            longitude,
+            latest.raw_file_name
+        from aqi_changes
+        union all
+        select * from (select
+        unnest(
+            generate_series(window_start_local, window_end_local, interval 1 hour)
+        ) as forecast_timestamp_local,
+        ingest_time_utc,
+        ingested_at_utc,
+        latitude,
+        longitude,
+        raw_file_name
+    from stg_aqi_hourly
+    where is_delta and forecast_timestamp_local = window_end_local
+)
+    )
+    group by forecast_timestamp_local
+),
+weather_changes as (
+    select
+        forecast_timestamp_local,
+        latitude,
+        longitude,
+        arg_max(
+            struct_pack(
+                temperature_c,
+                relative_humidity,
+                wind_speed_kph,
+                ingested_at_utc,
+                raw_file_name
+            ),
+            (ingested_at_utc, raw_file_name)
+        ) as latest
+    from stg_weather_hourly
+    group by forecast_timestamp_local, latitude, longitude
+),
+weather_ingests as (
+    select
+        forecast_timestamp_local,
+        arg_max(struct_pack(latitude, longitude), (ingested_at_utc, raw_file_name)) as latest
+    from (
+        select
+            forecast_timestamp_local,
+            latest.ingested_at_utc,
+            latitude,
+            longitude,
+            latest.raw_file_name
+        from weather_changes
+        union all
+        select forecast_timestamp_local, ingested_at_utc, latitude, longitude, raw_file_name
+        from (select
+        unnest(
+            generate_series(window_start_local, window_end_local, interval 1 hour)
+        ) as forecast_timestamp_local,
+        ingest_time_utc,
+        ingested_at_utc,
+        latitude,
+        longitude,
+        raw_file_name
+    from stg_weather_hourly
+    where is_delta and forecast_timestamp_local = window_end_local
+)
+    )
+    group by forecast_timestamp_local
+),
+latest_weather as (
+    select weather.forecast_timestamp_local, weather.latest
+    from weather_ingests as ingest
+    inner join weather_changes as weather
+        on ingest.forecast_timestamp_local = weather.forecast_timestamp_local
+        and ingest.latest.latitude = weather.latitude
+        and ingest.latest.longitude = weather.longitude
+)
+select
+    md5(
+        cast(aqi.forecast_timestamp_local as varchar)
+        || '|'
+        || cast(ingest.latest.ingest_time_utc as varchar)
+    ) as record_key,
+    aqi.forecast_timestamp_local,
+    aqi.latest.forecast_date_local,
+    aqi.latest.pm25,
+    aqi.latest.pm10,
+    aqi.latest.us_aqi,
+    weather.latest.temperature_c,
+    weather.latest.relative_humidity,
+    weather.latest.wind_speed_kph,
+    ingest.latest.ingested_at_utc as last_ingested_at_utc,
+    aqi.latest.source_system,
+    aqi.latest.latitude,
+    aqi.latest.longitude
+from aqi_ingests as ingest
+inner join aqi_changes as aqi
+    on ingest.forecast_timestamp_local = aqi.forecast_timestamp_local
+    and ingest.latest.latitude = aqi.latitude
+    and ingest.latest.longitude = aqi.longitude
+left join latest_weather as weather
+    on aqi.forecast_timestamp_local = weather.forecast_timestamp_local
+""",
+    ("fct_aqi_hourly", "incremental"): """
+-- arg_max keeps each hour's latest version in a single hash aggregate instead of ranking
+-- every revision; packing the whole row keeps revisions with null metrics eligible.
+-- Delta files only store the hours that changed since the previous ingest, so an hour's
+-- values come from its latest stored row for a location, and the ingest that last reported
+-- them is the newest file covering the hour, whether it restated the hour or not. With
+-- full payloads every covered hour is stored and both reduce to the latest row.
+with aqi_changes as (
+    select
+        forecast_timestamp_local,
+        latitude,
+        longitude,
+        arg_max(stg, (ingested_at_utc, raw_file_name)) as latest
+    from stg_aqi_hourly as stg
+    where forecast_timestamp_local in (select forecast_timestamp_local from _affected_hours)
+    group by forecast_timestamp_local, latitude, longitude
+),
+aqi_ingests as (
+    select
+        forecast_timestamp_local,
+        arg_max(
+            struct_pack(ingest_time_utc, ingested_at_utc, latitude, longitude),
+            (ingested_at_utc, raw_file_name)
+        ) as latest
+    from (
+        select
+            forecast_timestamp_local,
+            latest.ingest_time_utc,
+            latest.ingested_at_utc,
+            latitude,
+            longitude,
+            latest.raw_file_name
+        from aqi_changes
+        union all
+        select * from (select
+        unnest(
+            generate_series(window_start_local, window_end_local, interval 1 hour)
+        ) as forecast_timestamp_local,
+        ingest_time_utc,
+        ingested_at_utc,
+        latitude,
+        longitude,
+        raw_file_name
+    from stg_aqi_hourly
+    where is_delta and forecast_timestamp_local = window_end_local
+) where forecast_timestamp_local in (select forecast_timestamp_local from _affected_hours)
+    )
+    group by forecast_timestamp_local
+),
+weather_changes as (
+    select
+        forecast_timestamp_local,
+        latitude,
+        longitude,
+        arg_max(
+            struct_pack(
+                temperature_c,
+                relative_humidity,
+                wind_speed_kph,
+                ingested_at_utc,
+                raw_file_name
+            ),
+            (ingested_at_utc, raw_file_name)
+        ) as latest
+    from stg_weather_hourly
+    where forecast_timestamp_local in (select forecast_timestamp_local from _affected_hours)
+    group by forecast_timestamp_local, latitude, longitude
+),
+weather_ingests as (
+    select
+        forecast_timestamp_local,
+        arg_max(struct_pack(latitude, longitude), (ingested_at_utc, raw_file_name)) as latest
+    from (
+        select
+            forecast_timestamp_local,
+            latest.ingested_at_utc,
+            latitude,
+            longitude,
+            latest.raw_file_name
+        from weather_changes
+        union all
+        select forecast_timestamp_local, ingested_at_utc, latitude, longitude, raw_file_name
+        from (select
+        unnest(
+            generate_series(window_start_local, window_end_local, interval 1 hour)
+        ) as forecast_timestamp_local,
+        ingest_time_utc,
+        ingested_at_utc,
+        latitude,
+        longitude,
+        raw_file_name
+    from stg_weather_hourly
+    where is_delta and forecast_timestamp_local = window_end_local
+) where forecast_timestamp_local in (select forecast_timestamp_local from _affected_hours)
+    )
+    group by forecast_timestamp_local
+),
+latest_weather as (
+    select weather.forecast_timestamp_local, weather.latest
+    from weather_ingests as ingest
+    inner join weather_changes as weather
+        on ingest.forecast_timestamp_local = weather.forecast_timestamp_local
+        and ingest.latest.latitude = weather.latitude
+        and ingest.latest.longitude = weather.longitude
+)
+select
+    md5(
+        cast(aqi.forecast_timestamp_local as varchar)
+        || '|'
+        || cast(ingest.latest.ingest_time_utc as varchar)
+    ) as record_key,
+    aqi.forecast_timestamp_local,
+    aqi.latest.forecast_date_local,
+    aqi.latest.pm25,
+    aqi.latest.pm10,
+    aqi.latest.us_aqi,
+    weather.latest.temperature_c,
+    weather.latest.relative_humidity,
+    weather.latest.wind_speed_kph,
+    ingest.latest.ingested_at_utc as last_ingested_at_utc,
+    aqi.latest.source_system,
+    aqi.latest.latitude,
+    aqi.latest.longitude
+from aqi_ingests as ingest
+inner join aqi_changes as aqi
+    on ingest.forecast_timestamp_local = aqi.forecast_timestamp_local
+    and ingest.latest.latitude = aqi.latitude
+    and ingest.latest.longitude = aqi.longitude
+left join latest_weather as weather
+    on aqi.forecast_timestamp_local = weather.forecast_timestamp_local
+""",
+    ("fct_aqi_forecast_skill", "full"): """
+-- One row per forecast hour with every revision of it, its lead time and, once the hour
+-- has been observed, its error against the realised value. Scored revisions are kept when
+-- lifecycle retires their bronze file, so the mart is never rebuilt from scratch: a full
+-- refresh rescores every staged hour and merges it with what is already stored, and
+-- incremental runs rescore only the hours new ingests touched.
+with
+changes as (
+    select
+        forecast_timestamp_local,
+        ingested_at_utc,
+        raw_file_name,
+        latitude,
+        longitude,
+        struct_pack(forecast_date_local, pm25, pm10, us_aqi) as stored
+    from stg_aqi_hourly
+),
+-- A delta file that covers an hour without restating it repeats the hour's previous stored
+-- value for that location, so the revision history matches a corpus of full payloads.
+filled_revisions as (
+    select
+        forecast_timestamp_local,
+        ingested_at_utc,
+        raw_file_name,
+        last_value(stored ignore nulls) over (
+            partition by forecast_timestamp_local, latitude, longitude
+            order by ingested_at_utc, raw_file_name
+        ) as stored
+    from (
+        select * from changes
+        union all
+        select
+            forecast_timestamp_local,
+            ingested_at_utc,
+            raw_file_name,
+            latitude,
+            longitude,
+            null as stored
+        from (
+            select *
+            from (select
+        unnest(
+            generate_series(window_start_local, window_end_local, interval 1 hour)
+        ) as forecast_timestamp_local,
+        ingest_time_utc,
+        ingested_at_utc,
+        latitude,
+        longitude,
+        raw_file_name
+    from stg_aqi_hourly
+    where is_delta and forecast_timestamp_local = window_end_local
+)
+        ) as coverage
+        where not exists (
+            select 1
+            from changes
+            where changes.forecast_timestamp_local = coverage.forecast_timestamp_local
+                and changes.raw_file_name = coverage.raw_file_name
+        )
+    )
+),
+revisions as (
+    select
+        forecast_timestamp_local,
+        stored.forecast_date_local,
+        stored.pm25,
+        stored.pm10,
+        stored.us_aqi,
+        ingested_at_utc,
+        raw_file_name,
+        datediff(
+            'hour',
+            timezone($timezone, timezone('UTC', ingested_at_utc)),
+            forecast_timestamp_local
+        ) as lead_hours
+    from filled_revisions
+    where stored is not null
+),
+scored_revisions as (
+    select
+        *,
+        -- The latest revision is the realised value once it was ingested at or after the
+        -- forecast hour itself.
+        first_value(lead_hours) over latest <= 0 as is_realised,
+        first_value(pm25) over latest as latest_pm25,
+        first_value(pm10) over latest as latest_pm10,
+        first_value(us_aqi) over latest as latest_us_aqi
+    from revisions
+    window latest as (
+        partition by forecast_timestamp_local
+        order by ingested_at_utc desc, raw_file_name desc
+    )
+)
+select
+    forecast_timestamp_local,
+    any_value(forecast_date_local) as forecast_date_local,
+    count(*) as revision_count,
+    max(lead_hours) as max_lead_hours,
+    bool_or(is_realised) as is_realised,
+    case when bool_or(is_realised) then any_value(latest_pm25) end as actual_pm25,
+    case when bool_or(is_realised) then any_value(latest_pm10) end as actual_pm10,
+    case when bool_or(is_realised) then any_value(latest_us_aqi) end as actual_us_aqi,
+    max(ingested_at_utc) as last_ingested_at_utc,
+    list(
+        struct_pack(
+            lead_hours := lead_hours,
+            ingested_at_utc := ingested_at_utc,
+            pm25 := pm25,
+            pm10 := pm10,
+            us_aqi := us_aqi,
+            pm25_error := case when is_realised then pm25 - latest_pm25 end,
+            pm10_error := case when is_realised then pm10 - latest_pm10 end,
+            us_aqi_error := case when is_realised then us_aqi - latest_us_aqi end
+        )
+        order by ingested_at_utc, raw_file_name
+    ) as revisions
+from scored_revisions
+group by forecast_timestamp_local
+""",
+    ("fct_aqi_forecast_skill", "incremental"): """
+-- One row per forecast hour with every revision of it, its lead time and, once the hour
+-- has been observed, its error against the realised value. Scored revisions are kept when
+-- lifecycle retires their bronze file, so the mart is never rebuilt from scratch: a full
+-- refresh rescores every staged hour and merges it with what is already stored, and
+-- incremental runs rescore only the hours new ingests touched.
+with
+affected_hours as (
+    -- Every file stores its window's last hour, and that row carries the whole window. New
+    -- files are those ingested after the newest scored one, plus the late ones staging
+    -- flagged, which count until their window's last hour holds a revision from them.
+    select unnest(
+        generate_series(pending.window_start_local, pending.window_end_local, interval 1 hour)
+    ) as forecast_timestamp_local
+    from (
+        select window_start_local, window_end_local, ingested_at_utc
+        from stg_aqi_hourly
+        where forecast_timestamp_local = window_end_local
+            and (
+                ingested_at_utc > (select max(last_ingested_at_utc) from fct_aqi_forecast_skill)
+                or is_late
+            )
+    ) as pending
+    left join fct_aqi_forecast_skill as skill
+        on skill.forecast_timestamp_local = pending.window_end_local
+    where not coalesce(
+        list_contains(
+            list_transform(skill.revisions, revision -> revision.ingested_at_utc),
+            pending.ingested_at_utc
+        ),
+        false
+    )
+),
+changes as (
+    select
+        forecast_timestamp_local,
+        ingested_at_utc,
+        raw_file_name,
+        latitude,
+        longitude,
+        struct_pack(forecast_date_local, pm25, pm10, us_aqi) as stored
+    from stg_aqi_hourly
+    where forecast_timestamp_local in (select forecast_timestamp_local from affected_hours)
+),
+-- A delta file that covers an hour without restating it repeats the hour's previous stored
+-- value for that location, so the revision history matches a corpus of full payloads.
+filled_revisions as (
+    select
+        forecast_timestamp_local,
+        ingested_at_utc,
+        raw_file_name,
+        last_value(stored ignore nulls) over (
+            partition by forecast_timestamp_local, latitude, longitude
+            order by ingested_at_utc, raw_file_name
+        ) as stored
+    from (
+        select * from changes
+        union all
+        select
+            forecast_timestamp_local,
+            ingested_at_utc,
+            raw_file_name,
+            latitude,
+            longitude,
+            null as stored
+        from (
+            select *
+            from (select
+        unnest(
+            generate_series(window_start_local, window_end_local, interval 1 hour)
+        ) as forecast_timestamp_local,
+        ingest_time_utc,
+        ingested_at_utc,
+        latitude,
+        longitude,
+        raw_file_name
+    from stg_aqi_hourly
+    where is_delta and forecast_timestamp_local = window_end_local
+)
+            where forecast_timestamp_local in (select forecast_timestamp_local from affected_hours)
+        ) as coverage
+        where not exists (
+            select 1
+            from changes
+            where changes.forecast_timestamp_local = coverage.forecast_timestamp_local
+                and changes.raw_file_name = coverage.raw_file_name
+        )
+    )
+),
+revisions as (
+    select
+        forecast_timestamp_local,
+        stored.forecast_date_local,
+        stored.pm25,
+        stored.pm10,
+        stored.us_aqi,
+        ingested_at_utc,
+        raw_file_name,
+        datediff(
+            'hour',
+            timezone($timezone, timezone('UTC', ingested_at_utc)),
+            forecast_timestamp_local
+        ) as lead_hours
+    from filled_revisions
+    where stored is not null
+    -- Revisions whose bronze file was retired are no longer staged; keep them as scored.
+    union all
+    select
+        skill.forecast_timestamp_local,
+        skill.forecast_date_local,
+        scored.revision.pm25,
+        scored.revision.pm10,
+        scored.revision.us_aqi,
+        scored.revision.ingested_at_utc,
+        null as raw_file_name,
+        scored.revision.lead_hours
+    from fct_aqi_forecast_skill as skill, unnest(skill.revisions) as scored(revision)
+    where skill.forecast_timestamp_local in (select forecast_timestamp_local from affected_hours)
+        and scored.revision.ingested_at_utc not in (
+            select ingested_at_utc
+            from filled_revisions
+            where filled_revisions.forecast_timestamp_local = skill.forecast_timestamp_local
+                and stored is not null
+        )
+),
+scored_revisions as (
+    select
+        *,
+        -- The latest revision is the realised value once it was ingested at or after the
+        -- forecast hour itself.
+        first_value(lead_hours) over latest <= 0 as is_realised,
+        first_value(pm25) over latest as latest_pm25,
+        first_value(pm10) over latest as latest_pm10,
+        first_value(us_aqi) over latest as latest_us_aqi
+    from revisions
+    window latest as (
+        partition by forecast_timestamp_local
+        order by ingested_at_utc desc, raw_file_name desc
+    )
+)
+select
+    forecast_timestamp_local,
+    any_value(forecast_date_local) as forecast_date_local,
+    count(*) as revision_count,
+    max(lead_hours) as max_lead_hours,
+    bool_or(is_realised) as is_realised,
+    case when bool_or(is_realised) then any_value(latest_pm25) end as actual_pm25,
+    case when bool_or(is_realised) then any_value(latest_pm10) end as actual_pm10,
+    case when bool_or(is_realised) then any_value(latest_us_aqi) end as actual_us_aqi,
+    max(ingested_at_utc) as last_ingested_at_utc,
+    list(
+        struct_pack(
+            lead_hours := lead_hours,
+            ingested_at_utc := ingested_at_utc,
+            pm25 := pm25,
+            pm10 := pm10,
+            us_aqi := us_aqi,
+            pm25_error := case when is_realised then pm25 - latest_pm25 end,
+            pm10_error := case when is_realised then pm10 - latest_pm10 end,
+            us_aqi_error := case when is_realised then us_aqi - latest_us_aqi end
+        )
+        order by ingested_at_utc, raw_file_name
+    ) as revisions
+from scored_revisions
+group by forecast_timestamp_local
+""",
+    ("fct_aqi_forecast_skill", "rescore"): """
+-- One row per forecast hour with every revision of it, its lead time and, once the hour
+-- has been observed, its error against the realised value. Scored revisions are kept when
+-- lifecycle retires their bronze file, so the mart is never rebuilt from scratch: a full
+-- refresh rescores every staged hour and merges it with what is already stored, and
+-- incremental runs rescore only the hours new ingests touched.
+with
+affected_hours as (
+    select distinct forecast_timestamp_local from stg_aqi_hourly
+),
+changes as (
+    select
+        forecast_timestamp_local,
+        ingested_at_utc,
+        raw_file_name,
+        latitude,
+        longitude,
+        struct_pack(forecast_date_local, pm25, pm10, us_aqi) as stored
+    from stg_aqi_hourly
+    where forecast_timestamp_local in (select forecast_timestamp_local from affected_hours)
+),
+-- A delta file that covers an hour without restating it repeats the hour's previous stored
+-- value for that location, so the revision history matches a corpus of full payloads.
+filled_revisions as (
+    select
+        forecast_timestamp_local,
+        ingested_at_utc,
+        raw_file_name,
+        last_value(stored ignore nulls) over (
+            partition by forecast_timestamp_local, latitude, longitude
+            order by ingested_at_utc, raw_file_name
+        ) as stored
+    from (
+        select * from changes
+        union all
+        select
+            forecast_timestamp_local,
+            ingested_at_utc,
+            raw_file_name,
+            latitude,
+            longitude,
+            null as stored
+        from (
+            select *
+            from (select
+        unnest(
+            generate_series(window_start_local, window_end_local, interval 1 hour)
+        ) as forecast_timestamp_local,
+        ingest_time_utc,
+        ingested_at_utc,
+        latitude,
+        longitude,
+        raw_file_name
+    from stg_aqi_hourly
+    where is_delta and forecast_timestamp_local = window_end_local
+)
+            where forecast_timestamp_local in (select forecast_timestamp_local from affected_hours)
+        ) as coverage
+        where not exists (
+            select 1
+            from changes
+            where changes.forecast_timestamp_local = coverage.forecast_timestamp_local
+                and changes.raw_file_name = coverage.raw_file_name
+        )
+    )
+),
+revisions as (
+    select
+        forecast_timestamp_local,
+        stored.forecast_date_local,
+        stored.pm25,
+        stored.pm10,
+        stored.us_aqi,
+        ingested_at_utc,
+        raw_file_name,
+        datediff(
+            'hour',
+            timezone($timezone, timezone('UTC', ingested_at_utc)),
+            forecast_timestamp_local
+        ) as lead_hours
+    from filled_revisions
+    where stored is not null
+    -- Revisions whose bronze file was retired are no longer staged; keep them as scored.
+    union all
+    select
+        skill.forecast_timestamp_local,
+        skill.forecast_date_local,
+        scored.revision.pm25,
+        scored.revision.pm10,
+        scored.revision.us_aqi,
+        scored.revision.ingested_at_utc,
+        null as raw_file_name,
+        scored.revision.lead_hours
+    from fct_aqi_forecast_skill as skill, unnest(skill.revisions) as scored(revision)
+    where skill.forecast_timestamp_local in (select forecast_timestamp_local from affected_hours)
+        and scored.revision.ingested_at_utc not in (
+            select ingested_at_utc
+            from filled_revisions
+            where filled_revisions.forecast_timestamp_local = skill.forecast_timestamp_local
+                and stored is not null
+        )
+),
+scored_revisions as (
+    select
+        *,
+        -- The latest revision is the realised value once it was ingested at or after the
+        -- forecast hour itself.
+        first_value(lead_hours) over latest <= 0 as is_realised,
+        first_value(pm25) over latest as latest_pm25,
+        first_value(pm10) over latest as latest_pm10,
+        first_value(us_aqi) over latest as latest_us_aqi
+    from revisions
+    window latest as (
+        partition by forecast_timestamp_local
+        order by ingested_at_utc desc, raw_file_name desc
+    )
+)
+select
+    forecast_timestamp_local,
+    any_value(forecast_date_local) as forecast_date_local,
+    count(*) as revision_count,
+    max(lead_hours) as max_lead_hours,
+    bool_or(is_realised) as is_realised,
+    case when bool_or(is_realised) then any_value(latest_pm25) end as actual_pm25,
+    case when bool_or(is_realised) then any_value(latest_pm10) end as actual_pm10,
+    case when bool_or(is_realised) then any_value(latest_us_aqi) end as actual_us_aqi,
+    max(ingested_at_utc) as last_ingested_at_utc,
+    list(
+        struct_pack(
+            lead_hours := lead_hours,
+            ingested_at_utc := ingested_at_utc,
+            pm25 := pm25,
+            pm10 := pm10,
+            us_aqi := us_aqi,
+            pm25_error := case when is_realised then pm25 - latest_pm25 end,
+            pm10_error := case when is_realised then pm10 - latest_pm10 end,
+            us_aqi_error := case when is_realised then us_aqi - latest_us_aqi end
+        )
+        order by ingested_at_utc, raw_file_name
+    ) as revisions
+from scored_revisions
+group by forecast_timestamp_local
+""",
+}
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import cProfile
+import io
+import logging
+import os
+import pstats
+import random
+from collections.abc import Iterator
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+from bangkok_aqi.config import PROFILERS, Settings, get_settings
+
+LOGGER = logging.getLogger(__name__)
+DEFAULT_PROFILE_TOP_N = 25
+
+
+def should_profile(sample_rate: float, force: bool = False) -> bool:
+    if force:
+        return True
+    return sample_rate > 0 and random.random() < sample_rate
+
+
+def build_profile_path(settings: Settings, label: str, suffix: str) -> Path:
+    # The pid keeps concurrent runs of the same command in one second from colliding.
+    timestamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    return settings.data_dir / "profiles" / f"{label}_{timestamp}_{os.getpid()}.{suffix}"
+
+
+@contextmanager
+def profile_command(
+    label: str,
+    force: bool = False,
+    profiler: str | None = None,
+    settings: Settings | None = None,
+    top_n: int = DEFAULT_PROFILE_TOP_N,
+) -> Iterator[Path | None]:
+    active_settings = settings or get_settings()
+    if not should_profile(active_settings.profile_sample_rate, force):
+        yield None
+        return
+
+    active_profiler = profiler or active_settings.profiler
+    if active_profiler not in PROFILERS:
+        raise ValueError(f"Unknown profiler {active_profiler!r}; expected one of {PROFILERS}.")
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    if active_profiler == "pyinstrument":
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            LOGGER.warning("pyinstrument is not installed; falling back to cProfile.")
+        else:
+            # Sampling keeps the overhead flat regardless of call counts, which makes it the
+            # better choice for captures left enabled on a share of production runs.
+            with _pyinstrument_profile(Profiler, active_settings, label) as output_path:
+                yield output_path
+            return
+
+    with _cprofile_profile(active_settings, label, top_n) as output_path:
+        yield output_path
+
+
+@contextmanager
+def _cprofile_profile(settings: Settings, label: str, top_n: int) -> Iterator[Path]:
+    output_path = build_profile_path(settings, label, "prof")
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield output_path
+    finally:
+        profiler.disable()
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        profiler.dump_stats(output_path)
+
+        summary = io.StringIO()
+        pstats.Stats(profiler, stream=summary).sort_stats("cumulative").print_stats(top_n)
+        LOGGER.info(
+            "Wrote cProfile stats to %s; top %s by cumulative time:\n%s",
+            output_path,
+            top_n,
+            summary.getvalue(),
+        )
+
+
+@contextmanager
+def _pyinstrument_profile(profiler_class, settings: Settings, label: str) -> Iterator[Path]:
+    output_path = build_profile_path(settings, label, "html")
+    profiler = profiler_class()
+    profiler.start()
+    try:
+        yield output_path
+    finally:
+        profiler.stop()
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        output_path.write_text(profiler.output_html(), encoding="utf-8")
+        LOGGER.info(
+            "Wrote pyinstrument profile to %s:\n%s",
+            output_path,
+            profiler.output_text(unicode=False, color=False),
+        )
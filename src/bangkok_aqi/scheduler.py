@@ -0,0 +1,525 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from collections import deque
+from collections.abc import Callable, Iterator
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextlib import closing, contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import TypeVar
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from bangkok_aqi.config import Settings
+
+RETRYABLE_STATUSES = frozenset({429, 500, 502, 503, 504})
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class SchedulerConfig:
+    rate_per_second: float = 1.0
+    burst: int = 5
+    min_concurrency: int = 1
+    max_concurrency: int = 4
+    target_latency_seconds: float = 5.0
+    max_attempts: int = 4
+    backoff_seconds: float = 1.0
+    max_retry_after_seconds: float = 300.0
+    state_path: Path | None = None
+    hedge_requests: bool = False
+    hedge_quantile: float = 0.95
+    hedge_min_samples: int = 20
+    hedge_default_delay_seconds: float = 2.0
+    hedge_min_delay_seconds: float = 0.05
+    breaker_failure_threshold: int = 5
+    breaker_reset_seconds: float = 30.0
+
+    def __post_init__(self) -> None:
+        if self.rate_per_second < 0:
+            raise ValueError("rate_per_second cannot be negative.")
+        if self.burst < 1:
+            raise ValueError("burst must be at least 1.")
+        if not 1 <= self.min_concurrency <= self.max_concurrency:
+            raise ValueError("Concurrency bounds must satisfy 1 <= min <= max.")
+        if self.max_attempts < 1:
+            raise ValueError("max_attempts must be at least 1.")
+        if not 0 < self.hedge_quantile < 1:
+            raise ValueError("hedge_quantile must be between 0 and 1.")
+        if self.breaker_failure_threshold < 0:
+            raise ValueError("breaker_failure_threshold cannot be negative.")
+
+
+class CircuitOpenError(requests.ConnectionError):
+    """Raised without a request when an endpoint's circuit breaker is open."""
+
+
+@dataclass(frozen=True)
+class BucketState:
+    tokens: float
+    updated_at: float
+    blocked_until: float
+
+
+class _MemoryBucketState:
+    def __init__(self, initial: BucketState):
+        self._state = initial
+        self._lock = threading.Lock()
+
+    def transact(self, apply: Callable[[BucketState], tuple[BucketState, T]]) -> T:
+        with self._lock:
+            self._state, result = apply(self._state)
+            return result
+
+
+class _SqliteBucketState:
+    # BEGIN IMMEDIATE takes SQLite's write lock before the read, so every process sharing
+    # the file sees a serialized read-modify-write of the one bucket row.
+    def __init__(self, path: Path, initial: BucketState):
+        self.path = path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as connection:
+            connection.execute("begin immediate")
+            connection.execute(
+                "create table if not exists token_bucket ("
+                "id integer primary key check (id = 1), "
+                "tokens real not null, updated_at real not null, blocked_until real not null)"
+            )
+            connection.execute(
+                "insert or ignore into token_bucket values (1, ?, ?, ?)",
+                (initial.tokens, initial.updated_at, initial.blocked_until),
+            )
+            connection.execute("commit")
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30, isolation_level=None)
+
+    def transact(self, apply: Callable[[BucketState], tuple[BucketState, T]]) -> T:
+        with closing(self._connect()) as connection:
+            connection.execute("begin immediate")
+            try:
+                row = connection.execute(
+                    "select tokens, updated_at, blocked_until from token_bucket where id = 1"
+                ).fetchone()
+                state, result = apply(BucketState(*row))
+                connection.execute(
+                    "update token_bucket set tokens = ?, updated_at = ?, blocked_until = ? "
+                    "where id = 1",
+                    (state.tokens, state.updated_at, state.blocked_until),
+                )
+            except BaseException:
+                connection.execute("rollback")
+                raise
+            connection.execute("commit")
+            return result
+
+
+class TokenBucket:
+    def __init__(
+        self,
+        rate_per_second: float,
+        capacity: int,
+        state_path: Path | None = None,
+        clock: Callable[[], float] | None = None,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.rate_per_second = rate_per_second
+        self.capacity = capacity
+        # Processes only share a timeline through the wall clock; a single process can use
+        # the monotonic one and ignore clock adjustments.
+        self._clock = clock or (time.time if state_path else time.monotonic)
+        self._sleep = sleep
+        initial = BucketState(tokens=float(capacity), updated_at=self._clock(), blocked_until=0.0)
+        self._state = (
+            _SqliteBucketState(state_path, initial) if state_path else _MemoryBucketState(initial)
+        )
+
+    def acquire(self) -> float:
+        waited = 0.0
+        while True:
+            wait = self._state.transact(self._take)
+            if wait <= 0:
+                return waited
+            self._sleep(wait)
+            waited += wait
+
+    def pause(self, seconds: float) -> None:
+        # A throttle from upstream applies to every caller sharing the bucket, and the
+        # bucket restarts empty so the pause is not followed by a full burst.
+        def apply(state: BucketState) -> tuple[BucketState, None]:
+            now = self._clock()
+            blocked_until = max(state.blocked_until, now + seconds)
+            return BucketState(0.0, blocked_until, blocked_until), None
+
+        self._state.transact(apply)
+
+    def _take(self, state: BucketState) -> tuple[BucketState, float]:
+        now = self._clock()
+        if now < state.blocked_until:
+            return state, state.blocked_until - now
+        if self.rate_per_second <= 0:
+            return state, 0.0
+
+        elapsed = max(0.0, now - state.updated_at)
+        tokens = min(float(self.capacity), state.tokens + elapsed * self.rate_per_second)
+        if tokens >= 1:
+            return BucketState(tokens - 1, now, state.blocked_until), 0.0
+        return BucketState(tokens, now, state.blocked_until), (1 - tokens) / self.rate_per_second
+
+
+class AdaptiveConcurrencyLimiter:
+    # Additive increase, multiplicative decrease: each fast success grows the limit by
+    # about one slot per window of requests, slow responses shrink it gently, and throttles
+    # or server errors halve it.
+    def __init__(self, min_limit: int, max_limit: int, target_latency_seconds: float):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.target_latency_seconds = target_latency_seconds
+        self._limit = float(min_limit)
+        self._in_flight = 0
+        self._condition = threading.Condition()
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        with self._condition:
+            self._condition.wait_for(lambda: self._in_flight < self.limit)
+            self._in_flight += 1
+        try:
+            yield
+        finally:
+            self.release()
+
+    def try_acquire(self) -> bool:
+        with self._condition:
+            if self._in_flight >= self.limit:
+                return False
+            self._in_flight += 1
+            return True
+
+    def release(self) -> None:
+        with self._condition:
+            self._in_flight -= 1
+            self._condition.notify_all()
+
+    def record_success(self, latency_seconds: float) -> None:
+        with self._condition:
+            if latency_seconds <= self.target_latency_seconds:
+                self._limit = min(float(self.max_limit), self._limit + 1 / self._limit)
+            else:
+                self._limit = max(float(self.min_limit), self._limit * 0.9)
+            self._condition.notify_all()
+
+    def record_failure(self) -> None:
+        with self._condition:
+            self._limit = max(float(self.min_limit), self._limit / 2)
+
+
+class LatencyTracker:
+    def __init__(self, window: int = 200):
+        self._latencies: deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._latencies)
+
+    def record(self, latency_seconds: float) -> None:
+        with self._lock:
+            self._latencies.append(latency_seconds)
+
+    def quantile(self, q: float) -> float | None:
+        with self._lock:
+            ordered = sorted(self._latencies)
+        if not ordered:
+            return None
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class CircuitBreaker:
+    # Closed until `failure_threshold` consecutive failures, then open: requests fail fast
+    # for `reset_seconds`. After that a single trial request is let through (half-open),
+    # and its outcome closes the breaker or opens it again.
+    def __init__(
+        self,
+        failure_threshold: int,
+        reset_seconds: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._clock = clock
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if self._clock() - self._opened_at < self.reset_seconds:
+                return "open"
+            return "half-open"
+
+    def before_request(self, endpoint: str) -> None:
+        with self._lock:
+            if self._opened_at is None:
+                return
+            remaining = self.reset_seconds - (self._clock() - self._opened_at)
+            if remaining > 0 or self._trial_in_flight:
+                raise CircuitOpenError(
+                    f"Circuit breaker for {endpoint} is open after {self._failures} "
+                    f"consecutive failures; retrying in {max(remaining, 0):.0f}s."
+                )
+            self._trial_in_flight = True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                self._opened_at = self._clock()
+
+
+class RequestScheduler:
+    def __init__(
+        self,
+        config: SchedulerConfig | None = None,
+        clock: Callable[[], float] | None = None,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.config = config or SchedulerConfig()
+        self.bucket = TokenBucket(
+            self.config.rate_per_second,
+            self.config.burst,
+            state_path=self.config.state_path,
+            clock=clock,
+            sleep=sleep,
+        )
+        self.concurrency = AdaptiveConcurrencyLimiter(
+            self.config.min_concurrency,
+            self.config.max_concurrency,
+            self.config.target_latency_seconds,
+        )
+        self._clock = clock or time.monotonic
+        self._sleep = sleep
+        self._breakers: dict[str, CircuitBreaker] = {}
+        self._latencies: dict[str, LatencyTracker] = {}
+        self._endpoints_lock = threading.Lock()
+        self._hedge_executor: ThreadPoolExecutor | None = None
+        self.hedges_sent = 0
+        self.hedges_won = 0
+
+    def breaker(self, endpoint: str) -> CircuitBreaker | None:
+        if not self.config.breaker_failure_threshold:
+            return None
+        with self._endpoints_lock:
+            breaker = self._breakers.get(endpoint)
+            if breaker is None:
+                breaker = self._breakers[endpoint] = CircuitBreaker(
+                    self.config.breaker_failure_threshold,
+                    self.config.breaker_reset_seconds,
+                    clock=self._clock,
+                )
+            return breaker
+
+    def latencies(self, endpoint: str) -> LatencyTracker:
+        with self._endpoints_lock:
+            return self._latencies.setdefault(endpoint, LatencyTracker())
+
+    def hedge_delay(self, endpoint: str) -> float:
+        tracker = self.latencies(endpoint)
+        if len(tracker) < self.config.hedge_min_samples:
+            return self.config.hedge_default_delay_seconds
+        p95_latency = tracker.quantile(self.config.hedge_quantile)
+        return max(self.config.hedge_min_delay_seconds, p95_latency)
+
+    def send(
+        self,
+        send: Callable[[], requests.Response],
+        endpoint: str = "",
+        hedge: bool = False,
+    ) -> tuple[requests.Response, int]:
+        breaker = self.breaker(endpoint)
+        hedged = hedge and self.config.hedge_requests
+        retries = 0
+        while True:
+            if breaker is not None:
+                breaker.before_request(endpoint)
+            with self.concurrency.slot():
+                self.bucket.acquire()
+                started = self._clock()
+                try:
+                    response = self._send_hedged(send, endpoint) if hedged else send()
+                # Any error counts against the breaker, so a failed half-open trial never
+                # leaves the endpoint refused for good.
+                except Exception as exc:
+                    if isinstance(exc, requests.RequestException):
+                        self.concurrency.record_failure()
+                    if breaker is not None:
+                        breaker.record_failure()
+                    raise
+                latency = self._clock() - started
+
+            # Throttling means upstream is up, so only server errors count against the breaker.
+            if breaker is not None:
+                if response.status_code >= 500:
+                    breaker.record_failure()
+                else:
+                    breaker.record_success()
+            if response.status_code not in RETRYABLE_STATUSES:
+                self.concurrency.record_success(latency)
+                self.latencies(endpoint).record(latency)
+                return response, retries
+
+            self.concurrency.record_failure()
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            delay = (
+                retry_after
+                if retry_after is not None
+                else self.config.backoff_seconds * 2**retries
+            )
+            out_of_attempts = retries + 1 >= self.config.max_attempts
+            if out_of_attempts or delay > self.config.max_retry_after_seconds:
+                return response, retries
+
+            response.close()
+            retries += 1
+            if response.status_code == 429 or retry_after is not None:
+                self.bucket.pause(delay)
+            else:
+                self._sleep(delay)
+
+    def _send_hedged(
+        self,
+        send: Callable[[], requests.Response],
+        endpoint: str,
+    ) -> requests.Response:
+        # The duplicate goes out once the primary has outlived the endpoint's recent p95
+        # latency, so only tail requests pay for a second call. It spends a rate token and a
+        # concurrency slot of its own, and is not sent when the limiter has no slot free.
+        # Whichever response arrives first is used; the other is closed.
+        if self._hedge_executor is None:
+            with self._endpoints_lock:
+                if self._hedge_executor is None:
+                    self._hedge_executor = ThreadPoolExecutor(
+                        max_workers=2 * self.config.max_concurrency,
+                        thread_name_prefix="hedged-request",
+                    )
+        primary = self._hedge_executor.submit(send)
+        done, _ = wait([primary], timeout=self.hedge_delay(endpoint))
+        if done:
+            return primary.result()
+
+        if not self.concurrency.try_acquire():
+            return primary.result()
+
+        def send_hedge() -> requests.Response:
+            try:
+                self.bucket.acquire()
+                return send()
+            finally:
+                self.concurrency.release()
+
+        hedge = self._hedge_executor.submit(send_hedge)
+        self.hedges_sent += 1
+        pending = {primary, hedge}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            winners = [future for future in (primary, hedge) if future in done]
+            for winner in winners:
+                if winner.exception() is None:
+                    for loser in {primary, hedge} - {winner}:
+                        loser.add_done_callback(_close_response)
+                    self.hedges_won += winner is hedge
+                    return winner.result()
+        return primary.result()
+
+
+def _close_response(future: Future) -> None:
+    if future.exception() is None:
+        future.result().close()
+
+
+class ScheduledHTTPAdapter(HTTPAdapter):
+    def __init__(self, scheduler: RequestScheduler, **kwargs):
+        self.scheduler = scheduler
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs) -> requests.Response:
+        parent_send = super().send
+        response, retries = self.scheduler.send(
+            lambda: parent_send(request, **kwargs),
+            endpoint=build_endpoint_key(request.url),
+            hedge=request.method == "GET",
+        )
+        response.scheduler_retries = retries
+        return response
+
+
+def build_endpoint_key(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}{parts.path}"
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    if value is None or not value.strip():
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def build_scheduler_config(settings: Settings) -> SchedulerConfig:
+    return SchedulerConfig(
+        rate_per_second=settings.request_rate_per_second,
+        burst=settings.request_burst,
+        max_concurrency=settings.request_max_concurrency,
+        state_path=settings.request_rate_limit_path,
+        hedge_requests=settings.hedge_requests,
+        breaker_failure_threshold=settings.circuit_breaker_threshold,
+        breaker_reset_seconds=settings.circuit_breaker_reset_seconds,
+    )
+
+
+_SCHEDULERS: dict[SchedulerConfig, RequestScheduler] = {}
+_SCHEDULERS_LOCK = threading.Lock()
+
+
+def get_request_scheduler(config: SchedulerConfig) -> RequestScheduler:
+    # Sessions built in the same process share one scheduler per configuration, so threads
+    # fetching in parallel draw from a single budget.
+    with _SCHEDULERS_LOCK:
+        scheduler = _SCHEDULERS.get(config)
+        if scheduler is None:
+            scheduler = _SCHEDULERS[config] = RequestScheduler(config)
+        return scheduler
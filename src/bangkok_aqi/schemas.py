@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from pathlib import Path
+
+from bangkok_aqi.config import get_repo_root
+
+DBT_COLUMNS_MACRO_PATH = Path("dbt") / "macros" / "bronze_columns.sql"
+# Delta-encoded bronze files carry this envelope; see bangkok_aqi.delta.
+DELTA_ENVELOPE_TYPE = "STRUCT(window_start VARCHAR, window_end VARCHAR)"
+
+
+@dataclass(frozen=True)
+class BronzeField:
+    name: str
+    duckdb_type: str
+    metric: bool = False
+
+
+@dataclass(frozen=True)
+class BronzeSchema:
+    dataset: str
+    label: str
+    hourly_fields: tuple[BronzeField, ...]
+    location_fields: tuple[BronzeField, ...] = (
+        BronzeField("latitude", "DOUBLE"),
+        BronzeField("longitude", "DOUBLE"),
+    )
+
+    @property
+    def hourly_columns(self) -> tuple[str, ...]:
+        return tuple(field.name for field in self.hourly_fields)
+
+    @property
+    def metric_columns(self) -> tuple[str, ...]:
+        return tuple(field.name for field in self.hourly_fields if field.metric)
+
+    @property
+    def request_hourly_param(self) -> str:
+        return ",".join(field.name for field in self.hourly_fields if field.name != "time")
+
+    def duckdb_columns(self) -> dict[str, str]:
+        hourly_struct = ", ".join(
+            f'"{field.name}" {field.duckdb_type}[]' for field in self.hourly_fields
+        )
+        return {
+            **{field.name: field.duckdb_type for field in self.location_fields},
+            "hourly": f"STRUCT({hourly_struct})",
+            "delta": DELTA_ENVELOPE_TYPE,
+        }
+
+    def duckdb_columns_sql(self) -> str:
+        # Rendered as a DuckDB struct literal for read_json(columns = ...), so the reader
+        # never samples files to infer types and an all-null metric cannot drift to JSON.
+        entries = ", ".join(
+            f"'{name}': '{duckdb_type}'" for name, duckdb_type in self.duckdb_columns().items()
+        )
+        return f"{{{entries}}}"
+
+
+BRONZE_SCHEMAS = {
+    "aqi": BronzeSchema(
+        dataset="aqi",
+        label="Hourly",
+        hourly_fields=(
+            BronzeField("time", "VARCHAR"),
+            BronzeField("pm2_5", "DOUBLE", metric=True),
+            BronzeField("pm10", "DOUBLE", metric=True),
+            BronzeField("us_aqi", "INTEGER", metric=True),
+        ),
+    ),
+    "weather": BronzeSchema(
+        dataset="weather",
+        label="Weather",
+        hourly_fields=(
+            BronzeField("time", "VARCHAR"),
+            BronzeField("temperature_2m", "DOUBLE"),
+            BronzeField("relative_humidity_2m", "DOUBLE"),
+            BronzeField("wind_speed_10m", "DOUBLE"),
+        ),
+    ),
+}
+
+
+def render_dbt_columns_macro() -> str:
+    lines = [
+        "{#- Generated from bangkok_aqi.schemas by `bangkok-aqi sync-dbt-schemas`. -#}",
+        "{% macro bronze_columns(dataset) %}",
+    ]
+    for index, (dataset, schema) in enumerate(BRONZE_SCHEMAS.items()):
+        keyword = "if" if index == 0 else "elif"
+        lines.append(f'    {{%- {keyword} dataset == "{dataset}" -%}}')
+        lines.append(f"    {schema.duckdb_columns_sql()}")
+    lines.append('    {%- else -%}')
+    lines.append('    {{ exceptions.raise_compiler_error("Unknown bronze dataset " ~ dataset) }}')
+    lines.append("    {%- endif -%}")
+    lines.append("{% endmacro %}")
+    return "\n".join(lines) + "\n"
+
+
+def sync_dbt_columns_macro(check: bool = False) -> bool:
+    macro_path = get_repo_root() / DBT_COLUMNS_MACRO_PATH
+    rendered = render_dbt_columns_macro()
+    current = macro_path.read_text(encoding="utf-8") if macro_path.exists() else None
+    if current == rendered:
+        return True
+    if not check:
+        macro_path.parent.mkdir(parents=True, exist_ok=True)
+        macro_path.write_text(rendered, encoding="utf-8")
+    return False
@@ -0,0 +1,448 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from email.utils import format_datetime, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any
+from urllib.parse import parse_qs, urlencode, urlsplit
+from zoneinfo import ZoneInfo
+
+import duckdb
+
+from bangkok_aqi.config import (
+    DEFAULT_MAX_AGE_SECONDS,
+    DEFAULT_POOL_SIZE,
+    DEFAULT_RESPONSE_CACHE_ENTRIES,
+    Settings,
+    get_settings,
+)
+
+LOGGER = logging.getLogger(__name__)
+MAX_LATEST_HOURS = 168
+MAX_RANGE_DAYS = 92
+HOURLY_SELECT = """
+    select
+        forecast_timestamp_local,
+        forecast_date_local,
+        pm25,
+        pm10,
+        us_aqi,
+        temperature_c,
+        relative_humidity,
+        wind_speed_kph,
+        last_ingested_at_utc,
+        latitude,
+        longitude
+    from fct_aqi_hourly
+"""
+DAILY_SELECT = """
+    select
+        forecast_date_local,
+        round(avg(us_aqi), 1) as avg_aqi,
+        max(us_aqi) as max_aqi,
+        round(avg(pm25), 1) as avg_pm25,
+        round(avg(pm10), 1) as avg_pm10,
+        round(avg(temperature_c), 1) as avg_temperature_c,
+        round(avg(relative_humidity), 1) as avg_relative_humidity,
+        round(avg(wind_speed_kph), 1) as avg_wind_speed_kph
+    from fct_aqi_hourly
+    where forecast_date_local between ? and ?
+    group by forecast_date_local
+    order by forecast_date_local
+"""
+
+
+class ApiRequestError(ValueError):
+    """Raised when a read API request has missing or invalid query parameters."""
+
+
+@dataclass(frozen=True)
+class DataVersion:
+    file_signature: tuple[int, int]
+    last_ingested_at_utc: datetime | None
+    row_count: int
+
+
+@dataclass(frozen=True)
+class RenderedResponse:
+    body: bytes
+    etag: str
+    last_modified: str | None
+
+
+class ResponseCache:
+    def __init__(self, max_entries: int = DEFAULT_RESPONSE_CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[tuple[Any, ...], RenderedResponse] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: tuple[Any, ...]) -> RenderedResponse | None:
+        with self._lock:
+            response = self._entries.get(key)
+            if response is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return response
+
+    def put(self, key: tuple[Any, ...], response: RenderedResponse) -> None:
+        with self._lock:
+            self._entries[key] = response
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class ReadOnlyConnectionPool:
+    # DuckDB lets a writer in only when no other process holds the file, so each connection
+    # is closed as soon as its query finishes and dbt or the native transform can take the
+    # write lock between any two requests. The pool only bounds how many queries run at once;
+    # requests answered from the response cache never touch it.
+    def __init__(self, duckdb_path: Path, size: int = DEFAULT_POOL_SIZE):
+        self.duckdb_path = duckdb_path
+        self._slots = threading.BoundedSemaphore(size)
+
+    @contextmanager
+    def connection(self) -> Iterator[duckdb.DuckDBPyConnection]:
+        with self._slots:
+            with duckdb.connect(str(self.duckdb_path), read_only=True) as connection:
+                yield connection
+
+
+def _database_signature(duckdb_path: Path) -> tuple[int, int]:
+    signature = []
+    for path in (duckdb_path, duckdb_path.with_name(f"{duckdb_path.name}.wal")):
+        try:
+            signature.append(path.stat().st_mtime_ns)
+        except FileNotFoundError:
+            signature.append(0)
+    return signature[0], signature[1]
+
+
+def _parse_date_param(query: dict[str, list[str]], name: str) -> date:
+    values = query.get(name)
+    if not values:
+        raise ApiRequestError(f"Query parameter '{name}' is required (YYYY-MM-DD).")
+    try:
+        return date.fromisoformat(values[0])
+    except ValueError as exc:
+        raise ApiRequestError(f"Query parameter '{name}' must be a YYYY-MM-DD date.") from exc
+
+
+def _parse_range(query: dict[str, list[str]]) -> tuple[date, date]:
+    start_date = _parse_date_param(query, "start")
+    end_date = _parse_date_param(query, "end")
+    if end_date < start_date:
+        raise ApiRequestError("'end' cannot be before 'start'.")
+    if (end_date - start_date).days >= MAX_RANGE_DAYS:
+        raise ApiRequestError(f"Date ranges are limited to {MAX_RANGE_DAYS} days.")
+    return start_date, end_date
+
+
+def _records(cursor: duckdb.DuckDBPyConnection) -> list[dict[str, Any]]:
+    columns = [column[0] for column in cursor.description]
+    return [dict(zip(columns, row, strict=True)) for row in cursor.fetchall()]
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, datetime | date):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+class MartApiServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address: tuple[str, int],
+        settings: Settings,
+        cache_entries: int = DEFAULT_RESPONSE_CACHE_ENTRIES,
+        max_age_seconds: int = DEFAULT_MAX_AGE_SECONDS,
+        pool_size: int = DEFAULT_POOL_SIZE,
+    ):
+        super().__init__(address, MartApiRequestHandler)
+        self.settings = settings
+        self.max_age_seconds = max_age_seconds
+        self.cache = ResponseCache(cache_entries)
+        self.pool = ReadOnlyConnectionPool(settings.duckdb_path, pool_size)
+        self._version: DataVersion | None = None
+        self._version_lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def data_version(self) -> DataVersion:
+        # A stat per request is enough to notice a dbt build or native transform; the mart is
+        # only queried for its ingest watermark when the file actually changed.
+        signature = _database_signature(self.settings.duckdb_path)
+        with self._version_lock:
+            if self._version is not None and self._version.file_signature == signature:
+                return self._version
+            try:
+                with self.pool.connection() as connection:
+                    last_ingested_at, row_count = connection.execute(
+                        "select max(last_ingested_at_utc), count(*) from fct_aqi_hourly"
+                    ).fetchone()
+            except duckdb.IOException as exc:
+                # A writer holds the file mid-build. Keep answering with the version already
+                # cached, under its ETag, and look again on the next request.
+                if self._version is None:
+                    raise
+                LOGGER.info("Warehouse is locked (%s); serving the cached version", exc)
+                return self._version
+            if last_ingested_at is not None:
+                last_ingested_at = last_ingested_at.replace(tzinfo=timezone.utc)
+            self._version = DataVersion(signature, last_ingested_at, row_count)
+            self.cache.clear()
+            return self._version
+
+    def render(self, route: str, query: dict[str, list[str]]) -> RenderedResponse:
+        version = self.data_version()
+        canonical_query = urlencode(sorted((key, values[0]) for key, values in query.items()))
+        last_modified = version.last_ingested_at_utc
+        latest_hour = None
+        if route == "/v1/latest":
+            # The latest view moves with the clock, so the current hour is part of its key
+            # and of its modification time.
+            current_hour = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+            latest_hour = current_hour.isoformat()
+            last_modified = max(last_modified or current_hour, current_hour)
+        key = (route, canonical_query, latest_hour, version.file_signature)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        payload = {
+            "last_ingested_at_utc": (
+                version.last_ingested_at_utc.isoformat() if version.last_ingested_at_utc else None
+            ),
+            **self._query(route, query),
+        }
+        body = json.dumps(payload, default=_json_default, separators=(",", ":")).encode()
+        etag_source = f"{route}?{canonical_query}|{latest_hour}|{version.last_ingested_at_utc}"
+        etag_source += f"|{version.row_count}"
+        rendered = RenderedResponse(
+            body=body,
+            etag=f'"{hashlib.sha1(etag_source.encode()).hexdigest()[:20]}"',
+            last_modified=(
+                format_datetime(last_modified.replace(microsecond=0), usegmt=True)
+                if last_modified
+                else None
+            ),
+        )
+        self.cache.put(key, rendered)
+        return rendered
+
+    def _query(self, route: str, query: dict[str, list[str]]) -> dict[str, Any]:
+        if route == "/v1/latest":
+            try:
+                hours = int(query.get("hours", ["24"])[0])
+            except ValueError as exc:
+                raise ApiRequestError("'hours' must be an integer.") from exc
+            if not 1 <= hours <= MAX_LATEST_HOURS:
+                raise ApiRequestError(f"'hours' must be between 1 and {MAX_LATEST_HOURS}.")
+            current_hour = datetime.now(ZoneInfo(self.settings.timezone_name)).replace(
+                minute=0, second=0, microsecond=0, tzinfo=None
+            )
+            with self.pool.connection() as connection:
+                rows = _records(
+                    connection.execute(
+                        f"""
+                        {HOURLY_SELECT}
+                        where forecast_timestamp_local >= (
+                            select least(?, max(forecast_timestamp_local)) from fct_aqi_hourly
+                        )
+                        order by forecast_timestamp_local
+                        limit ?
+                        """,
+                        [current_hour, hours],
+                    )
+                )
+            return {"rows": rows}
+
+        start_date, end_date = _parse_range(query)
+        with self.pool.connection() as connection:
+            if route == "/v1/hourly":
+                rows = _records(
+                    connection.execute(
+                        f"""
+                        {HOURLY_SELECT}
+                        where forecast_date_local between ? and ?
+                        order by forecast_timestamp_local
+                        """,
+                        [start_date, end_date],
+                    )
+                )
+            else:
+                rows = _records(connection.execute(DAILY_SELECT, [start_date, end_date]))
+        return {"start": start_date, "end": end_date, "rows": rows}
+
+    def start(self) -> MartApiServer:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> MartApiServer:
+        return self.start()
+
+    def __exit__(self, exc_type, exc, exc_tb) -> bool:
+        self.stop()
+        return False
+
+
+class MartApiRequestHandler(BaseHTTPRequestHandler):
+    server: MartApiServer
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    routes = ("/v1/latest", "/v1/hourly", "/v1/daily")
+
+    def do_GET(self) -> None:
+        url = urlsplit(self.path)
+        if url.path == "/healthz":
+            self._send_json(
+                200,
+                {
+                    "status": "ok",
+                    "cache_entries": len(self.server.cache),
+                    "cache_hits": self.server.cache.hits,
+                    "cache_misses": self.server.cache.misses,
+                },
+            )
+            return
+        if url.path not in self.routes:
+            self._send_json(404, {"error": f"Unknown endpoint {url.path}"})
+            return
+
+        try:
+            rendered = self.server.render(url.path, parse_qs(url.query))
+        except ApiRequestError as exc:
+            self._send_json(400, {"error": str(exc)})
+            return
+        except duckdb.Error as exc:
+            LOGGER.warning("Mart query failed: %s", exc)
+            self._send_json(503, {"error": "The warehouse is unavailable."}, {"Retry-After": "5"})
+            return
+
+        headers = {
+            "ETag": rendered.etag,
+            "Cache-Control": f"public, max-age={self.server.max_age_seconds}",
+        }
+        if rendered.last_modified:
+            headers["Last-Modified"] = rendered.last_modified
+        if self._is_not_modified(rendered):
+            self._send(304, b"", headers)
+            return
+        self._send(200, rendered.body, headers)
+
+    def _is_not_modified(self, rendered: RenderedResponse) -> bool:
+        if_none_match = self.headers.get("If-None-Match")
+        if if_none_match is not None:
+            candidates = {tag.strip() for tag in if_none_match.split(",")}
+            return "*" in candidates or rendered.etag in candidates
+
+        if_modified_since = self.headers.get("If-Modified-Since")
+        if if_modified_since and rendered.last_modified:
+            try:
+                since = parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError):
+                return False
+            return parsedate_to_datetime(rendered.last_modified) <= since
+        return False
+
+    def _send_json(
+        self,
+        status: int,
+        payload: dict[str, Any],
+        headers: dict[str, str] | None = None,
+    ) -> None:
+        self._send(
+            status,
+            json.dumps(payload).encode(),
+            {"Cache-Control": "no-store", **(headers or {})},
+        )
+
+    def _send(self, status: int, body: bytes, headers: dict[str, str]) -> None:
+        self.send_response(status)
+        if status != 304:
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        if status != 304:
+            self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        LOGGER.debug("serve %s - %s", self.address_string(), format % args)
+
+
+def start_mart_api_server(
+    settings: Settings | None = None,
+    host: str = "127.0.0.1",
+    port: int = 0,
+    **kwargs: Any,
+) -> MartApiServer:
+    return MartApiServer((host, port), settings or get_settings(), **kwargs).start()
+
+
+def run_serve(
+    host: str = "127.0.0.1",
+    port: int = 8080,
+    cache_entries: int = DEFAULT_RESPONSE_CACHE_ENTRIES,
+    max_age_seconds: int = DEFAULT_MAX_AGE_SECONDS,
+    pool_size: int = DEFAULT_POOL_SIZE,
+) -> None:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    settings = get_settings()
+    if not settings.duckdb_path.exists():
+        raise FileNotFoundError(
+            f"{settings.duckdb_path} does not exist; build the warehouse first."
+        )
+    server = MartApiServer(
+        (host, port),
+        settings,
+        cache_entries=cache_entries,
+        max_age_seconds=max_age_seconds,
+        pool_size=pool_size,
+    )
+    LOGGER.info("Serving fct_aqi_hourly from %s at %s", settings.duckdb_path, server.base_url)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
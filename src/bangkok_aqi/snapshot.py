@@ -0,0 +1,204 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import Any
+
+import duckdb
+import pandas as pd
+
+from bangkok_aqi.config import DEFAULT_SNAPSHOT_WINDOW_DAYS, Settings, get_settings
+from bangkok_aqi.dashboard import (
+    SKILL_CURVE_COLUMNS,
+    build_daily_summary,
+    build_hero_summary,
+    build_map_frame,
+    build_metric_options,
+    build_status_rows,
+    default_date_window,
+    load_forecast_skill_curve,
+    load_hourly_aqi,
+    load_mart_date_bounds,
+)
+from bangkok_aqi.instrumentation import span
+
+LOGGER = logging.getLogger(__name__)
+SNAPSHOT_SCHEMA_VERSION = 2
+SNAPSHOT_HEADER_NAME = "dashboard_snapshot.json"
+SNAPSHOT_HOURLY_PREFIX = "dashboard_snapshot_"
+
+
+@dataclass(frozen=True)
+class DashboardSnapshot:
+    created_at_utc: str
+    mart_start_date: date
+    mart_end_date: date
+    mart_row_count: int
+    window_start_date: date
+    window_end_date: date
+    hourly: pd.DataFrame
+    hero: dict[str, Any]
+    status_rows: list[dict[str, Any]]
+    map_frame: pd.DataFrame
+    daily_summary: pd.DataFrame
+    metric_options: dict[str, str]
+    skill_curve: pd.DataFrame
+
+
+def build_dashboard_snapshot(
+    duckdb_path: Path,
+    window_days: int = DEFAULT_SNAPSHOT_WINDOW_DAYS,
+    connection: duckdb.DuckDBPyConnection | None = None,
+) -> DashboardSnapshot:
+    if window_days < 1:
+        raise ValueError("window_days must be at least 1.")
+
+    bounds = load_mart_date_bounds(duckdb_path, connection)
+    if bounds is None:
+        raise ValueError(f"fct_aqi_hourly in {duckdb_path} has no rows to snapshot.")
+
+    mart_start_date, mart_end_date, mart_row_count = bounds
+    window_start_date, _ = default_date_window(mart_start_date, mart_end_date, window_days)
+    hourly = load_hourly_aqi(
+        duckdb_path,
+        compact=True,
+        start_date=window_start_date,
+        end_date=mart_end_date,
+        connection=connection,
+    )
+    return DashboardSnapshot(
+        created_at_utc=datetime.now(timezone.utc).isoformat(),
+        mart_start_date=mart_start_date,
+        mart_end_date=mart_end_date,
+        mart_row_count=mart_row_count,
+        window_start_date=window_start_date,
+        window_end_date=mart_end_date,
+        hourly=hourly,
+        hero=build_hero_summary(hourly),
+        status_rows=build_status_rows(hourly),
+        map_frame=build_map_frame(hourly),
+        daily_summary=build_daily_summary(hourly),
+        metric_options=build_metric_options(hourly),
+        # The curve spans the whole mart, not the window, and is cheap to store.
+        skill_curve=load_forecast_skill_curve(duckdb_path, connection),
+    )
+
+
+def write_dashboard_snapshot(snapshot: DashboardSnapshot, snapshot_dir: Path) -> Path:
+    snapshot_dir.mkdir(parents=True, exist_ok=True)
+    created_at = datetime.fromisoformat(snapshot.created_at_utc)
+    hourly_name = f"{SNAPSHOT_HOURLY_PREFIX}{created_at:%Y%m%dT%H%M%S%fZ}.parquet"
+    header = {
+        "schema_version": SNAPSHOT_SCHEMA_VERSION,
+        "created_at_utc": snapshot.created_at_utc,
+        "hourly_file": hourly_name,
+        "mart": {
+            "start_date": snapshot.mart_start_date.isoformat(),
+            "end_date": snapshot.mart_end_date.isoformat(),
+            "row_count": snapshot.mart_row_count,
+        },
+        "window": {
+            "start_date": snapshot.window_start_date.isoformat(),
+            "end_date": snapshot.window_end_date.isoformat(),
+            "row_count": len(snapshot.hourly),
+        },
+        "hero": snapshot.hero,
+        "status_rows": snapshot.status_rows,
+        "map": snapshot.map_frame.to_dict(orient="records"),
+        "daily_summary": json.loads(
+            snapshot.daily_summary.to_json(orient="records", date_format="iso")
+        ),
+        "metric_options": snapshot.metric_options,
+        "skill_curve": json.loads(snapshot.skill_curve.to_json(orient="records")),
+    }
+
+    # The header is swapped in last and names its own hourly file, so a reader never pairs a
+    # new header with an old frame. Superseded frames are removed afterwards; a reader that
+    # loses that race gets None back and falls through to DuckDB.
+    hourly_path = snapshot_dir / hourly_name
+    _replace_atomically(hourly_path, lambda temp_path: snapshot.hourly.to_parquet(temp_path))
+    header_path = snapshot_dir / SNAPSHOT_HEADER_NAME
+    _replace_atomically(
+        header_path,
+        lambda temp_path: temp_path.write_text(json.dumps(header, indent=2), encoding="utf-8"),
+    )
+    for stale_path in snapshot_dir.glob(f"{SNAPSHOT_HOURLY_PREFIX}*.parquet"):
+        if stale_path.name != hourly_name:
+            stale_path.unlink(missing_ok=True)
+    return header_path
+
+
+def _replace_atomically(target_path: Path, write: Any) -> None:
+    temp_path = target_path.with_name(f".{target_path.name}.{os.getpid()}.tmp")
+    write(temp_path)
+    os.replace(temp_path, target_path)
+
+
+def load_dashboard_snapshot(snapshot_dir: Path) -> DashboardSnapshot | None:
+    header_path = snapshot_dir / SNAPSHOT_HEADER_NAME
+    try:
+        header = json.loads(header_path.read_text(encoding="utf-8"))
+        if header.get("schema_version") != SNAPSHOT_SCHEMA_VERSION:
+            return None
+        hourly = pd.read_parquet(snapshot_dir / header["hourly_file"])
+    except FileNotFoundError:
+        return None
+
+    daily_summary = pd.DataFrame(header["daily_summary"])
+    if not daily_summary.empty:
+        daily_summary["forecast_date_local"] = pd.to_datetime(
+            daily_summary["forecast_date_local"]
+        )
+
+    return DashboardSnapshot(
+        created_at_utc=header["created_at_utc"],
+        mart_start_date=date.fromisoformat(header["mart"]["start_date"]),
+        mart_end_date=date.fromisoformat(header["mart"]["end_date"]),
+        mart_row_count=header["mart"]["row_count"],
+        window_start_date=date.fromisoformat(header["window"]["start_date"]),
+        window_end_date=date.fromisoformat(header["window"]["end_date"]),
+        hourly=hourly,
+        hero=header["hero"],
+        status_rows=header["status_rows"],
+        map_frame=pd.DataFrame(header["map"]),
+        daily_summary=daily_summary,
+        metric_options=header["metric_options"],
+        skill_curve=pd.DataFrame(header["skill_curve"], columns=list(SKILL_CURVE_COLUMNS)),
+    )
+
+
+def publish_dashboard_snapshot(
+    settings: Settings | None = None,
+    window_days: int = DEFAULT_SNAPSHOT_WINDOW_DAYS,
+    connection: duckdb.DuckDBPyConnection | None = None,
+) -> DashboardSnapshot:
+    active_settings = settings or get_settings()
+    with span("dashboard_snapshot") as snapshot_span:
+        snapshot = build_dashboard_snapshot(active_settings.duckdb_path, window_days, connection)
+        header_path = write_dashboard_snapshot(snapshot, active_settings.snapshot_dir)
+        snapshot_span.set(
+            row_count=len(snapshot.hourly),
+            payload_bytes=sum(
+                path.stat().st_size
+                for path in active_settings.snapshot_dir.glob(f"{SNAPSHOT_HOURLY_PREFIX}*")
+            )
+            + header_path.stat().st_size,
+        )
+
+    LOGGER.info(
+        "Published dashboard snapshot for %s to %s (%s rows) at %s",
+        snapshot.window_start_date,
+        snapshot.window_end_date,
+        len(snapshot.hourly),
+        header_path,
+    )
+    return snapshot
+
+
+def run_snapshot(window_days: int = DEFAULT_SNAPSHOT_WINDOW_DAYS) -> DashboardSnapshot:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    return publish_dashboard_snapshot(window_days=window_days)
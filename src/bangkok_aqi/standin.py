@@ -0,0 +1,256 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import random
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import date, datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from bangkok_aqi.synthetic import (
+    SyntheticConfig,
+    encode_synthetic_history_payload,
+    encode_synthetic_payload,
+)
+
+LOGGER = logging.getLogger(__name__)
+STANDIN_ROUTES = {
+    "/v1/air-quality": "aqi",
+    "/v1/forecast": "weather",
+    "/v1/archive": "weather",
+}
+
+
+@dataclass(frozen=True)
+class StandinConfig:
+    latency_seconds: float = 0.0
+    error_rate: float = 0.0
+    throttle_rate: float = 0.0
+    slow_every: int = 0
+    slow_latency_seconds: float = 0.0
+    retry_after_seconds: int = 1
+    drip_chunk_bytes: int = 0
+    drip_delay_seconds: float = 0.0
+    cache_max_age_seconds: int = 0
+    seed: int = 0
+
+    def __post_init__(self) -> None:
+        if min(self.latency_seconds, self.slow_latency_seconds, self.drip_delay_seconds) < 0:
+            raise ValueError("Latencies and drip delay cannot be negative.")
+        if self.slow_every < 0:
+            raise ValueError("slow_every cannot be negative.")
+        if not 0 <= self.error_rate <= 1 or not 0 <= self.throttle_rate <= 1:
+            raise ValueError("error_rate and throttle_rate must be between 0 and 1.")
+        if self.error_rate + self.throttle_rate > 1:
+            raise ValueError("error_rate and throttle_rate cannot add up to more than 1.")
+        if self.drip_chunk_bytes < 0:
+            raise ValueError("drip_chunk_bytes cannot be negative.")
+        if self.cache_max_age_seconds < 0:
+            raise ValueError("cache_max_age_seconds cannot be negative.")
+
+
+@dataclass
+class StandinStats:
+    statuses: Counter = field(default_factory=Counter)
+    bytes_sent: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    @property
+    def requests(self) -> int:
+        return sum(self.statuses.values())
+
+    def record(self, status: int, bytes_sent: int) -> None:
+        with self._lock:
+            self.statuses[status] += 1
+            self.bytes_sent += bytes_sent
+
+
+class StandinServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], config: StandinConfig):
+        super().__init__(address, StandinRequestHandler)
+        self.config = config
+        self.stats = StandinStats()
+        self._random = random.Random(config.seed)
+        self._random_lock = threading.Lock()
+        self._request_count = 0
+        self._thread: threading.Thread | None = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def air_quality_url(self) -> str:
+        return f"{self.base_url}/v1/air-quality"
+
+    @property
+    def weather_forecast_url(self) -> str:
+        return f"{self.base_url}/v1/forecast"
+
+    @property
+    def weather_archive_url(self) -> str:
+        return f"{self.base_url}/v1/archive"
+
+    def next_request_number(self) -> int:
+        with self._random_lock:
+            self._request_count += 1
+            return self._request_count
+
+    def draw(self) -> float:
+        with self._random_lock:
+            return self._random.random()
+
+    def start(self) -> StandinServer:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> StandinServer:
+        return self.start()
+
+    def __exit__(self, exc_type, exc, exc_tb) -> bool:
+        self.stop()
+        return False
+
+
+class StandinRequestHandler(BaseHTTPRequestHandler):
+    server: StandinServer
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; without TCP_NODELAY every keep-alive
+    # response stalls on the client's delayed ACK.
+    disable_nagle_algorithm = True
+
+    def do_GET(self) -> None:
+        config = self.server.config
+        url = urlsplit(self.path)
+        dataset = STANDIN_ROUTES.get(url.path)
+        if dataset is None:
+            self._send(404, b'{"error":true,"reason":"Not found"}')
+            return
+
+        if config.latency_seconds:
+            time.sleep(config.latency_seconds)
+        # Every Nth request is a deterministic tail-latency outlier; a duplicate sent while
+        # it stalls is the next request and goes through at normal speed.
+        if config.slow_every and self.server.next_request_number() % config.slow_every == 0:
+            time.sleep(config.slow_latency_seconds)
+
+        # One draw per request decides between throttling, a server error and success, so
+        # the configured rates hold regardless of how many threads are serving.
+        draw = self.server.draw()
+        if draw < config.throttle_rate:
+            self._send(
+                429,
+                b'{"error":true,"reason":"Too many concurrent requests"}',
+                {"Retry-After": str(config.retry_after_seconds)},
+            )
+            return
+        if draw < config.throttle_rate + config.error_rate:
+            self._send(503, b'{"error":true,"reason":"Service unavailable"}')
+            return
+
+        query = parse_qs(url.query)
+        synthetic_config = SyntheticConfig(
+            seed=config.seed,
+            latitude=float(query.get("latitude", ["13.75"])[0]),
+            longitude=float(query.get("longitude", ["100.5"])[0]),
+            timezone_name=query.get("timezone", ["Asia/Bangkok"])[0],
+        )
+        generated_at = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+        if "start_date" in query and "end_date" in query:
+            body = encode_synthetic_history_payload(
+                synthetic_config,
+                dataset,
+                date.fromisoformat(query["start_date"][0]),
+                date.fromisoformat(query["end_date"][0]),
+            )
+        else:
+            body = encode_synthetic_payload(synthetic_config, dataset, generated_at)
+
+        # Like a model run upstream, a forecast only changes when the hour turns over.
+        headers = {
+            "ETag": f'"{hashlib.sha1(body).hexdigest()}"',
+            "Last-Modified": format_datetime(generated_at, usegmt=True),
+        }
+        if config.cache_max_age_seconds:
+            headers["Cache-Control"] = f"max-age={config.cache_max_age_seconds}"
+        if self._not_modified(headers["ETag"], generated_at):
+            self._send(304, b"", headers)
+            return
+        self._send(200, body, headers)
+
+    def _not_modified(self, etag: str, last_modified: datetime) -> bool:
+        if_none_match = self.headers.get("If-None-Match")
+        if if_none_match is not None:
+            return etag in {tag.strip() for tag in if_none_match.split(",")}
+        if_modified_since = self.headers.get("If-Modified-Since")
+        if if_modified_since is None:
+            return False
+        try:
+            return last_modified <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+
+    def _send(self, status: int, body: bytes, headers: dict[str, str] | None = None) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+
+        chunk_size = self.server.config.drip_chunk_bytes or len(body) or 1
+        for offset in range(0, len(body), chunk_size):
+            if offset and self.server.config.drip_delay_seconds:
+                time.sleep(self.server.config.drip_delay_seconds)
+            self.wfile.write(body[offset : offset + chunk_size])
+            self.wfile.flush()
+        self.server.stats.record(status, len(body))
+
+    def log_message(self, format: str, *args) -> None:
+        LOGGER.debug("standin %s - %s", self.address_string(), format % args)
+
+
+def start_standin_server(
+    config: StandinConfig | None = None,
+    host: str = "127.0.0.1",
+    port: int = 0,
+) -> StandinServer:
+    return StandinServer((host, port), config or StandinConfig()).start()
+
+
+def run_standin(config: StandinConfig, host: str = "127.0.0.1", port: int = 8765) -> None:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    server = StandinServer((host, port), config)
+    LOGGER.info(
+        "Open-Meteo stand-in listening; set AIR_QUALITY_URL=%s and WEATHER_FORECAST_URL=%s",
+        server.air_quality_url,
+        server.weather_forecast_url,
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        LOGGER.info(
+            "Stand-in served %s request(s): %s",
+            server.stats.requests,
+            dict(server.stats.statuses),
+        )
@@ -1,11 +1,22 @@
 from __future__ import annotations
 
+import base64
+import time
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import contextmanager
 from pathlib import Path
 
-from azure.storage.blob import BlobServiceClient, ContainerClient
+from azure.storage.blob import BlobBlock, BlobServiceClient, ContainerClient
 
 from bangkok_aqi.config import Settings
 
+# Blob batch requests accept at most 256 sub-requests.
+AZURE_BATCH_SIZE = 256
+# Streamed uploads are staged in blocks of this size, which also bounds their buffer.
+AZURE_BLOCK_BYTES = 4 * 1024 * 1024
+# Copies within one account usually finish at once; the rest are polled at this pace.
+AZURE_COPY_POLL_SECONDS = 0.5
+
 
 class StorageClient:
     def __init__(self, settings: Settings):
@@ -45,6 +56,41 @@ class StorageClient:
         local_path = self._get_local_path(path)
         local_path.write_bytes(content)
 
+    @contextmanager
+    def open_write_stream(self, path: str) -> Iterator[Callable[[bytes], object]]:
+        # Nothing becomes visible at `path` unless the block exits cleanly, so a payload
+        # rejected halfway through its download never lands in bronze.
+        if self.settings.azure_storage_connection_string:
+            blob_client = self._get_container_client().get_blob_client(path)
+            block_ids: list[str] = []
+            buffer = bytearray()
+
+            def stage_buffer() -> None:
+                block_id = base64.b64encode(f"{len(block_ids):08d}".encode()).decode()
+                blob_client.stage_block(block_id, bytes(buffer))
+                block_ids.append(block_id)
+                buffer.clear()
+
+            def write(chunk: bytes) -> None:
+                buffer.extend(chunk)
+                if len(buffer) >= AZURE_BLOCK_BYTES:
+                    stage_buffer()
+
+            yield write
+            if buffer:
+                stage_buffer()
+            blob_client.commit_block_list([BlobBlock(block_id=block_id) for block_id in block_ids])
+            return
+
+        local_path = self._get_local_path(path)
+        partial_path = local_path.with_name(f"{local_path.name}.partial")
+        try:
+            with partial_path.open("wb") as handle:
+                yield handle.write
+            partial_path.replace(local_path)
+        finally:
+            partial_path.unlink(missing_ok=True)
+
     def read_bytes(self, path: str) -> bytes:
         if self.settings.azure_storage_connection_string:
             blob_client = self._get_container_client().get_blob_client(path)
@@ -53,6 +99,12 @@ class StorageClient:
         local_path = self._get_local_path(path)
         return local_path.read_bytes()
 
+    def exists(self, path: str) -> bool:
+        if self.settings.azure_storage_connection_string:
+            return self._get_container_client().get_blob_client(path).exists()
+
+        return (self.settings.data_dir / path).is_file()
+
     def list_files(self, prefix: str = "") -> list[str]:
         if self.settings.azure_storage_connection_string:
             blobs = self._get_container_client().list_blobs(name_starts_with=prefix)
@@ -67,3 +119,69 @@ class StorageClient:
             for file_path in target_dir.rglob("*")
             if file_path.is_file()
         )
+
+    def list_file_sizes(self, prefix: str = "") -> dict[str, int]:
+        if self.settings.azure_storage_connection_string:
+            blobs = self._get_container_client().list_blobs(name_starts_with=prefix)
+            return {blob.name: blob.size for blob in blobs}
+
+        target_dir = self.settings.data_dir / prefix
+        if not target_dir.exists():
+            return {}
+
+        return {
+            str(file_path.relative_to(self.settings.data_dir)): file_path.stat().st_size
+            for file_path in target_dir.rglob("*")
+            if file_path.is_file()
+        }
+
+    def delete_files(self, paths: Iterable[str]) -> None:
+        paths = list(paths)
+        if self.settings.azure_storage_connection_string:
+            container_client = self._get_container_client()
+            for offset in range(0, len(paths), AZURE_BATCH_SIZE):
+                container_client.delete_blobs(*paths[offset : offset + AZURE_BATCH_SIZE])
+            return
+
+        for path in paths:
+            local_path = self.settings.data_dir / path
+            local_path.unlink(missing_ok=True)
+            self._remove_empty_parents(local_path)
+
+    def move_file(self, source: str, target: str, tier: str | None = None) -> None:
+        if self.settings.azure_storage_connection_string:
+            # The copy runs server-side, so archiving a blob never pulls its bytes through us.
+            container_client = self._get_container_client()
+            source_client = container_client.get_blob_client(source)
+            target_client = container_client.get_blob_client(target)
+            copy = target_client.start_copy_from_url(source_client.url, standard_blob_tier=tier)
+            status = copy["copy_status"]
+            while status == "pending":
+                time.sleep(AZURE_COPY_POLL_SECONDS)
+                status = target_client.get_blob_properties().copy.status
+            if status != "success":
+                raise RuntimeError(f"Copying {source} to {target} ended with status {status}.")
+            source_client.delete_blob()
+            return
+
+        source_path = self.settings.data_dir / source
+        source_path.replace(self._get_local_path(target))
+        self._remove_empty_parents(source_path)
+
+    def set_access_tier(self, paths: Iterable[str], tier: str) -> None:
+        if not self.settings.azure_storage_connection_string:
+            raise RuntimeError("Access tiers are only available on Azure storage.")
+
+        paths = list(paths)
+        container_client = self._get_container_client()
+        for offset in range(0, len(paths), AZURE_BATCH_SIZE):
+            container_client.set_standard_blob_tier_blobs(
+                tier,
+                *paths[offset : offset + AZURE_BATCH_SIZE],
+            )
+
+    def _remove_empty_parents(self, local_path: Path) -> None:
+        # Emptied hive partitions are dropped so globs stop listing them.
+        parent = local_path.parent
+        if "=" in parent.name and parent.is_dir() and not any(parent.iterdir()):
+            parent.rmdir()
@@ -0,0 +1,510 @@
+from __future__ import annotations
+
+import json
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Any
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+from bangkok_aqi.config import DEFAULT_SYNTHETIC_START, Settings, get_settings
+from bangkok_aqi.delta import encode_delta_payload
+from bangkok_aqi.extract import build_raw_object_path
+from bangkok_aqi.storage import StorageClient
+
+LOGGER = logging.getLogger(__name__)
+SYNTHETIC_DATASETS: dict[str, dict[str, Any]] = {
+    "aqi": {
+        "horizon_hours": 120,
+        "hourly_units": {"time": "iso8601", "pm2_5": "μg/m³", "pm10": "μg/m³", "us_aqi": "USAQI"},
+    },
+    "weather": {
+        "horizon_hours": 168,
+        "hourly_units": {
+            "time": "iso8601",
+            "temperature_2m": "°C",
+            "relative_humidity_2m": "%",
+            "wind_speed_10m": "km/h",
+        },
+    },
+}
+# 2024 EPA PM2.5 breakpoints, linearly interpolated onto the US AQI scale.
+PM25_AQI_BREAKPOINTS = (
+    (0.0, 9.0, 35.4, 55.4, 125.4, 225.4, 325.4),
+    (0.0, 50.0, 100.0, 150.0, 200.0, 300.0, 500.0),
+)
+CHUNK_INGEST_HOURS = 24 * 7
+
+_GOLDEN_GAMMA = np.uint64(0x9E3779B97F4A7C15)
+_MIX_MULTIPLIER_1 = np.uint64(0xBF58476D1CE4E5B9)
+_MIX_MULTIPLIER_2 = np.uint64(0x94D049BB133111EB)
+_SALT_PHASE = 1
+_SALT_DAY = 2
+_SALT_HOUR = 3
+_SALT_REVISION = 4
+_SALT_NULL = 5
+_SALT_LOCATION = 6
+MAX_SYNTHETIC_LOCATIONS = 3600
+
+
+@dataclass(frozen=True)
+class SyntheticConfig:
+    start: datetime = DEFAULT_SYNTHETIC_START
+    ingest_hours: int = 24
+    locations: int = 1
+    revision_rate: float = 0.3
+    null_ratio: float = 0.0
+    seed: int = 0
+    timezone_name: str = "Asia/Bangkok"
+    latitude: float = 13.75
+    longitude: float = 100.5
+    delta_baseline_hours: int = 0
+
+    def __post_init__(self) -> None:
+        if self.ingest_hours < 1:
+            raise ValueError("Synthetic corpora need at least one ingest hour.")
+        if self.locations < 1:
+            raise ValueError("At least one synthetic location is required.")
+        # Each location lands one second later within its ingest hour; beyond an hour of
+        # offsets, object paths would collide with the next hour's files.
+        if self.locations > MAX_SYNTHETIC_LOCATIONS:
+            raise ValueError(
+                f"Synthetic corpora support at most {MAX_SYNTHETIC_LOCATIONS} locations."
+            )
+        if not 0 <= self.revision_rate <= 1:
+            raise ValueError("revision_rate must be between 0 and 1.")
+        if not 0 <= self.null_ratio < 1:
+            raise ValueError("null_ratio must be at least 0 and below 1.")
+        if self.delta_baseline_hours < 0:
+            raise ValueError("delta_baseline_hours cannot be negative.")
+
+
+@dataclass(frozen=True)
+class SyntheticLocation:
+    latitude: float
+    longitude: float
+
+
+@dataclass(frozen=True)
+class SyntheticCorpus:
+    object_paths: tuple[str, ...]
+    total_bytes: int
+    ingest_hours: int
+    locations: int
+
+    @property
+    def file_count(self) -> int:
+        return len(self.object_paths)
+
+
+def build_synthetic_locations(config: SyntheticConfig) -> list[SyntheticLocation]:
+    return [
+        SyntheticLocation(
+            latitude=round(config.latitude + 0.05 * (index % 5), 2),
+            longitude=round(config.longitude + 0.05 * (index // 5), 2),
+        )
+        for index in range(config.locations)
+    ]
+
+
+def _mix64(values: np.ndarray) -> np.ndarray:
+    mixed = values + _GOLDEN_GAMMA
+    mixed = (mixed ^ (mixed >> np.uint64(30))) * _MIX_MULTIPLIER_1
+    mixed = (mixed ^ (mixed >> np.uint64(27))) * _MIX_MULTIPLIER_2
+    return mixed ^ (mixed >> np.uint64(31))
+
+
+def _hash_uniform(shape: tuple[int, ...], *keys: Any) -> np.ndarray:
+    # Counter-based hashing keeps every value a pure function of its keys, so chunks can be
+    # generated in any order or process and still reproduce the same corpus for a seed.
+    state = np.zeros(shape, dtype=np.uint64)
+    for key in keys:
+        state = _mix64(state ^ np.asarray(key, dtype=np.int64).view(np.uint64))
+    return (state >> np.uint64(11)).astype(np.float64) / float(1 << 53)
+
+
+def _hash_normal(shape: tuple[int, ...], *keys: Any) -> np.ndarray:
+    first = _hash_uniform(shape, *keys, 0)
+    second = _hash_uniform(shape, *keys, 1)
+    return np.sqrt(-2.0 * np.log1p(-first)) * np.cos(2.0 * np.pi * second)
+
+
+def _ingest_times(
+    config: SyntheticConfig,
+    ingest_indices: range,
+    location_index: int,
+) -> list[datetime]:
+    # Raw object paths are keyed by ingest time only, so each location lands a few seconds
+    # apart to keep its files distinct within the same ingest hour.
+    return [
+        config.start + timedelta(hours=ingest_index, seconds=location_index)
+        for ingest_index in ingest_indices
+    ]
+
+
+def _forecast_grid(
+    config: SyntheticConfig,
+    ingest_times: list[datetime],
+    horizon_hours: int,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    zone = ZoneInfo(config.timezone_name)
+    local_times = [ingest_time.astimezone(zone) for ingest_time in ingest_times]
+    window_starts = np.array(
+        [local_time.strftime("%Y-%m-%dT00") for local_time in local_times],
+        dtype="datetime64[h]",
+    )
+    forecast_local = window_starts[:, None] + np.arange(horizon_hours, dtype="timedelta64[h]")
+    forecast_keys = forecast_local.astype(np.int64)
+    utc_offset_hours = np.array(
+        [local_time.utcoffset().total_seconds() // 3600 for local_time in local_times],
+        dtype=np.int64,
+    )
+    ingest_keys = np.array(
+        [int(ingest_time.timestamp() // 3600) for ingest_time in ingest_times],
+        dtype=np.int64,
+    )
+    leads = forecast_keys - utc_offset_hours[:, None] - ingest_keys[:, None]
+    return forecast_local, forecast_keys, leads
+
+
+def _revision_ids(
+    config: SyntheticConfig,
+    location_index: int,
+    forecast_keys: np.ndarray,
+    leads: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray]:
+    shape = forecast_keys.shape
+    if config.revision_rate == 0:
+        return np.zeros(shape, dtype=np.int64), np.full(shape, 72, dtype=np.int64)
+
+    # Each forecast hour is revised on a staggered schedule at `revision_rate` of ingests.
+    # Lead time is measured from the ingest that produced the revision rather than the one
+    # that repeated it, so unrevised hours carry byte-identical values forward.
+    phase = _hash_uniform(shape, config.seed, location_index, forecast_keys, _SALT_PHASE)
+    ingest_keys = forecast_keys - leads
+    revision_ids = np.floor(ingest_keys * config.revision_rate + phase).astype(np.int64)
+    revision_starts = np.ceil((revision_ids - phase) / config.revision_rate).astype(np.int64)
+    return revision_ids, leads + (ingest_keys - revision_starts)
+
+
+def _null_mask(
+    config: SyntheticConfig,
+    location_index: int,
+    forecast_keys: np.ndarray,
+    revision_ids: np.ndarray,
+    column_salt: int,
+) -> np.ndarray:
+    if config.null_ratio == 0:
+        return np.zeros(forecast_keys.shape, dtype=bool)
+
+    draws = _hash_uniform(
+        forecast_keys.shape,
+        config.seed,
+        location_index,
+        forecast_keys,
+        revision_ids,
+        _SALT_NULL,
+        column_salt,
+    )
+    return draws < config.null_ratio
+
+
+def _seasonal_cycle(forecast_keys: np.ndarray, peak_day_of_year: float) -> np.ndarray:
+    day_of_year = (forecast_keys / 24.0) % 365.2425
+    return np.cos(2.0 * np.pi * (day_of_year - peak_day_of_year) / 365.2425)
+
+
+def _daily_cycle(forecast_keys: np.ndarray, peak_hour: float) -> np.ndarray:
+    return np.cos(2.0 * np.pi * (forecast_keys % 24 - peak_hour) / 24)
+
+
+def _generate_aqi_hourly(
+    config: SyntheticConfig,
+    location_index: int,
+    forecast_keys: np.ndarray,
+    leads: np.ndarray,
+) -> dict[str, tuple[np.ndarray, np.ndarray]]:
+    shape = forecast_keys.shape
+    revision_ids, revision_leads = _revision_ids(config, location_index, forecast_keys, leads)
+    location_factor = 1.0 + 0.1 * _hash_normal((1,), config.seed, location_index, _SALT_LOCATION)
+
+    # Bangkok PM2.5 peaks in the dry-season burning months and bottoms out in the monsoon,
+    # with a morning traffic bump on top of day-to-day synoptic swings.
+    seasonal = 32.0 + 22.0 * _seasonal_cycle(forecast_keys, peak_day_of_year=25.0)
+    diurnal = 1.0 + 0.2 * _daily_cycle(forecast_keys, peak_hour=7.0)
+    synoptic = np.exp(
+        0.3 * _hash_normal(shape, config.seed, location_index, forecast_keys // 24, _SALT_DAY)
+    )
+    hourly_noise = 1.0 + 0.08 * _hash_normal(
+        shape, config.seed, location_index, forecast_keys, _SALT_HOUR
+    )
+    truth = seasonal * diurnal * synoptic * hourly_noise * location_factor
+
+    forecast_spread = 0.05 + 0.004 * np.clip(revision_leads, 0, 168)
+    forecast_error = _hash_normal(
+        shape, config.seed, location_index, forecast_keys, revision_ids, _SALT_REVISION
+    )
+    pm25 = np.clip(truth * np.exp(forecast_spread * forecast_error), 1.0, 500.0)
+    coarse_ratio = 1.5 + 0.2 * _hash_uniform(
+        shape, config.seed, location_index, forecast_keys, _SALT_HOUR
+    )
+    us_aqi = np.rint(np.interp(pm25, *PM25_AQI_BREAKPOINTS)).astype(np.int64)
+
+    def null_mask(column_salt: int) -> np.ndarray:
+        return _null_mask(config, location_index, forecast_keys, revision_ids, column_salt)
+
+    return {
+        "pm2_5": (np.round(pm25, 1), null_mask(1)),
+        "pm10": (np.round(pm25 * coarse_ratio, 1), null_mask(2)),
+        "us_aqi": (us_aqi, null_mask(3)),
+    }
+
+
+def _generate_weather_hourly(
+    config: SyntheticConfig,
+    location_index: int,
+    forecast_keys: np.ndarray,
+    leads: np.ndarray,
+) -> dict[str, tuple[np.ndarray, np.ndarray]]:
+    shape = forecast_keys.shape
+    revision_ids, revision_leads = _revision_ids(config, location_index, forecast_keys, leads)
+    day_noise = _hash_normal(shape, config.seed, location_index, forecast_keys // 24, _SALT_DAY)
+    forecast_error = _hash_normal(
+        shape, config.seed, location_index, forecast_keys, revision_ids, _SALT_REVISION
+    ) * (0.3 + 0.01 * np.clip(revision_leads, 0, 168))
+
+    temperature = (
+        28.5
+        + 2.0 * _seasonal_cycle(forecast_keys, peak_day_of_year=110.0)
+        + 3.5 * _daily_cycle(forecast_keys, peak_hour=15.0)
+        + 0.8 * day_noise
+        + forecast_error
+    )
+    humidity = np.clip(np.rint(122.0 - 1.9 * temperature + 4.0 * forecast_error), 25, 100)
+    wind_speed = np.abs(8.0 + 3.0 * day_noise + 2.5 * forecast_error)
+
+    def null_mask(column_salt: int) -> np.ndarray:
+        return _null_mask(config, location_index, forecast_keys, revision_ids, column_salt)
+
+    return {
+        "temperature_2m": (np.round(temperature, 1), null_mask(4)),
+        "relative_humidity_2m": (humidity.astype(np.int64), null_mask(5)),
+        "wind_speed_10m": (np.round(wind_speed, 1), null_mask(6)),
+    }
+
+
+_HOURLY_GENERATORS = {
+    "aqi": _generate_aqi_hourly,
+    "weather": _generate_weather_hourly,
+}
+
+
+def _to_json_values(values: np.ndarray, null_mask: np.ndarray) -> list[Any]:
+    python_values = values.tolist()
+    if not null_mask.any():
+        return python_values
+    return [
+        None if is_null else value
+        for value, is_null in zip(python_values, null_mask.tolist(), strict=True)
+    ]
+
+
+def _encode_payloads(
+    config: SyntheticConfig,
+    dataset: str,
+    location_index: int,
+    ingest_times: list[datetime],
+    horizon_hours: int | None = None,
+) -> list[bytes]:
+    dataset_spec = SYNTHETIC_DATASETS[dataset]
+    location = build_synthetic_locations(config)[location_index]
+    zone = ZoneInfo(config.timezone_name)
+    forecast_local, forecast_keys, leads = _forecast_grid(
+        config, ingest_times, horizon_hours or dataset_spec["horizon_hours"]
+    )
+    hourly_columns = _HOURLY_GENERATORS[dataset](config, location_index, forecast_keys, leads)
+    time_strings = np.datetime_as_string(forecast_local, unit="m")
+
+    encoded = []
+    for row_index, ingested_at in enumerate(ingest_times):
+        local_ingest = ingested_at.astimezone(zone)
+        hourly: dict[str, list[Any]] = {"time": time_strings[row_index].tolist()}
+        for column, (values, null_mask) in hourly_columns.items():
+            hourly[column] = _to_json_values(values[row_index], null_mask[row_index])
+        payload = {
+            "latitude": location.latitude,
+            "longitude": location.longitude,
+            "generationtime_ms": 0.1,
+            "utc_offset_seconds": int(local_ingest.utcoffset().total_seconds()),
+            "timezone": config.timezone_name,
+            "timezone_abbreviation": local_ingest.tzname(),
+            "elevation": 4.0,
+            "hourly_units": dataset_spec["hourly_units"],
+            "hourly": hourly,
+        }
+        encoded.append(json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode())
+    return encoded
+
+
+def build_synthetic_payload(
+    config: SyntheticConfig,
+    dataset: str,
+    ingested_at: datetime,
+    location_index: int = 0,
+) -> dict[str, Any]:
+    return json.loads(encode_synthetic_payload(config, dataset, ingested_at, location_index))
+
+
+def encode_synthetic_payload(
+    config: SyntheticConfig,
+    dataset: str,
+    ingested_at: datetime,
+    location_index: int = 0,
+) -> bytes:
+    if dataset not in SYNTHETIC_DATASETS:
+        raise ValueError(f"Unsupported dataset '{dataset}'.")
+    return _encode_payloads(config, dataset, location_index, [ingested_at])[0]
+
+
+def encode_synthetic_history_payload(
+    config: SyntheticConfig,
+    dataset: str,
+    start_date: date,
+    end_date: date,
+    location_index: int = 0,
+) -> bytes:
+    if dataset not in SYNTHETIC_DATASETS:
+        raise ValueError(f"Unsupported dataset '{dataset}'.")
+    if end_date < start_date:
+        raise ValueError("end_date cannot be before start_date.")
+
+    # A history response is one payload whose window opens at local midnight of start_date
+    # and runs through end_date, like the upstream start_date/end_date parameters.
+    window_start = datetime.combine(start_date, time(), ZoneInfo(config.timezone_name))
+    horizon_hours = ((end_date - start_date).days + 1) * 24
+    return _encode_payloads(
+        config,
+        dataset,
+        location_index,
+        [window_start.astimezone(timezone.utc)],
+        horizon_hours=horizon_hours,
+    )[0]
+
+
+def _delta_encode_payloads(
+    payloads: list[bytes],
+    ingest_indices: range,
+    baseline_hours: int,
+) -> list[bytes]:
+    # Baselines stay whole and every other ingest keeps only what changed since the one
+    # before it. The first payload is only a reference unless it is itself a baseline.
+    decoded = [json.loads(content) for content in payloads]
+    return [
+        json.dumps(
+            encode_delta_payload(decoded[position - 1], decoded[position]),
+            separators=(",", ":"),
+            ensure_ascii=False,
+        ).encode()
+        if ingest_index % baseline_hours
+        else payloads[position]
+        for position, ingest_index in enumerate(ingest_indices)
+        if position > 0 or ingest_index % baseline_hours == 0
+    ]
+
+
+def _write_chunk(
+    settings: Settings,
+    config: SyntheticConfig,
+    location_index: int,
+    ingest_indices: range,
+) -> tuple[list[str], int]:
+    storage = StorageClient(settings)
+    baseline_hours = config.delta_baseline_hours
+    # A chunk opening between baselines also generates the ingest before it to diff against.
+    encoded_indices = ingest_indices
+    if baseline_hours > 0 and ingest_indices.start % baseline_hours:
+        encoded_indices = range(ingest_indices.start - 1, ingest_indices.stop)
+    ingest_times = _ingest_times(config, encoded_indices, location_index)
+    object_paths = []
+    total_bytes = 0
+    for dataset in SYNTHETIC_DATASETS:
+        payloads = _encode_payloads(config, dataset, location_index, ingest_times)
+        if baseline_hours > 0:
+            payloads = _delta_encode_payloads(payloads, encoded_indices, baseline_hours)
+        for ingested_at, content in zip(ingest_times[-len(payloads) :], payloads, strict=True):
+            object_path = build_raw_object_path(ingested_at, dataset=dataset)
+            storage.save_bytes(object_path, content)
+            object_paths.append(object_path)
+            total_bytes += len(content)
+    return object_paths, total_bytes
+
+
+def _plan_chunks(config: SyntheticConfig) -> list[tuple[int, range]]:
+    return [
+        (
+            location_index,
+            range(chunk_start, min(chunk_start + CHUNK_INGEST_HOURS, config.ingest_hours)),
+        )
+        for location_index in range(config.locations)
+        for chunk_start in range(0, config.ingest_hours, CHUNK_INGEST_HOURS)
+    ]
+
+
+def write_synthetic_corpus(
+    settings: Settings,
+    config: SyntheticConfig,
+    workers: int = 1,
+) -> SyntheticCorpus:
+    chunks = _plan_chunks(config)
+    if workers > 1 and len(chunks) > 1:
+        location_indices, ingest_ranges = zip(*chunks, strict=True)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(
+                executor.map(
+                    _write_chunk,
+                    [settings] * len(chunks),
+                    [config] * len(chunks),
+                    location_indices,
+                    ingest_ranges,
+                )
+            )
+    else:
+        results = [
+            _write_chunk(settings, config, location_index, ingest_indices)
+            for location_index, ingest_indices in chunks
+        ]
+
+    object_paths = sorted(path for chunk_paths, _ in results for path in chunk_paths)
+    total_bytes = sum(chunk_bytes for _, chunk_bytes in results)
+    LOGGER.info(
+        "Wrote %s synthetic bronze files (%.1f MiB) for %s location(s) over %s ingest hours",
+        len(object_paths),
+        total_bytes / 2**20,
+        config.locations,
+        config.ingest_hours,
+    )
+    return SyntheticCorpus(
+        object_paths=tuple(object_paths),
+        total_bytes=total_bytes,
+        ingest_hours=config.ingest_hours,
+        locations=config.locations,
+    )
+
+
+def run_synth(
+    config: SyntheticConfig,
+    workers: int = 1,
+    settings: Settings | None = None,
+) -> SyntheticCorpus:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    active_settings = settings or get_settings()
+    LOGGER.info(
+        "Generating synthetic bronze data into %s storage with %s worker(s)",
+        StorageClient(active_settings).backend_name,
+        workers,
+    )
+    return write_synthetic_corpus(active_settings, config, workers=workers)
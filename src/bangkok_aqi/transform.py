@@ -0,0 +1,406 @@
+from __future__ import annotations
+
+import glob
+import logging
+import re
+import time
+from dataclasses import dataclass
+from datetime import date
+from pathlib import Path
+
+import duckdb
+
+from bangkok_aqi.config import Settings, get_repo_root, get_settings
+from bangkok_aqi.instrumentation import span
+from bangkok_aqi.native_sql import NATIVE_SQL
+
+LOGGER = logging.getLogger(__name__)
+NATIVE_DATASETS = ("aqi", "weather")
+
+# The native engine runs the dbt models themselves, rendered once by `bangkok-aqi
+# sync-native-sql` into bangkok_aqi.native_sql so running it needs neither dbt nor Jinja.
+# Each model is rendered per variant: "full" builds it from scratch, "incremental" as dbt's
+# is_incremental() does, and "rescore" as a --full-refresh of a model dbt never drops.
+NATIVE_SQL_PATH = Path("src") / "bangkok_aqi" / "native_sql.py"
+NATIVE_MODELS = {
+    "stg_aqi_hourly": Path("staging") / "stg_aqi_hourly.sql",
+    "stg_weather_hourly": Path("staging") / "stg_weather_hourly.sql",
+    "fct_aqi_hourly": Path("marts") / "fct_aqi_hourly.sql",
+    "fct_aqi_forecast_skill": Path("marts") / "fct_aqi_forecast_skill.sql",
+}
+NATIVE_VARIANTS = {
+    "stg_aqi_hourly": ("full", "incremental"),
+    "stg_weather_hourly": ("full", "incremental"),
+    "fct_aqi_hourly": ("full", "incremental"),
+    "fct_aqi_forecast_skill": ("full", "incremental", "rescore"),
+}
+# dbt vars the native engine binds as query parameters instead.
+NATIVE_PARAMETERS = {
+    "raw_aqi_glob": "files",
+    "raw_weather_glob": "files",
+    "local_timezone": "timezone",
+}
+AFFECTED_HOURS_FILTER = (
+    "where forecast_timestamp_local in (select forecast_timestamp_local from _affected_hours)"
+)
+# Every staged file stores its window's last hour, and that row carries the whole window.
+FILE_WINDOW_HOURS_SQL = """
+    select unnest(
+        generate_series(window_start_local, window_end_local, interval 1 hour)
+    ) as forecast_timestamp_local
+    from {table}
+    where forecast_timestamp_local = window_end_local
+"""
+
+
+def _native_var(name: str) -> str:
+    if name not in NATIVE_PARAMETERS:
+        raise ValueError(f"dbt var {name!r} has no native query parameter.")
+    return f"__native_{NATIVE_PARAMETERS[name]}__"
+
+
+def render_native_sql() -> str:
+    import jinja2  # Installed with dbt; only regenerating the module needs it.
+
+    project_dir = get_repo_root() / "dbt"
+    environment = jinja2.Environment(
+        extensions=["jinja2.ext.do"],
+        undefined=jinja2.StrictUndefined,
+        keep_trailing_newline=True,
+    )
+    for macro_path in sorted((project_dir / "macros").glob("*.sql")):
+        module = environment.from_string(macro_path.read_text(encoding="utf-8")).module
+        environment.globals.update(
+            (name, macro)
+            for name, macro in vars(module).items()
+            if isinstance(macro, jinja2.runtime.Macro)
+        )
+    environment.globals.update(config=lambda **_: "", ref=lambda name: name, var=_native_var)
+
+    lines = [
+        "# Generated from the dbt models by `bangkok-aqi sync-native-sql`; do not edit.",
+        "# ruff: noqa: E501",
+        "NATIVE_SQL = {",
+    ]
+    for model, model_path in NATIVE_MODELS.items():
+        template = environment.from_string(
+            (project_dir / "models" / model_path).read_text(encoding="utf-8")
+        )
+        for variant in NATIVE_VARIANTS[model]:
+            rendered = template.render(
+                this=model,
+                is_incremental=lambda variant=variant: variant != "full",
+                flags={"FULL_REFRESH": variant == "rescore"},
+                # Native runs pass exactly the files to stage and recompute only the mart
+                # hours they touched.
+                ingest_date_filter=lambda: "",
+                affected_hours_filter=lambda variant=variant: (
+                    AFFECTED_HOURS_FILTER if variant == "incremental" else ""
+                ),
+            )
+            sql = re.sub(r"'__native_(\w+)__'", r"$\1", rendered)
+            sql = "\n".join(line.rstrip() for line in sql.strip().splitlines() if line.strip())
+            if "__native_" in sql or '"""' in sql or "\\" in sql:
+                raise ValueError(f"{model_path} does not render to a native statement.")
+            lines.append(f'    ("{model}", "{variant}"): """')
+            lines.append(sql)
+            lines.append('""",')
+    lines.append("}")
+    return "\n".join(lines) + "\n"
+
+
+def sync_native_sql(check: bool = False) -> bool:
+    module_path = get_repo_root() / NATIVE_SQL_PATH
+    rendered = render_native_sql()
+    current = module_path.read_text(encoding="utf-8") if module_path.exists() else None
+    if current == rendered:
+        return True
+    if not check:
+        module_path.write_text(rendered, encoding="utf-8")
+    return False
+
+
+@dataclass(frozen=True)
+class TransformResult:
+    new_files: dict[str, int]
+    affected_hours: int
+    full_refresh: bool
+    duration_seconds: float
+
+
+def list_bronze_files(
+    settings: Settings,
+    dataset: str,
+    min_ingest_date: date | None = None,
+) -> list[str]:
+    dataset_dir = settings.data_dir / "raw" / dataset
+    if min_ingest_date is None:
+        return sorted(glob.glob(str(dataset_dir / "**" / "*.json"), recursive=True))
+
+    # Mirror the dbt reader's partition pruning: skip older ingest_date=... folders without
+    # listing their files.
+    files = []
+    for partition_dir in glob.glob(str(dataset_dir / "ingest_date=*")):
+        partition_date = date.fromisoformat(Path(partition_dir).name.split("=", 1)[1])
+        if partition_date >= min_ingest_date:
+            files.extend(glob.glob(str(Path(partition_dir) / "**" / "*.json"), recursive=True))
+    return sorted(files)
+
+
+def _list_all_bronze_files(
+    settings: Settings,
+    min_ingest_date: date | None = None,
+) -> dict[str, list[str]]:
+    bronze_files = {
+        dataset: list_bronze_files(settings, dataset, min_ingest_date)
+        for dataset in NATIVE_DATASETS
+    }
+    if not all(bronze_files.values()):
+        raise FileNotFoundError(
+            f"No bronze files found under {settings.data_dir / 'raw'}; run the extract first."
+        )
+    return bronze_files
+
+
+def _table_exists(connection: duckdb.DuckDBPyConnection, table_name: str) -> bool:
+    row = connection.execute(
+        """
+        select count(*)
+        from information_schema.tables
+        where table_schema = 'main' and table_name = ?
+        """,
+        [table_name],
+    ).fetchone()
+    return bool(row and row[0])
+
+
+def _has_column(connection: duckdb.DuckDBPyConnection, table_name: str, column: str) -> bool:
+    row = connection.execute(
+        """
+        select count(*)
+        from information_schema.columns
+        where table_schema = 'main' and table_name = ? and column_name = ?
+        """,
+        [table_name, column],
+    ).fetchone()
+    return bool(row and row[0])
+
+
+def _known_file_names(
+    connection: duckdb.DuckDBPyConnection,
+    dataset: str,
+    min_ingest_date: date | None = None,
+) -> set[str]:
+    # Compare base names: dbt records raw_file_name exactly as its glob resolved, which is
+    # repo-relative for `make dbt-build` and absolute inside Airflow.
+    rows = connection.execute(
+        f"""
+        select distinct raw_file_name
+        from stg_{dataset}_hourly
+        where ingest_date >= coalesce(?, ingest_date)
+        """,
+        [min_ingest_date],
+    ).fetchall()
+    return {Path(row[0]).name for row in rows}
+
+
+def _stage_new_files(
+    connection: duckdb.DuckDBPyConnection,
+    dataset: str,
+    files: list[str],
+) -> None:
+    connection.execute(
+        f"create or replace temp table _new_{dataset}_stg as "
+        + NATIVE_SQL[(f"stg_{dataset}_hourly", "incremental")],
+        {"files": files},
+    )
+    connection.execute(f"insert into stg_{dataset}_hourly select * from _new_{dataset}_stg")
+
+
+def _refresh_forecast_skill(
+    connection: duckdb.DuckDBPyConnection,
+    timezone_name: str,
+    variant: str,
+) -> None:
+    # dbt's delete+insert on forecast_timestamp_local: the model itself finds the hours to
+    # rescore and merges them with the revisions the mart already stores.
+    connection.execute(
+        "create or replace temp table _rescored_skill as "
+        + NATIVE_SQL[("fct_aqi_forecast_skill", variant)],
+        {"timezone": timezone_name},
+    )
+    connection.execute(
+        "delete from fct_aqi_forecast_skill "
+        "where forecast_timestamp_local in (select forecast_timestamp_local from _rescored_skill)"
+    )
+    connection.execute("insert into fct_aqi_forecast_skill select * from _rescored_skill")
+
+
+def _full_refresh(
+    connection: duckdb.DuckDBPyConnection,
+    files: dict[str, list[str]],
+    timezone_name: str,
+) -> None:
+    for dataset in NATIVE_DATASETS:
+        connection.execute(
+            f"create or replace table stg_{dataset}_hourly as "
+            + NATIVE_SQL[(f"stg_{dataset}_hourly", "full")],
+            {"files": files[dataset]},
+        )
+        # Warehouses built before staging was fused still hold the exploded base tables.
+        connection.execute(f"drop table if exists base_{dataset}_hourly_exploded")
+    connection.execute(
+        "create or replace table fct_aqi_hourly as " + NATIVE_SQL[("fct_aqi_hourly", "full")]
+    )
+    if _table_exists(connection, "fct_aqi_forecast_skill"):
+        _refresh_forecast_skill(connection, timezone_name, "rescore")
+    else:
+        connection.execute(
+            "create table fct_aqi_forecast_skill as "
+            + NATIVE_SQL[("fct_aqi_forecast_skill", "full")],
+            {"timezone": timezone_name},
+        )
+
+
+def _incremental_refresh(
+    connection: duckdb.DuckDBPyConnection,
+    new_files: dict[str, list[str]],
+    timezone_name: str,
+) -> int:
+    staged = [dataset for dataset in NATIVE_DATASETS if new_files[dataset]]
+    for dataset in staged:
+        _stage_new_files(connection, dataset, new_files[dataset])
+
+    connection.execute(
+        "create or replace temp table _affected_hours as "
+        + " union ".join(
+            FILE_WINDOW_HOURS_SQL.format(table=f"_new_{dataset}_stg") for dataset in staged
+        )
+    )
+    connection.execute(
+        "delete from fct_aqi_hourly "
+        "where forecast_timestamp_local in (select forecast_timestamp_local from _affected_hours)"
+    )
+    connection.execute(
+        "insert into fct_aqi_hourly " + NATIVE_SQL[("fct_aqi_hourly", "incremental")]
+    )
+    if "aqi" in staged:
+        _refresh_forecast_skill(connection, timezone_name, "incremental")
+    affected = connection.execute("select count(*) from _affected_hours").fetchone()
+    return int(affected[0]) if affected else 0
+
+
+def transform_warehouse(
+    connection: duckdb.DuckDBPyConnection,
+    settings: Settings,
+    full_refresh: bool = False,
+    min_ingest_date: date | None = None,
+    landed_files: dict[str, list[str]] | None = None,
+) -> TransformResult:
+    # A caller that knows which files it just landed passes them as `landed_files`, which
+    # skips listing bronze and diffing it against silver unless a full refresh is needed.
+    if full_refresh and min_ingest_date is not None:
+        raise ValueError(
+            "min_ingest_date only prunes incremental runs; a full refresh reads all of bronze."
+        )
+    if settings.azure_storage_connection_string:
+        raise ValueError(
+            "The native transform reads bronze from local storage; run dbt against Azure "
+            "bronze instead."
+        )
+    started = time.perf_counter()
+    bronze_files = (
+        _list_all_bronze_files(settings, min_ingest_date) if landed_files is None else None
+    )
+
+    with span("native_transform") as transform_span:
+        connection.execute("begin transaction")
+        try:
+            needs_full_refresh = full_refresh or not all(
+                _table_exists(connection, table_name)
+                for table_name in (
+                    "stg_aqi_hourly",
+                    "stg_weather_hourly",
+                    "fct_aqi_hourly",
+                    "fct_aqi_forecast_skill",
+                )
+            ) or not all(
+                _has_column(connection, "stg_aqi_hourly", column)
+                for column in ("ingested_at_utc", "window_end_local", "is_late")
+            )
+            if needs_full_refresh:
+                # Silver is rebuilt from scratch here, so pruning would drop the older history
+                # for good; min_ingest_date only narrows the scan for files not yet staged.
+                if bronze_files is None or min_ingest_date is not None:
+                    bronze_files = _list_all_bronze_files(settings)
+                new_files = bronze_files
+                _full_refresh(connection, new_files, settings.timezone_name)
+                affected_hours = connection.execute(
+                    "select count(*) from fct_aqi_hourly"
+                ).fetchone()[0]
+            elif landed_files is not None:
+                new_files = {dataset: landed_files.get(dataset, []) for dataset in NATIVE_DATASETS}
+                affected_hours = (
+                    _incremental_refresh(connection, new_files, settings.timezone_name)
+                    if any(new_files.values())
+                    else 0
+                )
+            else:
+                new_files = {}
+                for dataset, files in bronze_files.items():
+                    known_file_names = _known_file_names(connection, dataset, min_ingest_date)
+                    new_files[dataset] = [
+                        file_path
+                        for file_path in files
+                        if Path(file_path).name not in known_file_names
+                    ]
+                affected_hours = (
+                    _incremental_refresh(connection, new_files, settings.timezone_name)
+                    if any(new_files.values())
+                    else 0
+                )
+            connection.execute("commit")
+        except Exception:
+            connection.execute("rollback")
+            raise
+        transform_span.set(
+            row_count=affected_hours,
+            payload_bytes=sum(
+                Path(file_path).stat().st_size
+                for files in new_files.values()
+                for file_path in files
+            ),
+        )
+
+    result = TransformResult(
+        new_files={dataset: len(files) for dataset, files in new_files.items()},
+        affected_hours=affected_hours,
+        full_refresh=needs_full_refresh,
+        duration_seconds=time.perf_counter() - started,
+    )
+    LOGGER.info(
+        "Native transform %s %s new AQI and %s new weather file(s), %s mart hour(s) in %.2fs",
+        "rebuilt from" if result.full_refresh else "applied",
+        result.new_files["aqi"],
+        result.new_files["weather"],
+        result.affected_hours,
+        result.duration_seconds,
+    )
+    return result
+
+
+def run_native_transform(
+    settings: Settings | None = None,
+    full_refresh: bool = False,
+    min_ingest_date: date | None = None,
+) -> TransformResult:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    active_settings = settings or get_settings()
+    with duckdb.connect(str(active_settings.duckdb_path)) as connection:
+        return transform_warehouse(
+            connection,
+            active_settings,
+            full_refresh=full_refresh,
+            min_ingest_date=min_ingest_date,
+        )
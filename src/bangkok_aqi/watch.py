@@ -0,0 +1,297 @@
+from __future__ import annotations
+
+import json
+import logging
+import signal
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+import duckdb
+
+from bangkok_aqi.config import DEFAULT_SNAPSHOT_WINDOW_DAYS, Settings, get_settings
+from bangkok_aqi.extract import StreamedPayload, build_session, extract_dataset_to_bronze
+from bangkok_aqi.http_cache import build_http_cache
+from bangkok_aqi.instrumentation import span
+from bangkok_aqi.snapshot import publish_dashboard_snapshot
+from bangkok_aqi.storage import StorageClient
+from bangkok_aqi.transform import NATIVE_DATASETS, TransformResult, transform_warehouse
+
+LOGGER = logging.getLogger(__name__)
+# An unchanged payload still lands once an hour, as it would from the hourly DAG, so the
+# mart's last_ingested_at_utc keeps moving and the dashboard's staleness check holds.
+DEFAULT_UNCHANGED_LANDING_SECONDS = 3600.0
+UNHEALTHY_AFTER_INTERVALS = 3
+
+
+@dataclass
+class WatchHealth:
+    interval_seconds: float
+    started_at: float
+    polls: int = 0
+    batches: int = 0
+    consecutive_failures: int = 0
+    last_poll_at: float | None = None
+    last_success_at: float | None = None
+    last_batch_at: float | None = None
+    last_error: str | None = None
+
+    def status(self, now: float) -> str:
+        if now - (self.last_success_at or self.started_at) > (
+            UNHEALTHY_AFTER_INTERVALS * self.interval_seconds
+        ):
+            return "failing"
+        return "ok" if self.last_success_at is not None else "starting"
+
+    def to_dict(self, now: float) -> dict[str, Any]:
+        def isoformat(timestamp: float | None) -> str | None:
+            if timestamp is None:
+                return None
+            return datetime.fromtimestamp(timestamp, timezone.utc).isoformat()
+
+        return {
+            "status": self.status(now),
+            "interval_seconds": self.interval_seconds,
+            "polls": self.polls,
+            "batches": self.batches,
+            "consecutive_failures": self.consecutive_failures,
+            "last_poll_at": isoformat(self.last_poll_at),
+            "last_success_at": isoformat(self.last_success_at),
+            "last_batch_at": isoformat(self.last_batch_at),
+            "last_error": self.last_error,
+        }
+
+
+class WatchDaemon:
+    # One HTTP session, storage client, cache handle and DuckDB connection live for the
+    # whole run, so a poll that finds nothing new costs two requests and no warehouse work.
+    def __init__(
+        self,
+        settings: Settings,
+        interval_seconds: float | None = None,
+        window_days: int = DEFAULT_SNAPSHOT_WINDOW_DAYS,
+        release_warehouse: bool = False,
+        unchanged_landing_seconds: float = DEFAULT_UNCHANGED_LANDING_SECONDS,
+    ):
+        self.interval_seconds = interval_seconds or settings.watch_interval_seconds
+        # Bronze object names resolve to the second, so polls must start at least that far
+        # apart.
+        if self.interval_seconds < 1:
+            raise ValueError("The watch interval must be at least one second.")
+        if settings.azure_storage_connection_string:
+            raise ValueError(
+                "watch applies micro-batches with the native transform, which reads bronze "
+                "from local storage."
+            )
+        self.settings = settings
+        self.window_days = window_days
+        self.release_warehouse = release_warehouse
+        self.unchanged_landing_seconds = unchanged_landing_seconds
+        self.session = build_session(settings)
+        self.storage = StorageClient(settings)
+        self.http_cache = build_http_cache(settings)
+        self.health = WatchHealth(self.interval_seconds, started_at=time.time())
+        self.stop_event = threading.Event()
+        self._connection: duckdb.DuckDBPyConnection | None = None
+        self._landed: dict[str, tuple[StreamedPayload, float]] = {}
+        # Files landed while the daemon was down, or by a poll whose batch failed, are only
+        # found by diffing bronze against silver; after that each batch is exactly the
+        # files its poll landed.
+        self._caught_up = False
+
+    @property
+    def connection(self) -> duckdb.DuckDBPyConnection:
+        if self._connection is None:
+            self._connection = duckdb.connect(str(self.settings.duckdb_path))
+        return self._connection
+
+    def poll(self) -> TransformResult | None:
+        ingested_at = datetime.now(timezone.utc)
+        landed_files: dict[str, list[str]] = {}
+        with span("watch_poll") as poll_span:
+            for dataset in NATIVE_DATASETS:
+                previous, landed_at = self._landed.get(dataset, (None, 0.0))
+                if time.monotonic() - landed_at >= self.unchanged_landing_seconds:
+                    previous = None
+                streamed = extract_dataset_to_bronze(
+                    self.settings,
+                    dataset,
+                    self.session,
+                    ingested_at,
+                    self.storage,
+                    http_cache=self.http_cache,
+                    previous=previous,
+                )
+                if streamed.not_modified:
+                    self._landed[dataset] = (streamed, landed_at)
+                else:
+                    # Delta encoding commits the encoded object before extract returns, so the
+                    # batch stages exactly what bronze holds.
+                    self._landed[dataset] = (streamed, time.monotonic())
+                    landed_files[dataset] = [str(self.settings.data_dir / streamed.object_path)]
+
+            if not landed_files and self._caught_up:
+                poll_span.set(row_count=0)
+                return None
+            try:
+                result = transform_warehouse(
+                    self.connection,
+                    self.settings,
+                    landed_files=landed_files if self._caught_up else None,
+                )
+                self._caught_up = True
+                if result.affected_hours:
+                    publish_dashboard_snapshot(
+                        self.settings, self.window_days, connection=self.connection
+                    )
+            except Exception:
+                self._caught_up = False
+                raise
+            finally:
+                if self.release_warehouse:
+                    self.close_connection()
+            poll_span.set(row_count=result.affected_hours)
+        return result
+
+    def run(self, max_polls: int | None = None) -> WatchHealth:
+        LOGGER.info(
+            "Watching upstream every %.0fs into %s",
+            self.interval_seconds,
+            self.settings.duckdb_path,
+        )
+        try:
+            while not self.stop_event.is_set():
+                started = time.monotonic()
+                self._poll_and_record()
+                if max_polls is not None and self.health.polls >= max_polls:
+                    break
+                self.stop_event.wait(max(0.0, self.interval_seconds - (time.monotonic() - started)))
+        finally:
+            self.close()
+        return self.health
+
+    def _poll_and_record(self) -> None:
+        self.health.polls += 1
+        self.health.last_poll_at = time.time()
+        try:
+            result = self.poll()
+        # A failed poll leaves the warehouse as it was; the next one retries.
+        except Exception as exc:
+            self.health.consecutive_failures += 1
+            self.health.last_error = f"{type(exc).__name__}: {exc}"
+            LOGGER.exception("Watch poll failed (%s in a row)", self.health.consecutive_failures)
+            return
+
+        self.health.consecutive_failures = 0
+        self.health.last_error = None
+        self.health.last_success_at = time.time()
+        if result is not None and result.affected_hours:
+            self.health.batches += 1
+            self.health.last_batch_at = self.health.last_success_at
+
+    def stop(self) -> None:
+        # The current poll finishes, so a micro-batch is never cut off mid-transaction.
+        self.stop_event.set()
+
+    def close_connection(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def close(self) -> None:
+        self.close_connection()
+        self.session.close()
+
+
+class WatchHealthServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], daemon: WatchDaemon):
+        super().__init__(address, WatchHealthRequestHandler)
+        self.daemon = daemon
+        self._thread: threading.Thread | None = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> WatchHealthServer:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self) -> WatchHealthServer:
+        return self.start()
+
+    def __exit__(self, exc_type, exc, exc_tb) -> bool:
+        self.stop()
+        return False
+
+
+class WatchHealthRequestHandler(BaseHTTPRequestHandler):
+    server: WatchHealthServer
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self) -> None:
+        if self.path.split("?", 1)[0] != "/healthz":
+            self._send(404, {"error": f"Unknown endpoint {self.path}"})
+            return
+        health = self.server.daemon.health.to_dict(time.time())
+        self._send(503 if health["status"] == "failing" else 200, health)
+
+    def _send(self, status: int, payload: dict[str, Any]) -> None:
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        LOGGER.debug("watch health %s - %s", self.address_string(), format % args)
+
+
+def run_watch(
+    interval_seconds: float | None = None,
+    health_host: str = "127.0.0.1",
+    health_port: int | None = None,
+    window_days: int = DEFAULT_SNAPSHOT_WINDOW_DAYS,
+    release_warehouse: bool = False,
+    max_polls: int | None = None,
+) -> WatchHealth:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    daemon = WatchDaemon(
+        get_settings(),
+        interval_seconds=interval_seconds,
+        window_days=window_days,
+        release_warehouse=release_warehouse,
+    )
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, lambda *_: daemon.stop())
+
+    health_server = None
+    if health_port is not None:
+        health_server = WatchHealthServer((health_host, health_port), daemon).start()
+        LOGGER.info("Watch health at %s/healthz", health_server.base_url)
+    try:
+        health = daemon.run(max_polls=max_polls)
+    finally:
+        if health_server is not None:
+            health_server.stop()
+    LOGGER.info(
+        "Watch stopped after %s poll(s) and %s micro-batch(es)", health.polls, health.batches
+    )
+    return health
@@ -6,6 +6,7 @@ from unittest.mock import Mock
 import requests
 
 from bangkok_aqi import alerts
+from bangkok_aqi.dbt_build import DbtBuildError
 
 
 @dataclass
@@ -86,3 +87,30 @@ def test_notify_airflow_failure_handles_request_errors(monkeypatch) -> None:
     )
 
     send_alert_mock.assert_called_once()
+
+
+def test_notify_dbt_build_failure_alerts_once_per_failing_layer(monkeypatch) -> None:
+    send_alert_mock = Mock(return_value=True)
+    monkeypatch.setattr(alerts, "send_alert", send_alert_mock)
+
+    alerts.notify_dbt_build_failure(
+        {
+            "task_instance": FakeTaskInstance(
+                dag_id="bangkok_aqi_pipeline",
+                task_id="build_dbt_models",
+            ),
+            "dag_run": FakeDagRun(run_id="scheduled__2026-03-24T09:00:00+00:00"),
+            "exception": DbtBuildError(
+                {
+                    "silver": ["test.bangkok_aqi_dbt.not_null_stg_aqi_hourly_source_system"],
+                    "gold": ["test.bangkok_aqi_dbt.assert_no_missing_hourly_gaps"],
+                }
+            ),
+        }
+    )
+
+    silver_message, gold_message = [call.args[0] for call in send_alert_mock.call_args_list]
+    assert "Layer: silver" in silver_message
+    assert "not_null_stg_aqi_hourly_source_system" in silver_message
+    assert "Layer: gold" in gold_message
+    assert "assert_no_missing_hourly_gaps" in gold_message
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+from dataclasses import replace
+from datetime import date
+from pathlib import Path
+
+import duckdb
+import pytest
+from test_extract import build_settings
+
+from bangkok_aqi.backfill import backfill_bronze, plan_backfill_chunks
+from bangkok_aqi.standin import start_standin_server
+from bangkok_aqi.transform import run_native_transform
+
+
+def test_plan_backfill_chunks_covers_range_without_overlap() -> None:
+    chunks = plan_backfill_chunks(date(2024, 1, 1), date(2024, 1, 10), chunk_days=4)
+
+    aqi_chunks = [
+        (chunk.start_date.day, chunk.end_date.day) for chunk in chunks if chunk.dataset == "aqi"
+    ]
+    assert aqi_chunks == [(1, 4), (5, 8), (9, 10)]
+    assert len(chunks) == 6
+    with pytest.raises(ValueError):
+        plan_backfill_chunks(date(2024, 1, 2), date(2024, 1, 1))
+
+
+def test_backfill_is_resumable_idempotent_and_feeds_the_mart(tmp_path: Path) -> None:
+    with start_standin_server() as server:
+        settings = replace(
+            build_settings(tmp_path),
+            air_quality_url=server.air_quality_url,
+            weather_archive_url=server.weather_archive_url,
+            request_rate_per_second=0,
+        )
+        first = backfill_bronze(date(2024, 1, 1), date(2024, 1, 10), settings, chunk_days=4)
+        first_bytes = {path: (settings.data_dir / path).read_bytes() for path in first.object_paths}
+        resumed = backfill_bronze(date(2024, 1, 1), date(2024, 1, 10), settings, chunk_days=4)
+        requests_after_resume = server.stats.requests
+        restarted = backfill_bronze(
+            date(2024, 1, 1), date(2024, 1, 10), settings, chunk_days=4, resume=False
+        )
+
+    assert len(first.object_paths) == 6
+    assert first.object_paths[0] == (
+        "raw/aqi/ingest_date=2024-01-05/bangkok_aqi_raw_20240105T000000Z.json"
+    )
+    assert (resumed.object_paths, resumed.skipped_chunks) == ((), 6)
+    assert requests_after_resume == 6
+    assert restarted.object_paths == first.object_paths
+    assert all((settings.data_dir / path).read_bytes() == first_bytes[path] for path in first_bytes)
+
+    settings.warehouse_dir.mkdir(parents=True)
+    run_native_transform(settings, full_refresh=True)
+    with duckdb.connect(str(settings.duckdb_path), read_only=True) as connection:
+        hours, first_hour, last_hour, missing_weather = connection.execute(
+            """
+            select
+                count(*),
+                min(forecast_timestamp_local),
+                max(forecast_timestamp_local),
+                count(*) filter (where temperature_c is null)
+            from fct_aqi_hourly
+            """
+        ).fetchone()
+    assert hours == 10 * 24
+    assert (str(first_hour), str(last_hour)) == ("2024-01-01 00:00:00", "2024-01-10 23:00:00")
+    assert missing_weather == 0
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import duckdb
+import pytest
+
+from bangkok_aqi.benchmark import (
+    BENCHMARK_SCHEMA_VERSION,
+    Timing,
+    compare_benchmark_results,
+    format_benchmark_comparison,
+    load_benchmark_results,
+    measure_warehouse,
+    run_benchmark_scale,
+)
+
+
+def build_results(timings: dict[str, float]) -> dict:
+    return {
+        "schema_version": BENCHMARK_SCHEMA_VERSION,
+        "runs": [
+            {
+                "scale": {"name": "1d"},
+                "timings": {
+                    name: Timing(samples=(seconds,)).to_dict()
+                    for name, seconds in timings.items()
+                },
+            }
+        ],
+    }
+
+
+def test_timing_to_dict_reports_median_of_samples() -> None:
+    timing = Timing(samples=(0.3, 0.1, 0.2), items=10)
+
+    assert timing.to_dict() == {
+        "iterations": 3,
+        "items": 10,
+        "min_seconds": 0.1,
+        "median_seconds": 0.2,
+        "max_seconds": 0.3,
+    }
+
+
+def test_compare_benchmark_results_flags_regressions() -> None:
+    comparisons = compare_benchmark_results(
+        build_results({"load_hourly_aqi": 1.0, "build_daily_summary": 1.0, "removed": 1.0}),
+        build_results({"load_hourly_aqi": 1.5, "build_daily_summary": 1.05, "added": 1.0}),
+    )
+
+    assert [comparison.name for comparison in comparisons] == [
+        "build_daily_summary",
+        "load_hourly_aqi",
+    ]
+    assert [comparison.is_regression(0.10) for comparison in comparisons] == [False, True]
+    assert "REGRESSION" in format_benchmark_comparison(comparisons).splitlines()[2]
+
+
+def test_load_benchmark_results_rejects_unknown_schema(tmp_path: Path) -> None:
+    results_path = tmp_path / "results.json"
+    results_path.write_text(json.dumps({"schema_version": 999, "runs": []}))
+
+    with pytest.raises(ValueError, match="Unsupported benchmark schema version"):
+        load_benchmark_results(results_path)
+
+
+def test_measure_warehouse_reports_used_bytes_and_table_rows(tmp_path: Path) -> None:
+    duckdb_path = tmp_path / "warehouse.duckdb"
+    assert measure_warehouse(duckdb_path) == {}
+
+    with duckdb.connect(str(duckdb_path)) as connection:
+        connection.execute("create table stg_aqi_hourly as select range as id from range(1000)")
+        connection.execute("create table fct_aqi_hourly as select range as id from range(10)")
+
+    measured = measure_warehouse(duckdb_path)
+
+    assert measured["table_rows"] == {"fct_aqi_hourly": 10, "stg_aqi_hourly": 1000}
+    assert measured["materialized_rows"] == 1010
+    assert measured["used_bytes"] > 0
+
+
+def test_benchmark_times_the_dashboard_against_the_native_warehouse_without_dbt(
+    tmp_path: Path,
+) -> None:
+    run = run_benchmark_scale("1d", tmp_path, repeat=1, validation_sample=2, run_dbt=False)
+
+    assert run["dashboard"] == {"warehouse": "native", "skipped": False}
+    assert {"load_hourly_aqi", "load_hourly_aqi_compact", "build_daily_summary"} <= set(
+        run["timings"]
+    )
+    assert "dbt" not in run["warehouses"]
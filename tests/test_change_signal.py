@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+from dataclasses import replace
+from datetime import datetime
+from pathlib import Path
+
+from test_extract import build_settings
+
+from bangkok_aqi.change_signal import extract_with_change_signal
+from bangkok_aqi.extract import build_session
+from bangkok_aqi.standin import start_standin_server
+from bangkok_aqi.storage import StorageClient
+
+
+def test_change_signal_flags_only_new_content(tmp_path: Path) -> None:
+    with start_standin_server() as server:
+        settings = replace(
+            build_settings(tmp_path),
+            air_quality_url=server.air_quality_url,
+            http_cache_path=tmp_path / "http_cache.sqlite",
+        )
+        session = build_session(settings)
+
+        def extract(previous, minute, active_settings=settings, land_unchanged=False):
+            return extract_with_change_signal(
+                "aqi",
+                previous,
+                settings=active_settings,
+                session=session,
+                ingested_at=datetime(2024, 1, 1, 0, minute),
+                land_unchanged=land_unchanged,
+            )
+
+        first = extract(None, 5)
+        revalidated = extract(first, 10)
+        uncached = replace(settings, http_cache_path=None)
+        # Without the cache the identical body is downloaded but kept as the previous object.
+        refetched = extract(revalidated, 15, uncached)
+        landed = extract(refetched, 20, uncached, land_unchanged=True)
+        legacy = extract("raw/aqi/ingest_date=2024-01-01/old.json", 25)
+
+    assert first["changed"]
+    assert not revalidated["changed"]
+    assert revalidated["object_path"] == first["object_path"]
+    assert not refetched["changed"]
+    assert refetched["object_path"] == first["object_path"]
+    assert not landed["changed"]
+    assert landed["object_path"] != first["object_path"]
+    assert first["content_sha256"] == revalidated["content_sha256"] == landed["content_sha256"]
+    assert not legacy["changed"]
+    assert len(StorageClient(settings).list_files("raw/aqi/")) == 2
+    assert server.stats.statuses == {200: 3, 304: 2}
@@ -0,0 +1,21 @@
+from __future__ import annotations
+
+import subprocess
+import sys
+
+
+def test_cli_parser_does_not_import_heavy_dependencies() -> None:
+    loaded = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import sys; from bangkok_aqi.cli import build_parser; build_parser(); "
+            "heavy = {'pandas', 'pyarrow', 'ijson', 'duckdb', 'requests'}; "
+            "print(sorted(heavy & set(sys.modules)))",
+        ],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout.strip()
+
+    assert loaded == "[]"
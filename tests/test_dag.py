@@ -5,14 +5,19 @@ import sys
 import types
 from datetime import datetime, timedelta
 from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from bangkok_aqi.dbt_build import DbtNodeResult
 
 
 class FakeAirflowFailException(Exception):
     pass
 
 
-def load_dag_module():
-    dag_path = Path(__file__).resolve().parents[1] / "dags" / "bangkok_aqi_pipeline.py"
+def load_dag_module(file_name: str = "bangkok_aqi_pipeline.py"):
+    dag_path = Path(__file__).resolve().parents[1] / "dags" / file_name
     active_dag = None
 
     class FakeDAG:
@@ -48,10 +53,9 @@ def load_dag_module():
     airflow_exceptions.AirflowFailException = FakeAirflowFailException
 
     airflow_operators = types.ModuleType("airflow.operators")
-    airflow_operators_bash = types.ModuleType("airflow.operators.bash")
-    airflow_operators_bash.BashOperator = FakeOperator
     airflow_operators_python = types.ModuleType("airflow.operators.python")
     airflow_operators_python.PythonOperator = FakeOperator
+    airflow_operators_python.ShortCircuitOperator = FakeOperator
 
     pendulum_module = types.ModuleType("pendulum")
     pendulum_module.datetime = lambda year, month, day, tz=None: datetime(year, month, day)
@@ -61,7 +65,6 @@ def load_dag_module():
         "airflow": airflow_module,
         "airflow.exceptions": airflow_exceptions,
         "airflow.operators": airflow_operators,
-        "airflow.operators.bash": airflow_operators_bash,
         "airflow.operators.python": airflow_operators_python,
         "pendulum": pendulum_module,
     }
@@ -69,7 +72,7 @@ def load_dag_module():
     sys.modules.update(module_overrides)
 
     try:
-        spec = importlib.util.spec_from_file_location("test_bangkok_aqi_pipeline_dag", dag_path)
+        spec = importlib.util.spec_from_file_location(f"test_{dag_path.stem}_dag", dag_path)
         assert spec and spec.loader
         module = importlib.util.module_from_spec(spec)
         spec.loader.exec_module(module)
@@ -92,15 +95,23 @@ def test_bangkok_aqi_pipeline_dag_defines_bronze_silver_gold_flow() -> None:
     assert set(tasks) == {
         "extract_raw_aqi_json",
         "extract_raw_weather_json",
-        "build_silver_models",
-        "build_gold_mart",
+        "detect_bronze_changes",
+        "build_dbt_models",
+        "publish_dashboard_snapshot",
+        "export_gold_parquet",
+    }
+    assert tasks["extract_raw_aqi_json"].downstream_task_ids == {"detect_bronze_changes"}
+    assert tasks["extract_raw_weather_json"].downstream_task_ids == {"detect_bronze_changes"}
+    assert tasks["detect_bronze_changes"].downstream_task_ids == {"build_dbt_models"}
+    assert tasks["build_dbt_models"].downstream_task_ids == {
+        "publish_dashboard_snapshot",
+        "export_gold_parquet",
     }
-    assert tasks["extract_raw_aqi_json"].downstream_task_ids == {"build_silver_models"}
-    assert tasks["extract_raw_weather_json"].downstream_task_ids == {"build_silver_models"}
-    assert tasks["build_silver_models"].downstream_task_ids == {"build_gold_mart"}
+    assert tasks["publish_dashboard_snapshot"].downstream_task_ids == set()
+    assert tasks["export_gold_parquet"].downstream_task_ids == set()
 
 
-def test_bangkok_aqi_pipeline_dag_configures_task_retries_and_dbt_selects() -> None:
+def test_bangkok_aqi_pipeline_dag_configures_task_retries_and_dbt_build() -> None:
     module = load_dag_module()
     tasks = {task.task_id: task for task in module.dag.tasks}
 
@@ -114,10 +125,146 @@ def test_bangkok_aqi_pipeline_dag_configures_task_retries_and_dbt_selects() -> N
     )
     assert tasks["extract_raw_aqi_json"].kwargs["retries"] == 2
     assert tasks["extract_raw_weather_json"].kwargs["retries"] == 2
-    assert "base_aqi_hourly_exploded" in tasks["build_silver_models"].kwargs["bash_command"]
-    assert "base_weather_hourly_exploded" in tasks["build_silver_models"].kwargs["bash_command"]
-    assert "stg_aqi_hourly" in tasks["build_silver_models"].kwargs["bash_command"]
-    assert "stg_weather_hourly" in tasks["build_silver_models"].kwargs["bash_command"]
-    assert tasks["build_gold_mart"].kwargs["bash_command"].endswith(
-        "--select fct_aqi_hourly"
+    assert tasks["build_dbt_models"].kwargs["python_callable"] is module.build_dbt_models_task
+    assert (
+        tasks["build_dbt_models"].kwargs["on_failure_callback"]
+        is module.notify_dbt_build_failure
+    )
+    assert (
+        tasks["publish_dashboard_snapshot"].kwargs["python_callable"]
+        is module.publish_dashboard_snapshot_task
+    )
+    assert (
+        tasks["export_gold_parquet"].kwargs["python_callable"] is module.export_gold_parquet_task
+    )
+
+
+class FakeXComTaskInstance:
+    # One instance per DAG run; `history` holds every run's XComs, oldest first.
+    def __init__(self, history: list[dict], signals: list[dict] | None = None):
+        self.xcoms = dict(
+            zip(("extract_raw_aqi_json", "extract_raw_weather_json"), signals or [], strict=False)
+        )
+        self.history = history
+        history.append(self.xcoms)
+
+    def xcom_pull(self, task_ids, key="return_value", include_prior_dates=False):
+        if isinstance(task_ids, list):
+            return [self.xcoms.get(task_id) for task_id in task_ids]
+        for xcoms in reversed(self.history) if include_prior_dates else [self.xcoms]:
+            if (task_ids, key) in xcoms:
+                return xcoms[(task_ids, key)]
+        return None
+
+    def xcom_push(self, key, value):
+        self.xcoms[("build_dbt_models", key)] = value
+
+
+def test_build_dbt_models_task_counts_nodes_per_layer(monkeypatch) -> None:
+    module = load_dag_module()
+    monkeypatch.setattr(
+        module,
+        "run_dbt_build",
+        lambda: [
+            DbtNodeResult("model.bangkok_aqi_dbt.stg_aqi_hourly", "silver", "success", 0.1),
+            DbtNodeResult("model.bangkok_aqi_dbt.fct_aqi_hourly", "gold", "success", 0.1),
+            DbtNodeResult("test.bangkok_aqi_dbt.assert_valid_metric_ranges", "gold", "pass", 0.1),
+        ],
+    )
+
+    assert module.build_dbt_models_task(FakeXComTaskInstance([])) == {"silver": 1, "gold": 2}
+
+
+UNCHANGED = {"object_path": "raw/aqi/x.json", "content_sha256": "abc", "changed": False}
+
+
+def run_hour(module, history, signals, hour, run_type="scheduled"):
+    # Runs detect_bronze_changes and, when it passes, build_dbt_models for one DAG run.
+    ti = FakeXComTaskInstance(history, signals)
+    rebuild = module.detect_bronze_changes_task(
+        ti, datetime(2024, 6, 1, hour), SimpleNamespace(run_type=run_type)
+    )
+    if rebuild:
+        module.build_dbt_models_task(ti)
+    return rebuild
+
+
+def test_detect_bronze_changes_task_short_circuits_unchanged_hours(monkeypatch) -> None:
+    module = load_dag_module()
+    monkeypatch.setattr(module, "get_settings", lambda: SimpleNamespace(forced_rebuild_hours=6))
+    monkeypatch.setattr(module, "run_dbt_build", lambda: [])
+    history: list[dict] = []
+
+    # With no successful build on record the first hour is rebuilt.
+    assert run_hour(module, history, [UNCHANGED, UNCHANGED], hour=7)
+    assert not run_hour(module, history, [UNCHANGED, UNCHANGED], hour=7)
+    assert run_hour(module, history, [UNCHANGED, {**UNCHANGED, "changed": True}], hour=7)
+    assert run_hour(module, history, [UNCHANGED, UNCHANGED], hour=12)
+    assert run_hour(module, history, [UNCHANGED, UNCHANGED], hour=7, run_type="manual")
+
+
+def test_detect_bronze_changes_task_keeps_changes_pending_until_a_build_succeeds(
+    monkeypatch,
+) -> None:
+    module = load_dag_module()
+    monkeypatch.setattr(module, "get_settings", lambda: SimpleNamespace(forced_rebuild_hours=6))
+    monkeypatch.setattr(module, "run_dbt_build", lambda: [])
+    history: list[dict] = []
+    assert run_hour(module, history, [UNCHANGED, UNCHANGED], hour=7)
+
+    def fail_build():
+        raise RuntimeError("dbt build failed")
+
+    changed = {**UNCHANGED, "content_sha256": "def", "changed": True}
+    monkeypatch.setattr(module, "run_dbt_build", fail_build)
+    with pytest.raises(RuntimeError):
+        run_hour(module, history, [changed, UNCHANGED], hour=8)
+
+    # The next payloads match the failed hour's, but no build has consumed them yet.
+    quiet = {**changed, "changed": False}
+    monkeypatch.setattr(module, "run_dbt_build", lambda: [])
+    assert run_hour(module, history, [quiet, UNCHANGED], hour=9)
+    assert not run_hour(module, history, [quiet, UNCHANGED], hour=10)
+
+
+def test_extract_tasks_pass_the_previous_signal_and_land_on_rebuild_hours(monkeypatch) -> None:
+    module = load_dag_module()
+    monkeypatch.setattr(module, "get_settings", lambda: SimpleNamespace(forced_rebuild_hours=6))
+    calls = []
+    monkeypatch.setattr(
+        module,
+        "extract_with_change_signal",
+        lambda dataset, previous, land_unchanged: calls.append(
+            (dataset, previous, land_unchanged)
+        )
+        or UNCHANGED,
+    )
+    history: list[dict] = [{("extract_raw_aqi_json", "return_value"): UNCHANGED}]
+    ti = FakeXComTaskInstance(history)
+    ti.task_id = "extract_raw_aqi_json"
+
+    module.extract_raw_aqi_json_task(ti, datetime(2024, 6, 1, 7))
+    module.extract_raw_aqi_json_task(ti, datetime(2024, 6, 1, 12))
+
+    assert calls == [("aqi", UNCHANGED, False), ("aqi", UNCHANGED, True)]
+
+
+def test_full_history_dq_dag_runs_quality_checks_daily(monkeypatch) -> None:
+    module = load_dag_module("bangkok_aqi_dq_full_history.py")
+    tasks = {task.task_id: task for task in module.dag.tasks}
+    calls = []
+    monkeypatch.setattr(
+        module,
+        "run_dbt_quality_checks",
+        lambda mode: calls.append(mode)
+        or [DbtNodeResult("test.bangkok_aqi_dbt.assert_valid_metric_ranges", "gold", "pass", 0.1)],
+    )
+
+    assert module.dag.kwargs["schedule"] == "30 3 * * *"
+    assert set(tasks) == {"run_full_history_dq_checks"}
+    assert (
+        tasks["run_full_history_dq_checks"].kwargs["on_failure_callback"]
+        is module.notify_dbt_build_failure
     )
+    assert module.run_full_history_dq_checks_task() == 1
+    assert calls == ["full"]
@@ -10,8 +10,11 @@ from bangkok_aqi.dashboard import (
     build_daily_summary,
     build_map_frame,
     build_metric_options,
+    build_status_rows,
     classify_aqi,
+    default_date_window,
     is_data_stale,
+    load_forecast_skill_curve,
     load_hourly_aqi,
 )
 
@@ -143,3 +146,112 @@ def test_build_map_frame_uses_latest_forecast_coordinates() -> None:
     assert map_frame.to_dict(orient="records") == [
         {"latitude": 13.75, "longitude": 100.5, "us_aqi": 58}
     ]
+
+
+def test_load_hourly_aqi_compact_matches_default_frame(tmp_path: Path) -> None:
+    duckdb_path = tmp_path / "compact_dashboard.duckdb"
+
+    with duckdb.connect(str(duckdb_path)) as connection:
+        connection.execute(
+            """
+            create table fct_aqi_hourly as
+            select
+                timestamp '2026-03-24 00:00:00' + to_hours(hour_offset) as forecast_timestamp_local,
+                cast(timestamp '2026-03-24 00:00:00' + to_hours(hour_offset) as date)
+                    as forecast_date_local,
+                28.2 + hour_offset as pm25,
+                40.1::double as pm10,
+                case when hour_offset = 5 then null else 70 + hour_offset end as us_aqi,
+                31.5::double as temperature_c,
+                63.0::double as relative_humidity,
+                12.1::double as wind_speed_kph,
+                timestamp '2026-03-23 17:00:00' as last_ingested_at_utc,
+                'open-meteo' as source_system,
+                13.75::double as latitude,
+                100.5::double as longitude
+            from range(48) as hours(hour_offset)
+            """
+        )
+
+    hourly = load_hourly_aqi(duckdb_path)
+    compact = load_hourly_aqi(duckdb_path, compact=True)
+
+    assert compact["pm25"].dtype == "float32"
+    assert compact["us_aqi"].dtype == "Int16"
+    assert compact["source_system"].dtype == "category"
+    assert compact["forecast_date_local"].dtype.kind == "M"
+    assert compact["latitude"].dtype == "category"
+    assert (
+        compact.memory_usage(deep=True).sum() < hourly.memory_usage(deep=True).sum() / 2
+    )
+
+    filtered = compact[compact["forecast_date_local"] == pd.Timestamp("2026-03-25")]
+    assert build_status_rows(filtered) == build_status_rows(
+        hourly[hourly["forecast_date_local"] == date(2026, 3, 25)]
+    )
+    assert build_map_frame(filtered).to_dict(orient="records") == [
+        {"latitude": 13.75, "longitude": 100.5, "us_aqi": 94.0}
+    ]
+    assert build_daily_summary(compact)["max_aqi"].tolist() == [93, 117]
+
+    # Frame-level metadata does not survive a concat; coordinate columns do.
+    earlier = compact[compact["forecast_date_local"] < pd.Timestamp("2026-03-25")]
+    recombined = pd.concat([earlier, filtered])
+    assert build_map_frame(recombined).to_dict(orient="records") == [
+        {"latitude": 13.75, "longitude": 100.5, "us_aqi": 70.0}
+    ]
+    assert build_status_rows(recombined) == build_status_rows(hourly)
+
+
+def test_load_forecast_skill_curve_scores_realised_hours_by_lead_time(tmp_path: Path) -> None:
+    duckdb_path = tmp_path / "skill_dashboard.duckdb"
+    duckdb.connect(str(duckdb_path)).close()
+    assert load_forecast_skill_curve(duckdb_path).empty
+
+    with duckdb.connect(str(duckdb_path)) as connection:
+        connection.execute(
+            """
+            create table fct_aqi_forecast_skill as
+            select *
+            from (
+                values
+                    (
+                        true,
+                        [
+                            {'lead_hours': 2, 'pm25_error': 4.0, 'us_aqi_error': -6},
+                            {'lead_hours': 1, 'pm25_error': -1.0, 'us_aqi_error': 2},
+                            {'lead_hours': 0, 'pm25_error': 0.0, 'us_aqi_error': 0}
+                        ]
+                    ),
+                    (
+                        true,
+                        [
+                            {'lead_hours': 2, 'pm25_error': -2.0, 'us_aqi_error': 4},
+                            {'lead_hours': -1, 'pm25_error': 0.0, 'us_aqi_error': 0}
+                        ]
+                    ),
+                    (
+                        false,
+                        [{'lead_hours': 3, 'pm25_error': null, 'us_aqi_error': null}]
+                    )
+            ) as skill(is_realised, revisions)
+            """
+        )
+
+    curve = load_forecast_skill_curve(duckdb_path)
+
+    assert curve.to_dict(orient="records") == [
+        {"lead_hours": 1, "revision_count": 1, "pm25_mae": 1.0, "us_aqi_mae": 2.0},
+        {"lead_hours": 2, "revision_count": 2, "pm25_mae": 3.0, "us_aqi_mae": 5.0},
+    ]
+
+
+def test_default_date_window_matches_the_snapshot_window_and_clips_to_the_mart() -> None:
+    assert default_date_window(date(2024, 1, 1), date(2024, 3, 1), 7) == (
+        date(2024, 2, 24),
+        date(2024, 3, 1),
+    )
+    assert default_date_window(date(2024, 2, 28), date(2024, 3, 1), 7) == (
+        date(2024, 2, 28),
+        date(2024, 3, 1),
+    )
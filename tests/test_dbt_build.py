@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import shutil
+from pathlib import Path
+from types import SimpleNamespace
+
+import duckdb
+import pytest
+from test_transform import build_transform_settings
+
+from bangkok_aqi.dbt_build import (
+    DbtBuildError,
+    build_layer_selectors,
+    group_failures_by_layer,
+    run_dbt_quality_checks,
+    summarize_dbt_results,
+)
+from bangkok_aqi.synthetic import SyntheticConfig, write_synthetic_corpus
+from bangkok_aqi.transform import transform_warehouse
+
+
+def build_node(unique_id: str, original_file_path: str, depends_on: list[str] | None = None):
+    return SimpleNamespace(
+        unique_id=unique_id,
+        original_file_path=original_file_path,
+        depends_on=SimpleNamespace(nodes=depends_on or []),
+    )
+
+
+MANIFEST = SimpleNamespace(
+    nodes={
+        "model.bangkok_aqi_dbt.stg_aqi_hourly": build_node(
+            "model.bangkok_aqi_dbt.stg_aqi_hourly", "models/staging/stg_aqi_hourly.sql"
+        ),
+        "model.bangkok_aqi_dbt.fct_aqi_hourly": build_node(
+            "model.bangkok_aqi_dbt.fct_aqi_hourly", "models/marts/fct_aqi_hourly.sql"
+        ),
+    }
+)
+
+
+def build_result(node, status: str):
+    return SimpleNamespace(
+        node=node,
+        status=SimpleNamespace(value=status),
+        execution_time=0.5,
+        message=None,
+    )
+
+
+def test_build_layer_selectors_select_layer_directories() -> None:
+    assert build_layer_selectors() == ["path:models/staging", "path:models/marts"]
+    assert build_layer_selectors(["gold"]) == ["path:models/marts"]
+
+
+def test_summarize_dbt_results_assigns_tests_to_their_upstream_layer() -> None:
+    results = [
+        build_result(MANIFEST.nodes["model.bangkok_aqi_dbt.stg_aqi_hourly"], "success"),
+        build_result(
+            build_node(
+                "test.bangkok_aqi_dbt.not_null_stg_aqi_hourly_source_system",
+                "models/schema.yml",
+                ["model.bangkok_aqi_dbt.stg_aqi_hourly"],
+            ),
+            "fail",
+        ),
+        build_result(
+            build_node(
+                "test.bangkok_aqi_dbt.assert_no_missing_hourly_gaps",
+                "tests/assert_no_missing_hourly_gaps.sql",
+                ["model.bangkok_aqi_dbt.fct_aqi_hourly"],
+            ),
+            "error",
+        ),
+        build_result(MANIFEST.nodes["model.bangkok_aqi_dbt.fct_aqi_hourly"], "skipped"),
+    ]
+
+    node_results = summarize_dbt_results(results, MANIFEST)
+
+    assert [node_result.layer for node_result in node_results] == [
+        "silver",
+        "silver",
+        "gold",
+        "gold",
+    ]
+    assert group_failures_by_layer(node_results) == {
+        "silver": ["test.bangkok_aqi_dbt.not_null_stg_aqi_hourly_source_system"],
+        "gold": ["test.bangkok_aqi_dbt.assert_no_missing_hourly_gaps"],
+    }
+
+
+def test_dbt_build_error_summarizes_failures_per_layer() -> None:
+    with pytest.raises(DbtBuildError, match="silver: model.a; gold: test.b") as exc_info:
+        raise DbtBuildError({"silver": ["model.a"], "gold": ["test.b"]})
+
+    assert exc_info.value.failures == {"silver": ["model.a"], "gold": ["test.b"]}
+
+
+@pytest.mark.skipif(shutil.which("dbt") is None, reason="dbt is not installed")
+def test_windowed_quality_checks_skip_old_history_and_record_results(
+    tmp_path: Path, monkeypatch
+) -> None:
+    settings = build_transform_settings(tmp_path)
+    write_synthetic_corpus(settings, SyntheticConfig(ingest_hours=30))
+    with duckdb.connect(str(settings.duckdb_path)) as connection:
+        transform_warehouse(connection, settings)
+        # A gap and a missing weather join two hours into history, long before the latest
+        # ingest window; the generic tests are windowed like the singular ones.
+        connection.execute(
+            """
+            delete from fct_aqi_hourly
+            where forecast_timestamp_local = (
+                select min(forecast_timestamp_local) + interval 2 hour from fct_aqi_hourly
+            )
+            """
+        )
+        connection.execute(
+            """
+            update fct_aqi_hourly
+            set temperature_c = null
+            where forecast_timestamp_local = (
+                select min(forecast_timestamp_local) from fct_aqi_hourly
+            )
+            """
+        )
+    monkeypatch.setenv("DBT_DUCKDB_PATH", str(settings.duckdb_path))
+    monkeypatch.setenv("DBT_TARGET_PATH", str(tmp_path / "dbt_target"))
+    monkeypatch.setenv("DBT_LOG_PATH", str(tmp_path / "dbt_logs"))
+
+    windowed = run_dbt_quality_checks(mode="window", window_hours=6)
+    with pytest.raises(DbtBuildError) as exc_info:
+        run_dbt_quality_checks(mode="full")
+
+    assert not any(node_result.failed for node_result in windowed)
+    assert exc_info.value.failures == {
+        "gold": [
+            "test.bangkok_aqi_dbt.assert_no_missing_hourly_gaps",
+            "test.bangkok_aqi_dbt.not_null_fct_aqi_hourly_temperature_c.97f06c0908",
+        ]
+    }
+    # dbt-duckdb keeps its in-process connection open, so read back with the same config.
+    with duckdb.connect(str(settings.duckdb_path)) as connection:
+        recorded = connection.execute(
+            """
+            select dq_mode, dq_window_hours, status, failures
+            from dq_test_results
+            where test_name = 'assert_no_missing_hourly_gaps'
+            order by run_started_at, dq_mode desc
+            """
+        ).fetchall()
+    assert recorded == [("window", 6, "pass", 0), ("full", 24, "fail", 1)]
@@ -0,0 +1,110 @@
+import base64
+import io
+import json
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from test_extract import build_settings
+
+from bangkok_aqi.delta import (
+    DeltaEncoding,
+    build_delta_head_path,
+    encode_bronze_object,
+    encode_delta_payload,
+)
+from bangkok_aqi.extract import build_raw_object_path
+from bangkok_aqi.storage import StorageClient
+from bangkok_aqi.synthetic import SyntheticConfig, encode_synthetic_payload
+
+
+def test_encode_delta_payload_keeps_changed_new_and_last_hours() -> None:
+    previous = {
+        "latitude": 13.75,
+        "hourly": {
+            "time": ["2026-03-24T00:00", "2026-03-24T01:00", "2026-03-24T02:00"],
+            "pm2_5": [10.0, 11.0, 12.0],
+            "us_aqi": [40, 41, 42],
+        },
+    }
+    current = {
+        "latitude": 13.75,
+        "hourly": {
+            "time": [
+                "2026-03-24T00:00",
+                "2026-03-24T01:00",
+                "2026-03-24T02:00",
+                "2026-03-24T03:00",
+                "2026-03-24T04:00",
+            ],
+            "pm2_5": [10.0, 11.5, 12.0, 13.0, 14.0],
+            "us_aqi": [40, 41, 42, 43, 44],
+        },
+    }
+
+    delta = encode_delta_payload(previous, current)
+
+    assert delta == {
+        "latitude": 13.75,
+        "hourly": {
+            "time": ["2026-03-24T01:00", "2026-03-24T03:00", "2026-03-24T04:00"],
+            "pm2_5": [11.5, 13.0, 14.0],
+            "us_aqi": [41, 43, 44],
+        },
+        "delta": {"window_start": "2026-03-24T00:00", "window_end": "2026-03-24T04:00"},
+    }
+
+
+def test_encode_bronze_object_stores_deltas_between_baselines(tmp_path: Path) -> None:
+    storage = StorageClient(build_settings(tmp_path))
+    config = SyntheticConfig(revision_rate=0.2)
+    start = datetime(2026, 3, 24, 1, tzinfo=timezone.utc)
+    payloads = {}
+
+    def encode(ingested_at: datetime) -> DeltaEncoding:
+        payloads[ingested_at] = encode_synthetic_payload(config, "aqi", ingested_at)
+        return encode_bronze_object(
+            storage,
+            "aqi",
+            build_raw_object_path(ingested_at),
+            ingested_at,
+            3,
+            io.BytesIO(payloads[ingested_at]),
+        )
+
+    encodings = [encode(start + timedelta(hours=hour)) for hour in range(5)]
+    # A file that landed without going through the encoder breaks the chain.
+    storage.save_bytes(
+        build_raw_object_path(start + timedelta(hours=5)),
+        encode_synthetic_payload(config, "aqi", start + timedelta(hours=5)),
+    )
+    encodings.append(encode(start + timedelta(hours=6)))
+
+    assert [encoding.is_baseline for encoding in encodings] == [
+        True,
+        False,
+        False,
+        True,
+        False,
+        True,
+    ]
+    ingest_times = list(payloads)
+    for position, encoding in enumerate(encodings):
+        stored = json.loads(storage.read_bytes(encoding.object_path))
+        payload = json.loads(payloads[ingest_times[position]])
+        # The streamed encoder writes what encode_delta_payload builds in memory.
+        expected = (
+            payload
+            if encoding.is_baseline
+            else encode_delta_payload(json.loads(payloads[ingest_times[position - 1]]), payload)
+        )
+        assert stored == expected
+        assert len(stored["hourly"]["time"]) == encoding.stored_hours
+    assert all(
+        encoding.stored_hours < encoding.window_hours
+        for encoding in encodings
+        if not encoding.is_baseline
+    )
+    # The head keeps one digest per forecast hour, not the payload.
+    head = json.loads(storage.read_bytes(build_delta_head_path("aqi")))
+    assert "hourly" not in head
+    assert len(base64.b64decode(head["row_digests"])) == 8 * encodings[-1].window_hours
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+from datetime import date
+from pathlib import Path
+
+import duckdb
+import pyarrow.parquet as pq
+from test_extract import build_settings
+from test_snapshot import build_mart
+
+from bangkok_aqi.export import EXPORT_PREFIX, build_partition_path, export_mart_parquet
+
+
+def test_export_rewrites_only_changed_partitions(tmp_path: Path) -> None:
+    settings = build_settings(tmp_path)
+    build_mart(settings.duckdb_path, days=5)
+
+    first = export_mart_parquet(settings)
+    unchanged = export_mart_parquet(settings)
+    with duckdb.connect(str(settings.duckdb_path)) as connection:
+        # A weather-only revision leaves last_ingested_at_utc alone but must still export.
+        connection.execute(
+            "update fct_aqi_hourly set temperature_c = 31.0 "
+            "where forecast_date_local = date '2026-03-02'"
+        )
+        connection.execute(
+            "update fct_aqi_hourly set us_aqi = 99, last_ingested_at_utc = now()::timestamp "
+            "where forecast_date_local = date '2026-03-04'"
+        )
+        connection.execute("delete from fct_aqi_hourly where forecast_date_local = '2026-03-05'")
+    incremental = export_mart_parquet(settings)
+
+    assert len(first.written_partitions) == 5
+    assert (unchanged.written_partitions, unchanged.unchanged_partitions) == ((), 5)
+    assert incremental.written_partitions == (date(2026, 3, 2), date(2026, 3, 4))
+    assert incremental.deleted_partitions == (date(2026, 3, 5),)
+    assert not (settings.data_dir / build_partition_path(date(2026, 3, 5))).exists()
+
+    partition = pq.read_table(settings.data_dir / build_partition_path(date(2026, 3, 4)))
+    timestamps = partition.column("forecast_timestamp_local").to_pylist()
+    assert timestamps == sorted(timestamps)
+    assert set(partition.column("us_aqi").to_pylist()) == {99}
+
+    export_glob = settings.data_dir / EXPORT_PREFIX / "*" / "*.parquet"
+    with duckdb.connect() as connection:
+        exported = connection.execute(
+            f"""
+            select count(*), count(distinct forecast_date_local)
+            from read_parquet('{export_glob}', hive_partitioning = true)
+            where forecast_date_local >= date '2026-03-02'
+            """
+        ).fetchone()
+    assert exported == (3 * 24, 3)
+
+
+def test_export_fingerprints_only_partitions_touched_since_the_manifest(tmp_path: Path) -> None:
+    settings = build_settings(tmp_path)
+    build_mart(settings.duckdb_path, days=5)
+    with duckdb.connect(str(settings.duckdb_path)) as connection:
+        connection.execute(
+            """
+            create table stg_weather_hourly as
+            select
+                timestamp '2026-03-01 23:00:00' as forecast_timestamp_local,
+                timestamp '2026-03-01 00:00:00' as window_start_local,
+                timestamp '2026-03-01 23:00:00' as window_end_local,
+                timestamp '2026-03-01 00:00:00' as ingested_at_utc
+            """
+        )
+    export_mart_parquet(settings)
+
+    with duckdb.connect(str(settings.duckdb_path)) as connection:
+        # A newer weather file whose window spans 2026-03-02 and 2026-03-03.
+        connection.execute(
+            """
+            insert into stg_weather_hourly values (
+                timestamp '2026-03-03 05:00:00',
+                timestamp '2026-03-02 06:00:00',
+                timestamp '2026-03-03 05:00:00',
+                timestamp '2026-03-02 06:00:00'
+            )
+            """
+        )
+        connection.execute(
+            "update fct_aqi_hourly set temperature_c = 31.0 "
+            "where forecast_date_local = date '2026-03-02'"
+        )
+        # No ingest since the last export covers this date, so it is not hashed again.
+        connection.execute(
+            "update fct_aqi_hourly set temperature_c = 35.0 "
+            "where forecast_date_local = date '2026-03-01'"
+        )
+        connection.execute(
+            "update fct_aqi_hourly set us_aqi = 99, last_ingested_at_utc = now()::timestamp "
+            "where forecast_date_local = date '2026-03-04'"
+        )
+        connection.execute("delete from fct_aqi_hourly where forecast_date_local = '2026-03-05'")
+    incremental = export_mart_parquet(settings)
+    refreshed = export_mart_parquet(settings, full_refresh=True)
+
+    assert incremental.written_partitions == (date(2026, 3, 2), date(2026, 3, 4))
+    assert incremental.deleted_partitions == (date(2026, 3, 5),)
+    assert incremental.unchanged_partitions == 2
+    assert len(refreshed.written_partitions) == 4
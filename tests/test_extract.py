@@ -1,5 +1,10 @@
-from datetime import datetime, timezone
+import json
+import tracemalloc
+from collections.abc import Iterator
+from dataclasses import replace
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
+from unittest.mock import MagicMock
 
 import pytest
 
@@ -7,7 +12,9 @@ from bangkok_aqi.config import Settings
 from bangkok_aqi.extract import (
     AQIPayloadValidationError,
     build_raw_object_path,
+    extract_dataset_to_bronze,
     save_raw_payload,
+    stream_payload_to_bronze,
     validate_hourly_payload,
     validate_weather_payload,
 )
@@ -140,3 +147,139 @@ def test_validate_weather_payload_rejects_invalid_timestamps() -> None:
 def test_validate_weather_payload_rejects_missing_hourly_section() -> None:
     with pytest.raises(AQIPayloadValidationError, match="does not contain an hourly section"):
         validate_weather_payload({})
+
+
+def build_streaming_session(chunks: Iterator[bytes]) -> MagicMock:
+    response = MagicMock(raw=None, scheduler_retries=0)
+    response.__enter__.return_value = response
+    response.iter_content.return_value = chunks
+    session = MagicMock()
+    session.get.return_value = response
+    return session
+
+
+def generate_hourly_payload(rows: int, batch_rows: int = 1000) -> Iterator[bytes]:
+    started_at = datetime(2024, 1, 1)
+    columns = {
+        "time": lambda row: json.dumps(f"{started_at + timedelta(hours=row):%Y-%m-%dT%H:%M}"),
+        "pm2_5": lambda row: "12.5",
+        "pm10": lambda row: "null",
+        "us_aqi": lambda row: "42",
+    }
+    yield b'{"latitude": 13.75, "longitude": 100.5, "hourly": {'
+    for column_index, (column, render) in enumerate(columns.items()):
+        yield f'{"," if column_index else ""}"{column}": ['.encode()
+        for batch_start in range(0, rows, batch_rows):
+            batch = range(batch_start, min(batch_start + batch_rows, rows))
+            prefix = "," if batch_start else ""
+            yield (prefix + ",".join(render(row) for row in batch)).encode()
+        yield b"]"
+    yield b"}}"
+
+
+def test_stream_payload_to_bronze_bounds_memory_by_chunk_size(tmp_path: Path) -> None:
+    storage = StorageClient(build_settings(tmp_path))
+    object_path = "raw/aqi/ingest_date=2024-01-01/bangkok_aqi_raw_20240101T000000Z.json"
+    session = build_streaming_session(generate_hourly_payload(rows=50_000))
+
+    tracemalloc.start()
+    try:
+        streamed = stream_payload_to_bronze(
+            session, "http://standin/v1/air-quality", {}, "aqi", storage, object_path
+        )
+        _, peak_bytes = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    written = (storage.settings.data_dir / object_path).read_bytes()
+    assert streamed.payload_bytes == len(written) > 3 * 2**19
+    assert len(json.loads(written)["hourly"]["us_aqi"]) == 50_000
+    assert peak_bytes < 2**20
+
+
+class RecordingStorage(StorageClient):
+    def __init__(self, settings: Settings):
+        super().__init__(settings)
+        self.calls: list[tuple[str, str]] = []
+
+    def open_write_stream(self, path: str):
+        self.calls.append(("write", path))
+        return super().open_write_stream(path)
+
+    def save_bytes(self, path: str, content: bytes) -> None:
+        self.calls.append(("write", path))
+        super().save_bytes(path, content)
+
+    def read_bytes(self, path: str) -> bytes:
+        self.calls.append(("read", path))
+        return super().read_bytes(path)
+
+
+def test_delta_encoded_extract_commits_each_object_once_in_bounded_memory(
+    tmp_path: Path,
+) -> None:
+    settings = replace(build_settings(tmp_path), bronze_delta_baseline_hours=3)
+    storage = RecordingStorage(settings)
+    ingest_times = [datetime(2024, 1, 1, hour, tzinfo=timezone.utc) for hour in range(2)]
+    body = b"".join(generate_hourly_payload(rows=10_000))
+    tracemalloc.start()
+    try:
+        json.loads(body)
+        _, parse_peak_bytes = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    tracemalloc.start()
+    try:
+        streamed = [
+            extract_dataset_to_bronze(
+                settings,
+                "aqi",
+                build_streaming_session(generate_hourly_payload(rows=10_000)),
+                ingested_at,
+                storage,
+            )
+            for ingested_at in ingest_times
+        ]
+        _, peak_bytes = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    object_paths = [payload.object_path for payload in streamed]
+    assert [call for call in storage.calls if call[1].startswith("raw/")] == [
+        ("write", path) for path in object_paths
+    ]
+    # The head only moves once the object it describes has landed.
+    assert storage.calls[-1] == ("write", "state/bronze_delta/aqi.json")
+    delta = json.loads(storage.read_bytes(object_paths[-1]))
+    assert delta["hourly"]["time"] == [delta["delta"]["window_end"]]
+    # Encoding a delta never holds the parsed payload.
+    assert peak_bytes < parse_peak_bytes
+
+
+@pytest.mark.parametrize(
+    ("chunks", "message"),
+    [
+        (generate_hourly_payload(rows=0), "empty frame"),
+        ([b'{"hourly": {"time": ["2024-01-01T00:00", "not-a-time"], "pm2_5": ['], "timestamps"),
+        ([b'{"hourly": {"time": ["2024-01-01T00:00"], "pm2_5": [1'], "not valid JSON"),
+        ([b'{"hourly": {"time": ["2024-01-01T00:00"], "pm2_5": [1]}}'], "missing required"),
+    ],
+)
+def test_stream_payload_to_bronze_rejects_invalid_payloads_without_landing_them(
+    tmp_path: Path, chunks: Iterator[bytes], message: str
+) -> None:
+    storage = StorageClient(build_settings(tmp_path))
+    object_path = "raw/aqi/ingest_date=2024-01-01/bangkok_aqi_raw_20240101T000000Z.json"
+
+    with pytest.raises(AQIPayloadValidationError, match=message):
+        stream_payload_to_bronze(
+            build_streaming_session(iter(chunks)),
+            "http://standin/v1/air-quality",
+            {},
+            "aqi",
+            storage,
+            object_path,
+        )
+
+    assert storage.list_files("raw/") == []
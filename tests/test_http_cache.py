@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from bangkok_aqi.http_cache import HttpCache, build_cache_entry, compute_expires_at
+
+
+def test_compute_expires_at_honours_cache_control_and_expires() -> None:
+    now = 1_700_000_000.0
+
+    assert compute_expires_at({"Cache-Control": "public, max-age=600"}, now) == now + 600
+    assert compute_expires_at({"Cache-Control": "max-age=600", "Age": "100"}, now) == now + 500
+    assert compute_expires_at({"Cache-Control": "no-cache, max-age=600"}, now) == now
+    assert compute_expires_at({"Expires": "Tue, 14 Nov 2023 22:23:20 GMT"}, now) == now + 600
+    assert compute_expires_at({}, now) == now
+    no_store = {"Cache-Control": "no-store", "ETag": '"a"'}
+    assert build_cache_entry("key", no_store, "p", 1, now) is None
+    assert build_cache_entry("key", {}, "p", 1, now) is None
+
+
+def test_http_cache_evicts_least_recently_used_entries(tmp_path: Path) -> None:
+    ticks = iter(range(100))
+    cache = HttpCache(tmp_path / "http_cache.sqlite", max_entries=2, clock=lambda: next(ticks))
+    for name in ("a", "b"):
+        cache.put(build_cache_entry(name, {"ETag": f'"{name}"'}, f"raw/{name}.json", 10, 0.0))
+
+    assert cache.get("a").etag == '"a"'
+    cache.put(build_cache_entry("c", {"ETag": '"c"'}, "raw/c.json", 10, 0.0))
+
+    assert len(cache) == 2
+    assert cache.get("b") is None
+    assert cache.get("a").conditional_headers() == {"If-None-Match": '"a"'}
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import Mock
+
+import pytest
+from test_extract import build_settings, build_streaming_session, generate_hourly_payload
+
+from bangkok_aqi import instrumentation
+from bangkok_aqi.extract import fetch_aqi_payload, stream_payload_to_bronze
+from bangkok_aqi.storage import StorageClient
+
+
+@pytest.fixture
+def metrics_dir(tmp_path: Path):
+    instrumentation.configure_instrumentation(tmp_path / "metrics")
+    yield tmp_path / "metrics"
+    instrumentation.configure_instrumentation(None)
+
+
+def read_spans(metrics_dir: Path) -> list[dict]:
+    return [
+        json.loads(line)
+        for line in (metrics_dir / instrumentation.SPANS_FILE_NAME).read_text().splitlines()
+    ]
+
+
+def test_span_is_shared_noop_when_disabled() -> None:
+    instrumentation.configure_instrumentation(None)
+
+    with instrumentation.span("fetch", dataset="aqi") as first_span:
+        first_span.set(payload_bytes=10)
+
+    assert first_span is instrumentation.span("parse")
+    assert not instrumentation.instrumentation_enabled()
+
+
+def test_span_exports_json_lines_and_prometheus_textfile(metrics_dir: Path) -> None:
+    with instrumentation.span("storage_write", dataset="aqi") as write_span:
+        write_span.set(payload_bytes=2048, row_count=120)
+
+    [record] = read_spans(metrics_dir)
+    assert record["stage"] == "storage_write"
+    assert record["labels"] == {"dataset": "aqi"}
+    assert record["payload_bytes"] == 2048
+    assert record["success"] is True
+
+    textfile = (metrics_dir / "bangkok_aqi_aqi_storage_write.prom").read_text()
+    assert (
+        'bangkok_aqi_stage_payload_bytes{dataset="aqi",stage="storage_write"} 2048'
+        in textfile
+    )
+    assert 'bangkok_aqi_stage_success{dataset="aqi",stage="storage_write"} 1' in textfile
+    assert "bangkok_aqi_stage_retry_count" not in textfile
+
+
+def test_span_records_failures_and_reraises(metrics_dir: Path) -> None:
+    with pytest.raises(RuntimeError):
+        with instrumentation.span("validate", dataset="weather"):
+            raise RuntimeError("bad payload")
+
+    [record] = read_spans(metrics_dir)
+    assert record["success"] is False
+    assert record["error"] == "RuntimeError: bad payload"
+
+
+def test_fetch_records_bytes_and_retries(metrics_dir: Path, tmp_path: Path) -> None:
+    content = b'{"hourly": {"time": []}}'
+    response = Mock(
+        content=content,
+        raw=SimpleNamespace(retries=SimpleNamespace(history=[1, 2])),
+        scheduler_retries=1,
+    )
+    response.json.return_value = {"hourly": {"time": []}}
+    session = Mock()
+    session.get.return_value = response
+
+    raw_payload = fetch_aqi_payload(build_settings(tmp_path), session=session)
+
+    assert raw_payload.content == content
+    fetch_record, parse_record = read_spans(metrics_dir)
+    assert (fetch_record["stage"], fetch_record["payload_bytes"]) == ("fetch", len(content))
+    assert fetch_record["retry_count"] == 3
+    assert parse_record["stage"] == "parse"
+
+
+def test_streamed_extract_times_validation_and_writes_separately(
+    metrics_dir: Path, tmp_path: Path
+) -> None:
+    storage = StorageClient(build_settings(tmp_path))
+    object_path = "raw/aqi/ingest_date=2024-01-01/bangkok_aqi_raw_20240101T000000Z.json"
+    session = build_streaming_session(generate_hourly_payload(rows=5_000))
+
+    streamed = stream_payload_to_bronze(
+        session, "http://standin/v1/air-quality", {}, "aqi", storage, object_path
+    )
+
+    records = {record["stage"]: record for record in read_spans(metrics_dir)}
+    assert set(records) == {"fetch_stream", "validate", "storage_write"}
+    assert records["validate"]["row_count"] == 5_000
+    assert records["storage_write"]["payload_bytes"] == streamed.payload_bytes
+    assert records["storage_write"]["labels"] == {"dataset": "aqi", "backend": "local-filesystem"}
+    assert 0 < records["validate"]["duration_seconds"] < records["fetch_stream"]["duration_seconds"]
+    assert (
+        0
+        < records["storage_write"]["duration_seconds"]
+        < records["fetch_stream"]["duration_seconds"]
+    )
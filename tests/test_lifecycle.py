@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+from dataclasses import replace
+from datetime import datetime, timezone
+from pathlib import Path
+
+import duckdb
+import pandas as pd
+from test_transform import build_transform_settings, read_forecast_skill, read_mart
+
+from bangkok_aqi.lifecycle import (
+    LIFECYCLE_DATASETS,
+    RetentionPolicy,
+    apply_lifecycle,
+    format_lifecycle_report,
+    plan_lifecycle,
+)
+from bangkok_aqi.storage import StorageClient
+from bangkok_aqi.synthetic import SyntheticConfig, write_synthetic_corpus
+from bangkok_aqi.transform import transform_warehouse
+
+LATER = datetime(2024, 3, 1, tzinfo=timezone.utc)
+
+
+def test_lifecycle_retires_only_files_the_mart_no_longer_reads(tmp_path: Path) -> None:
+    settings = build_transform_settings(tmp_path)
+    corpus = write_synthetic_corpus(settings, SyntheticConfig(ingest_hours=48, revision_rate=0.5))
+    with duckdb.connect(str(settings.duckdb_path)) as connection:
+        transform_warehouse(connection, settings)
+    storage = StorageClient(settings)
+
+    in_progress = plan_lifecycle(settings, now=datetime(2024, 1, 2, 12, tzinfo=timezone.utc))
+    dry_run = plan_lifecycle(settings, now=LATER)
+    assert len(in_progress.actions) < len(dry_run.actions)
+    assert storage.list_files("raw/") == sorted(corpus.object_paths)
+    assert "Total reclaimed from hot bronze" in format_lifecycle_report(dry_run, dry_run=True)
+
+    # The skill mart keeps its scored revisions, so superseded AQI files are retired too.
+    assert {action.dataset for action in dry_run.actions} == {"aqi", "weather"}
+    skill = read_forecast_skill(settings.duckdb_path)
+
+    apply_lifecycle(dry_run, storage)
+    remaining = storage.list_files("raw/")
+    assert len(remaining) == corpus.file_count - len(dry_run.actions)
+    assert len(storage.list_files("archive/raw/")) == len(dry_run.actions)
+    assert dry_run.reclaimed_bytes == sum(action.size_bytes for action in dry_run.actions) > 0
+
+    rebuilt_settings = replace(settings, warehouse_dir=tmp_path / "rebuilt")
+    rebuilt_settings.warehouse_dir.mkdir()
+    with duckdb.connect(str(rebuilt_settings.duckdb_path)) as connection:
+        transform_warehouse(connection, rebuilt_settings)
+    assert read_mart(rebuilt_settings.duckdb_path).equals(read_mart(settings.duckdb_path))
+    # A full refresh restages what is left of bronze but keeps every revision already scored.
+    with duckdb.connect(str(settings.duckdb_path)) as connection:
+        transform_warehouse(connection, settings, full_refresh=True)
+    pd.testing.assert_frame_equal(read_forecast_skill(settings.duckdb_path), skill)
+
+
+def test_lifecycle_keeps_scored_aqi_files_when_asked(tmp_path: Path) -> None:
+    settings = build_transform_settings(tmp_path)
+    write_synthetic_corpus(settings, SyntheticConfig(ingest_hours=48, revision_rate=0.5))
+    with duckdb.connect(str(settings.duckdb_path)) as connection:
+        transform_warehouse(connection, settings)
+    keeping = {
+        dataset: RetentionPolicy(dataset, keep_forecast_skill=True)
+        for dataset in LIFECYCLE_DATASETS
+    }
+
+    plan = plan_lifecycle(settings, keeping, now=LATER)
+
+    assert {action.dataset for action in plan.actions} == {"weather"}
+
+
+def test_lifecycle_delete_policy_removes_files_and_empty_partitions(tmp_path: Path) -> None:
+    settings = build_transform_settings(tmp_path)
+    write_synthetic_corpus(settings, SyntheticConfig(ingest_hours=48, revision_rate=0.5))
+    with duckdb.connect(str(settings.duckdb_path)) as connection:
+        transform_warehouse(connection, settings)
+    policies = {
+        dataset: RetentionPolicy(dataset, action="delete")
+        for dataset in LIFECYCLE_DATASETS
+    }
+    storage = StorageClient(settings)
+
+    plan = plan_lifecycle(settings, policies, now=LATER)
+    apply_lifecycle(plan, storage)
+
+    assert {action.action for action in plan.actions} == {"delete"}
+    assert storage.list_files("archive/") == []
+    assert all(
+        any(partition.iterdir())
+        for partition in (settings.data_dir / "raw" / "aqi").glob("ingest_date=*")
+    )
+
+
+def test_azure_archive_copies_server_side_and_deletes_the_source(tmp_path: Path) -> None:
+    calls: list[tuple] = []
+
+    class FakeBlobClient:
+        def __init__(self, name: str):
+            self.name = name
+            self.url = f"https://account.blob.core.windows.net/aqi-data/{name}"
+
+        def start_copy_from_url(self, url: str, standard_blob_tier: str | None = None) -> dict:
+            calls.append(("copy", url, self.name, standard_blob_tier))
+            return {"copy_status": "success"}
+
+        def delete_blob(self) -> None:
+            calls.append(("delete", self.name))
+
+        def download_blob(self):
+            raise AssertionError("archiving must not download the blob")
+
+    class FakeContainerClient:
+        def get_blob_client(self, name: str) -> FakeBlobClient:
+            return FakeBlobClient(name)
+
+    storage = StorageClient(
+        replace(build_transform_settings(tmp_path), azure_storage_connection_string="fake")
+    )
+    storage._container_client = FakeContainerClient()
+    storage.move_file("raw/aqi/a.json", "archive/raw/aqi/a.json", tier="Cool")
+
+    assert calls == [
+        (
+            "copy",
+            "https://account.blob.core.windows.net/aqi-data/raw/aqi/a.json",
+            "archive/raw/aqi/a.json",
+            "Cool",
+        ),
+        ("delete", "raw/aqi/a.json"),
+    ]
@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import logging
+import pstats
+import sys
+from dataclasses import replace
+from pathlib import Path
+
+from test_extract import build_settings
+
+from bangkok_aqi.profiling import profile_command, should_profile
+
+
+def busy_work() -> int:
+    return sum(index * index for index in range(10_000))
+
+
+def test_profile_command_writes_cprofile_stats_and_logs_summary(
+    tmp_path: Path,
+    caplog,
+) -> None:
+    settings = build_settings(tmp_path)
+
+    with caplog.at_level(logging.INFO, logger="bangkok_aqi.profiling"):
+        with profile_command("extract", force=True, settings=settings) as output_path:
+            busy_work()
+
+    assert output_path is not None
+    assert output_path.parent == settings.data_dir / "profiles"
+    assert output_path.name.startswith("extract_")
+    stats = pstats.Stats(str(output_path))
+    assert any(function[2] == "busy_work" for function in stats.stats)
+    assert "busy_work" in caplog.text
+
+
+def test_profile_command_is_disabled_without_flag_or_sample_rate(tmp_path: Path) -> None:
+    settings = build_settings(tmp_path)
+
+    with profile_command("extract", settings=settings) as output_path:
+        busy_work()
+
+    assert output_path is None
+    assert not (settings.data_dir / "profiles").exists()
+    assert should_profile(1.0)
+    assert not should_profile(0.0)
+
+
+def test_profile_command_falls_back_to_cprofile_without_pyinstrument(
+    tmp_path: Path,
+    monkeypatch,
+) -> None:
+    monkeypatch.setitem(sys.modules, "pyinstrument", None)
+    settings = replace(build_settings(tmp_path), profiler="pyinstrument", profile_sample_rate=1.0)
+
+    with profile_command("transform", settings=settings) as output_path:
+        busy_work()
+
+    assert output_path is not None
+    assert output_path.suffix == ".prof"
@@ -0,0 +1,196 @@
+from __future__ import annotations
+
+import time
+from pathlib import Path
+
+import pytest
+import requests
+
+from bangkok_aqi.extract import build_session
+from bangkok_aqi.scheduler import (
+    AdaptiveConcurrencyLimiter,
+    CircuitOpenError,
+    RequestScheduler,
+    SchedulerConfig,
+    TokenBucket,
+    parse_retry_after,
+)
+from bangkok_aqi.standin import StandinConfig, start_standin_server
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1_000.0
+        self.sleeps: list[float] = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def test_token_bucket_is_shared_across_instances_through_sqlite(tmp_path: Path) -> None:
+    clock = FakeClock()
+    state_path = tmp_path / "rate_limit.sqlite"
+    first = TokenBucket(2, capacity=2, state_path=state_path, clock=clock, sleep=clock.sleep)
+    second = TokenBucket(2, capacity=2, state_path=state_path, clock=clock, sleep=clock.sleep)
+
+    assert first.acquire() == 0
+    assert second.acquire() == 0
+    assert first.acquire() == 0.5
+
+    second.pause(3)
+    assert first.acquire() == 3.5
+    assert clock.sleeps == [0.5, 3, 0.5]
+
+
+def test_adaptive_concurrency_grows_on_fast_responses_and_halves_on_errors() -> None:
+    limiter = AdaptiveConcurrencyLimiter(min_limit=1, max_limit=8, target_latency_seconds=1)
+    for _ in range(20):
+        limiter.record_success(0.1)
+    assert limiter.limit == 6
+
+    limiter.record_failure()
+    assert limiter.limit == 3
+    for _ in range(5):
+        limiter.record_success(2.0)
+    assert limiter.limit == 1
+    for _ in range(5):
+        limiter.record_failure()
+    assert limiter.limit == 1
+
+
+def test_scheduler_honours_retry_after_from_standin() -> None:
+    clock = FakeClock()
+    scheduler = RequestScheduler(
+        SchedulerConfig(rate_per_second=0, max_attempts=10),
+        clock=clock,
+        sleep=clock.sleep,
+    )
+    config = StandinConfig(throttle_rate=0.5, retry_after_seconds=7, seed=3)
+    with start_standin_server(config) as server:
+        session = build_session(scheduler=scheduler)
+        responses = [session.get(server.air_quality_url, timeout=5) for _ in range(10)]
+
+    throttled = server.stats.statuses[429]
+    assert throttled > 0
+    assert all(response.status_code == 200 for response in responses)
+    assert sum(response.scheduler_retries for response in responses) == throttled
+    assert clock.sleeps == [7] * throttled
+
+
+def test_parse_retry_after_accepts_seconds_and_http_dates() -> None:
+    assert parse_retry_after("12") == 12
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0
+    assert parse_retry_after("soon") is None
+    assert parse_retry_after(None) is None
+
+
+def test_hedged_requests_cut_tail_latency_against_standin() -> None:
+    scheduler = RequestScheduler(
+        SchedulerConfig(
+            rate_per_second=0,
+            hedge_requests=True,
+            hedge_min_samples=5,
+            hedge_default_delay_seconds=0.2,
+        )
+    )
+    config = StandinConfig(slow_every=5, slow_latency_seconds=2.0)
+    with start_standin_server(config) as server:
+        session = build_session(scheduler=scheduler)
+        latencies = []
+        for _ in range(20):
+            started = time.perf_counter()
+            assert session.get(server.air_quality_url, timeout=5).status_code == 200
+            latencies.append(time.perf_counter() - started)
+
+    assert scheduler.hedges_won > 0
+    assert scheduler.hedges_sent >= scheduler.hedges_won
+    assert max(latencies) < 1.0
+
+
+def test_circuit_breaker_fails_fast_and_probes_after_reset() -> None:
+    clock = FakeClock()
+    scheduler = RequestScheduler(
+        SchedulerConfig(
+            rate_per_second=0,
+            max_attempts=1,
+            breaker_failure_threshold=3,
+            breaker_reset_seconds=30,
+        ),
+        clock=clock,
+        sleep=clock.sleep,
+    )
+    with start_standin_server(StandinConfig(error_rate=1.0)) as server:
+        session = build_session(scheduler=scheduler)
+        statuses = [session.get(server.air_quality_url, timeout=5).status_code for _ in range(3)]
+        with pytest.raises(CircuitOpenError):
+            session.get(server.air_quality_url, timeout=5)
+        # Other endpoints keep their own breaker.
+        assert session.get(server.weather_forecast_url, timeout=5).status_code == 503
+
+        clock.now += 30
+        assert session.get(server.air_quality_url, timeout=5).status_code == 503
+        with pytest.raises(CircuitOpenError):
+            session.get(server.air_quality_url, timeout=5)
+
+    assert statuses == [503, 503, 503]
+    assert server.stats.statuses == {503: 5}
+
+
+def test_circuit_breaker_releases_a_trial_that_raises_any_error() -> None:
+    clock = FakeClock()
+    scheduler = RequestScheduler(
+        SchedulerConfig(rate_per_second=0, breaker_failure_threshold=1, breaker_reset_seconds=30),
+        clock=clock,
+        sleep=clock.sleep,
+    )
+
+    def fail(error: Exception):
+        def send() -> requests.Response:
+            raise error
+
+        return send
+
+    def succeed() -> requests.Response:
+        response = requests.Response()
+        response.status_code = 200
+        return response
+
+    with pytest.raises(requests.ConnectionError):
+        scheduler.send(fail(requests.ConnectionError()), "upstream")
+    # Half-open trials that fail outside the connection layer still reopen the breaker.
+    for error in (requests.exceptions.ChunkedEncodingError(), ValueError("bad payload")):
+        clock.now += 30
+        with pytest.raises(type(error)):
+            scheduler.send(fail(error), "upstream")
+        assert scheduler.breaker("upstream").state == "open"
+    clock.now += 30
+
+    assert scheduler.send(succeed, "upstream")[0].status_code == 200
+    assert scheduler.breaker("upstream").state == "closed"
+
+
+def test_hedged_requests_stay_within_the_concurrency_limit() -> None:
+    scheduler = RequestScheduler(
+        SchedulerConfig(
+            rate_per_second=0,
+            max_concurrency=1,
+            hedge_requests=True,
+            hedge_default_delay_seconds=0.01,
+        )
+    )
+    calls = []
+
+    def slow_send() -> requests.Response:
+        calls.append(scheduler.concurrency.in_flight)
+        time.sleep(0.1)
+        response = requests.Response()
+        response.status_code = 200
+        return response
+
+    assert scheduler.send(slow_send, "upstream", hedge=True)[0].status_code == 200
+    assert calls == [1]
+    assert scheduler.hedges_sent == 0
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import duckdb
+
+from bangkok_aqi.config import get_repo_root
+from bangkok_aqi.extract import REQUIRED_HOURLY_COLUMNS, REQUIRED_WEATHER_COLUMNS
+from bangkok_aqi.schemas import (
+    BRONZE_SCHEMAS,
+    DBT_COLUMNS_MACRO_PATH,
+    render_dbt_columns_macro,
+)
+
+
+def test_dbt_columns_macro_is_in_sync_with_registry() -> None:
+    checked_in = (get_repo_root() / DBT_COLUMNS_MACRO_PATH).read_text(encoding="utf-8")
+
+    assert checked_in == render_dbt_columns_macro(), (
+        "Run `bangkok-aqi sync-dbt-schemas` after changing bangkok_aqi.schemas."
+    )
+
+
+def test_registry_drives_extract_required_columns() -> None:
+    assert REQUIRED_HOURLY_COLUMNS == ("time", "pm2_5", "pm10", "us_aqi")
+    assert REQUIRED_WEATHER_COLUMNS == BRONZE_SCHEMAS["weather"].hourly_columns
+    assert BRONZE_SCHEMAS["aqi"].request_hourly_param == "pm2_5,pm10,us_aqi"
+
+
+def test_explicit_columns_keep_all_null_metrics_typed(tmp_path: Path) -> None:
+    raw_path = tmp_path / "bangkok_aqi_raw_20260324T000000Z.json"
+    raw_path.write_text(
+        json.dumps(
+            {
+                "latitude": 13.75,
+                "longitude": 100.5,
+                "elevation": 4.0,
+                "hourly": {
+                    "time": ["2026-03-24T00:00"],
+                    "pm2_5": [None],
+                    "pm10": [None],
+                    "us_aqi": [42],
+                },
+            }
+        )
+    )
+
+    with duckdb.connect() as connection:
+        columns = connection.execute(
+            f"""
+            describe select *
+            from read_json(?, columns = {BRONZE_SCHEMAS["aqi"].duckdb_columns_sql()})
+            """,
+            [str(raw_path)],
+        ).fetchall()
+
+    assert [(column[0], column[1]) for column in columns] == [
+        ("latitude", "DOUBLE"),
+        ("longitude", "DOUBLE"),
+        (
+            "hourly",
+            'STRUCT("time" VARCHAR[], pm2_5 DOUBLE[], pm10 DOUBLE[], us_aqi INTEGER[])',
+        ),
+        ("delta", "STRUCT(window_start VARCHAR, window_end VARCHAR)"),
+    ]
@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import subprocess
+import sys
+from pathlib import Path
+
+import duckdb
+import requests
+from test_extract import build_settings
+from test_snapshot import build_mart
+
+from bangkok_aqi.serve import start_mart_api_server
+
+
+def test_serve_answers_from_cache_and_honours_conditional_requests(tmp_path: Path) -> None:
+    settings = build_settings(tmp_path)
+    build_mart(settings.duckdb_path, days=10)
+
+    with start_mart_api_server(settings) as server, requests.Session() as session:
+        daily_url = f"{server.base_url}/v1/daily?start=2026-03-01&end=2026-03-03"
+        first = session.get(daily_url, timeout=5)
+        repeated = session.get(daily_url, timeout=5)
+        not_modified = session.get(
+            daily_url, headers={"If-None-Match": first.headers["ETag"]}, timeout=5
+        )
+        since = session.get(
+            daily_url, headers={"If-Modified-Since": first.headers["Last-Modified"]}, timeout=5
+        )
+        hourly = session.get(
+            f"{server.base_url}/v1/hourly?end=2026-03-02&start=2026-03-02", timeout=5
+        ).json()
+        latest = session.get(f"{server.base_url}/v1/latest?hours=6", timeout=5).json()
+        bad_range = session.get(f"{server.base_url}/v1/hourly?start=2026-03-02", timeout=5)
+        health = session.get(f"{server.base_url}/healthz", timeout=5).json()
+
+        with duckdb.connect(str(settings.duckdb_path)) as connection:
+            connection.execute(
+                "update fct_aqi_hourly set last_ingested_at_utc = timestamp '2026-03-02 00:00:00'"
+            )
+        refreshed = session.get(
+            daily_url, headers={"If-None-Match": first.headers["ETag"]}, timeout=5
+        )
+
+    assert first.status_code == 200
+    assert [row["forecast_date_local"] for row in first.json()["rows"]] == [
+        "2026-03-01",
+        "2026-03-02",
+        "2026-03-03",
+    ]
+    assert first.json()["rows"][0]["max_aqi"] == 73
+    assert first.headers["Last-Modified"] == "Sun, 01 Mar 2026 00:00:00 GMT"
+    assert repeated.content == first.content
+    assert (not_modified.status_code, not_modified.content) == (304, b"")
+    assert since.status_code == 304
+    assert len(hourly["rows"]) == 24
+    assert [row["forecast_timestamp_local"] for row in latest["rows"]] == ["2026-03-10T23:00:00"]
+    assert bad_range.status_code == 400
+    assert (health["cache_hits"], health["cache_misses"]) == (3, 4)
+
+    assert refreshed.status_code == 200
+    assert refreshed.headers["ETag"] != first.headers["ETag"]
+    assert refreshed.json()["last_ingested_at_utc"] == "2026-03-02T00:00:00+00:00"
+
+
+# Takes the write lock from another process, changes the mart, and holds the lock until
+# stdin closes, as a dbt build or native transform would.
+CONCURRENT_WRITER = """
+import sys
+
+import duckdb
+
+connection = duckdb.connect(sys.argv[1])
+connection.execute(
+    "update fct_aqi_hourly set last_ingested_at_utc = timestamp '2026-03-05 00:00:00'"
+)
+connection.execute("checkpoint")
+print("locked", flush=True)
+sys.stdin.read()
+connection.close()
+"""
+
+
+def test_serve_yields_to_a_concurrent_writer_and_serves_its_cached_version(
+    tmp_path: Path,
+) -> None:
+    settings = build_settings(tmp_path)
+    build_mart(settings.duckdb_path, days=10)
+
+    with start_mart_api_server(settings) as server, requests.Session() as session:
+        daily_url = f"{server.base_url}/v1/daily?start=2026-03-01&end=2026-03-03"
+        first = session.get(daily_url, timeout=5)
+
+        # No connection outlives its request, so the writer gets the lock straight away.
+        writer = subprocess.Popen(
+            [sys.executable, "-c", CONCURRENT_WRITER, str(settings.duckdb_path)],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            text=True,
+        )
+        try:
+            assert writer.stdout.readline().strip() == "locked"
+            during = session.get(daily_url, timeout=5)
+            revalidated = session.get(
+                daily_url, headers={"If-None-Match": first.headers["ETag"]}, timeout=5
+            )
+            uncached = session.get(
+                f"{server.base_url}/v1/hourly?start=2026-03-02&end=2026-03-02", timeout=5
+            )
+        finally:
+            writer.communicate(timeout=30)
+        after = session.get(daily_url, timeout=5)
+
+    assert writer.returncode == 0
+    assert (during.status_code, during.headers["ETag"]) == (200, first.headers["ETag"])
+    assert during.content == first.content
+    assert revalidated.status_code == 304
+    assert uncached.status_code == 503
+    assert after.headers["ETag"] != first.headers["ETag"]
+    assert after.json()["last_ingested_at_utc"] == "2026-03-05T00:00:00+00:00"
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+from datetime import date
+from pathlib import Path
+
+import duckdb
+import pandas as pd
+from test_extract import build_settings
+
+from bangkok_aqi.dashboard import (
+    build_daily_summary,
+    build_status_rows,
+    load_forecast_skill_curve,
+    load_hourly_aqi,
+)
+from bangkok_aqi.snapshot import (
+    SNAPSHOT_HEADER_NAME,
+    load_dashboard_snapshot,
+    publish_dashboard_snapshot,
+)
+
+
+def build_mart(duckdb_path: Path, days: int) -> None:
+    duckdb_path.parent.mkdir(parents=True, exist_ok=True)
+    with duckdb.connect(str(duckdb_path)) as connection:
+        connection.execute(
+            f"""
+            create table fct_aqi_hourly as
+            select
+                timestamp '2026-03-01 00:00:00' + to_hours(hour_offset) as forecast_timestamp_local,
+                cast(timestamp '2026-03-01 00:00:00' + to_hours(hour_offset) as date)
+                    as forecast_date_local,
+                20.0 + hour_offset % 24 as pm25,
+                40.0 as pm10,
+                cast(50 + hour_offset % 24 as integer) as us_aqi,
+                30.0 as temperature_c,
+                60.0 as relative_humidity,
+                10.0 as wind_speed_kph,
+                timestamp '2026-03-01 00:00:00' as last_ingested_at_utc,
+                'open-meteo' as source_system,
+                13.75 as latitude,
+                100.5 as longitude
+            from range({days * 24}) as hours(hour_offset)
+            """
+        )
+
+
+def test_publish_dashboard_snapshot_materializes_default_window(tmp_path: Path) -> None:
+    settings = build_settings(tmp_path)
+    build_mart(settings.duckdb_path, days=10)
+
+    publish_dashboard_snapshot(settings, window_days=3)
+    snapshot = load_dashboard_snapshot(settings.snapshot_dir)
+
+    assert snapshot is not None
+    assert (snapshot.mart_start_date, snapshot.mart_end_date) == (
+        date(2026, 3, 1),
+        date(2026, 3, 10),
+    )
+    assert snapshot.mart_row_count == 240
+    assert (snapshot.window_start_date, snapshot.window_end_date) == (
+        date(2026, 3, 8),
+        date(2026, 3, 10),
+    )
+    assert len(snapshot.hourly) == 72
+    assert snapshot.hourly["us_aqi"].dtype == "Int16"
+
+    window = load_hourly_aqi(settings.duckdb_path, start_date=date(2026, 3, 8))
+    assert snapshot.status_rows == build_status_rows(window)
+    assert snapshot.hero["forecast_time"] == "2026-03-08 00:00"
+    assert snapshot.hero["peak_aqi"] == 73.0
+    assert snapshot.map_frame.to_dict(orient="records") == [
+        {"latitude": 13.75, "longitude": 100.5, "us_aqi": 50.0}
+    ]
+    pd.testing.assert_frame_equal(
+        snapshot.daily_summary[["avg_aqi", "max_aqi", "avg_pm25"]],
+        build_daily_summary(window)[["avg_aqi", "max_aqi", "avg_pm25"]],
+        check_dtype=False,
+    )
+
+
+def test_republishing_snapshot_replaces_previous_frame(tmp_path: Path) -> None:
+    settings = build_settings(tmp_path)
+    build_mart(settings.duckdb_path, days=2)
+
+    publish_dashboard_snapshot(settings)
+    publish_dashboard_snapshot(settings)
+
+    assert sorted(path.name for path in settings.snapshot_dir.iterdir())[0] == SNAPSHOT_HEADER_NAME
+    assert len(list(settings.snapshot_dir.glob("*.parquet"))) == 1
+    assert load_dashboard_snapshot(tmp_path / "missing") is None
+
+
+def test_snapshot_carries_the_forecast_skill_curve(tmp_path: Path) -> None:
+    settings = build_settings(tmp_path)
+    build_mart(settings.duckdb_path, days=2)
+    assert publish_dashboard_snapshot(settings).skill_curve.empty
+
+    with duckdb.connect(str(settings.duckdb_path)) as connection:
+        connection.execute(
+            """
+            create table fct_aqi_forecast_skill as
+            select
+                true as is_realised,
+                [
+                    {'lead_hours': 1, 'pm25_error': -1.5, 'us_aqi_error': 2},
+                    {'lead_hours': 3, 'pm25_error': 4.0, 'us_aqi_error': -6}
+                ] as revisions
+            """
+        )
+    publish_dashboard_snapshot(settings)
+    snapshot = load_dashboard_snapshot(settings.snapshot_dir)
+
+    assert snapshot is not None
+    assert snapshot.skill_curve.to_dict(orient="records") == load_forecast_skill_curve(
+        settings.duckdb_path
+    ).to_dict(orient="records")
+    assert snapshot.skill_curve["lead_hours"].tolist() == [1, 3]
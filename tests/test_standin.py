@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import time
+from dataclasses import replace
+from datetime import datetime
+from pathlib import Path
+
+import requests
+from test_extract import build_settings
+
+from bangkok_aqi.extract import build_session, extract_aqi_to_bronze, extract_weather_to_bronze
+from bangkok_aqi.standin import StandinConfig, start_standin_server
+from bangkok_aqi.storage import StorageClient
+
+
+def test_extract_runs_end_to_end_against_standin(tmp_path: Path) -> None:
+    with start_standin_server() as server:
+        settings = replace(
+            build_settings(tmp_path),
+            air_quality_url=server.air_quality_url,
+            weather_forecast_url=server.weather_forecast_url,
+        )
+        session = build_session(settings)
+        aqi_path = extract_aqi_to_bronze(settings, session)
+        weather_path = extract_weather_to_bronze(settings, session)
+
+    assert (settings.data_dir / aqi_path).stat().st_size > 1000
+    assert (settings.data_dir / weather_path).stat().st_size > 1000
+    assert server.stats.statuses == {200: 2}
+
+
+def test_extract_sends_conditional_requests_and_skips_unchanged_payloads(tmp_path: Path) -> None:
+    with start_standin_server() as server:
+        settings = replace(
+            build_settings(tmp_path),
+            air_quality_url=server.air_quality_url,
+            http_cache_path=tmp_path / "http_cache.sqlite",
+        )
+        session = build_session(settings)
+        first = extract_aqi_to_bronze(settings, session, ingested_at=datetime(2024, 1, 1, 0, 5))
+        second = extract_aqi_to_bronze(settings, session, ingested_at=datetime(2024, 1, 1, 0, 10))
+
+    assert second == first
+    assert StorageClient(settings).list_files("raw/aqi/") == [first]
+    assert server.stats.statuses == {200: 1, 304: 1}
+
+
+def test_extract_skips_requests_while_cached_payload_is_fresh(tmp_path: Path) -> None:
+    with start_standin_server(StandinConfig(cache_max_age_seconds=600)) as server:
+        settings = replace(
+            build_settings(tmp_path),
+            weather_forecast_url=server.weather_forecast_url,
+            http_cache_path=tmp_path / "http_cache.sqlite",
+        )
+        session = build_session(settings)
+        first = extract_weather_to_bronze(settings, session, ingested_at=datetime(2024, 1, 1, 0))
+        second = extract_weather_to_bronze(settings, session, ingested_at=datetime(2024, 1, 1, 1))
+
+    assert second == first
+    assert server.stats.statuses == {200: 1}
+
+
+def test_standin_injects_throttling_and_server_errors() -> None:
+    with start_standin_server(StandinConfig(throttle_rate=0.3, error_rate=0.2, seed=7)) as server:
+        with requests.Session() as session:
+            responses = [session.get(server.air_quality_url, timeout=5) for _ in range(200)]
+
+    statuses = [response.status_code for response in responses]
+    assert 40 <= statuses.count(429) <= 80
+    assert 20 <= statuses.count(503) <= 60
+    assert statuses.count(200) == 200 - statuses.count(429) - statuses.count(503)
+    throttled = next(response for response in responses if response.status_code == 429)
+    assert throttled.headers["Retry-After"] == "1"
+
+
+def test_standin_drips_body_slowly() -> None:
+    config = StandinConfig(drip_chunk_bytes=1024, drip_delay_seconds=0.01)
+    with start_standin_server(config) as server:
+        started = time.perf_counter()
+        response = requests.get(server.weather_forecast_url, timeout=5)
+        elapsed = time.perf_counter() - started
+
+    chunks = -(-len(response.content) // 1024)
+    assert response.json()["hourly"]["time"]
+    assert elapsed >= (chunks - 1) * 0.01
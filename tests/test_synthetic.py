@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import json
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+from test_extract import build_settings
+
+from bangkok_aqi.extract import validate_hourly_payload, validate_weather_payload
+from bangkok_aqi.storage import StorageClient
+from bangkok_aqi.synthetic import (
+    MAX_SYNTHETIC_LOCATIONS,
+    SyntheticConfig,
+    build_synthetic_payload,
+    write_synthetic_corpus,
+)
+
+
+def test_build_synthetic_payload_starts_window_at_local_midnight() -> None:
+    payload = build_synthetic_payload(
+        SyntheticConfig(),
+        "aqi",
+        datetime(2026, 3, 24, 20, 30, tzinfo=timezone.utc),
+    )
+
+    assert payload["timezone"] == "Asia/Bangkok"
+    assert payload["hourly"]["time"][0] == "2026-03-25T00:00"
+    assert len(payload["hourly"]["time"]) == 120
+
+
+def test_build_synthetic_payload_revises_only_a_fraction_of_hours() -> None:
+    ingested_at = datetime(2026, 3, 24, 3, tzinfo=timezone.utc)
+
+    def changed_fraction(revision_rate: float) -> float:
+        config = SyntheticConfig(revision_rate=revision_rate)
+        first = build_synthetic_payload(config, "aqi", ingested_at)["hourly"]["pm2_5"]
+        second = build_synthetic_payload(config, "aqi", ingested_at + timedelta(hours=1))[
+            "hourly"
+        ]["pm2_5"]
+        return sum(a != b for a, b in zip(first, second, strict=True)) / len(first)
+
+    assert changed_fraction(0.0) == 0.0
+    assert 0.1 < changed_fraction(0.3) < 0.5
+    assert changed_fraction(1.0) > 0.9
+
+
+def test_build_synthetic_payload_follows_dry_season_pm25_peak() -> None:
+    config = SyntheticConfig()
+
+    def mean_pm25(ingested_at: datetime) -> float:
+        values = build_synthetic_payload(config, "aqi", ingested_at)["hourly"]["pm2_5"]
+        return sum(values) / len(values)
+
+    assert mean_pm25(datetime(2026, 1, 20, tzinfo=timezone.utc)) > 2 * mean_pm25(
+        datetime(2026, 7, 20, tzinfo=timezone.utc)
+    )
+
+
+def test_write_synthetic_corpus_lands_valid_payloads(tmp_path: Path) -> None:
+    settings = build_settings(tmp_path)
+    storage = StorageClient(settings)
+
+    corpus = write_synthetic_corpus(
+        settings,
+        SyntheticConfig(ingest_hours=3, locations=2, null_ratio=0.1),
+    )
+
+    assert corpus.file_count == 12
+    assert list(corpus.object_paths) == storage.list_files("raw/")
+    assert corpus.total_bytes == sum(
+        len(storage.read_bytes(path)) for path in corpus.object_paths
+    )
+    for object_path in corpus.object_paths:
+        payload = json.loads(storage.read_bytes(object_path))
+        if object_path.startswith("raw/aqi/"):
+            validate_hourly_payload(payload)
+        else:
+            validate_weather_payload(payload)
+
+
+def test_write_synthetic_corpus_is_reproducible_across_worker_counts(tmp_path: Path) -> None:
+    config = SyntheticConfig(ingest_hours=200, seed=7, null_ratio=0.05)
+    serial_settings = build_settings(tmp_path / "serial")
+    parallel_settings = build_settings(tmp_path / "parallel")
+
+    serial = write_synthetic_corpus(serial_settings, config)
+    parallel = write_synthetic_corpus(parallel_settings, config, workers=2)
+
+    assert serial.object_paths == parallel.object_paths
+    for object_path in serial.object_paths[::25]:
+        assert (serial_settings.data_dir / object_path).read_bytes() == (
+            parallel_settings.data_dir / object_path
+        ).read_bytes()
+
+
+def test_synthetic_config_rejects_locations_whose_object_paths_would_collide() -> None:
+    SyntheticConfig(locations=MAX_SYNTHETIC_LOCATIONS)
+
+    with pytest.raises(ValueError, match="at most 3600 locations"):
+        SyntheticConfig(locations=MAX_SYNTHETIC_LOCATIONS + 1)
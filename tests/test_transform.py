@@ -0,0 +1,319 @@
+from __future__ import annotations
+
+import os
+import shutil
+import subprocess
+from dataclasses import replace
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+import duckdb
+import pandas as pd
+import pytest
+from test_extract import build_settings
+
+from bangkok_aqi.config import Settings, get_repo_root
+from bangkok_aqi.synthetic import SyntheticConfig, write_synthetic_corpus
+from bangkok_aqi.transform import (
+    NATIVE_SQL_PATH,
+    list_bronze_files,
+    render_native_sql,
+    transform_warehouse,
+)
+
+MART_ORDER = "order by forecast_timestamp_local"
+
+
+def build_transform_settings(tmp_path: Path) -> Settings:
+    settings = build_settings(tmp_path)
+    settings.warehouse_dir.mkdir(parents=True, exist_ok=True)
+    return settings
+
+
+def read_mart(duckdb_path: Path) -> pd.DataFrame:
+    with duckdb.connect(str(duckdb_path), read_only=True) as connection:
+        return connection.execute(f"select * from fct_aqi_hourly {MART_ORDER}").fetchdf()
+
+
+def read_silver(duckdb_path: Path, table: str) -> pd.DataFrame:
+    with duckdb.connect(str(duckdb_path), read_only=True) as connection:
+        return connection.execute(f"select * from {table} order by all").fetchdf()
+
+
+def read_forecast_skill(duckdb_path: Path) -> pd.DataFrame:
+    with duckdb.connect(str(duckdb_path), read_only=True) as connection:
+        return connection.execute(
+            f"""
+            select * exclude (revisions), to_json(revisions) as revisions
+            from fct_aqi_forecast_skill
+            {MART_ORDER}
+            """
+        ).fetchdf()
+
+
+def test_incremental_transform_matches_full_refresh(tmp_path: Path) -> None:
+    settings = build_transform_settings(tmp_path)
+    first_batch = SyntheticConfig(ingest_hours=30, revision_rate=0.5)
+    write_synthetic_corpus(settings, first_batch)
+
+    with duckdb.connect(str(settings.duckdb_path)) as connection:
+        initial = transform_warehouse(connection, settings)
+        write_synthetic_corpus(
+            settings,
+            replace(first_batch, start=first_batch.start + timedelta(hours=30), ingest_hours=5),
+        )
+        incremental = transform_warehouse(connection, settings)
+        unchanged = transform_warehouse(connection, settings)
+
+    assert initial.full_refresh
+    assert not incremental.full_refresh
+    assert incremental.new_files == {"aqi": 5, "weather": 5}
+    assert unchanged.new_files == {"aqi": 0, "weather": 0}
+
+    rebuilt_settings = replace(settings, warehouse_dir=tmp_path / "rebuilt")
+    rebuilt_settings.warehouse_dir.mkdir()
+    with duckdb.connect(str(rebuilt_settings.duckdb_path)) as connection:
+        transform_warehouse(connection, rebuilt_settings)
+
+    pd.testing.assert_frame_equal(
+        read_mart(settings.duckdb_path),
+        read_mart(rebuilt_settings.duckdb_path),
+    )
+    pd.testing.assert_frame_equal(
+        read_forecast_skill(settings.duckdb_path),
+        read_forecast_skill(rebuilt_settings.duckdb_path),
+    )
+
+
+def test_delta_encoded_bronze_builds_the_same_marts_as_full_payloads(tmp_path: Path) -> None:
+    config = SyntheticConfig(ingest_hours=30, revision_rate=0.5, null_ratio=0.02, locations=2)
+    warehouses = {}
+    bronze_bytes = {}
+    for name, delta_baseline_hours in (("full", 0), ("delta", 6)):
+        settings = build_transform_settings(tmp_path / name)
+        corpus_config = replace(config, delta_baseline_hours=delta_baseline_hours)
+        corpus = write_synthetic_corpus(settings, corpus_config)
+        with duckdb.connect(str(settings.duckdb_path)) as connection:
+            transform_warehouse(connection, settings)
+            later = write_synthetic_corpus(
+                settings,
+                replace(corpus_config, start=config.start + timedelta(hours=30), ingest_hours=5),
+            )
+            transform_warehouse(connection, settings)
+        warehouses[name] = settings.duckdb_path
+        bronze_bytes[name] = corpus.total_bytes + later.total_bytes
+
+    assert bronze_bytes["delta"] < bronze_bytes["full"]
+    pd.testing.assert_frame_equal(read_mart(warehouses["full"]), read_mart(warehouses["delta"]))
+    pd.testing.assert_frame_equal(
+        read_forecast_skill(warehouses["full"]),
+        read_forecast_skill(warehouses["delta"]),
+    )
+
+
+def test_native_sql_is_in_sync_with_dbt_models() -> None:
+    pytest.importorskip("jinja2")
+    checked_in = (get_repo_root() / NATIVE_SQL_PATH).read_text(encoding="utf-8")
+
+    assert checked_in == render_native_sql(), (
+        "Run `bangkok-aqi sync-native-sql` after changing a dbt model or macro."
+    )
+
+
+def test_native_transform_rejects_azure_bronze(tmp_path: Path) -> None:
+    settings = replace(build_transform_settings(tmp_path), azure_storage_connection_string="fake")
+
+    with duckdb.connect(str(settings.duckdb_path)) as connection:
+        with pytest.raises(ValueError, match="reads bronze from local storage"):
+            transform_warehouse(connection, settings)
+
+
+def test_full_refresh_materializes_one_silver_table_per_dataset(tmp_path: Path) -> None:
+    settings = build_transform_settings(tmp_path)
+    write_synthetic_corpus(settings, SyntheticConfig(ingest_hours=3))
+
+    with duckdb.connect(str(settings.duckdb_path)) as connection:
+        connection.execute("create table base_aqi_hourly_exploded as select 1 as legacy")
+        transform_warehouse(connection, settings)
+        tables = {
+            row[0]
+            for row in connection.execute(
+                "select table_name from duckdb_tables() where schema_name = 'main'"
+            ).fetchall()
+        }
+
+    assert tables == {
+        "stg_aqi_hourly",
+        "stg_weather_hourly",
+        "fct_aqi_hourly",
+        "fct_aqi_forecast_skill",
+    }
+
+
+def test_forecast_skill_scores_revisions_against_realised_values(tmp_path: Path) -> None:
+    settings = build_transform_settings(tmp_path)
+    write_synthetic_corpus(settings, SyntheticConfig(ingest_hours=30, revision_rate=0.5))
+
+    with duckdb.connect(str(settings.duckdb_path)) as connection:
+        transform_warehouse(connection, settings)
+        mismatched_hours, realised, open_with_errors, latest_errors = connection.execute(
+            """
+            select
+                count(*) filter (
+                    where skill.revision_count <> (
+                        select count(*)
+                        from stg_aqi_hourly as stg
+                        where stg.forecast_timestamp_local = skill.forecast_timestamp_local
+                    )
+                ),
+                count(*) filter (where is_realised),
+                count(*) filter (
+                    where not is_realised
+                      and list_count(list_transform(revisions, r -> r.pm25_error)) > 0
+                ),
+                list_distinct(flatten(list(
+                    [revisions[-1].pm25_error, revisions[-1].us_aqi_error]
+                ) filter (where is_realised and actual_pm25 is not null)))
+            from fct_aqi_forecast_skill as skill
+            """
+        ).fetchone()
+
+    assert mismatched_hours == 0
+    assert realised > 0
+    assert open_with_errors == 0
+    assert latest_errors == [0]
+
+
+def test_transform_rolls_back_when_bronze_is_unreadable(tmp_path: Path) -> None:
+    settings = build_transform_settings(tmp_path)
+    write_synthetic_corpus(settings, SyntheticConfig(ingest_hours=2))
+
+    with duckdb.connect(str(settings.duckdb_path)) as connection:
+        transform_warehouse(connection, settings)
+        broken_path = settings.data_dir / "raw/aqi/ingest_date=2024-01-01/bangkok_aqi_raw_x.json"
+        broken_path.write_text("{not json")
+
+        with pytest.raises(duckdb.Error):
+            transform_warehouse(connection, settings)
+
+        stg_files = connection.execute(
+            "select count(distinct raw_file_name) from stg_aqi_hourly"
+        ).fetchone()[0]
+
+    assert stg_files == 2
+
+
+def test_transform_prunes_partitions_before_min_ingest_date(tmp_path: Path) -> None:
+    settings = build_transform_settings(tmp_path)
+    first_batch = SyntheticConfig(ingest_hours=48)
+    write_synthetic_corpus(settings, first_batch)
+
+    with duckdb.connect(str(settings.duckdb_path)) as connection:
+        # A first build is a full refresh, which reads every partition regardless.
+        transform_warehouse(connection, settings, min_ingest_date=date(2024, 1, 2))
+        write_synthetic_corpus(
+            settings, replace(first_batch, start=datetime(2024, 1, 3), ingest_hours=24)
+        )
+        result = transform_warehouse(connection, settings, min_ingest_date=date(2024, 1, 3))
+        staged = connection.execute(
+            """
+            select min(ingest_date), min(ingested_at_utc), typeof(any_value(ingested_at_utc))
+            from stg_aqi_hourly
+            """
+        ).fetchone()
+        with pytest.raises(ValueError, match="only prunes incremental runs"):
+            transform_warehouse(
+                connection, settings, full_refresh=True, min_ingest_date=date(2024, 1, 3)
+            )
+
+    recent_files = list_bronze_files(settings, "aqi", min_ingest_date=date(2024, 1, 3))
+    assert len(recent_files) == 24
+    assert all("ingest_date=2024-01-03" in file_path for file_path in recent_files)
+    assert (result.full_refresh, result.new_files) == (False, {"aqi": 24, "weather": 24})
+    # History from before the cutoff survives the pruned run.
+    assert staged == (date(2024, 1, 1), datetime(2024, 1, 1, 0, 0), "TIMESTAMP")
+
+    rebuilt_settings = replace(settings, warehouse_dir=tmp_path / "rebuilt")
+    rebuilt_settings.warehouse_dir.mkdir()
+    with duckdb.connect(str(rebuilt_settings.duckdb_path)) as connection:
+        transform_warehouse(connection, rebuilt_settings)
+    pd.testing.assert_frame_equal(
+        read_mart(settings.duckdb_path), read_mart(rebuilt_settings.duckdb_path)
+    )
+
+
+@pytest.mark.skipif(shutil.which("dbt") is None, reason="dbt is not installed")
+@pytest.mark.parametrize(
+    ("min_ingest_date", "delta_baseline_hours"),
+    [(None, 0), (date(2024, 1, 2), 0), (None, 6)],
+)
+def test_native_transform_matches_dbt_build(
+    tmp_path: Path,
+    min_ingest_date: date | None,
+    delta_baseline_hours: int,
+) -> None:
+    settings = build_transform_settings(tmp_path)
+    first_batch = SyntheticConfig(
+        ingest_hours=30,
+        null_ratio=0.02,
+        delta_baseline_hours=delta_baseline_hours,
+    )
+    write_synthetic_corpus(settings, first_batch)
+    dbt_duckdb_path = tmp_path / "dbt.duckdb"
+    project_dir = get_repo_root() / "dbt"
+
+    def run_dbt() -> None:
+        subprocess.run(
+            [
+                "dbt",
+                "run",
+                "--project-dir",
+                str(project_dir),
+                "--profiles-dir",
+                str(project_dir),
+                "--target-path",
+                str(tmp_path / "dbt_target"),
+                "--log-path",
+                str(tmp_path / "dbt_logs"),
+            ],
+            env={
+                **os.environ,
+                "DBT_DUCKDB_PATH": str(dbt_duckdb_path),
+                "DBT_RAW_AQI_GLOB": str(settings.data_dir / "raw/aqi/**/*.json"),
+                "DBT_RAW_WEATHER_GLOB": str(settings.data_dir / "raw/weather/**/*.json"),
+                "DBT_MIN_INGEST_DATE": min_ingest_date.isoformat() if min_ingest_date else "",
+            },
+            check=True,
+            capture_output=True,
+        )
+
+    def run_both() -> None:
+        run_dbt()
+        with duckdb.connect(str(settings.duckdb_path)) as connection:
+            transform_warehouse(connection, settings, min_ingest_date=min_ingest_date)
+
+    # Later runs maintain silver and fct_aqi_forecast_skill incrementally, pruned to
+    # min_ingest_date, so history from the first run must survive.
+    run_both()
+    write_synthetic_corpus(
+        settings, replace(first_batch, start=datetime(2024, 1, 2, 6), ingest_hours=5)
+    )
+    run_both()
+    # Backfilled files are stamped before the newest ingest but still have to be scored.
+    write_synthetic_corpus(
+        settings,
+        replace(first_batch, start=datetime(2024, 1, 2, 0, 30), ingest_hours=2, seed=7),
+    )
+    run_both()
+
+    # Every dbt model is compared, including the incremental paths only native runs take.
+    for table in ("stg_aqi_hourly", "stg_weather_hourly"):
+        native = read_silver(settings.duckdb_path, table)
+        pd.testing.assert_frame_equal(native, read_silver(dbt_duckdb_path, table))
+        # Delta coverage only feeds the marts when delta-encoded files were staged.
+        assert native["is_delta"].any() == bool(delta_baseline_hours)
+    pd.testing.assert_frame_equal(read_mart(settings.duckdb_path), read_mart(dbt_duckdb_path))
+    pd.testing.assert_frame_equal(
+        read_forecast_skill(settings.duckdb_path),
+        read_forecast_skill(dbt_duckdb_path),
+    )
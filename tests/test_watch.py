@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+from dataclasses import replace
+from pathlib import Path
+
+import duckdb
+import pandas as pd
+import pytest
+import requests
+from test_extract import build_settings
+from test_transform import read_mart
+
+from bangkok_aqi.config import Settings
+from bangkok_aqi.snapshot import load_dashboard_snapshot
+from bangkok_aqi.standin import StandinServer, start_standin_server
+from bangkok_aqi.storage import StorageClient
+from bangkok_aqi.transform import transform_warehouse
+from bangkok_aqi.watch import WatchDaemon, WatchHealthServer
+
+
+def build_watch_settings(tmp_path: Path, server: StandinServer) -> Settings:
+    settings = replace(
+        build_settings(tmp_path),
+        air_quality_url=server.air_quality_url,
+        weather_forecast_url=server.weather_forecast_url,
+        watch_interval_seconds=1.0,
+    )
+    settings.warehouse_dir.mkdir(parents=True, exist_ok=True)
+    return settings
+
+
+def test_watch_applies_changed_payloads_and_drops_unchanged_ones(tmp_path: Path) -> None:
+    with start_standin_server() as server:
+        settings = build_watch_settings(tmp_path, server)
+        health = WatchDaemon(settings).run(max_polls=3)
+        # Landing every payload makes each later poll a micro-batch of the files it landed.
+        eager = WatchDaemon(settings, unchanged_landing_seconds=0).run(max_polls=2)
+
+    storage = StorageClient(settings)
+    assert server.stats.statuses == {200: 10}
+    assert (health.polls, health.batches, health.consecutive_failures) == (3, 1, 0)
+    assert eager.batches == 2
+    assert len(storage.list_files("raw/aqi/")) == 3
+    assert len(storage.list_files("raw/weather/")) == 3
+    assert load_dashboard_snapshot(settings.snapshot_dir) is not None
+
+    rebuilt_settings = replace(settings, warehouse_dir=tmp_path / "rebuilt")
+    rebuilt_settings.warehouse_dir.mkdir()
+    with duckdb.connect(str(rebuilt_settings.duckdb_path)) as connection:
+        transform_warehouse(connection, rebuilt_settings)
+    pd.testing.assert_frame_equal(
+        read_mart(settings.duckdb_path),
+        read_mart(rebuilt_settings.duckdb_path),
+    )
+
+
+def test_watch_micro_batches_read_delta_encoded_bronze(tmp_path: Path) -> None:
+    with start_standin_server() as server:
+        settings = replace(build_watch_settings(tmp_path, server), bronze_delta_baseline_hours=3)
+        health = WatchDaemon(settings, unchanged_landing_seconds=0).run(max_polls=3)
+
+    storage = StorageClient(settings)
+    aqi_paths = storage.list_files("raw/aqi/")
+    assert health.batches == 3
+    assert [b'"delta"' in storage.read_bytes(path) for path in aqi_paths] == [False, True, True]
+
+    # Each batch staged the object as re-encoded after landing, not the body as fetched.
+    rebuilt_settings = replace(settings, warehouse_dir=tmp_path / "rebuilt")
+    rebuilt_settings.warehouse_dir.mkdir()
+    with duckdb.connect(str(rebuilt_settings.duckdb_path)) as connection:
+        transform_warehouse(connection, rebuilt_settings)
+    for table in ("stg_aqi_hourly", "stg_weather_hourly", "fct_aqi_hourly"):
+        query = f"select * from {table} order by all"
+        with duckdb.connect(str(settings.duckdb_path), read_only=True) as connection:
+            watched = connection.execute(query).fetchdf()
+        with duckdb.connect(str(rebuilt_settings.duckdb_path), read_only=True) as connection:
+            rebuilt = connection.execute(query).fetchdf()
+        pd.testing.assert_frame_equal(watched, rebuilt)
+        if table == "stg_aqi_hourly":
+            assert watched["is_delta"].any()
+
+
+def test_watch_reports_failing_polls_through_healthz(tmp_path: Path) -> None:
+    with start_standin_server() as server:
+        settings = build_watch_settings(tmp_path, server)
+        daemon = WatchDaemon(replace(settings, air_quality_url=f"{server.base_url}/v1/missing"))
+        with WatchHealthServer(("127.0.0.1", 0), daemon) as health_server:
+            starting = requests.get(f"{health_server.base_url}/healthz", timeout=5)
+            daemon.run(max_polls=1)
+            daemon.health.started_at -= 10
+            failing = requests.get(f"{health_server.base_url}/healthz", timeout=5)
+
+    assert starting.status_code == 200
+    assert starting.json()["status"] == "starting"
+    assert failing.status_code == 503
+    assert failing.json()["consecutive_failures"] == 1
+    assert failing.json()["last_error"].startswith("HTTPError")
+    assert not settings.duckdb_path.exists()
+
+
+def test_watch_rejects_sub_second_intervals(tmp_path: Path) -> None:
+    with pytest.raises(ValueError, match="at least one second"):
+        WatchDaemon(build_settings(tmp_path), interval_seconds=0.5)